@@ -0,0 +1,208 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from comum.eventos import ADAPTACAO
+
+# ================================
+# PONTOS DE OPERAÇÃO
+# ================================
+# (SCALE_FACTOR, det_size do detector de rostos, imgsz do YOLO, FPS máximo da inferência ou None),
+# do mais barato ao de maior qualidade. O nível 3 é a configuração fixa usada antes.
+NIVEIS_PADRAO = (
+    (0.30, 160, 320, 2.0),
+    (0.35, 192, 416, 4.0),
+    (0.40, 256, 480, None),
+    (0.50, 320, 640, None),
+    (0.65, 416, 640, None),
+    (0.80, 512, 640, None),
+)
+PARAMETROS = ("escala", "det_size", "yolo_imgsz")
+
+# Como o custo de cada estágio muda com o ponto de operação (parâmetro e expoente).
+# O reconhecimento depende do número de rostos, não da resolução.
+SENSIBILIDADE_ESTAGIOS = {
+    "preprocessamento": ("escala", 2),
+    "pessoas": ("yolo_imgsz", 2),
+    "deteccao_rostos": ("det_size", 2),
+}
+
+def _formatar_ponto(ponto):
+    escala, det_size, yolo_imgsz, fps_max = ponto
+    return (f"escala {escala:.2f}, det {det_size}, yolo {yolo_imgsz}, " +
+            (f"máx. {fps_max:g} FPS" if fps_max else "FPS livre"))
+
+# ================================
+# CONTROLADOR ADAPTATIVO
+# ================================
+class ControladorAdaptativo:
+    """
+    Mantém a latência de inferência (duração de processar_lote) dentro de 'orcamento_ms'
+    trocando o ponto de operação do ProcessadorCV: SCALE_FACTOR, det_size, imgsz do YOLO
+    e FPS máximo.
+
+    - Desce (mais barato) assim que o quantil 'quantil' das últimas inferências passa do
+      orçamento, direto para o nível mais alto que os tempos por estágio preveem caber.
+    - Sobe um nível só depois de 'permanencia_s' no nível atual, com a janela cheia e se a
+      previsão para o nível de cima fica abaixo de 'margem_subida' x orçamento.
+    - Histerese: se uma subida é desfeita logo em seguida, a permanência exigida dobra
+      (até 8x); volta ao valor base depois de um período estável.
+
+    Toda troca é impressa, registrada em 'logger' e, com 'eventos', vira um evento
+    "adaptacao" no histórico, para cruzar com a qualidade do reconhecimento.
+    observar() roda na thread de inferência e estatisticas() no laço principal e no
+    coletor de métricas: as duas passam pelo mesmo lock.
+    """
+    def __init__(self, pcv, orcamento_ms, niveis=NIVEIS_PADRAO, nivel_inicial=None, janela=20, quantil=0.9,
+                 min_amostras_descida=5, margem_subida=0.75, permanencia_s=10.0, logger=None, eventos=None):
+        self.pcv = pcv
+        self.orcamento_ms = orcamento_ms
+        self.niveis = tuple(niveis)
+        self.janela = janela
+        self.quantil = quantil
+        self.min_amostras_descida = min_amostras_descida
+        self.margem_subida = margem_subida
+        self.permanencia_s = permanencia_s
+        self.logger = logger
+        self.eventos = eventos
+
+        self.permanencia_atual = permanencia_s
+        self.totais = deque(maxlen=janela)
+        self.estagios = deque(maxlen=janela)
+        self.mudancas = deque(maxlen=50)
+        self.subidas = 0
+        self.descidas = 0
+        self.pulados = 0
+        self._ultima_inferencia = {}
+        self._ultima_mudanca = time.monotonic()
+        self._ultima_subida = None
+        self._lock = threading.Lock()
+
+        if nivel_inicial is None:
+            atual = (pcv.SCALE_FACTOR, pcv.DET_SIZE, pcv.YOLO_IMGSZ)
+            nivel_inicial = next((i for i, ponto in enumerate(self.niveis) if ponto[:3] == atual), len(self.niveis) // 2)
+        self.nivel = nivel_inicial
+        self._aplicar(nivel_inicial)
+
+    @property
+    def ponto(self):
+        return self.niveis[self.nivel]
+
+    def _quantil(self):
+        # "lower": com poucas amostras, um único frame lento (ex.: aquecimento do modelo) não dispara a descida
+        return float(np.quantile(self.totais, self.quantil, method="lower"))
+
+    # ---------- FPS máximo (interface do AgendadorInferencia) ----------
+    def deve_processar(self, frame=None, agora=None, stream_id=None):
+        """Limita a taxa de inferência por câmera quando o ponto atual tem FPS máximo."""
+        fps_max = self.ponto[3]
+        agora = time.monotonic() if agora is None else agora
+        ultima = self._ultima_inferencia.get(stream_id)
+        if fps_max and ultima is not None and agora - ultima < 1.0 / fps_max:
+            self.pulados += 1
+            return False
+        self._ultima_inferencia[stream_id] = agora
+        return True
+
+    # ---------- observação (thread de inferência) ----------
+    def prever(self, nivel):
+        """Latência (ms, no quantil) prevista para 'nivel' a partir dos tempos por estágio atuais."""
+        if not self.totais:
+            return 0.0
+        atual = dict(zip(PARAMETROS, self.ponto))
+        alvo = dict(zip(PARAMETROS, self.niveis[nivel]))
+        previsto = self._quantil()
+        for estagio, (parametro, expoente) in SENSIBILIDADE_ESTAGIOS.items():
+            mediana = float(np.median([tempos.get(estagio, 0.0) for tempos in self.estagios]))
+            previsto += mediana * ((alvo[parametro] / atual[parametro]) ** expoente - 1)
+        return previsto
+
+    def observar(self, tempos, total_ms, agora=None):
+        """Chamado pelo ProcessadorCV ao fim de cada processar_lote (mesma thread da inferência)."""
+        agora = time.monotonic() if agora is None else agora
+        with self._lock:
+            self._observar(tempos, total_ms, agora)
+
+    def _observar(self, tempos, total_ms, agora):
+        self.totais.append(total_ms)
+        self.estagios.append(tempos)
+        medido = self._quantil()
+
+        if medido > self.orcamento_ms and len(self.totais) >= self.min_amostras_descida and self.nivel > 0:
+            alvo = self.nivel - 1
+            while alvo > 0 and self.prever(alvo) > self.orcamento_ms:
+                alvo -= 1
+            if self._ultima_subida is not None and agora - self._ultima_subida < 2 * self.permanencia_atual:
+                # A última subida não se sustentou: espera mais antes de tentar de novo
+                self.permanencia_atual = min(self.permanencia_atual * 2, self.permanencia_s * 8)
+            self._mudar(alvo, medido, agora)
+            return
+
+        if (self.nivel < len(self.niveis) - 1 and len(self.totais) == self.janela
+                and agora - self._ultima_mudanca >= self.permanencia_atual):
+            previsto = self.prever(self.nivel + 1)
+            if previsto <= self.orcamento_ms * self.margem_subida:
+                if agora - self._ultima_mudanca >= 4 * self.permanencia_atual:
+                    self.permanencia_atual = self.permanencia_s
+                self._ultima_subida = agora
+                self._mudar(self.nivel + 1, medido, agora, previsto)
+
+    # ---------- troca de ponto ----------
+    def _aplicar(self, nivel):
+        escala, det_size, yolo_imgsz, _ = self.niveis[nivel]
+        self.pcv.ajustar_resolucao(escala, det_size, yolo_imgsz)
+
+    def _mudar(self, nivel, medido, agora, previsto=None):
+        anterior = self.nivel
+        self.nivel = nivel
+        self._aplicar(nivel)
+        if nivel > anterior:
+            self.subidas += 1
+        else:
+            self.descidas += 1
+        # Tempos do ponto anterior não valem para o novo
+        self.totais.clear()
+        self.estagios.clear()
+        self._ultima_mudanca = agora
+
+        motivo = (f"p{self.quantil * 100:.0f} {medido:.0f} ms " + (">" if nivel < anterior else "<") +
+                  f" orçamento {self.orcamento_ms:.0f} ms" + (f", previsto {previsto:.0f} ms" if previsto is not None else ""))
+        mensagem = (f"ADAPTACAO: nível {anterior} -> {nivel} ({_formatar_ponto(self.niveis[nivel])}) | {motivo}")
+        self.mudancas.append((time.time(), anterior, nivel, medido))
+        print(f"[INFO] {mensagem}")
+        if self.logger is not None:
+            self.logger.info(mensagem)
+        if self.eventos is not None:
+            escala, det_size, yolo_imgsz, fps_max = self.niveis[nivel]
+            self.eventos.registrar(ADAPTACAO, detalhes={
+                "nivel_anterior": anterior, "nivel": nivel, "escala": escala, "det_size": det_size,
+                "yolo_imgsz": yolo_imgsz, "fps_max": fps_max, "latencia_ms": round(medido, 1), "orcamento_ms": self.orcamento_ms,
+            })
+
+    def estatisticas(self):
+        with self._lock:
+            return self._estatisticas()
+
+    def _estatisticas(self):
+        escala, det_size, yolo_imgsz, fps_max = self.ponto
+        return {
+            "nivel": self.nivel,
+            "escala": escala,
+            "det_size": det_size,
+            "yolo_imgsz": yolo_imgsz,
+            "fps_max": fps_max or 0.0,
+            "orcamento_ms": self.orcamento_ms,
+            "latencia_ms": self._quantil() if self.totais else 0.0,
+            "subidas_total": self.subidas,
+            "descidas_total": self.descidas,
+            "pulados_total": self.pulados,
+            "permanencia_s": self.permanencia_atual,
+        }
+
+def formatar_adaptacao(stats):
+    fps = f"máx. {stats['fps_max']:g} FPS" if stats["fps_max"] else "FPS livre"
+    return (f"Adaptação: nível {stats['nivel']} (escala {stats['escala']:.2f}, det {stats['det_size']}, yolo {stats['yolo_imgsz']}, {fps}) | "
+            f"latência {stats['latencia_ms']:.0f} ms / orçamento {stats['orcamento_ms']:.0f} ms | "
+            f"{stats['subidas_total']} subidas, {stats['descidas_total']} descidas")
@@ -0,0 +1,183 @@
+import logging
+import queue
+import threading
+import time
+from logging.handlers import QueueListener
+
+import cv2
+
+# ================================
+# LOGS EM LOTE (FORA DA THREAD DE DETECÇÃO)
+# ================================
+class FileHandlerEmLote(logging.FileHandler):
+    """
+    FileHandler que não faz flush a cada registro.
+    O flush fica a cargo do ListenerEmLote, uma vez por lote.
+    """
+    def emit(self, record):
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+class ListenerEmLote(QueueListener):
+    """
+    QueueListener que grava os registros assim que chegam, mas só faz
+    flush no disco quando a fila esvazia, agrupando rajadas de logs.
+    """
+    def dequeue(self, block):
+        if block and self.queue.empty():
+            for handler in self.handlers:
+                handler.flush()
+        return self.queue.get(block)
+
+# ================================
+# GRAVADOR ASSÍNCRONO DE ALERTAS
+# ================================
+class GravadorAlertas(threading.Thread):
+    """
+    Recebe recortes de rostos de não-alunos numa fila limitada e faz a
+    codificação JPEG + escrita em disco numa thread separada.
+
+    Política de descarte quando a fila está cheia:
+      - "descartar_novo":   o alerta que está chegando é descartado.
+      - "descartar_antigo": o alerta mais antigo da fila é descartado.
+    """
+    POLITICAS = ("descartar_novo", "descartar_antigo")
+    INTERVALO_AVISO_DESCARTE = 10.0
+
+    def __init__(self, logger_alertas, tamanho_fila=32, politica="descartar_novo"):
+        super().__init__(daemon=True, name="GravadorAlertas")
+        if politica not in self.POLITICAS:
+            raise ValueError(f"Política de descarte inválida: {politica}")
+        self.logger_alertas = logger_alertas
+        self.politica = politica
+        self.fila = queue.Queue(maxsize=tamanho_fila)
+
+        self.enviados = 0
+        self.gravados = 0
+        self.descartados = 0
+        self.falhas = 0
+        self._ultimo_aviso = 0.0
+        self._lock = threading.Lock()
+
+    def enviar(self, save_path, cropped_face, logar=True):
+        """
+        Enfileira um alerta sem bloquear. Retorna False se algum alerta foi descartado.
+        'logar=False' grava o recorte sem o log de ALERTA (ex.: recorte melhor
+        substituindo o de um desconhecido já alertado).
+        """
+        with self._lock:
+            self.enviados += 1
+        try:
+            self.fila.put_nowait((save_path, cropped_face, logar))
+            return True
+        except queue.Full:
+            pass
+
+        if self.politica == "descartar_antigo":
+            try:
+                self.fila.get_nowait()
+                self.fila.task_done()
+            except queue.Empty:
+                pass
+            try:
+                self.fila.put_nowait((save_path, cropped_face, logar))
+            except queue.Full:
+                pass
+        self._registrar_descarte()
+        return False
+
+    def _registrar_descarte(self):
+        with self._lock:
+            self.descartados += 1
+            agora = time.monotonic()
+            avisar = agora - self._ultimo_aviso > self.INTERVALO_AVISO_DESCARTE
+            if avisar:
+                self._ultimo_aviso = agora
+            total = self.descartados
+        if avisar:
+            self.logger_alertas.warning(f"Fila de alertas cheia: {total} alertas descartados até agora.")
+
+    def run(self):
+        while True:
+            item = self.fila.get()
+            try:
+                if item is None:
+                    break
+                save_path, cropped_face, logar = item
+                if cv2.imwrite(save_path, cropped_face):
+                    self.gravados += 1
+                    if logar:
+                        self.logger_alertas.warning(f"ALERTA: Pessoa não cadastrada. Imagem salva: {save_path}")
+                else:
+                    self.falhas += 1
+                    if logar:
+                        self.logger_alertas.warning(f"ALERTA: Pessoa não cadastrada. Falha ao salvar imagem: {save_path}")
+                    else:
+                        self.logger_alertas.warning(f"Falha ao substituir o recorte: {save_path}")
+            except Exception as e:
+                self.falhas += 1
+                self.logger_alertas.error(f"Erro ao gravar alerta: {e}")
+            finally:
+                self.fila.task_done()
+
+    def parar(self, timeout=5.0):
+        """Grava o que ainda estiver na fila e encerra a thread (espera no máximo 'timeout')."""
+        prazo = time.monotonic() + timeout
+        try:
+            self.fila.put(None, timeout=timeout)
+        except queue.Full:
+            # Disco travado com a fila cheia: o alerta mais antigo dá lugar ao sinal de parada
+            try:
+                self.fila.get_nowait()
+                self.fila.task_done()
+                self._registrar_descarte()
+            except queue.Empty:
+                pass
+            try:
+                self.fila.put_nowait(None)
+            except queue.Full:
+                pass
+        self.join(timeout=max(0.0, prazo - time.monotonic()))
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "enviados": self.enviados,
+                "gravados": self.gravados,
+                "descartados": self.descartados,
+                "falhas": self.falhas,
+                "na_fila": self.fila.qsize(),
+            }
+
+# ================================
+# ALERTAS DE OUTRO PROCESSO
+# ================================
+class EncaminhadorAlertas:
+    """
+    Substitui o GravadorAlertas num processo de trabalho: em vez de gravar, envia
+    ("alerta", caminho, recorte, logar) pelo canal (multiprocessing.Queue) ao processo que
+    grava os alertas. O recorte é só o rosto, então o envio é barato.
+    """
+    def __init__(self, canal):
+        self.canal = canal
+        self.enviados = 0
+        self.falhas = 0
+
+    def enviar(self, save_path, cropped_face, logar=True):
+        self.enviados += 1
+        try:
+            self.canal.put_nowait(("alerta", save_path, cropped_face, logar))
+            return True
+        except Exception:
+            self.falhas += 1
+            return False
+
+    def parar(self, timeout=5.0):
+        pass
+
+    def estatisticas(self):
+        return {"enviados": self.enviados, "gravados": 0, "descartados": 0, "falhas": self.falhas, "na_fila": 0}
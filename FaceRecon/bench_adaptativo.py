@@ -0,0 +1,116 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from adaptativo import ControladorAdaptativo, NIVEIS_PADRAO
+
+# ================================
+# PROCESSADOR SIMULADO (CUSTOS DE UM RASPBERRY PI 4)
+# ================================
+class ProcessadorSimulado:
+    """
+    Só o que o ControladorAdaptativo usa do ProcessadorCV: SCALE_FACTOR, DET_SIZE,
+    YOLO_IMGSZ e ajustar_resolucao. Os tempos por estágio seguem um modelo calibrado no Pi 4
+    (ms com escala 0.5 e det_size 320), multiplicados pela lentidão térmica.
+    """
+    def __init__(self, custos, semente=0):
+        self.custos = custos
+        self.SCALE_FACTOR = 0.5
+        self.DET_SIZE = 320
+        self.YOLO_IMGSZ = 640
+        self.rng = np.random.default_rng(semente)
+
+    def ajustar_resolucao(self, escala, det_size, yolo_imgsz):
+        self.SCALE_FACTOR = escala
+        self.DET_SIZE = det_size
+        self.YOLO_IMGSZ = yolo_imgsz
+
+    def tempos(self, rostos, lentidao):
+        c = self.custos
+        ruido = lambda: self.rng.lognormal(0.0, 0.08)
+        tempos = {
+            "preprocessamento": c["preprocessamento"] * (self.SCALE_FACTOR / 0.5) ** 2 * ruido(),
+            "pessoas": c["pessoas"] * (self.YOLO_IMGSZ / 640) ** 2 * ruido(),
+            "deteccao_rostos": c["deteccao_rostos"] * (self.DET_SIZE / 320) ** 2 * ruido(),
+            # O rastreamento reaproveita a identidade: ~1/3 dos rostos recebe embedding por frame
+            "reconhecimento": c["embedding"] * self.rng.binomial(rostos, 1 / 3) * ruido(),
+            "alertas": 1.0,
+        }
+        tempos = {estagio: ms * lentidao for estagio, ms in tempos.items()}
+        if self.rng.uniform() < 0.01:
+            tempos["pessoas"] *= 3  # pico ocasional (GC, I/O do cartão SD)
+        return tempos
+
+# Fases: (nome, duração em s, rostos na cena, lentidão térmica)
+FASES = (
+    ("normal, 2 rostos", 120, 2, 1.0),
+    ("CPU estrangulada (80 °C)", 120, 2, 1.8),
+    ("estrangulada + sala cheia", 120, 12, 1.8),
+    ("sala vazia, CPU fria", 180, 0, 1.0),
+)
+
+# ================================
+# SIMULAÇÃO
+# ================================
+def simular(orcamento_ms, adaptativo, custos, semente=0):
+    pcv = ProcessadorSimulado(custos, semente)
+    controlador = None
+    if adaptativo:
+        controlador = ControladorAdaptativo(pcv, orcamento_ms)
+    agora = 0.0
+    relatorio = []
+    for nome, duracao, rostos, lentidao in FASES:
+        fim = agora + duracao
+        latencias, escalas, dets = [], [], []
+        while agora < fim:
+            if controlador is not None and not controlador.deve_processar(agora=agora):
+                agora += 1 / 30  # espera o próximo frame da câmera
+                continue
+            tempos = pcv.tempos(rostos, lentidao)
+            total = sum(tempos.values())
+            latencias.append(total)
+            escalas.append(pcv.SCALE_FACTOR)
+            dets.append(pcv.DET_SIZE)
+            agora += total / 1000
+            if controlador is not None:
+                controlador.observar(tempos, total, agora)
+        latencias = np.array(latencias)
+        relatorio.append({
+            "fase": nome,
+            "fps": len(latencias) / duracao,
+            "p50_ms": np.percentile(latencias, 50),
+            "p90_ms": np.percentile(latencias, 90),
+            "acima_orcamento": np.mean(latencias > orcamento_ms),
+            "escala_media": np.mean(escalas),
+            "det_medio": np.mean(dets),
+        })
+    return relatorio, controlador
+
+# ================================
+# EXECUÇÃO DO BENCHMARK
+# ================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Controlador adaptativo contra a configuração fixa, em fases simuladas.")
+    parser.add_argument("--orcamento-ms", type=float, default=400.0)
+    parser.add_argument("--pessoas-ms", type=float, default=180.0, help="YOLO (imgsz 640) por frame no Pi 4")
+    parser.add_argument("--deteccao-ms", type=float, default=120.0, help="Detector de rostos com det_size 320")
+    parser.add_argument("--embedding-ms", type=float, default=40.0, help="Reconhecimento por rosto")
+    parser.add_argument("--preprocessamento-ms", type=float, default=6.0)
+    args = parser.parse_args()
+
+    custos = {"preprocessamento": args.preprocessamento_ms, "pessoas": args.pessoas_ms,
+              "deteccao_rostos": args.deteccao_ms, "embedding": args.embedding_ms}
+    print(f"Níveis: {NIVEIS_PADRAO}")
+    for adaptativo in (False, True):
+        print(f"\n--- {'ADAPTATIVO' if adaptativo else 'FIXO (escala 0.5, det 320)'} | orçamento {args.orcamento_ms:.0f} ms ---")
+        relatorio, controlador = simular(args.orcamento_ms, adaptativo, custos)
+        for fase in relatorio:
+            print(f"{fase['fase']:<28}{fase['fps']:>5.1f} FPS | p50 {fase['p50_ms']:>4.0f} ms | p90 {fase['p90_ms']:>4.0f} ms | "
+                  f"{fase['acima_orcamento'] * 100:>3.0f}% acima | escala {fase['escala_media']:.2f} | det {fase['det_medio']:.0f}")
+        if controlador is not None:
+            stats = controlador.estatisticas()
+            print(f"[INFO] {stats['subidas_total']} subidas, {stats['descidas_total']} descidas, "
+                  f"{stats['pulados_total']} frames pulados pelo FPS máximo")
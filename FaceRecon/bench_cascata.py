@@ -0,0 +1,106 @@
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from reconhecimento import ProcessadorCV
+
+# ================================
+# FONTES DE FRAMES
+# ================================
+def ler_frames(fonte, limite):
+    """Lê até 'limite' frames de um vídeo ou de um diretório de imagens."""
+    frames = []
+    if os.path.isdir(fonte):
+        for nome in sorted(os.listdir(fonte)):
+            if nome.lower().endswith((".jpg", ".png", ".jpeg")):
+                frame = cv2.imread(os.path.join(fonte, nome))
+                if frame is not None:
+                    frames.append(frame)
+            if len(frames) >= limite:
+                break
+    else:
+        cap = cv2.VideoCapture(fonte)
+        while len(frames) < limite:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+    return frames
+
+def cena_vazia(n, largura=640, altura=480):
+    """Corredor estático sintético: fundo com gradiente e ruído leve, sem pessoas."""
+    rng = np.random.default_rng(0)
+    base = np.tile(np.linspace(60, 180, largura, dtype=np.float32), (altura, 1))
+    frames = []
+    for _ in range(n):
+        ruido = rng.normal(0, 2, (altura, largura)).astype(np.float32)
+        cinza = np.clip(base + ruido, 0, 255).astype(np.uint8)
+        frames.append(cv2.cvtColor(cinza, cv2.COLOR_GRAY2BGR))
+    return frames
+
+def medir(pcv, frame):
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    resultado = pcv.processar_frame(frame)
+    return (time.process_time() - cpu0) * 1000, (time.perf_counter() - t0) * 1000, resultado
+
+def categoria(n_pessoas, limiar_multidao):
+    if n_pessoas == 0:
+        return "vazia"
+    return "multidão" if n_pessoas >= limiar_multidao else "poucas pessoas"
+
+# ================================
+# EXECUÇÃO DO BENCHMARK
+# ================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara o modo cascata (pessoa -> rosto) com o modo padrão.")
+    parser.add_argument("--fonte", help="Vídeo ou diretório de imagens com pessoas")
+    parser.add_argument("--frames", type=int, default=200, help="Máximo de frames lidos da fonte")
+    parser.add_argument("--vazios", type=int, default=50, help="Frames sintéticos de cena vazia")
+    parser.add_argument("--multidao", type=int, default=3, help="Pessoas a partir das quais a cena é 'multidão'")
+    args = parser.parse_args()
+
+    frames = cena_vazia(args.vazios)
+    if args.fonte:
+        frames += ler_frames(args.fonte, args.frames)
+
+    pcv = ProcessadorCV()
+    # Aquecimento dos dois caminhos antes de medir
+    for modo in (False, True):
+        pcv.CASCADE_MODE = modo
+        pcv.processar_frame(frames[-1])
+
+    tabela = {}
+    for frame in frames:
+        pcv.CASCADE_MODE = False
+        cpu_padrao, lat_padrao, res_padrao = medir(pcv, frame)
+        pcv.CASCADE_MODE = True
+        cpu_cascata, lat_cascata, res_cascata = medir(pcv, frame)
+
+        chave = categoria(len(res_padrao["persons"]), args.multidao)
+        linha = tabela.setdefault(chave, {"frames": 0, "cpu_p": [], "cpu_c": [], "lat_p": [], "lat_c": [], "faces_p": 0, "faces_c": 0})
+        linha["frames"] += 1
+        linha["cpu_p"].append(cpu_padrao)
+        linha["cpu_c"].append(cpu_cascata)
+        linha["lat_p"].append(lat_padrao)
+        linha["lat_c"].append(lat_cascata)
+        linha["faces_p"] += len(res_padrao["faces"])
+        linha["faces_c"] += len(res_cascata["faces"])
+
+    pcv.encerrar()
+
+    print(f"\n{'cena':<16}{'frames':>7}{'CPU padrão':>12}{'CPU cascata':>13}{'economia':>10}"
+          f"{'lat padrão':>12}{'lat cascata':>13}{'rostos p/c':>13}")
+    for chave in ("vazia", "poucas pessoas", "multidão"):
+        if chave not in tabela:
+            continue
+        linha = tabela[chave]
+        cpu_p, cpu_c = np.mean(linha["cpu_p"]), np.mean(linha["cpu_c"])
+        print(f"{chave:<16}{linha['frames']:>7}{cpu_p:>10.1f}ms{cpu_c:>11.1f}ms{(1 - cpu_c / cpu_p) * 100:>9.0f}%"
+              f"{np.mean(linha['lat_p']):>10.1f}ms{np.mean(linha['lat_c']):>11.1f}ms"
+              f"{linha['faces_p']:>7}/{linha['faces_c']:<5}")
@@ -0,0 +1,158 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comum.eventos import ArmazemEventos, ConsultaEventos, conectar, INSERCAO, GESTO, NAO_ALUNO, RECONHECIDO
+
+# ================================
+# EVENTOS SINTÉTICOS
+# ================================
+def gerar_eventos(n, inicio, duracao_s, n_alunos=500, n_cameras=4, semente=0):
+    """Mistura típica: 85% reconhecimentos, 12% NAO ALUNO (1/4 com alerta), 3% gestos."""
+    rng = np.random.default_rng(semente)
+    instantes = np.sort(inicio + rng.uniform(0, duracao_s, n))
+    sorteio = rng.uniform(size=n)
+    eventos = []
+    for ts, u, aluno, camera, track in zip(instantes, sorteio, rng.integers(0, n_alunos, n),
+                                           rng.integers(0, n_cameras, n), rng.integers(1, 10**6, n)):
+        if u < 0.85:
+            eventos.append((float(ts), RECONHECIDO, f"ALUNO_{aluno}", str(camera), None, 0.7, int(track), None, None))
+        elif u < 0.97:
+            alerta = "NAO ALUNO" if u < 0.88 else None
+            eventos.append((float(ts), NAO_ALUNO, f"desconhecido#{aluno}", str(camera), alerta, 0.8, int(track),
+                            f"/tmp/ALERTA_{aluno}.jpg", '{"acao": "alertar"}'))
+        else:
+            eventos.append((float(ts), GESTO, f"track#{track}", str(camera), "MAOS PARA CIMA", None, int(track),
+                            None, None))
+    return eventos
+
+def popular(caminho, eventos, lote=10000):
+    conexao = conectar(caminho)
+    for i in range(0, len(eventos), lote):
+        with conexao:
+            conexao.executemany(INSERCAO, eventos[i:i + lote])
+    conexao.close()
+
+# ================================
+# MEDIÇÕES
+# ================================
+def vazao(diretorio, n, tamanho_lote):
+    """Enfileira 'n' eventos de uma vez e mede até estarem todos gravados."""
+    caminho = os.path.join(diretorio, f"vazao_{tamanho_lote}.sqlite3")
+    armazem = ArmazemEventos(caminho, tamanho_lote=tamanho_lote, tamanho_fila=n + 1, intervalo_s=0.05)
+    eventos = gerar_eventos(n, time.time(), 60)
+    armazem.start()
+    t0 = time.perf_counter()
+    # Tuplas prontas direto na fila: mede só a thread de gravação (o custo do registrar é medido à parte)
+    for evento in eventos:
+        armazem.fila.put_nowait(evento)
+    armazem.parar(timeout=600)
+    duracao = time.perf_counter() - t0
+    return armazem.estatisticas()["gravados"] / duracao
+
+def custo_registrar(diretorio, n=20000):
+    """Custo (µs) de ArmazemEventos.registrar na thread de quem chama."""
+    armazem = ArmazemEventos(os.path.join(diretorio, "custo.sqlite3"), tamanho_fila=n + 1)
+    armazem.start()
+    tempos = []
+    for i in range(n):
+        t0 = time.perf_counter()
+        armazem.registrar(RECONHECIDO, identidade=f"ALUNO_{i % 500}", camera=i % 4, confianca=0.7, track_id=i)
+        tempos.append((time.perf_counter() - t0) * 1e6)
+    armazem.parar()
+    return np.array(tempos)
+
+def ritmo_real(diretorio, taxa, duracao_s):
+    """Eventos a 'taxa' por segundo: tamanho máximo da fila e atraso até o disco."""
+    caminho = os.path.join(diretorio, "ritmo.sqlite3")
+    armazem = ArmazemEventos(caminho)
+    armazem.start()
+    max_fila = 0
+    inicio = time.monotonic()
+    enviados = 0
+    while time.monotonic() - inicio < duracao_s:
+        alvo = int((time.monotonic() - inicio) * taxa)
+        while enviados < alvo:
+            armazem.registrar(RECONHECIDO, identidade=f"ALUNO_{enviados % 500}", camera=enviados % 4)
+            enviados += 1
+        max_fila = max(max_fila, armazem.fila.qsize())
+        time.sleep(0.005)
+    gravados_antes = armazem.estatisticas()["gravados"]
+    armazem.parar()
+    stats = armazem.estatisticas()
+    return {"enviados": enviados, "gravados_durante": gravados_antes, "gravados": stats["gravados"],
+            "lotes": stats["lotes"], "max_fila": max_fila}
+
+def consultas(caminho, inicio, repeticoes=20):
+    consulta = ConsultaEventos(caminho)
+    casos = {
+        "último avistamento": lambda: consulta.ultimo_avistamento("ALUNO_42"),
+        "alertas 8h-9h": lambda: consulta.consultar(inicio=inicio + 8 * 3600, fim=inicio + 9 * 3600,
+                                                    so_alertas=True, limite=1000),
+        "câmera 2, última hora": lambda: consulta.consultar(camera=2, inicio=inicio + 23 * 3600, limite=1000),
+        "alerta de gesto": lambda: consulta.consultar(alerta="MAOS PARA CIMA", limite=100),
+        "resumo do dia": lambda: consulta.resumo(inicio, inicio + 86400),
+    }
+    resultados = {}
+    for nome, funcao in casos.items():
+        tempos = []
+        for _ in range(repeticoes):
+            t0 = time.perf_counter()
+            linhas = funcao()
+            tempos.append((time.perf_counter() - t0) * 1000)
+        resultados[nome] = (np.median(tempos), len(linhas) if isinstance(linhas, list) else int(linhas is not None))
+    return resultados
+
+def tamanho_mb(caminho):
+    return sum(os.path.getsize(caminho + sufixo) for sufixo in ("", "-wal") if os.path.exists(caminho + sufixo)) / 1e6
+
+# ================================
+# EXECUÇÃO DO BENCHMARK
+# ================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vazão de gravação, consultas e retenção do histórico de eventos.")
+    parser.add_argument("--eventos-vazao", type=int, default=50000)
+    parser.add_argument("--lotes", type=int, nargs="+", default=[1, 16, 256])
+    parser.add_argument("--taxa", type=float, default=40.0, help="Eventos/s no teste de ritmo real (4 câmeras x 10 rostos)")
+    parser.add_argument("--duracao", type=float, default=5.0)
+    parser.add_argument("--eventos-consulta", type=int, default=1_000_000, help="Eventos de um dia para as consultas")
+    args = parser.parse_args()
+
+    diretorio = tempfile.mkdtemp(prefix="bench_eventos_")
+    try:
+        print("--- GRAVAÇÃO ---")
+        tempos = custo_registrar(diretorio)
+        print(f"registrar(): p50 {np.percentile(tempos, 50):.1f} µs | p99 {np.percentile(tempos, 99):.1f} µs")
+        for tamanho_lote in args.lotes:
+            print(f"lote {tamanho_lote:>4}: {vazao(diretorio, args.eventos_vazao, tamanho_lote):>10.0f} eventos/s")
+        ritmo = ritmo_real(diretorio, args.taxa, args.duracao)
+        print(f"{args.taxa:.0f} eventos/s por {args.duracao:.0f}s: {ritmo['gravados']}/{ritmo['enviados']} gravados "
+              f"em {ritmo['lotes']} transações | fila máx. {ritmo['max_fila']}")
+
+        print(f"--- CONSULTAS ({args.eventos_consulta} eventos em 24h) ---")
+        caminho = os.path.join(diretorio, "dia.sqlite3")
+        inicio = time.time() - 86400
+        t0 = time.perf_counter()
+        popular(caminho, gerar_eventos(args.eventos_consulta, inicio, 86400))
+        print(f"[INFO] Banco populado em {time.perf_counter() - t0:.1f}s: {tamanho_mb(caminho):.1f} MB "
+              f"({tamanho_mb(caminho) * 1e6 / args.eventos_consulta:.0f} bytes/evento)")
+        for nome, (mediana, linhas) in consultas(caminho, inicio).items():
+            print(f"{nome:<24}{mediana:>9.2f} ms  ({linhas} linhas)")
+
+        print("--- RETENÇÃO ---")
+        armazem = ArmazemEventos(caminho, retencao_dias=0.5, max_eventos=None, remover_imagens=False)
+        conexao = conectar(caminho)
+        antes = tamanho_mb(caminho)
+        t0 = time.perf_counter()
+        apagados = armazem.aplicar_retencao(conexao, agora=time.time())
+        conexao.close()
+        print(f"Retenção de 12h: {apagados} eventos apagados em {time.perf_counter() - t0:.1f}s | "
+              f"{antes:.1f} MB -> {tamanho_mb(caminho):.1f} MB")
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
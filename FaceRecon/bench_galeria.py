@@ -0,0 +1,81 @@
+import argparse
+import time
+
+import numpy as np
+
+from galeria import GaleriaIndex, IndiceIVF, normalizar
+
+# ================================
+# GALERIA SINTÉTICA
+# ================================
+def gerar_galeria(n, dimensao, semente=0):
+    """
+    Gera embeddings agrupados (como rostos parecidos entre si) e consultas
+    que são versões com ruído de rostos da galeria.
+    """
+    rng = np.random.default_rng(semente)
+    centros = normalizar(rng.standard_normal((max(1, n // 50), dimensao)))
+    grupos = rng.integers(0, len(centros), n)
+    galeria = normalizar(centros[grupos] + 0.8 * rng.standard_normal((n, dimensao)) / np.sqrt(dimensao) * 4)
+    return galeria, [f"ALUNO_{i}" for i in range(n)]
+
+def gerar_consultas(galeria, m, ruido=0.6, semente=1):
+    rng = np.random.default_rng(semente)
+    alvos = rng.integers(0, len(galeria), m)
+    consultas = galeria[alvos] + ruido * rng.standard_normal((m, galeria.shape[1])) / np.sqrt(galeria.shape[1])
+    return normalizar(consultas), alvos
+
+def medir(indice, consultas, k, lote, repeticoes):
+    tempos = []
+    resultado = None
+    for _ in range(repeticoes):
+        for inicio in range(0, len(consultas), lote):
+            t0 = time.perf_counter()
+            indice.buscar(consultas[inicio:inicio + lote], k=k)
+            tempos.append((time.perf_counter() - t0) * 1000)
+    resultado = indice.buscar(consultas, k=k)
+    return np.array(tempos), resultado
+
+def recall(aproximado, exato, k):
+    acertos = [len(set(a[:k]) & set(e[:k])) for a, e in zip(aproximado, exato)]
+    return float(np.mean(acertos)) / k
+
+# ================================
+# EXECUÇÃO DO BENCHMARK
+# ================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de recall/latência da galeria de rostos.")
+    parser.add_argument("--tamanho", type=int, default=20000, help="Número de rostos na galeria")
+    parser.add_argument("--consultas", type=int, default=256, help="Número de rostos consultados")
+    parser.add_argument("--lote", type=int, default=4, help="Rostos por frame (consultas por busca)")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--sondas", type=int, nargs="+", default=[4, 8, 16, 32])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"--- BENCHMARK DA GALERIA ({args.tamanho} rostos, {args.lote} rostos por frame) ---")
+    vetores, nomes = gerar_galeria(args.tamanho, 512)
+    consultas, _ = gerar_consultas(vetores, args.consultas)
+
+    exato = GaleriaIndex(vetores, nomes)
+    tempos, (indices_exatos, _) = medir(exato, consultas, args.k, args.lote, args.repeticoes)
+    print(f"{'índice':<22}{'memória':>10}{'p50 ms':>10}{'p95 ms':>10}{'recall@1':>10}{'recall@k':>10}")
+    print(f"{'exato float32':<22}{exato.nbytes() / 1e6:>8.1f}MB{np.percentile(tempos, 50):>10.3f}"
+          f"{np.percentile(tempos, 95):>10.3f}{1.0:>10.3f}{1.0:>10.3f}")
+
+    for dtype in ("float16", "int8"):
+        quantizado = GaleriaIndex(vetores, nomes, dtype=dtype)
+        tempos, (indices, _) = medir(quantizado, consultas, args.k, args.lote, args.repeticoes)
+        print(f"{'exato ' + dtype:<22}{quantizado.nbytes() / 1e6:>8.1f}MB{np.percentile(tempos, 50):>10.3f}"
+              f"{np.percentile(tempos, 95):>10.3f}{recall(indices, indices_exatos, 1):>10.3f}"
+              f"{recall(indices, indices_exatos, args.k):>10.3f}")
+
+    t0 = time.perf_counter()
+    ivf = IndiceIVF(exato)
+    print(f"[INFO] IVF treinado com {ivf.n_listas} listas em {time.perf_counter() - t0:.2f}s")
+    for n_sondas in args.sondas:
+        ivf.n_sondas = n_sondas
+        tempos, (indices, _) = medir(ivf, consultas, args.k, args.lote, args.repeticoes)
+        print(f"{f'IVF sondas={n_sondas}':<22}{exato.nbytes() / 1e6:>8.1f}MB{np.percentile(tempos, 50):>10.3f}"
+              f"{np.percentile(tempos, 95):>10.3f}{recall(indices, indices_exatos, 1):>10.3f}"
+              f"{recall(indices, indices_exatos, args.k):>10.3f}")
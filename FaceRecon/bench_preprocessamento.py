@@ -0,0 +1,187 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comum.captura import copiar_em_buffer
+from pipeline import PipelineCV
+from preprocessamento import Preprocessador, PoolFrames
+
+# ================================
+# VÍDEO SINTÉTICO
+# ================================
+def gerar_video(caminho, largura, altura, n_frames, fps=30):
+    """Fundo com ruído e um bloco em movimento, gravado em MJPG."""
+    rng = np.random.default_rng(0)
+    fundo = rng.integers(0, 256, (altura, largura, 3), dtype=np.uint8)
+    escritor = cv2.VideoWriter(caminho, cv2.VideoWriter_fourcc(*"MJPG"), fps, (largura, altura))
+    for i in range(n_frames):
+        frame = fundo.copy()
+        x = (i * 7) % max(1, largura - 80)
+        cv2.rectangle(frame, (x, altura // 3), (x + 80, altura // 3 + 120), (40, 200, 90), -1)
+        escritor.write(frame)
+    escritor.release()
+
+# ================================
+# CAMINHOS COMPARADOS
+# ================================
+def preparar_antigo(frame, escala, gamma):
+    """Caminho anterior: LUT recalculado, gamma no frame cheio e depois a redução."""
+    inv_gamma = 1.0 / max(gamma, 0.01)
+    tabela = np.array([((i / 255.0) ** inv_gamma) * 255 for i in np.arange(0, 256)]).astype("uint8")
+    return cv2.resize(cv2.LUT(frame, tabela), (0, 0), fx=escala, fy=escala)
+
+def alocacoes_por_frame(fonte, modo, escala, gamma, aquecimento):
+    """
+    Leitura + pré-processamento + cópia para exibição, frame a frame, sob o tracemalloc.
+    Para cada frame: pico de memória alocada acima do início do frame (KB).
+    """
+    cap = cv2.VideoCapture(fonte)
+    pool = PoolFrames()
+    preprocessador = Preprocessador()
+    exibicao = None
+    picos = []
+    tracemalloc.start()
+    try:
+        while True:
+            antes, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            if modo == "antigo":
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                small = preparar_antigo(frame, escala, gamma)
+                exibicao = frame.copy()
+            else:
+                ret, frame = pool.ler(cap)
+                if not ret:
+                    break
+                small = preprocessador.preparar(frame, escala, gamma)
+                exibicao = copiar_em_buffer(exibicao, frame)
+            _, pico = tracemalloc.get_traced_memory()
+            picos.append((pico - antes) / 1024)
+    finally:
+        tracemalloc.stop()
+        cap.release()
+    del small, exibicao
+    return np.array(picos[aquecimento:]), pool.alocacoes
+
+def tempo_preprocessamento(frames, escala, gamma, repeticoes):
+    """Só gamma + redução, com os frames já em memória (ms por frame)."""
+    preprocessador = Preprocessador()
+    tempos = {"antigo": [], "novo": []}
+    for _ in range(repeticoes):
+        for frame in frames:
+            t0 = time.perf_counter()
+            preparar_antigo(frame, escala, gamma)
+            t1 = time.perf_counter()
+            preprocessador.preparar(frame, escala, gamma)
+            t2 = time.perf_counter()
+            tempos["antigo"].append((t1 - t0) * 1000)
+            tempos["novo"].append((t2 - t1) * 1000)
+    return {modo: np.array(valores) for modo, valores in tempos.items()}
+
+def pool_em_threads(fonte, escala, gamma, duracao_s, inferencia_ms):
+    """
+    PipelineCV real (captura, inferência e exibição em threads) com uma inferência falsa
+    de 'inferencia_ms'. Retorna (frames exibidos, alocações do pool, alocações após o aquecimento).
+    """
+    cap = cv2.VideoCapture(fonte)
+    fps_fonte = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    preprocessador = Preprocessador()
+
+    def processar(frame):
+        preprocessador.preparar(frame, escala, gamma)
+        time.sleep(inferencia_ms / 1000)
+        return {"faces": [], "persons": []}
+
+    pipeline = PipelineCV(cap, processar, fps_alvo=fps_fonte)
+    pipeline.iniciar()
+    seq = 0
+    exibidos = 0
+    exibicao = None
+    inicio = time.monotonic()
+    alocacoes_aquecimento = None
+    try:
+        while time.monotonic() - inicio < duracao_s and not pipeline.captura.falhou:
+            proximo = pipeline.proximo(seq)
+            if proximo is None:
+                continue
+            seq, frame, _, _ = proximo
+            exibidos += 1
+            exibicao = copiar_em_buffer(exibicao, frame)
+            pipeline.desenhar_estatisticas(exibicao)
+            del frame, proximo
+            if alocacoes_aquecimento is None and time.monotonic() - inicio > 1.0:
+                alocacoes_aquecimento = pipeline.captura.pool.alocacoes
+    finally:
+        pipeline.parar()
+        cap.release()
+    alocacoes = pipeline.captura.pool.alocacoes
+    return exibidos, alocacoes, alocacoes - (alocacoes_aquecimento or 0)
+
+# ================================
+# EXECUÇÃO DO BENCHMARK
+# ================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Alocações e tempo do pré-processamento (gamma + redução).")
+    parser.add_argument("--fonte", help="Vídeo de entrada; sem ele, gera um vídeo sintético")
+    parser.add_argument("--resolucao", default="1280x720", help="Resolução do vídeo sintético (LxA)")
+    parser.add_argument("--frames", type=int, default=150, help="Frames do vídeo sintético")
+    parser.add_argument("--escala", type=float, default=0.5)
+    parser.add_argument("--gamma", type=float, default=1.2)
+    parser.add_argument("--aquecimento", type=int, default=10)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--duracao", type=float, default=5.0, help="Segundos do teste com threads")
+    parser.add_argument("--inferencia-ms", type=float, default=40.0, help="Duração da inferência simulada")
+    args = parser.parse_args()
+
+    temporario = None
+    fonte = args.fonte
+    if fonte is None:
+        largura, altura = map(int, args.resolucao.lower().split("x"))
+        temporario = tempfile.NamedTemporaryFile(suffix=".avi", delete=False)
+        temporario.close()
+        fonte = temporario.name
+        gerar_video(fonte, largura, altura, args.frames)
+
+    try:
+        cap = cv2.VideoCapture(fonte)
+        frames = []
+        while len(frames) < 60:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+        if not frames:
+            raise SystemExit(f"[ERRO] Não foi possível ler frames de '{fonte}'")
+        altura, largura = frames[0].shape[:2]
+        print(f"--- PRÉ-PROCESSAMENTO ({largura}x{altura}, escala {args.escala}, gamma {args.gamma}) ---")
+
+        # O LUT é o mesmo; só a ordem reduz -> gamma muda a saída, em poucos níveis de cinza
+        ordem_antiga = preparar_antigo(frames[0], args.escala, args.gamma).astype(np.int16)
+        ordem_nova = Preprocessador().preparar(frames[0], args.escala, args.gamma).astype(np.int16)
+        diferenca = np.abs(ordem_antiga - ordem_nova)
+        print(f"Diferença da ordem reduz -> gamma: média {diferenca.mean():.2f}, máx {diferenca.max()} níveis")
+
+        tempos = tempo_preprocessamento(frames, args.escala, args.gamma, args.repeticoes)
+        print(f"{'caminho':<10}{'p50 ms':>10}{'p95 ms':>10}{'pico KB/frame':>16}{'buffers novos':>16}")
+        for modo in ("antigo", "novo"):
+            picos, alocacoes = alocacoes_por_frame(fonte, modo, args.escala, args.gamma, args.aquecimento)
+            buffers = "-" if modo == "antigo" else str(alocacoes)
+            print(f"{modo:<10}{np.percentile(tempos[modo], 50):>10.3f}{np.percentile(tempos[modo], 95):>10.3f}"
+                  f"{np.median(picos):>16.1f}{buffers:>16}")
+
+        exibidos, alocacoes, depois = pool_em_threads(fonte, args.escala, args.gamma, args.duracao, args.inferencia_ms)
+        print(f"Com threads: {exibidos} frames exibidos | buffers de captura alocados: {alocacoes} "
+              f"({depois} após o aquecimento)")
+    finally:
+        if temporario is not None:
+            os.remove(temporario.name)
@@ -0,0 +1,139 @@
+import argparse
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+from keypoints_rosto import TEMPLATE_ARCFACE
+from qualidade import FiltroQualidade, estimar_pose, medir_nitidez
+
+# ================================
+# ROSTOS SINTÉTICOS
+# ================================
+class RostoSintetico:
+    """Só o que o FiltroQualidade lê de um Face do InsightFace."""
+    def __init__(self, bbox, kps, det_score):
+        self.bbox = np.asarray(bbox, dtype=np.float32)
+        self.kps = kps
+        self.det_score = det_score
+
+# Profundidade (z, em distâncias entre os olhos, positivo para a câmera) dos 5 landmarks num
+# rosto médio: diferente da profundidade única que o estimador assume, de propósito
+PROFUNDIDADES = np.array([0.0, 0.0, 0.6, 0.15, 0.15])
+
+def projetar_landmarks(yaw, pitch, roll=0.0, ruido=0.0, distancia=8.0, rng=None):
+    """Landmarks 2D (recorte 112x112) de um rosto 3D girado, com perspectiva e ruído de detecção."""
+    iod = float(TEMPLATE_ARCFACE[1, 0] - TEMPLATE_ARCFACE[0, 0])
+    centro = TEMPLATE_ARCFACE.mean(axis=0)
+    pontos = np.column_stack([(TEMPLATE_ARCFACE - centro) / iod, PROFUNDIDADES])
+    y, p, r = np.radians([yaw, pitch, roll])
+    rot_y = np.array([[np.cos(y), 0, np.sin(y)], [0, 1, 0], [-np.sin(y), 0, np.cos(y)]])
+    rot_x = np.array([[1, 0, 0], [0, np.cos(p), -np.sin(p)], [0, np.sin(p), np.cos(p)]])
+    rot_z = np.array([[np.cos(r), -np.sin(r), 0], [np.sin(r), np.cos(r), 0], [0, 0, 1]])
+    girados = pontos @ (rot_z @ rot_x @ rot_y).T
+    perspectiva = distancia / (distancia - girados[:, 2:3])
+    kps = girados[:, :2] * perspectiva * iod + centro
+    if ruido and rng is not None:
+        kps = kps + rng.normal(0.0, ruido * iod, kps.shape)
+    return kps.astype(np.float32)
+
+def gerar_rosto(lado=112, semente=0):
+    """Rosto desenhado (pele com textura, olhos, sobrancelhas, nariz e boca) sobre fundo liso."""
+    rng = np.random.default_rng(semente)
+    imagem = np.full((lado, lado, 3), 90, np.uint8)
+    c = lado // 2
+    cv2.ellipse(imagem, (c, c), (int(lado * 0.36), int(lado * 0.46)), 0, 0, 360, (120, 150, 190), -1)
+    for x in (int(lado * 0.35), int(lado * 0.65)):
+        cv2.ellipse(imagem, (x, int(lado * 0.42)), (int(lado * 0.07), int(lado * 0.035)), 0, 0, 360, (240, 240, 240), -1)
+        cv2.circle(imagem, (x, int(lado * 0.42)), int(lado * 0.025), (40, 30, 20), -1)
+        cv2.line(imagem, (x - int(lado * 0.08), int(lado * 0.34)), (x + int(lado * 0.08), int(lado * 0.33)), (40, 50, 60), 2)
+    cv2.line(imagem, (c, int(lado * 0.45)), (c - int(lado * 0.04), int(lado * 0.62)), (90, 110, 150), 2)
+    cv2.ellipse(imagem, (c, int(lado * 0.75)), (int(lado * 0.13), int(lado * 0.04)), 0, 0, 180, (70, 70, 150), 2)
+    textura = rng.normal(0, 6, imagem.shape)
+    return np.clip(imagem + textura, 0, 255).astype(np.uint8)
+
+# ================================
+# MEDIÇÕES
+# ================================
+def erro_pose(angulos, repeticoes=200, ruido=0.02, semente=0):
+    """Erro médio (graus) de yaw e pitch estimados, com roll e ruído aleatórios nos landmarks."""
+    rng = np.random.default_rng(semente)
+    resultados = {}
+    for yaw, pitch in angulos:
+        estimados = np.array([
+            estimar_pose(projetar_landmarks(yaw, pitch, roll=rng.uniform(-20, 20), ruido=ruido, rng=rng))
+            for _ in range(repeticoes)
+        ])
+        resultados[(yaw, pitch)] = estimados.mean(axis=0), estimados.std(axis=0)
+    return resultados
+
+def nitidez_por_borrao(lados, sigmas):
+    """Nitidez do rosto sintético reduzido para 'lado' px e borrado com sigma (px)."""
+    base = gerar_rosto(256)
+    resultados = {}
+    for lado in lados:
+        reduzido = cv2.resize(base, (lado, lado), interpolation=cv2.INTER_AREA)
+        for sigma in sigmas:
+            imagem = cv2.GaussianBlur(reduzido, (0, 0), sigma) if sigma else reduzido
+            resultados[(lado, sigma)] = medir_nitidez(imagem, (0, 0, lado, lado))
+    return resultados
+
+def custo_avaliacao(filtro, repeticoes=2000):
+    """µs por rosto de FiltroQualidade.avaliar num frame 320x240 (pior caso: todos os critérios)."""
+    frame = cv2.resize(gerar_rosto(256), (320, 240))
+    escala = 60 / 112
+    kps = projetar_landmarks(10, 5) * escala + (130, 90)
+    rosto = RostoSintetico((130, 90, 190, 150), kps, 0.9)
+    filtro.avaliar(rosto, frame)
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        filtro.avaliar(rosto, frame)
+    return (time.perf_counter() - inicio) / repeticoes * 1e6
+
+def nitidez_de_recortes(diretorio):
+    """Nitidez dos recortes gravados (ex.: alertas NAO ALUNO em historico/imagem-nao-aluno): quantos o filtro reprovaria."""
+    valores = []
+    for caminho in sorted(glob.glob(os.path.join(diretorio, "**", "*.jpg"), recursive=True)):
+        imagem = cv2.imread(caminho)
+        if imagem is not None:
+            valores.append(medir_nitidez(imagem, (0, 0, imagem.shape[1], imagem.shape[0])))
+    return np.array(valores)
+
+# ================================
+# EXECUÇÃO DO BENCHMARK
+# ================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precisão e custo das medidas do filtro de qualidade de rostos.")
+    parser.add_argument("--recortes", help="Recortes de rostos reais (.jpg), ex.: historico/imagem-nao-aluno, para ver a distribuição da nitidez")
+    parser.add_argument("--ruido", type=float, default=0.02, help="Ruído dos landmarks, em distâncias entre os olhos")
+    args = parser.parse_args()
+
+    filtro = FiltroQualidade()
+    print(f"--- POSE PELOS LANDMARKS (roll aleatório de ±20°, ruído {args.ruido:.0%} da distância entre os olhos) ---")
+    angulos = [(0, 0), (15, 0), (30, 0), (45, 0), (60, 0), (0, 15), (0, 30), (0, 45), (30, 20)]
+    for (yaw, pitch), (media, desvio) in erro_pose(angulos, ruido=args.ruido).items():
+        reprovado = media[0] > filtro.yaw_max or media[1] > filtro.pitch_max
+        print(f"real yaw {yaw:>3}° pitch {pitch:>3}° -> estimado yaw {media[0]:5.1f}° (±{desvio[0]:4.1f}) "
+              f"pitch {media[1]:5.1f}° (±{desvio[1]:4.1f})  {'reprovado' if reprovado else 'aprovado'}")
+
+    print(f"--- NITIDEZ (variância do Laplaciano; limiar {filtro.nitidez_min:g}) ---")
+    sigmas = (0, 0.5, 1.0, 1.5, 2.0, 3.0)
+    print(f"{'lado':<8}" + "".join(f"{'sigma ' + str(s):>12}" for s in sigmas))
+    tabela = nitidez_por_borrao((24, 32, 48, 64, 96), sigmas)
+    for lado in (24, 32, 48, 64, 96):
+        print(f"{lado:<8}" + "".join(f"{tabela[(lado, s)]:>12.1f}" for s in sigmas))
+
+    print("--- CUSTO ---")
+    print(f"FiltroQualidade.avaliar: {custo_avaliacao(filtro):.0f} µs por rosto "
+          f"(embedding do buffalo_l no Pi 4: ~40 ms por rosto)")
+
+    if args.recortes:
+        valores = nitidez_de_recortes(args.recortes)
+        if valores.size:
+            print(f"--- RECORTES EM '{args.recortes}' ({valores.size}) ---")
+            print(f"nitidez p10 {np.percentile(valores, 10):.1f} | p50 {np.percentile(valores, 50):.1f} | "
+                  f"p90 {np.percentile(valores, 90):.1f} | {np.mean(valores < filtro.nitidez_min) * 100:.0f}% abaixo do limiar")
+        else:
+            print(f"[AVISO] Nenhum .jpg em '{args.recortes}'")
@@ -0,0 +1,110 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from galeria import criar_indice, normalizar
+from reavaliacao import CacheEmbeddings, LIMIAR_PADRAO, reavaliar
+
+# ================================
+# RECORTES SINTÉTICOS
+# ================================
+def gerar_alunos(n, dimensao=512, semente=0):
+    rng = np.random.default_rng(semente)
+    return normalizar(rng.normal(size=(n, dimensao)))
+
+def gerar_recortes(alunos, n, fracao_alunos, ruido=0.9, semente=1):
+    """
+    Embeddings de recortes NAO ALUNO: 'fracao_alunos' são de alunos (ainda não
+    cadastrados, no cenário real) com ruído de captura; o resto é de visitantes.
+    Retorna (embeddings, índice do aluno ou -1).
+    """
+    rng = np.random.default_rng(semente)
+    donos = np.where(rng.uniform(size=n) < fracao_alunos, rng.integers(0, len(alunos), n), -1)
+    embeddings = rng.normal(size=(n, alunos.shape[1])).astype(np.float32)
+    embeddings = normalizar(embeddings)
+    de_aluno = donos >= 0
+    embeddings[de_aluno] = normalizar(alunos[donos[de_aluno]] + ruido * embeddings[de_aluno] / np.sqrt(2))
+    return embeddings, donos
+
+# ================================
+# EXECUÇÃO DO BENCHMARK
+# ================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cache de embeddings e reavaliação em lote dos recortes NAO ALUNO.")
+    parser.add_argument("--recortes", type=int, default=300000)
+    parser.add_argument("--alunos", type=int, default=1000)
+    parser.add_argument("--tardios", type=int, default=50, help="Alunos cadastrados depois dos alertas")
+    parser.add_argument("--fracao-alunos", type=float, default=0.05, help="Fração dos recortes que são de alunos tardios")
+    parser.add_argument("--lote", type=int, default=4096, help="Recortes por gravação no cache")
+    args = parser.parse_args()
+
+    diretorio = tempfile.mkdtemp(prefix="bench_reavaliacao_")
+    try:
+        alunos = gerar_alunos(args.alunos)
+        tardios = alunos[-args.tardios:]
+
+        cache = CacheEmbeddings(diretorio)
+        inicio = time.perf_counter()
+        acertos = np.zeros(0, dtype=np.int64)
+        for i in range(0, args.recortes, args.lote):
+            n = min(args.lote, args.recortes - i)
+            embeddings, donos = gerar_recortes(tardios, n, args.fracao_alunos, semente=i + 1)
+            acertos = np.concatenate([acertos, donos])
+            registros = [(f"/recortes/ALERTA_NAO_ALUNO_{i + j}.jpg", i + j, 20000, "ok") for j in range(n)]
+            cache.adicionar(registros, embeddings, varredura=1)
+        duracao = time.perf_counter() - inicio
+        tamanho_mb = os.path.getsize(cache.caminho_matriz) / 1e6
+        print(f"--- CACHE: {args.recortes} recortes gravados em {duracao:.1f}s ({args.recortes / duracao:.0f}/s), "
+              f"matriz float16 de {tamanho_mb:.0f} MB ---")
+
+        recortes = [(f"/recortes/ALERTA_NAO_ALUNO_{i}.jpg", i, 20000) for i in range(args.recortes)]
+        inicio = time.perf_counter()
+        pendentes = cache.pendentes(recortes, varredura=2)
+        duracao = time.perf_counter() - inicio
+        print(f"Varredura sem mudanças: {len(recortes)} arquivos conferidos em {duracao:.1f}s, {len(pendentes)} pendentes")
+        del recortes
+
+        for nome, n_alunos in (("antes do cadastro tardio", args.alunos - args.tardios), ("depois do cadastro tardio", args.alunos)):
+            galeria = criar_indice(alunos[:n_alunos], [f"ALUNO_{k}" for k in range(n_alunos)], normalizado=True)
+            # Memória alocada pela reavaliação (as páginas do memmap são do cache do sistema operacional)
+            tracemalloc.start()
+            mudancas, stats = reavaliar(cache, galeria, LIMIAR_PADRAO)
+            pico_mb = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.stop()
+            casados = {caminho: aluno for caminho, _, aluno, _ in mudancas if aluno is not None}
+            print(f"--- REAVALIAÇÃO {nome.upper()} ({n_alunos} alunos) ---")
+            print(f"{stats['comparados']} recortes em {stats['segundos']:.2f}s ({stats['por_segundo']:.0f} recortes/s) | "
+                  f"{len(casados)} casam com alunos | pico de {pico_mb:.0f} MB "
+                  f"(a matriz inteira em float32 teria {args.recortes * 512 * 4 / 1e6:.0f} MB)")
+            if n_alunos == args.alunos:
+                esperados = {i for i, dono in enumerate(acertos) if dono >= 0}
+                obtidos = {int(caminho.rsplit("_", 1)[1].split(".")[0]) for caminho in casados}
+                corretos = sum(1 for caminho, aluno in casados.items()
+                               if aluno == f"ALUNO_{args.alunos - args.tardios + acertos[int(caminho.rsplit('_', 1)[1].split('.')[0])]}")
+                print(f"recall {len(esperados & obtidos) / max(len(esperados), 1):.1%} | "
+                      f"aluno certo em {corretos / max(len(casados), 1):.1%} | "
+                      f"{len(obtidos - esperados)} visitantes casados por engano")
+                cache.marcar([(aluno, 0.0, caminho) for caminho, aluno in casados.items()])
+                mudancas, _ = reavaliar(cache, galeria, LIMIAR_PADRAO)
+                print(f"Reavaliação repetida: {len(mudancas)} mudanças (marcações já gravadas)")
+
+        cache.remover([f"/recortes/ALERTA_NAO_ALUNO_{i}.jpg" for i in range(0, args.recortes, 3)] +
+                      [f"/recortes/ALERTA_NAO_ALUNO_{i}.jpg" for i in range(1, args.recortes, 3)])
+        inicio = time.perf_counter()
+        liberadas = cache.compactar()
+        print(f"Compactação: {liberadas} linhas órfãs liberadas em {time.perf_counter() - inicio:.1f}s, "
+              f"matriz com {os.path.getsize(cache.caminho_matriz) / 1e6:.0f} MB")
+        cache.fechar()
+
+        cache = CacheEmbeddings(diretorio)
+        print(f"Reabertura: {cache.linhas} linhas na matriz, {cache.com_rosto()} recortes no índice")
+        cache.fechar()
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
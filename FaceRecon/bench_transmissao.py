@@ -0,0 +1,164 @@
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comum.transmissao import TransmissorFrames, ServidorTransmissao, FRONTEIRA
+
+# ================================
+# FRAME E CLIENTES SINTÉTICOS
+# ================================
+def gerar_frame(largura=640, altura=480):
+    """Cena com gradiente, formas e ruído leve: comprime como uma câmera, não como ruído puro."""
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 255, largura, dtype=np.float32)
+    y = np.linspace(0, 255, altura, dtype=np.float32)[:, None]
+    frame = np.dstack([(x + y) / 2, np.broadcast_to(x, (altura, largura)), np.broadcast_to(y, (altura, largura))])
+    frame = frame.astype(np.uint8)
+    for _ in range(12):
+        centro = tuple(int(v) for v in rng.integers(0, (largura, altura)))
+        cv2.circle(frame, centro, int(rng.integers(10, 60)), tuple(int(v) for v in rng.integers(0, 256, 3)), -1)
+    ruido = rng.integers(-8, 9, frame.shape, dtype=np.int16)
+    return np.clip(frame.astype(np.int16) + ruido, 0, 255).astype(np.uint8)
+
+class ClienteHTTP(threading.Thread):
+    """Lê /video.mjpg contando os frames; 'taxa_bytes' limita a leitura (visualizador numa rede ruim)."""
+    def __init__(self, porta, caminho, taxa_bytes=None):
+        super().__init__(daemon=True)
+        self.porta = porta
+        self.caminho = caminho
+        self.taxa_bytes = taxa_bytes
+        self.quadros = 0
+        self.bytes = 0
+        self.parar = threading.Event()
+
+    def run(self):
+        sock = socket.create_connection(("127.0.0.1", self.porta))
+        if self.taxa_bytes:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 8192)
+        sock.sendall(f"GET {self.caminho} HTTP/1.1\r\nHost: bench\r\n\r\n".encode("ascii"))
+        marca = f"--{FRONTEIRA}".encode("ascii")
+        cauda = b""
+        bloco = 4096 if self.taxa_bytes else 1 << 18
+        try:
+            while not self.parar.is_set():
+                dados = sock.recv(bloco)
+                if not dados:
+                    break
+                self.bytes += len(dados)
+                self.quadros += (cauda + dados).count(marca)
+                cauda = dados[-(len(marca) - 1):]
+                if self.taxa_bytes:
+                    time.sleep(len(dados) / self.taxa_bytes)
+        except OSError:
+            pass
+        finally:
+            sock.close()
+
+# ================================
+# MEDIÇÕES
+# ================================
+def custo_codificacao(frame, qualidades, larguras, repeticoes=50):
+    """ms e KB por JPEG para cada (qualidade, largura), direto no cv2."""
+    resultados = {}
+    for largura in larguras:
+        altura = round(frame.shape[0] * largura / frame.shape[1])
+        imagem = frame if largura >= frame.shape[1] else cv2.resize(frame, (largura, altura), interpolation=cv2.INTER_AREA)
+        for qualidade in qualidades:
+            tempos = []
+            for _ in range(repeticoes):
+                t0 = time.perf_counter()
+                _, jpeg = cv2.imencode(".jpg", imagem, [cv2.IMWRITE_JPEG_QUALITY, qualidade])
+                tempos.append((time.perf_counter() - t0) * 1000)
+            resultados[(qualidade, largura)] = (np.median(tempos), jpeg.nbytes / 1024)
+    return resultados
+
+def laco_exibicao(frame, fps, duracao_s, publicar):
+    """Laço no ritmo da câmera: mede o custo de 'publicar' e o FPS que o laço consegue manter."""
+    intervalo = 1.0 / fps
+    custos = []
+    inicio = proximo = time.monotonic()
+    cpu_inicio = time.process_time()
+    frames = 0
+    while time.monotonic() - inicio < duracao_s:
+        t0 = time.perf_counter()
+        publicar(frame)
+        custos.append((time.perf_counter() - t0) * 1e6)
+        frames += 1
+        proximo += intervalo
+        espera = proximo - time.monotonic()
+        if espera > 0:
+            time.sleep(espera)
+    duracao = time.monotonic() - inicio
+    return {"fps_laco": frames / duracao, "publicar_p50_us": np.percentile(custos, 50),
+            "publicar_p99_us": np.percentile(custos, 99),
+            "cpu_pct": (time.process_time() - cpu_inicio) / duracao * 100}
+
+def cenario(frame, clientes, args, porta):
+    """Sobe transmissor + servidor, conecta 'clientes' [(caminho, taxa_bytes)] e roda o laço."""
+    transmissor = TransmissorFrames(codificadores=args.codificadores, fps_max=args.fps)
+    servidor = ServidorTransmissao({0: transmissor}, porta=porta, host="127.0.0.1")
+    servidor.start()
+    leitores = [ClienteHTTP(porta, caminho, taxa) for caminho, taxa in clientes]
+    for leitor in leitores:
+        leitor.start()
+    while transmissor.estatisticas()["clientes_video"] < len(leitores):
+        time.sleep(0.01)
+
+    resultados = {"faces": [], "persons": []}
+    medida = laco_exibicao(frame, args.fps, args.duracao, lambda f: transmissor.publicar(f, resultados))
+    stats = transmissor.estatisticas()
+    for leitor in leitores:
+        leitor.parar.set()
+    for leitor in leitores:
+        leitor.join(timeout=2.0)
+    servidor.parar()
+    medida["clientes"] = [(caminho, leitor.quadros / args.duracao) for (caminho, _), leitor in zip(clientes, leitores)]
+    medida.update(stats)
+    return medida
+
+# ================================
+# EXECUÇÃO DO BENCHMARK
+# ================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Custo da transmissão MJPEG no laço de exibição.")
+    parser.add_argument("--fps", type=float, default=15.0, help="Ritmo do laço de exibição (e fps máximo dos clientes)")
+    parser.add_argument("--duracao", type=float, default=5.0, help="Segundos por cenário")
+    parser.add_argument("--codificadores", type=int, default=2)
+    parser.add_argument("--porta", type=int, default=8181)
+    args = parser.parse_args()
+
+    frame = gerar_frame()
+    print("--- CODIFICAÇÃO JPEG (640x480) ---")
+    for (qualidade, largura), (ms, kb) in custo_codificacao(frame, (50, 70, 90), (640, 320)).items():
+        print(f"qualidade {qualidade:>3}, largura {largura:>4}: {ms:6.2f} ms  {kb:6.1f} KB")
+
+    print(f"--- LAÇO DE EXIBIÇÃO A {args.fps:.0f} FPS ---")
+    baseline = laco_exibicao(frame, args.fps, args.duracao,
+                             lambda f: cv2.imencode(".jpg", f, [cv2.IMWRITE_JPEG_QUALITY, 70]))
+    print(f"{'JPEG no próprio laço':<34} publicar p50 {baseline['publicar_p50_us']:>7.0f} µs | "
+          f"p99 {baseline['publicar_p99_us']:>7.0f} µs | laço {baseline['fps_laco']:.1f} FPS | "
+          f"CPU {baseline['cpu_pct']:.0f}%")
+
+    lento = 60_000  # bytes/s: ~2 frames/s de 640x480
+    cenarios = {
+        "sem clientes": [],
+        "1 cliente": [("/video.mjpg", None)],
+        "4 clientes, 2 perfis": [("/video.mjpg", None)] * 3 + [("/video.mjpg?fps=5&qualidade=50&largura=320", None)],
+        "4 clientes + 1 lento": [("/video.mjpg", None)] * 3 + [("/video.mjpg?fps=5&qualidade=50&largura=320", None),
+                                                               ("/video.mjpg", lento)],
+        "8 clientes": [("/video.mjpg", None)] * 8,
+    }
+    for i, (nome, clientes) in enumerate(cenarios.items()):
+        medida = cenario(frame, clientes, args, args.porta + i)
+        print(f"{nome:<34} publicar p50 {medida['publicar_p50_us']:>7.0f} µs | p99 {medida['publicar_p99_us']:>7.0f} µs | "
+              f"laço {medida['fps_laco']:.1f} FPS | CPU {medida['cpu_pct']:.0f}% | JPEG p50 {medida['jpeg_p50_ms']:.1f} ms | "
+              f"{medida['jpeg_codificados_total']} codificados, {medida['jpeg_descartados_total']} descartados")
+        for caminho, fps in medida["clientes"]:
+            print(f"    {caminho:<46} {fps:5.1f} FPS recebidos")
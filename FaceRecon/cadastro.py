@@ -1,55 +1,232 @@
 import os
+import sys
 import pickle
+import hashlib
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import cv2
-import insightface
 import numpy as np
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from galeria import carregar_galeria, normalizar, salvar_galeria
+from modelos import carregar_analise_facial
+
+EXTENSOES_IMAGEM = (".jpg", ".png", ".jpeg")
+
+# ================================
+# CACHE DE EMBEDDINGS POR IMAGEM
+# ================================
+def carregar_cache(caminho_cache):
+    """
+    Cache no formato {nome_arquivo: {"mtime_ns", "tamanho", "hash", "status", "embedding"}}.
+    """
+    try:
+        with open(caminho_cache, 'rb') as file:
+            return pickle.load(file)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return {}
+
+def salvar_cache(caminho_cache, cache):
+    temporario = caminho_cache + ".tmp"
+    with open(temporario, 'wb') as file:
+        pickle.dump(cache, file)
+    os.replace(temporario, caminho_cache)
+
+def hash_arquivo(path):
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as file:
+        for bloco in iter(lambda: file.read(1 << 20), b""):
+            sha1.update(bloco)
+    return sha1.hexdigest()
+
+def planejar_cadastro(dir_alunos, cache):
+    """
+    Compara o diretório com o cache.
+    Retorna (pendentes, removidos): imagens novas/alteradas e entradas de arquivos apagados.
+    Arquivos só com mtime alterado, mas com o mesmo conteúdo (hash), reaproveitam o cache.
+    """
+    pendentes = []
+    atuais = set()
+    for entry in os.scandir(dir_alunos):
+        if not entry.is_file() or not entry.name.lower().endswith(EXTENSOES_IMAGEM):
+            continue
+        atuais.add(entry.name)
+        stat = entry.stat()
+        cached = cache.get(entry.name)
+        if cached and cached["mtime_ns"] == stat.st_mtime_ns and cached["tamanho"] == stat.st_size:
+            continue
+        digest = hash_arquivo(entry.path)
+        if cached and cached["hash"] == digest:
+            cached["mtime_ns"] = stat.st_mtime_ns
+            cached["tamanho"] = stat.st_size
+            continue
+        pendentes.append((entry.name, entry.path, stat.st_mtime_ns, stat.st_size, digest))
+
+    removidos = sorted(set(cache) - atuais)
+    return sorted(pendentes), removidos
+
+def salvar_base_legada(caminho_pkl, embeddings, names):
+    """
+    Mantém o base_dados_alunos.pkl em dia com a galeria: é dele que o reconhecimento
+    migra quando o manifesto não existe (gravação atômica, como no manifesto).
+    """
+    temporario = caminho_pkl + ".tmp"
+    with open(temporario, 'wb') as file:
+        pickle.dump({"embeddings": np.asarray(embeddings, dtype=np.float32), "names": list(names)}, file)
+    os.replace(temporario, caminho_pkl)
+
+def base_legada_inalterada(caminho_pkl, embeddings, names):
+    try:
+        with open(caminho_pkl, 'rb') as file:
+            data = pickle.load(file)
+        atuais = np.asarray(data["embeddings"], dtype=np.float32).reshape(-1, 512)
+        nomes_atuais = list(data["names"])
+    except (OSError, pickle.UnpicklingError, EOFError, KeyError, ValueError):
+        return False
+    return nomes_atuais == list(names) and atuais.shape == embeddings.shape and np.allclose(atuais, embeddings, atol=1e-6)
+
+def galeria_inalterada(caminho_manifesto, embeddings, names):
+    """True se a galeria gravada já tem exatamente esses nomes e embeddings."""
+    try:
+        atuais, nomes_atuais, _ = carregar_galeria(caminho_manifesto)
+    except (OSError, ValueError, KeyError):
+        return False
+    if list(nomes_atuais) != list(names):
+        return False
+    if not len(names):
+        return True
+    return atuais.shape == embeddings.shape and np.allclose(atuais, normalizar(embeddings), atol=1e-6)
+
+# ================================
+# WORKERS (UMA INSTÂNCIA DO INSIGHTFACE POR PROCESSO)
+# ================================
+_app_worker = None
+
+def _iniciar_worker():
+    global _app_worker
+    # Só detector e reconhecimento, rodando na CPU, com as sessões do cache compartilhado
+    diretorio_cache = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache_modelos")
+    _app_worker = carregar_analise_facial('buffalo_l', diretorio_cache)
+    _app_worker.prepare(ctx_id=0, det_size=(640, 640))
+
+def _processar_imagem(filename, path):
+    """Retorna (filename, status, embedding, mensagem_erro, segundos)."""
+    inicio = time.perf_counter()
+    filename, status, embedding, erro = _embedding_imagem(filename, path)
+    return filename, status, embedding, erro, time.perf_counter() - inicio
+
+def _embedding_imagem(filename, path):
+    try:
+        # Carrega a imagem com OpenCV
+        img = cv2.imread(path)
+        if img is None:
+            return filename, "erro", None, "imagem ilegível"
+        # 'app.get' faz a detecção e extração do embedding de uma só vez
+        faces = _app_worker.get(img)
+        if faces and len(faces) == 1:
+            # Usamos o 'normed_embedding' que é a assinatura facial
+            return filename, "ok", faces[0].normed_embedding, None
+        elif not faces:
+            return filename, "sem_rosto", None, None
+        else:
+            return filename, "multiplos", None, None
+    except Exception as e:
+        return filename, "erro", None, str(e)
+
+def _relatar(filename, status, erro):
+    nome = os.path.splitext(filename)[0]
+    if status == "ok":
+        print(f"[SUCESSO] ✅ - Rosto de '{nome}' cadastrado.")
+    elif status == "sem_rosto":
+        print(f"[FALHA]   ❌ - Nenhum rosto encontrado em '{filename}'.")
+    elif status == "multiplos":
+        print(f"[FALHA]   ❌ - Múltiplos rostos encontrados em '{filename}'. Apenas um é permitido.")
+    else:
+        print(f"[ERRO]    ⚠️ - Erro ao processar '{filename}': {erro}")
+
 if __name__ == "__main__":
     # --- CONFIGURAÇÕES ---
     SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
     PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
     DIR_ALUNOS = os.path.join(PROJECT_ROOT, "alunos")
-    ARQUIVO_BASE_DADOS = os.path.join(SCRIPT_DIR, "base_dados_alunos.pkl")
+    ARQUIVO_BASE_DADOS = os.path.join(SCRIPT_DIR, "base_dados_alunos.galeria.json")
+    ARQUIVO_BASE_LEGADA = os.path.join(SCRIPT_DIR, "base_dados_alunos.pkl")
+    ARQUIVO_CACHE = os.path.join(SCRIPT_DIR, "cache_cadastro.pkl")
+
+    parser = argparse.ArgumentParser(description="Cadastro incremental de rostos dos alunos.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Número de processos (cada um com sua instância do InsightFace)")
+    parser.add_argument("--refazer", action="store_true", help="Ignora o cache e reprocessa todas as imagens")
+    args = parser.parse_args()
 
     print("--- INICIANDO PROCESSO DE CADASTRO DE ROSTOS (com InsightFace) ---")
 
-    # Inicializa o modelo InsightFace. Ele fará o download dos modelos na primeira vez.
-    # Usamos 'CPUExecutionProvider' para garantir que rode na CPU.
-    app = insightface.app.FaceAnalysis(providers=['CPUExecutionProvider'])
-    app.prepare(ctx_id=0, det_size=(640, 640))
-    print("[INFO] Modelo InsightFace carregado.")
-
-    known_face_embeddings = []
-    known_face_names = []
-
-    if os.path.isdir(DIR_ALUNOS):
-        for filename in os.listdir(DIR_ALUNOS):
-            if filename.lower().endswith((".jpg", ".png", ".jpeg")):
-                path = os.path.join(DIR_ALUNOS, filename)
-                try:
-                    # Carrega a imagem com OpenCV
-                    img = cv2.imread(path)
-                    # 'app.get' faz a detecção e extração do embedding de uma só vez
-                    faces = app.get(img)
-                    
-                    if faces and len(faces) == 1:
-                        # Usamos o 'normed_embedding' que é a assinatura facial
-                        known_face_embeddings.append(faces[0].normed_embedding)
-                        known_face_names.append(os.path.splitext(filename)[0])
-                        print(f"[SUCESSO] ✅ - Rosto de '{os.path.splitext(filename)[0]}' cadastrado.")
-                    elif not faces:
-                        print(f"[FALHA]   ❌ - Nenhum rosto encontrado em '{filename}'.")
-                    else:
-                        print(f"[FALHA]   ❌ - Múltiplos rostos encontrados em '{filename}'. Apenas um é permitido.")
-                except Exception as e:
-                    print(f"[ERRO]    ⚠️ - Erro ao processar '{filename}': {e}")
-    
-    if known_face_embeddings:
-        data = {"embeddings": np.array(known_face_embeddings), "names": known_face_names}
-        with open(ARQUIVO_BASE_DADOS, 'wb') as file:
-            pickle.dump(data, file)
-        print(f"\n[SUCESSO] Base de dados salva em '{ARQUIVO_BASE_DADOS}' com {len(known_face_names)} rostos.")
+    if not os.path.isdir(DIR_ALUNOS):
+        # Sem o diretório (ex.: deploy sem as fotos) não há como saber quem foi removido
+        print(f"[ERRO] Diretório '{DIR_ALUNOS}' não encontrado. A base de dados não foi alterada.")
+        sys.exit(1)
+
+    cache = {} if args.refazer else carregar_cache(ARQUIVO_CACHE)
+    havia_cadastrados = any(entrada["status"] == "ok" for entrada in cache.values())
+
+    pendentes, removidos = planejar_cadastro(DIR_ALUNOS, cache)
+
+    for filename in removidos:
+        del cache[filename]
+        print(f"[REMOVIDO] 🗑️ - '{filename}' não existe mais em '{DIR_ALUNOS}'.")
+
+    reaproveitadas = len(set(cache) - {filename for filename, *_ in pendentes})
+    print(f"[INFO] {len(pendentes)} imagens novas/alteradas, {reaproveitadas} reaproveitadas do cache, {len(removidos)} removidas.")
+
+    if pendentes:
+        workers = max(1, min(args.workers, len(pendentes)))
+        print(f"[INFO] Carregando InsightFace em {workers} processo(s)...")
+        metadados = {filename: (mtime_ns, tamanho, digest) for filename, _, mtime_ns, tamanho, digest in pendentes}
+
+        inicio = time.perf_counter()
+        tempo_workers = 0.0
+        with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_worker) as executor:
+            futuros = [executor.submit(_processar_imagem, filename, path) for filename, path, *_ in pendentes]
+            for futuro in as_completed(futuros):
+                filename, status, embedding, erro, segundos = futuro.result()
+                tempo_workers += segundos
+                _relatar(filename, status, erro)
+                mtime_ns, tamanho, digest = metadados[filename]
+                cache[filename] = {
+                    "mtime_ns": mtime_ns,
+                    "tamanho": tamanho,
+                    "hash": digest,
+                    "status": status,
+                    "embedding": embedding,
+                }
+        duracao = time.perf_counter() - inicio
+        print(f"[INFO] {len(pendentes)} imagens processadas em {duracao:.1f}s: "
+              f"{len(pendentes) / duracao:.2f} imagens/s no total (inclui carga dos modelos), "
+              f"{len(pendentes) * workers / max(tempo_workers, 1e-9):.2f} imagens/s só de embedding.")
+
+    salvar_cache(ARQUIVO_CACHE, cache)
+
+    cadastrados = [(os.path.splitext(filename)[0], entrada["embedding"])
+                   for filename, entrada in sorted(cache.items()) if entrada["status"] == "ok"]
+    known_face_names = [nome for nome, _ in cadastrados]
+    known_face_embeddings = np.array([embedding for _, embedding in cadastrados], dtype=np.float32).reshape(-1, 512)
+
+    if not cadastrados and not (removidos and havia_cadastrados):
+        # Galeria vazia só quando as remoções esvaziaram um cadastro que existia
+        print("\n[ERRO] Nenhum rosto pôde ser cadastrado. A base de dados não foi alterada.")
     else:
-        print("\n[ERRO] Nenhum rosto pôde ser cadastrado. A base de dados não foi criada.")
+        if galeria_inalterada(ARQUIVO_BASE_DADOS, known_face_embeddings, known_face_names):
+            # Uma nova geração faria os processos em execução recarregarem a galeria à toa
+            print(f"\n[INFO] Nenhuma mudança: '{ARQUIVO_BASE_DADOS}' mantida com {len(known_face_names)} rostos.")
+        else:
+            salvar_galeria(ARQUIVO_BASE_DADOS, known_face_embeddings, known_face_names)
+            if cadastrados:
+                print(f"\n[SUCESSO] Base de dados salva em '{ARQUIVO_BASE_DADOS}' com {len(known_face_names)} rostos.")
+            else:
+                print(f"\n[AVISO] Todos os alunos foram removidos. '{ARQUIVO_BASE_DADOS}' salva vazia.")
+        if not base_legada_inalterada(ARQUIVO_BASE_LEGADA, known_face_embeddings, known_face_names):
+            salvar_base_legada(ARQUIVO_BASE_LEGADA, known_face_embeddings, known_face_names)
+            print(f"[INFO] '{ARQUIVO_BASE_LEGADA}' atualizado com a galeria.")
 
     print("--- PROCESSO DE CADASTRO CONCLUÍDO ---")
\ No newline at end of file
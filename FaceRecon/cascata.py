@@ -0,0 +1,90 @@
+import numpy as np
+
+# ================================
+# CASCATA PESSOA -> ROSTO
+# ================================
+# No modo cascata o YOLO (barato) roda primeiro. Sem pessoas, a análise facial
+# é pulada. Com pessoas, só a parte de cima de cada pessoa (cabeça e ombros)
+# vai para o detector de rostos, com todos os recortes montados num único
+# mosaico para que o InsightFace rode uma vez só por frame.
+
+def regioes_tronco(pessoas, shape, razao_altura=0.5, margem_lateral=0.1):
+    """
+    Converte caixas de pessoas [x1, y1, x2, y2] em regiões da parte superior do corpo,
+    recortadas aos limites da imagem.
+    """
+    h_img, w_img = shape[:2]
+    regioes = []
+    for x1, y1, x2, y2 in pessoas:
+        largura = x2 - x1
+        altura = y2 - y1
+        rx1 = int(max(0, x1 - largura * margem_lateral))
+        rx2 = int(min(w_img, x2 + largura * margem_lateral))
+        ry1 = int(max(0, y1))
+        ry2 = int(min(h_img, y1 + altura * razao_altura))
+        if rx2 - rx1 > 1 and ry2 - ry1 > 1:
+            regioes.append((rx1, ry1, rx2, ry2))
+    return regioes
+
+def montar_mosaico(imagem, regioes, largura_max, espaco=8):
+    """
+    Empacota as regiões em prateleiras (da mais alta para a mais baixa) numa
+    imagem única. Retorna (mosaico, posicoes) com posicoes[i] = (px, py) da região i
+    dentro do mosaico. As regiões ficam separadas por 'espaco' pixels pretos para
+    que nenhum rosto seja detectado atravessando dois recortes.
+    """
+    ordem = sorted(range(len(regioes)), key=lambda i: regioes[i][3] - regioes[i][1], reverse=True)
+    posicoes = [None] * len(regioes)
+    x = y = altura_linha = largura_total = 0
+    for i in ordem:
+        rx1, ry1, rx2, ry2 = regioes[i]
+        w, h = rx2 - rx1, ry2 - ry1
+        if x > 0 and x + w > largura_max:
+            y += altura_linha + espaco
+            x = altura_linha = 0
+        posicoes[i] = (x, y)
+        x += w + espaco
+        altura_linha = max(altura_linha, h)
+        largura_total = max(largura_total, x - espaco)
+
+    mosaico = np.zeros((y + altura_linha, largura_total) + imagem.shape[2:], dtype=imagem.dtype)
+    for (rx1, ry1, rx2, ry2), (px, py) in zip(regioes, posicoes):
+        mosaico[py:py + ry2 - ry1, px:px + rx2 - rx1] = imagem[ry1:ry2, rx1:rx2]
+    return mosaico, posicoes
+
+def remapear_faces(faces, regioes, posicoes):
+    """
+    Leva bbox e landmarks das faces detectadas no mosaico de volta para as
+    coordenadas da imagem original. Faces fora de qualquer região são descartadas.
+    """
+    remapeadas = []
+    for face in faces:
+        cx = (face.bbox[0] + face.bbox[2]) / 2
+        cy = (face.bbox[1] + face.bbox[3]) / 2
+        for (rx1, ry1, rx2, ry2), (px, py) in zip(regioes, posicoes):
+            if px <= cx < px + (rx2 - rx1) and py <= cy < py + (ry2 - ry1):
+                deslocamento = np.array([rx1 - px, ry1 - py], dtype=np.float32)
+                face.bbox = face.bbox + np.tile(deslocamento, 2)
+                if face.get("kps") is not None:
+                    face.kps = face.kps + deslocamento
+                remapeadas.append(face)
+                break
+    return remapeadas
+
+def iou(a, b):
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    intersecao = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    uniao = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersecao
+    return intersecao / uniao if uniao > 0 else 0.0
+
+def suprimir_duplicadas(faces, limiar_iou=0.5):
+    """
+    Pessoas próximas geram recortes sobrepostos e o mesmo rosto pode ser
+    detectado duas vezes. Mantém a detecção de maior score.
+    """
+    mantidas = []
+    for face in sorted(faces, key=lambda f: f.det_score, reverse=True):
+        if all(iou(face.bbox, outra.bbox) < limiar_iou for outra in mantidas):
+            mantidas.append(face)
+    return mantidas
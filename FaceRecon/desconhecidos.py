@@ -0,0 +1,169 @@
+import itertools
+from collections import OrderedDict
+
+import numpy as np
+
+# ================================
+# IDENTIDADES DESCONHECIDAS (CLUSTERS ONLINE)
+# ================================
+class ClusterDesconhecido:
+    """Um desconhecido: centróide dos embeddings vistos, alerta e melhor recorte gravado."""
+    _ids = itertools.count(1)
+
+    def __init__(self, embedding, agora):
+        self.id = next(self._ids)
+        self.centroide = embedding.astype(np.float32)
+        self.n = 1
+        self.criado_em = agora
+        self.visto_em = agora
+        self.ultimo_alerta = None
+        self.melhor_qualidade = 0.0
+        self.caminho = None
+
+    def absorver(self, embedding, peso=1):
+        soma = self.centroide * self.n + embedding * peso
+        self.centroide = (soma / max(np.linalg.norm(soma), 1e-12)).astype(np.float32)
+        self.n += peso
+
+class MemoriaDesconhecidos:
+    """
+    Agrupa online os embeddings de rostos NAO ALUNO por similaridade de cosseno, para
+    que o mesmo visitante gere um alerta por cluster (com cooldown próprio) em vez de
+    um por trilha. Cada cluster guarda só o caminho e a qualidade do melhor recorte:
+    o arquivo é regravado apenas quando aparece um recorte melhor.
+
+    Memória limitada: clusters sem avistamento há 'ttl_s' expiram e, acima de
+    'max_clusters', o menos recente sai primeiro (LRU).
+    """
+    def __init__(self, limiar=0.5, limiar_fusao=0.6, cooldown_s=30.0, ttl_s=600.0,
+                 max_clusters=256, margem_qualidade=0.1):
+        self.limiar = limiar
+        self.limiar_fusao = limiar_fusao
+        self.cooldown_s = cooldown_s
+        self.ttl_s = ttl_s
+        self.max_clusters = max_clusters
+        self.margem_qualidade = margem_qualidade
+        # Ordem = recência de avistamento (o primeiro é o candidato do LRU)
+        self.clusters = OrderedDict()
+        # Clusters fundidos apontam para quem os absorveu (as trilhas guardam ids antigos)
+        self._aliases = OrderedDict()
+
+        self.criados = 0
+        self.fusoes = 0
+        self.alertas = 0
+        self.escritas_suprimidas = 0
+        self.representantes_atualizados = 0
+        self.expirados = 0
+        self.removidos_lru = 0
+
+    def obter(self, cluster_id):
+        cluster_id = self._aliases.get(cluster_id, cluster_id)
+        return self.clusters.get(cluster_id)
+
+    def _tocar(self, cluster, agora):
+        cluster.visto_em = agora
+        self.clusters.move_to_end(cluster.id)
+
+    def _remover(self, cluster_id):
+        del self.clusters[cluster_id]
+        for antigo in [a for a, novo in self._aliases.items() if novo == cluster_id]:
+            del self._aliases[antigo]
+
+    def podar(self, agora):
+        while self.clusters:
+            cluster = next(iter(self.clusters.values()))
+            if agora - cluster.visto_em <= self.ttl_s:
+                break
+            self._remover(cluster.id)
+            self.expirados += 1
+        while len(self.clusters) > self.max_clusters:
+            self._remover(next(iter(self.clusters)))
+            self.removidos_lru += 1
+
+    def _fundir(self, cluster):
+        """Funde 'cluster' com o vizinho mais parecido, se passar de 'limiar_fusao'. Retorna o sobrevivente."""
+        outros = [c for c in self.clusters.values() if c is not cluster]
+        if not outros:
+            return cluster
+        similaridades = np.stack([c.centroide for c in outros]) @ cluster.centroide
+        melhor = int(np.argmax(similaridades))
+        if similaridades[melhor] <= self.limiar_fusao:
+            return cluster
+
+        vizinho = outros[melhor]
+        maior, menor = (cluster, vizinho) if cluster.n >= vizinho.n else (vizinho, cluster)
+        maior.absorver(menor.centroide, peso=menor.n)
+        maior.criado_em = min(maior.criado_em, menor.criado_em)
+        if menor.ultimo_alerta is not None:
+            maior.ultimo_alerta = max(maior.ultimo_alerta or menor.ultimo_alerta, menor.ultimo_alerta)
+        if menor.melhor_qualidade > maior.melhor_qualidade or maior.caminho is None:
+            maior.melhor_qualidade, maior.caminho = menor.melhor_qualidade, menor.caminho
+        self._remover(menor.id)
+        self._aliases[menor.id] = maior.id
+        while len(self._aliases) > self.max_clusters:
+            self._aliases.popitem(last=False)
+        self.fusoes += 1
+        return maior
+
+    def atribuir(self, embedding, agora):
+        """Coloca um embedding normalizado no cluster mais parecido (ou num novo). Retorna o id."""
+        self.podar(agora)
+        cluster = None
+        if self.clusters:
+            candidatos = list(self.clusters.values())
+            similaridades = np.stack([c.centroide for c in candidatos]) @ embedding
+            melhor = int(np.argmax(similaridades))
+            if similaridades[melhor] > self.limiar:
+                cluster = candidatos[melhor]
+                cluster.absorver(embedding)
+                cluster = self._fundir(cluster)
+
+        if cluster is None:
+            cluster = ClusterDesconhecido(embedding, agora)
+            self.clusters[cluster.id] = cluster
+            self.criados += 1
+        self._tocar(cluster, agora)
+        self.podar(agora)
+        return cluster.id
+
+    def decidir(self, cluster_id, qualidade, agora):
+        """
+        Decide o que fazer com um avistamento do cluster:
+          - "alertar":       primeiro avistamento ou cooldown vencido (log de alerta);
+          - "representante": dentro do cooldown, mas o recorte é melhor que o gravado;
+          - "suprimir":      nada a gravar.
+        Para "alertar" com recorte melhor (ou sem arquivo ainda), 'gravar' vem True.
+        Retorna (acao, gravar, cluster).
+        """
+        cluster = self.obter(cluster_id)
+        if cluster is None:
+            return "alertar", True, None
+        self._tocar(cluster, agora)
+
+        melhorou = cluster.caminho is None or qualidade > cluster.melhor_qualidade * (1 + self.margem_qualidade)
+        if melhorou:
+            cluster.melhor_qualidade = qualidade
+
+        if cluster.ultimo_alerta is None or agora - cluster.ultimo_alerta > self.cooldown_s:
+            cluster.ultimo_alerta = agora
+            self.alertas += 1
+            if melhorou and cluster.caminho is not None:
+                self.representantes_atualizados += 1
+            return "alertar", melhorou, cluster
+        if melhorou:
+            self.representantes_atualizados += 1
+            return "representante", True, cluster
+        self.escritas_suprimidas += 1
+        return "suprimir", False, cluster
+
+    def estatisticas(self):
+        return {
+            "clusters": len(self.clusters),
+            "criados": self.criados,
+            "fusoes": self.fusoes,
+            "alertas": self.alertas,
+            "escritas_suprimidas": self.escritas_suprimidas,
+            "representantes_atualizados": self.representantes_atualizados,
+            "expirados": self.expirados,
+            "removidos_lru": self.removidos_lru,
+        }
@@ -0,0 +1,368 @@
+import argparse
+import json
+import os
+import pickle
+import threading
+import time
+
+import numpy as np
+
+# Manifesto JSON + bloco de embeddings em .npy (float32, normalizado, C-contíguo).
+# O .npy é aberto com np.memmap: o carregamento é instantâneo e vários processos
+# de reconhecimento compartilham as mesmas páginas do cache do sistema operacional.
+# Cada gravação cria um novo .npy e troca o manifesto atomicamente (os.replace).
+FORMATO_GALERIA = "citylab-galeria"
+VERSAO_GALERIA = 1
+
+# ================================
+# FUNÇÕES AUXILIARES
+# ================================
+def normalizar(vetores):
+    """Normaliza as linhas para norma 1 (float32, contíguo)."""
+    vetores = np.ascontiguousarray(vetores, dtype=np.float32)
+    if vetores.ndim == 1:
+        vetores = vetores[None, :]
+    normas = np.linalg.norm(vetores, axis=1, keepdims=True)
+    normas[normas == 0] = 1.0
+    return vetores / normas
+
+def top_k(scores, k):
+    """
+    Retorna (indices, scores) dos k maiores valores de cada linha, em ordem decrescente.
+    """
+    k = min(k, scores.shape[1])
+    if k == 1:
+        # Só o melhor: argmax é uma passada, bem mais barato que o argpartition
+        indices = np.argmax(scores, axis=1)[:, None]
+    elif k == scores.shape[1]:
+        indices = np.argsort(-scores, axis=1)
+    else:
+        parcial = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        ordem = np.argsort(-np.take_along_axis(scores, parcial, axis=1), axis=1)
+        indices = np.take_along_axis(parcial, ordem, axis=1)
+    return indices, np.take_along_axis(scores, indices, axis=1)
+
+def _mesclar_top_k(indices_a, scores_a, indices_b, scores_b, k):
+    indices = np.concatenate([indices_a, indices_b], axis=1)
+    scores = np.concatenate([scores_a, scores_b], axis=1)
+    pos, melhores = top_k(scores, k)
+    return np.take_along_axis(indices, pos, axis=1), melhores
+
+# ================================
+# FORMATO EM DISCO DA GALERIA
+# ================================
+def salvar_galeria(caminho_manifesto, embeddings, names):
+    """
+    Grava a galeria no formato versionado. Retorna o caminho do manifesto.
+    """
+    vetores = normalizar(embeddings) if len(names) else np.zeros((0, 512), dtype=np.float32)
+    if vetores.shape[0] != len(names):
+        raise ValueError(f"Galeria inconsistente: {vetores.shape[0]} embeddings e {len(names)} nomes.")
+
+    diretorio = os.path.dirname(os.path.abspath(caminho_manifesto))
+    base = os.path.basename(caminho_manifesto).split(".")[0]
+    arquivo_embeddings = f"{base}.{time.time_ns()}.npy"
+    caminho_embeddings = os.path.join(diretorio, arquivo_embeddings)
+    temporario = caminho_manifesto + ".tmp"
+    manifesto = {
+        "formato": FORMATO_GALERIA,
+        "versao": VERSAO_GALERIA,
+        "dtype": "float32",
+        "normalizado": True,
+        "quantidade": int(vetores.shape[0]),
+        "dimensao": int(vetores.shape[1]),
+        "embeddings": arquivo_embeddings,
+        "criado_em": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "nomes": list(names),
+    }
+    try:
+        np.save(caminho_embeddings, vetores)
+        with open(temporario, 'w', encoding='utf-8') as file:
+            json.dump(manifesto, file, ensure_ascii=False)
+        os.replace(temporario, caminho_manifesto)
+    except BaseException:
+        # Falha no meio (ex.: disco cheio): o manifesto anterior continua valendo;
+        # só o que esta gravação criou é removido
+        for caminho in (caminho_embeddings, temporario):
+            try:
+                os.remove(caminho)
+            except OSError:
+                pass
+        raise
+
+    # Remove gerações antigas; processos que ainda as mapeiam continuam válidos até fecharem
+    for nome in os.listdir(diretorio):
+        if nome.startswith(base + ".") and nome.endswith(".npy") and nome != arquivo_embeddings:
+            try:
+                os.remove(os.path.join(diretorio, nome))
+            except OSError:
+                pass
+    return caminho_manifesto
+
+def carregar_galeria(caminho_manifesto, mmap=True):
+    """
+    Lê o manifesto e retorna (embeddings, names, manifesto).
+    Com mmap=True os embeddings são um np.memmap somente leitura (zero-cópia).
+    """
+    with open(caminho_manifesto, 'r', encoding='utf-8') as file:
+        manifesto = json.load(file)
+    if manifesto.get("formato") != FORMATO_GALERIA:
+        raise ValueError(f"Arquivo não é uma galeria CityLab: {caminho_manifesto}")
+    if manifesto.get("versao", 0) > VERSAO_GALERIA:
+        raise ValueError(f"Versão da galeria não suportada: {manifesto.get('versao')}")
+
+    caminho_embeddings = os.path.join(os.path.dirname(os.path.abspath(caminho_manifesto)), manifesto["embeddings"])
+    embeddings = np.load(caminho_embeddings, mmap_mode='r' if mmap else None)
+    if embeddings.shape != (manifesto["quantidade"], manifesto["dimensao"]):
+        raise ValueError(f"Embeddings com formato {embeddings.shape} não batem com o manifesto.")
+    return embeddings, manifesto["nomes"], manifesto
+
+def migrar_pickle(caminho_pkl, caminho_manifesto):
+    """Converte o antigo base_dados_alunos.pkl para o formato versionado."""
+    with open(caminho_pkl, 'rb') as file:
+        data = pickle.load(file)
+    return salvar_galeria(caminho_manifesto, data["embeddings"], data["names"])
+
+# ================================
+# ÍNDICE EXATO DA GALERIA
+# ================================
+class GaleriaIndex:
+    """
+    Matriz contígua de embeddings normalizados + nomes dos alunos.
+    Busca exata: todas as faces de um frame são comparadas com a galeria
+    numa única multiplicação de matrizes.
+
+    dtype:
+      - "float32": busca direta com BLAS.
+      - "float16": metade da memória; convertido para float32 em blocos na busca.
+      - "int8":    um quarto da memória; quantização simétrica por linha.
+    """
+    DTYPES = ("float32", "float16", "int8")
+    TAMANHO_BLOCO = 8192
+
+    def __init__(self, embeddings, names, dtype="float32", normalizado=False):
+        if dtype not in self.DTYPES:
+            raise ValueError(f"dtype da galeria inválido: {dtype}")
+        self.nomes = list(names)
+        self.dtype = dtype
+        self.escalas = None
+
+        if len(self.nomes) == 0:
+            self.matriz = np.zeros((0, 512), dtype=np.float32)
+            self.dimensao = 512
+            return
+
+        # Embeddings já normalizados em float32 contíguo (ex.: np.memmap da galeria) são usados sem cópia
+        if normalizado and embeddings.dtype == np.float32 and embeddings.flags.c_contiguous:
+            vetores = embeddings
+        else:
+            vetores = normalizar(embeddings)
+        if vetores.shape[0] != len(self.nomes):
+            raise ValueError(f"Galeria inconsistente: {vetores.shape[0]} embeddings e {len(self.nomes)} nomes.")
+        self.dimensao = vetores.shape[1]
+
+        if dtype == "float32":
+            self.matriz = vetores
+        elif dtype == "float16":
+            self.matriz = vetores.astype(np.float16)
+        else:
+            maximos = np.abs(vetores).max(axis=1, keepdims=True)
+            maximos[maximos == 0] = 1.0
+            self.escalas = (maximos / 127.0).astype(np.float32).ravel()
+            self.matriz = np.round(vetores / (maximos / 127.0)).astype(np.int8)
+
+    def __len__(self):
+        return len(self.nomes)
+
+    def nbytes(self):
+        return self.matriz.nbytes + (self.escalas.nbytes if self.escalas is not None else 0)
+
+    def vetores(self, indices=None):
+        """Retorna os embeddings (float32) das linhas pedidas, desfazendo a quantização."""
+        bloco = self.matriz if indices is None else self.matriz[indices]
+        bloco = bloco.astype(np.float32, copy=False)
+        if self.escalas is not None:
+            escalas = self.escalas if indices is None else self.escalas[indices]
+            bloco = bloco * escalas[:, None]
+        return bloco
+
+    def pontuar(self, consultas, indices=None):
+        """Scores de similaridade (cosseno) entre as consultas e as linhas pedidas."""
+        return normalizar(consultas) @ self.vetores(indices).T
+
+    def buscar(self, consultas, k=1):
+        """
+        Busca exata em lote.
+        consultas: array [M, D] (ou [D]) de embeddings.
+        Retorna (indices [M, k], scores [M, k]) em ordem decrescente de score.
+        """
+        consultas = normalizar(consultas)
+        m = consultas.shape[0]
+        if len(self) == 0 or m == 0:
+            return np.zeros((m, 0), dtype=np.int64), np.zeros((m, 0), dtype=np.float32)
+
+        if self.dtype == "float32":
+            return top_k(consultas @ self.matriz.T, k)
+
+        # Tipos quantizados: converte em blocos para limitar a memória temporária
+        melhores_idx = np.zeros((m, 0), dtype=np.int64)
+        melhores_scores = np.zeros((m, 0), dtype=np.float32)
+        for inicio in range(0, len(self), self.TAMANHO_BLOCO):
+            fim = min(inicio + self.TAMANHO_BLOCO, len(self))
+            scores = consultas @ self.vetores(slice(inicio, fim)).T
+            idx, sc = top_k(scores, k)
+            melhores_idx, melhores_scores = _mesclar_top_k(melhores_idx, melhores_scores, idx + inicio, sc, k)
+        return melhores_idx, melhores_scores
+
+# ================================
+# ÍNDICE APROXIMADO (IVF)
+# ================================
+class IndiceIVF:
+    """
+    Índice aproximado por listas invertidas (IVF) em NumPy puro.
+    A galeria é agrupada com k-means esférico; na busca, apenas as
+    'n_sondas' listas com centróides mais próximos são comparadas.
+    """
+    def __init__(self, galeria, n_listas=None, n_sondas=8, iteracoes=10, semente=0):
+        self.galeria = galeria
+        self.n_sondas = n_sondas
+        n = len(galeria)
+        self.n_listas = max(1, min(n, n_listas or int(np.sqrt(n))))
+
+        rng = np.random.default_rng(semente)
+        vetores = galeria.vetores()
+        self.centroides = vetores[rng.choice(n, self.n_listas, replace=False)].copy()
+
+        for _ in range(iteracoes):
+            atribuicao = self._atribuir(vetores)
+            for lista in range(self.n_listas):
+                membros = vetores[atribuicao == lista]
+                if len(membros):
+                    self.centroides[lista] = membros.sum(axis=0)
+            self.centroides = normalizar(self.centroides)
+
+        atribuicao = self._atribuir(vetores)
+        ordem = np.argsort(atribuicao, kind="stable")
+        limites = np.searchsorted(atribuicao[ordem], np.arange(self.n_listas + 1))
+        self.listas = [ordem[limites[i]:limites[i + 1]] for i in range(self.n_listas)]
+
+    def _atribuir(self, vetores):
+        atribuicao = np.empty(len(vetores), dtype=np.int64)
+        for inicio in range(0, len(vetores), GaleriaIndex.TAMANHO_BLOCO):
+            bloco = vetores[inicio:inicio + GaleriaIndex.TAMANHO_BLOCO]
+            atribuicao[inicio:inicio + len(bloco)] = np.argmax(bloco @ self.centroides.T, axis=1)
+        return atribuicao
+
+    def __len__(self):
+        return len(self.galeria)
+
+    @property
+    def nomes(self):
+        return self.galeria.nomes
+
+    def buscar(self, consultas, k=1):
+        """Mesma interface de GaleriaIndex.buscar, com resultado aproximado."""
+        consultas = normalizar(consultas)
+        m = consultas.shape[0]
+        indices = np.full((m, k), -1, dtype=np.int64)
+        scores = np.full((m, k), -np.inf, dtype=np.float32)
+        if m == 0:
+            return indices, scores
+
+        n_sondas = min(self.n_sondas, self.n_listas)
+        sondas, _ = top_k(consultas @ self.centroides.T, n_sondas)
+        for i in range(m):
+            candidatos = np.concatenate([self.listas[lista] for lista in sondas[i]])
+            if len(candidatos) == 0:
+                continue
+            sc = self.galeria.pontuar(consultas[i], candidatos)
+            pos, melhores = top_k(sc, k)
+            indices[i, :pos.shape[1]] = candidatos[pos[0]]
+            scores[i, :pos.shape[1]] = melhores[0]
+        return indices, scores
+
+def criar_indice(embeddings, names, dtype="float32", limite_aproximado=None, n_sondas=8, normalizado=False):
+    """
+    Cria o índice da galeria. Se 'limite_aproximado' for definido e a galeria
+    tiver pelo menos esse número de rostos, usa o IndiceIVF.
+    """
+    galeria = GaleriaIndex(embeddings, names, dtype=dtype, normalizado=normalizado)
+    if limite_aproximado is not None and len(galeria) >= limite_aproximado:
+        return IndiceIVF(galeria, n_sondas=n_sondas)
+    return galeria
+
+# ================================
+# RECARGA DA GALERIA EM SEGUNDO PLANO
+# ================================
+class RecarregadorGaleria(threading.Thread):
+    """
+    Observa o manifesto da galeria e, quando ele muda (novo cadastro), carrega e
+    indexa a nova galeria numa thread separada. O índice pronto fica pendente
+    até o processador trocá-lo entre dois frames com 'obter_pendente'.
+    """
+    def __init__(self, caminho_manifesto, opcoes_indice, intervalo=2.0):
+        super().__init__(daemon=True, name="RecarregadorGaleria")
+        self.caminho_manifesto = caminho_manifesto
+        self.opcoes_indice = opcoes_indice
+        self.intervalo = intervalo
+        self.recargas = 0
+
+        self._assinatura = self._assinatura_atual()
+        self._pendente = None
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+
+    def _assinatura_atual(self):
+        try:
+            stat = os.stat(self.caminho_manifesto)
+            return stat.st_mtime_ns, stat.st_size, stat.st_ino
+        except FileNotFoundError:
+            return None
+
+    def run(self):
+        while not self._parar.wait(self.intervalo):
+            assinatura = self._assinatura_atual()
+            if assinatura is None or assinatura == self._assinatura:
+                continue
+            try:
+                inicio = time.perf_counter()
+                embeddings, names, manifesto = carregar_galeria(self.caminho_manifesto)
+                indice = criar_indice(embeddings, names, normalizado=True, **self.opcoes_indice)
+                duracao_carga = time.perf_counter() - inicio
+            except (OSError, ValueError, KeyError) as e:
+                # Manifesto pode estar no meio de uma gravação; tenta de novo no próximo ciclo
+                print(f"[AVISO] Falha ao recarregar a galeria: {e}")
+                continue
+            self._assinatura = assinatura
+            with self._lock:
+                self._pendente = (indice, manifesto, duracao_carga)
+
+    def obter_pendente(self):
+        """Retorna (indice, manifesto, segundos_de_carga) se houver uma galeria nova pronta, senão None."""
+        if self._pendente is None:
+            return None
+        with self._lock:
+            pendente, self._pendente = self._pendente, None
+        if pendente is not None:
+            self.recargas += 1
+        return pendente
+
+    def parar(self):
+        self._parar.set()
+
+if __name__ == "__main__":
+    SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Ferramentas da galeria de rostos.")
+    parser.add_argument("--migrar", action="store_true", help="Converte o base_dados_alunos.pkl para o formato memmap")
+    parser.add_argument("--pkl", default=os.path.join(SCRIPT_DIR, "base_dados_alunos.pkl"))
+    parser.add_argument("--galeria", default=os.path.join(SCRIPT_DIR, "base_dados_alunos.galeria.json"))
+    args = parser.parse_args()
+
+    if args.migrar:
+        migrar_pickle(args.pkl, args.galeria)
+        print(f"[SUCESSO] '{args.pkl}' migrado para '{args.galeria}'.")
+
+    embeddings, names, manifesto = carregar_galeria(args.galeria)
+    print(f"[INFO] Galeria v{manifesto['versao']} criada em {manifesto['criado_em']}: "
+          f"{manifesto['quantidade']} rostos x {manifesto['dimensao']} dimensões ({embeddings.nbytes / 1e6:.1f} MB).")
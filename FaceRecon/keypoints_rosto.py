@@ -0,0 +1,59 @@
+import numpy as np
+
+# ================================
+# ROSTOS A PARTIR DOS KEYPOINTS DE POSE
+# ================================
+# Template de 5 pontos do ArcFace (recorte 112x112), na ordem do InsightFace:
+# olho à esquerda da imagem, olho à direita, nariz, canto esquerdo e direito da boca.
+TEMPLATE_ARCFACE = np.array([
+    [38.2946, 51.6963], [73.5318, 51.5014], [56.0252, 71.7366],
+    [41.5493, 92.3655], [70.7299, 92.2041],
+], dtype=np.float32)
+CANTOS_TEMPLATE = np.array([[0, 0], [112, 0], [0, 112], [112, 112]], dtype=np.float32)
+
+# Índices COCO da cabeça
+NARIZ, OLHO_ESQ, OLHO_DIR = 0, 1, 2
+
+def _similaridade(origem, destino):
+    """Transformação de similaridade (escala, rotação, translação) por mínimos quadrados: matriz [2, 3]."""
+    media_o, media_d = origem.mean(axis=0), destino.mean(axis=0)
+    o = (origem - media_o) @ np.array([1, 1j])
+    d = (destino - media_d) @ np.array([1, 1j])
+    a = np.vdot(o, d) / np.vdot(o, o)
+    rotacao = np.array([[a.real, -a.imag], [a.imag, a.real]])
+    return np.hstack([rotacao, (media_d - rotacao @ media_o)[:, None]])
+
+def _aplicar(matriz, pontos):
+    return pontos @ matriz[:, :2].T + matriz[:, 2]
+
+def landmarks_de_keypoints(keypoints, conf_min=0.6, distancia_min_olhos=6.0, residuo_max=0.25):
+    """
+    Estima os 5 landmarks do ArcFace a partir dos keypoints COCO da cabeça de uma pessoa.
+    A boca não existe no COCO: vem da similaridade que leva os olhos e o nariz do
+    template aos da pessoa. A caixa do rosto é o recorte 112x112 levado para a imagem.
+
+    Retorna (landmarks [5, 2], bbox [4], score) ou None quando a cabeça não serve:
+    olhos ou nariz com baixa confiança, rosto pequeno demais, pessoa de costas ou
+    geometria que não bate com um rosto frontal (perfil).
+    """
+    nariz, olho_esq, olho_dir = keypoints[NARIZ], keypoints[OLHO_ESQ], keypoints[OLHO_DIR]
+    if min(nariz[2], olho_esq[2], olho_dir[2]) < conf_min:
+        return None
+    # O olho esquerdo da pessoa aparece à direita na imagem quando ela está de frente
+    if olho_esq[0] <= olho_dir[0]:
+        return None
+    distancia_olhos = float(np.hypot(olho_esq[0] - olho_dir[0], olho_esq[1] - olho_dir[1]))
+    if distancia_olhos < distancia_min_olhos:
+        return None
+
+    destino = np.array([olho_dir[:2], olho_esq[:2], nariz[:2]], dtype=np.float64)
+    matriz = _similaridade(TEMPLATE_ARCFACE[:3].astype(np.float64), destino)
+    residuo = np.sqrt(((_aplicar(matriz, TEMPLATE_ARCFACE[:3]) - destino) ** 2).sum(axis=1).mean())
+    if residuo / distancia_olhos > residuo_max:
+        return None
+
+    landmarks = _aplicar(matriz, TEMPLATE_ARCFACE).astype(np.float32)
+    cantos = _aplicar(matriz, CANTOS_TEMPLATE)
+    bbox = np.concatenate([cantos.min(axis=0), cantos.max(axis=0)]).astype(np.float32)
+    score = float(min(nariz[2], olho_esq[2], olho_dir[2]))
+    return landmarks, bbox, score
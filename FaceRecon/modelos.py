@@ -0,0 +1,232 @@
+import argparse
+import math
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comum.perfil import PerfilInicializacao
+
+PROVEDORES = ['CPUExecutionProvider']
+
+# ================================
+# SESSÕES ONNX COM CACHE
+# ================================
+def criar_sessao(caminho, diretorio_cache=None):
+    """
+    InferenceSession do onnxruntime para 'caminho'. Com 'diretorio_cache', a primeira
+    execução grava o grafo já otimizado (fusões e layout específicos desta CPU e desta
+    versão do onnxruntime); as seguintes carregam esse arquivo sem repetir as otimizações.
+    """
+    import onnxruntime
+
+    opcoes = onnxruntime.SessionOptions()
+    if diretorio_cache is None:
+        return onnxruntime.InferenceSession(caminho, sess_options=opcoes, providers=PROVEDORES)
+
+    info = os.stat(caminho)
+    base = os.path.splitext(os.path.basename(caminho))[0]
+    cache = os.path.join(diretorio_cache, f"{base}.{info.st_size}-{int(info.st_mtime)}.ort{onnxruntime.__version__}.onnx")
+    if os.path.exists(cache):
+        opcoes.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
+        try:
+            return onnxruntime.InferenceSession(cache, sess_options=opcoes, providers=PROVEDORES)
+        except Exception as e:
+            print(f"[AVISO] Cache de sessão inválido ({e}); recriando '{cache}'")
+            os.remove(cache)
+            opcoes = onnxruntime.SessionOptions()
+
+    os.makedirs(diretorio_cache, exist_ok=True)
+    # Vários processos (cadastro, multiprocesso) podem criar o mesmo cache: grava à parte e troca atomicamente
+    temporario = f"{cache}.{os.getpid()}.tmp"
+    opcoes.optimized_model_filepath = temporario
+    sessao = onnxruntime.InferenceSession(caminho, sess_options=opcoes, providers=PROVEDORES)
+    if os.path.exists(temporario):
+        os.replace(temporario, cache)
+    return sessao
+
+# ================================
+# DETECTOR DE PESSOAS (YOLO)
+# ================================
+class DetectorPessoasYOLO:
+    """YOLO pelo ultralytics (PyTorch)."""
+    def __init__(self, modelo):
+        self.modelo = modelo
+
+    def detectar(self, frames, imgsz):
+        """Lote de frames -> por frame, [(bbox [x1, y1, x2, y2], confiança), ...]."""
+        pessoas_lote = []
+        for r in self.modelo(frames, classes=[0], imgsz=imgsz, verbose=False):
+            pessoas_lote.append([(box.xyxy[0].numpy().astype(int), float(box.conf[0])) for box in r.boxes])
+        return pessoas_lote
+
+class DetectorPessoasONNX:
+    """
+    YOLOv8 exportado para ONNX rodando direto no onnxruntime, sem importar PyTorch nem
+    ultralytics. Pré e pós-processamento equivalentes aos do ultralytics: letterbox com
+    borda 114, confiança mínima 0.25 e NMS com IoU 0.7, só a classe pessoa.
+    Com eixos dinâmicos (exportar_yolo) o imgsz pode mudar entre chamadas.
+    """
+    def __init__(self, sessao, conf=0.25, iou=0.7, classe=0, passo=32):
+        self.sessao = sessao
+        self.conf = conf
+        self.iou = iou
+        self.classe = classe
+        self.passo = passo
+        entrada = sessao.get_inputs()[0]
+        self.entrada = entrada.name
+        # Eixos dinâmicos aparecem como texto na forma da entrada
+        self.tamanho_fixo = entrada.shape[2] if isinstance(entrada.shape[2], int) else None
+
+    def _letterbox(self, frame, imgsz):
+        h, w = frame.shape[:2]
+        r = min(imgsz / h, imgsz / w)
+        novo_w, novo_h = round(w * r), round(h * r)
+        if self.tamanho_fixo:
+            alvo_w = alvo_h = self.tamanho_fixo
+        else:
+            alvo_w = math.ceil(novo_w / self.passo) * self.passo
+            alvo_h = math.ceil(novo_h / self.passo) * self.passo
+        if (novo_w, novo_h) != (w, h):
+            frame = cv2.resize(frame, (novo_w, novo_h), interpolation=cv2.INTER_LINEAR)
+        dw, dh = (alvo_w - novo_w) / 2, (alvo_h - novo_h) / 2
+        topo, esquerda = round(dh - 0.1), round(dw - 0.1)
+        frame = cv2.copyMakeBorder(frame, topo, round(dh + 0.1), esquerda, round(dw + 0.1),
+                                   cv2.BORDER_CONSTANT, value=(114, 114, 114))
+        return frame, r, (esquerda, topo)
+
+    def _pessoas(self, saida, r, deslocamento, forma):
+        # saida: [4 + classes, N] com caixas (cx, cy, w, h) na imagem com letterbox
+        scores = saida[4 + self.classe]
+        # Como no ultralytics com classes=[0]: a caixa é pessoa só se pessoa for a melhor classe
+        manter = (scores > self.conf) & (saida[4:].argmax(axis=0) == self.classe)
+        if not np.any(manter):
+            return []
+        cx, cy, bw, bh = saida[:4, manter]
+        scores = scores[manter]
+        caixas = np.stack([cx - bw / 2, cy - bh / 2, bw, bh], axis=1)
+        indices = cv2.dnn.NMSBoxes(caixas.tolist(), scores.tolist(), self.conf, self.iou)
+        pessoas = []
+        h, w = forma[:2]
+        for i in np.asarray(indices).reshape(-1)[:300]:
+            x, y, bw_i, bh_i = caixas[i]
+            x1 = (x - deslocamento[0]) / r
+            y1 = (y - deslocamento[1]) / r
+            bbox = np.array([np.clip(x1, 0, w), np.clip(y1, 0, h),
+                             np.clip(x1 + bw_i / r, 0, w), np.clip(y1 + bh_i / r, 0, h)])
+            pessoas.append((bbox.astype(int), float(scores[i])))
+        return pessoas
+
+    def detectar(self, frames, imgsz):
+        """Lote de frames -> por frame, [(bbox [x1, y1, x2, y2], confiança), ...]."""
+        preparados = [self._letterbox(frame, imgsz) for frame in frames]
+        pessoas_lote = [None] * len(frames)
+        # Frames com a mesma forma depois do letterbox vão juntos para o modelo
+        grupos = {}
+        for i, (imagem, _, _) in enumerate(preparados):
+            grupos.setdefault(imagem.shape, []).append(i)
+        for indices in grupos.values():
+            lote = np.stack([preparados[i][0] for i in indices])
+            lote = np.ascontiguousarray(lote[..., ::-1].transpose(0, 3, 1, 2), dtype=np.float32) / 255.0
+            saidas = self.sessao.run(None, {self.entrada: lote})[0]
+            for i, saida in zip(indices, saidas):
+                _, r, deslocamento = preparados[i]
+                pessoas_lote[i] = self._pessoas(saida, r, deslocamento, frames[i].shape)
+        return pessoas_lote
+
+def carregar_detector_pessoas(caminho_pt, caminho_onnx=None, diretorio_cache=None, perfil=None):
+    """
+    Usa o YOLO em ONNX quando 'caminho_onnx' existe (sem PyTorch na memória nem no
+    tempo de partida) e, senão, o .pt pelo ultralytics.
+    """
+    perfil = perfil or PerfilInicializacao()
+    if caminho_onnx and os.path.exists(caminho_onnx):
+        with perfil.medir("import_onnxruntime"):
+            import onnxruntime  # noqa: F401
+        with perfil.medir("carga_yolo_onnx"):
+            return DetectorPessoasONNX(criar_sessao(caminho_onnx, diretorio_cache))
+    with perfil.medir("import_ultralytics"):
+        from ultralytics import YOLO # type: ignore
+    with perfil.medir("carga_yolo"):
+        return DetectorPessoasYOLO(YOLO(caminho_pt))
+
+def exportar_yolo(caminho_pt, imgsz=640):
+    """Exporta o .pt para ONNX com eixos dinâmicos (lote e imgsz variáveis); requer o ultralytics."""
+    from ultralytics import YOLO # type: ignore
+    return YOLO(caminho_pt).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+
+# ================================
+# ANÁLISE FACIAL (SÓ DETECÇÃO E RECONHECIMENTO)
+# ================================
+# Arquivos de cada pacote do InsightFace que o projeto usa; o resto do pacote
+# (gênero/idade e landmarks 2D/3D) nunca é carregado
+ARQUIVOS_PACOTE = {
+    "buffalo_l": {"detection": "det_10g.onnx", "recognition": "w600k_r50.onnx"},
+    "buffalo_s": {"detection": "det_500m.onnx", "recognition": "w600k_mbf.onnx"},
+}
+
+class AnaliseFacial:
+    """
+    O subconjunto do FaceAnalysis do InsightFace usado aqui: detecção e reconhecimento,
+    com a mesma interface (det_model, models, prepare, get) para o código e os benchmarks.
+    """
+    def __init__(self, det_model, rec_model):
+        from insightface.app.common import Face
+        from insightface.utils import face_align
+
+        self.det_model = det_model
+        self.models = {"detection": det_model, "recognition": rec_model}
+        self.criar_face = Face
+        self.norm_crop = face_align.norm_crop
+
+    def prepare(self, ctx_id=0, det_thresh=0.5, det_size=(640, 640)):
+        self.det_model.prepare(ctx_id, input_size=det_size, det_thresh=det_thresh)
+        self.models["recognition"].prepare(ctx_id)
+
+    def get(self, img, max_num=0):
+        bboxes, kpss = self.det_model.detect(img, max_num=max_num, metric='default')
+        faces = []
+        for i in range(bboxes.shape[0]):
+            face = self.criar_face(bbox=bboxes[i, 0:4], kps=kpss[i] if kpss is not None else None, det_score=bboxes[i, 4])
+            self.models["recognition"].get(img, face)
+            faces.append(face)
+        return faces
+
+def carregar_analise_facial(nome='buffalo_l', diretorio_cache=None, perfil=None):
+    """
+    Carrega só o detector e o modelo de reconhecimento do pacote 'nome', com as sessões
+    do onnxruntime vindas do cache. Pacotes desconhecidos caem no FaceAnalysis com
+    allowed_modules.
+    """
+    perfil = perfil or PerfilInicializacao()
+    with perfil.medir("import_insightface"):
+        import insightface
+        from insightface.model_zoo.arcface_onnx import ArcFaceONNX
+        from insightface.model_zoo.retinaface import RetinaFace
+        from insightface.utils.storage import ensure_available
+
+    with perfil.medir("carga_insightface"):
+        arquivos = ARQUIVOS_PACOTE.get(nome)
+        if arquivos is None:
+            app = insightface.app.FaceAnalysis(name=nome, allowed_modules=['detection', 'recognition'],
+                                               providers=PROVEDORES)
+            return AnaliseFacial(app.det_model, app.models['recognition'])
+        pasta = ensure_available('models', nome, root='~/.insightface')
+        caminhos = {tarefa: os.path.join(pasta, arquivo) for tarefa, arquivo in arquivos.items()}
+        det_model = RetinaFace(model_file=caminhos["detection"],
+                               session=criar_sessao(caminhos["detection"], diretorio_cache))
+        rec_model = ArcFaceONNX(model_file=caminhos["recognition"],
+                                session=criar_sessao(caminhos["recognition"], diretorio_cache))
+        return AnaliseFacial(det_model, rec_model)
+
+# ================================
+# EXPORTAÇÃO (UMA VEZ, NUMA MÁQUINA COM O ULTRALYTICS)
+# ================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta o YOLO para ONNX, para a partida rápida sem PyTorch.")
+    parser.add_argument("--modelo", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "yolov8n.pt"))
+    parser.add_argument("--imgsz", type=int, default=640)
+    args = parser.parse_args()
+    print(f"[INFO] Modelo exportado: {exportar_yolo(args.modelo, args.imgsz)}")
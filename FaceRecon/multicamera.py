@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import deque
+
+from comum.captura import abrir_fonte
+from pipeline import CapturaThread, MedidorFPS
+
+# ================================
+# ESTATÍSTICAS POR CÂMERA
+# ================================
+class EstatisticasStream:
+    def __init__(self):
+        self.fps_inferencia = MedidorFPS()
+        self.latencias = deque(maxlen=100)
+        self.processados = 0
+        self.descartados = 0
+
+    def registrar(self, latencia_ms, descartados=0):
+        self.processados += 1
+        self.descartados += descartados
+        self.latencias.append(latencia_ms)
+        self.fps_inferencia.marcar()
+
+# ================================
+# PROCESSADOR DE MÚLTIPLAS CÂMERAS
+# ================================
+class ProcessadorMultiCamera(threading.Thread):
+    """
+    Uma CapturaThread por câmera; a cada ciclo pega o frame mais novo de cada
+    câmera que tem frame novo e processa todos juntos com ProcessadorCV.processar_lote
+    (YOLO em lote, análise facial por câmera).
+
+    Escalonamento justo: cada câmera contribui com no máximo um frame por ciclo,
+    então uma câmera com FPS alto não atrasa as outras. Com 'max_lote' menor que o
+    número de câmeras, a ordem de atendimento gira (round-robin) entre os ciclos.
+
+    Com 'criar_agendador', cada câmera ganha seu AgendadorInferencia: câmeras com
+    cena parada deixam de entrar no lote, exceto nos frames de keep-alive. O FPS máximo
+    do ControladorAdaptativo do 'pcv' (se houver) vale para cada câmera.
+    """
+    def __init__(self, pcv, fontes, max_lote=None, criar_agendador=None):
+        super().__init__(daemon=True, name="ProcessadorMultiCamera")
+        self.pcv = pcv
+        self.fontes = list(fontes)
+        self.max_lote = max_lote or len(self.fontes)
+
+        self.capturas = {}
+        for stream_id, fonte in enumerate(self.fontes):
+            cap, fps_alvo = abrir_fonte(fonte)
+            if not cap.isOpened():
+                # As câmeras já abertas não são liberadas por ninguém se o construtor falhar
+                cap.release()
+                for captura in self.capturas.values():
+                    captura.cap.release()
+                raise RuntimeError(f"Não foi possível abrir a fonte de vídeo '{fonte}'")
+            self.capturas[stream_id] = CapturaThread(cap, fps_alvo=fps_alvo, nome=f"Captura-{stream_id}")
+
+        self.stats = {stream_id: EstatisticasStream() for stream_id in self.capturas}
+        self.agendadores = {stream_id: criar_agendador() for stream_id in self.capturas} if criar_agendador else {}
+        self._ultimo_seq = {stream_id: 0 for stream_id in self.capturas}
+        self._resultados = {stream_id: (0, 0.0, {"faces": [], "persons": []}) for stream_id in self.capturas}
+        self._inicio_rodizio = 0
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+
+    def iniciar(self):
+        for captura in self.capturas.values():
+            captura.start()
+        self.start()
+
+    def ativas(self):
+        return [stream_id for stream_id, captura in self.capturas.items() if not captura.falhou]
+
+    def _coletar(self):
+        """Frames novos, no máximo um por câmera e 'max_lote' no total, em rodízio."""
+        ids = list(self.capturas)
+        ordem = ids[self._inicio_rodizio:] + ids[:self._inicio_rodizio]
+        prontos = []
+        for stream_id in ordem:
+            seq, timestamp, frame = self.capturas[stream_id].ultimo_frame()
+            if seq > self._ultimo_seq[stream_id]:
+                agendador = self.agendadores.get(stream_id)
+                controlador = self.pcv.controlador
+                if ((agendador is not None and not agendador.deve_processar(frame, timestamp))
+                        or (controlador is not None and not controlador.deve_processar(frame, timestamp, stream_id))):
+                    self.stats[stream_id].descartados += seq - self._ultimo_seq[stream_id] - 1
+                    self._ultimo_seq[stream_id] = seq
+                    continue
+                prontos.append((stream_id, seq, timestamp, frame))
+                if len(prontos) >= self.max_lote:
+                    break
+        if prontos:
+            self._inicio_rodizio = (ids.index(prontos[-1][0]) + 1) % len(ids)
+        return prontos
+
+    def run(self):
+        while not self._parar.is_set() and self.ativas():
+            prontos = self._coletar()
+            if not prontos:
+                time.sleep(0.002)
+                continue
+
+            inicio = time.perf_counter()
+            resultados = self.pcv.processar_lote({stream_id: frame for stream_id, _, _, frame in prontos})
+            duracao = (time.perf_counter() - inicio) / len(prontos)
+            agora = time.monotonic()
+            with self._lock:
+                for stream_id, seq, timestamp, _ in prontos:
+                    descartados = seq - self._ultimo_seq[stream_id] - 1
+                    self._ultimo_seq[stream_id] = seq
+                    self._resultados[stream_id] = (seq, timestamp, resultados[stream_id])
+                    self.stats[stream_id].registrar((agora - timestamp) * 1000, descartados)
+                    if stream_id in self.agendadores:
+                        self.agendadores[stream_id].registrar_inferencia(duracao)
+
+    def ultimos_resultados(self, stream_id):
+        """Retorna (seq, timestamp_do_frame, resultados) da câmera, com 'stream' nos resultados."""
+        with self._lock:
+            seq, timestamp, resultados = self._resultados[stream_id]
+        return seq, timestamp, dict(resultados, stream=stream_id)
+
+    def estatisticas(self):
+        relatorio = {}
+        for stream_id, captura in self.capturas.items():
+            stats = self.stats[stream_id]
+            latencias = list(stats.latencias)
+            relatorio[stream_id] = {
+                "fonte": self.fontes[stream_id],
+                "fps_captura": captura.fps.fps(),
+                "fps_inferencia": stats.fps_inferencia.fps(),
+                "processados": stats.processados,
+                "descartados": stats.descartados,
+                "latencia_media_ms": sum(latencias) / len(latencias) if latencias else 0.0,
+                "latencia_max_ms": max(latencias) if latencias else 0.0,
+                "ativa": not captura.falhou,
+            }
+            if stream_id in self.agendadores:
+                relatorio[stream_id]["agendamento"] = self.agendadores[stream_id].estatisticas()
+        return relatorio
+
+    def parar(self):
+        self._parar.set()
+        for captura in self.capturas.values():
+            captura.parar()
+        self.join(timeout=2.0)
+        for captura in self.capturas.values():
+            captura.join(timeout=2.0)
+            captura.cap.release()
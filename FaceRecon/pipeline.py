@@ -0,0 +1,225 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from preprocessamento import PoolFrames
+
+# ================================
+# MEDIDOR DE TAXA (FPS)
+# ================================
+class MedidorFPS:
+    """
+    Mede a taxa de eventos por segundo numa janela deslizante de tempo.
+    """
+    def __init__(self, janela_segundos=2.0):
+        self.janela_segundos = janela_segundos
+        self._marcas = deque()
+        self._lock = threading.Lock()
+
+    def marcar(self, agora=None):
+        agora = time.monotonic() if agora is None else agora
+        with self._lock:
+            self._marcas.append(agora)
+            limite = agora - self.janela_segundos
+            while self._marcas and self._marcas[0] < limite:
+                self._marcas.popleft()
+
+    def fps(self):
+        with self._lock:
+            if len(self._marcas) < 2:
+                return 0.0
+            duracao = self._marcas[-1] - self._marcas[0]
+            return (len(self._marcas) - 1) / duracao if duracao > 0 else 0.0
+
+# ================================
+# ESTÁGIO DE CAPTURA
+# ================================
+class CapturaThread(threading.Thread):
+    """
+    Lê a câmera continuamente e guarda apenas o frame mais recente.
+    Frames antigos são descartados, então o buffer da câmera nunca acumula atraso.
+    """
+    def __init__(self, cap, fps_alvo=None, nome="CapturaThread"):
+        super().__init__(daemon=True, name=nome)
+        self.cap = cap
+        # Para arquivos de vídeo: limita a leitura ao FPS original em vez de ler o mais rápido possível
+        self.fps_alvo = fps_alvo
+        self.fps = MedidorFPS()
+        self.falhou = False
+        # O cap.read grava num buffer já alocado quando nenhuma outra thread o usa mais
+        self.pool = PoolFrames()
+
+        self._cond = threading.Condition()
+        self._frame = None
+        self._seq = 0
+        self._timestamp = 0.0
+        self._parar = threading.Event()
+
+    def run(self):
+        proxima_leitura = time.monotonic()
+        while not self._parar.is_set():
+            if self.fps_alvo:
+                espera = proxima_leitura - time.monotonic()
+                if espera > 0:
+                    time.sleep(espera)
+                proxima_leitura = max(proxima_leitura + 1.0 / self.fps_alvo, time.monotonic() - 1.0)
+            ret, frame = self.pool.ler(self.cap)
+            if not ret:
+                print("[ERRO] Falha ao ler frame da câmera")
+                self.falhou = True
+                break
+            agora = time.monotonic()
+            self.fps.marcar(agora)
+            with self._cond:
+                self._frame = frame
+                self._seq += 1
+                self._timestamp = agora
+                self._cond.notify_all()
+        with self._cond:
+            self._cond.notify_all()
+
+    def ultimo_frame(self):
+        """Retorna (seq, timestamp, frame) do frame mais recente, sem esperar."""
+        with self._cond:
+            return self._seq, self._timestamp, self._frame
+
+    def esperar_novo(self, seq_anterior, timeout=0.5):
+        """
+        Bloqueia até existir um frame com seq maior que 'seq_anterior'.
+        Retorna (seq, timestamp, frame) ou None se a captura terminou/expirou.
+        """
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._seq > seq_anterior or self.falhou or self._parar.is_set(),
+                timeout=timeout
+            )
+            if self._seq > seq_anterior:
+                return self._seq, self._timestamp, self._frame
+            return None
+
+    def parar(self):
+        self._parar.set()
+
+# ================================
+# ESTÁGIO DE INFERÊNCIA
+# ================================
+class InferenciaThread(threading.Thread):
+    """
+    Processa sempre o frame mais novo disponível quando fica livre
+    (latest-frame-wins): frames que chegaram durante uma inferência são ignorados.
+    Com um 'agendador' (AgendadorInferencia), frames de cena parada são pulados
+    e os últimos resultados continuam valendo. Um 'controlador' (ControladorAdaptativo)
+    limita a taxa de inferência quando o ponto de operação atual tem FPS máximo.
+    """
+    def __init__(self, captura, processar, agendador=None, controlador=None):
+        super().__init__(daemon=True, name="InferenciaThread")
+        self.captura = captura
+        self.processar = processar
+        self.agendador = agendador
+        self.controlador = controlador
+        self.fps = MedidorFPS()
+        # Frames capturados que nunca chegaram à inferência (sobrescritos por um mais novo)
+        self.descartados = 0
+
+        self._lock = threading.Lock()
+        self._resultados = {"faces": [], "persons": []}
+        self._seq_resultado = 0
+        self._timestamp_resultado = 0.0
+        self._parar = threading.Event()
+
+    def run(self):
+        seq_processado = 0
+        while not self._parar.is_set():
+            novo = self.captura.esperar_novo(seq_processado)
+            if novo is None:
+                if self.captura.falhou:
+                    break
+                continue
+            seq, timestamp, frame = novo
+            self.descartados += seq - seq_processado - 1
+            if self.agendador is not None and not self.agendador.deve_processar(frame, timestamp):
+                seq_processado = seq
+                continue
+            if self.controlador is not None and not self.controlador.deve_processar(frame, timestamp):
+                seq_processado = seq
+                continue
+            inicio = time.perf_counter()
+            resultados = self.processar(frame)
+            if self.agendador is not None:
+                self.agendador.registrar_inferencia(time.perf_counter() - inicio)
+            seq_processado = seq
+            self.fps.marcar()
+            with self._lock:
+                self._resultados = resultados
+                self._seq_resultado = seq
+                self._timestamp_resultado = timestamp
+
+    def ultimos_resultados(self):
+        """Retorna (seq, timestamp_do_frame, resultados) da última inferência concluída."""
+        with self._lock:
+            return self._seq_resultado, self._timestamp_resultado, self._resultados
+
+    def parar(self):
+        self._parar.set()
+
+# ================================
+# ORQUESTRADOR DO PIPELINE
+# ================================
+class PipelineCV:
+    """
+    Liga captura -> inferência -> renderização em estágios independentes.
+    A renderização (thread principal) desenha o frame mais novo com os
+    resultados mais recentes e mede a idade desses resultados.
+    """
+    def __init__(self, cap, processar, intervalo_relatorio=5.0, fps_alvo=None, agendador=None, controlador=None):
+        self.captura = CapturaThread(cap, fps_alvo=fps_alvo)
+        self.inferencia = InferenciaThread(self.captura, processar, agendador=agendador, controlador=controlador)
+        self.fps_render = MedidorFPS()
+        self.intervalo_relatorio = intervalo_relatorio
+        self._idades = deque(maxlen=100)
+
+    def iniciar(self):
+        self.captura.start()
+        self.inferencia.start()
+
+    def parar(self):
+        self.inferencia.parar()
+        self.captura.parar()
+        self.inferencia.join(timeout=2.0)
+        self.captura.join(timeout=2.0)
+
+    def proximo(self, seq_anterior):
+        """
+        Retorna (seq, frame, resultados, idade_ms) para o próximo frame a ser desenhado,
+        ou None se a captura terminou.
+        'idade_ms' é o tempo desde a captura do frame que gerou os resultados.
+        """
+        novo = self.captura.esperar_novo(seq_anterior)
+        if novo is None:
+            return None
+        seq, _, frame = novo
+        seq_res, ts_res, resultados = self.inferencia.ultimos_resultados()
+        idade_ms = (time.monotonic() - ts_res) * 1000 if seq_res else 0.0
+        if seq_res:
+            self._idades.append(idade_ms)
+        self.fps_render.marcar()
+        return seq, frame, resultados, idade_ms
+
+    def estatisticas(self):
+        idades = list(self._idades)
+        return {
+            "fps_captura": self.captura.fps.fps(),
+            "fps_inferencia": self.inferencia.fps.fps(),
+            "fps_render": self.fps_render.fps(),
+            "descartados": self.inferencia.descartados,
+            "idade_media_ms": sum(idades) / len(idades) if idades else 0.0,
+            "idade_max_ms": max(idades) if idades else 0.0,
+        }
+
+    def desenhar_estatisticas(self, frame):
+        stats = self.estatisticas()
+        texto = (f"Cap {stats['fps_captura']:.1f} | Inf {stats['fps_inferencia']:.1f} FPS"
+                 f" | Idade {stats['idade_media_ms']:.0f} ms")
+        cv2.putText(frame, texto, (10, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
@@ -0,0 +1,85 @@
+import sys
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+# ================================
+# LUT DE GAMMA (CACHE POR VALOR)
+# ================================
+@lru_cache(maxsize=16)
+def lut_gamma(gamma):
+    """Tabela de 256 entradas para cv2.LUT, calculada uma vez por valor de gamma."""
+    inv_gamma = 1.0 / max(gamma, 0.01)
+    tabela = (((np.arange(256) / 255.0) ** inv_gamma) * 255).astype(np.uint8)
+    tabela.flags.writeable = False
+    return tabela
+
+# ================================
+# GAMMA + REDUÇÃO SEM ALOCAÇÃO POR FRAME
+# ================================
+class Preprocessador:
+    """
+    Reduz o frame e aplica o gamma num buffer de saída reaproveitado (um por stream).
+    A redução vem primeiro: com SCALE_FACTOR 0.5 o LUT passa por 1/4 dos pixels, e o
+    gamma é aplicado no próprio buffer (dst=), sem o frame intermediário em tamanho cheio.
+    O buffer devolvido vale até a próxima chamada para o mesmo stream.
+    """
+    def __init__(self):
+        self._buffers = {}
+
+    def preparar(self, frame, escala, gamma, stream_id=None):
+        altura, largura = frame.shape[:2]
+        tamanho = (max(1, round(largura * escala)), max(1, round(altura * escala)))
+        forma = (tamanho[1], tamanho[0]) + frame.shape[2:]
+
+        buffer = self._buffers.get(stream_id)
+        if buffer is None or buffer.shape != forma or buffer.dtype != frame.dtype:
+            buffer = self._buffers[stream_id] = np.empty(forma, dtype=frame.dtype)
+        cv2.resize(frame, tamanho, dst=buffer, interpolation=cv2.INTER_LINEAR)
+        cv2.LUT(buffer, lut_gamma(gamma), dst=buffer)
+        return buffer
+
+# ================================
+# BUFFERS DE CAPTURA REAPROVEITADOS
+# ================================
+class PoolFrames:
+    """
+    Buffers para cap.read(image=...). Um buffer só é reaproveitado quando nada mais o
+    referencia: nem o frame mais novo publicado pela captura, nem a inferência ou a
+    renderização que ainda estão usando um frame anterior (contagem de referências do CPython).
+    Sem buffer livre, o cap.read aloca um novo, que entra no pool até 'maximo'.
+    """
+    # Referências de um buffer livre: a lista do pool e o argumento de getrefcount
+    _REFS_LIVRE = 2
+
+    def __init__(self, maximo=5):
+        self.maximo = maximo
+        self.alocacoes = 0
+        self._buffers = []
+
+    def _livre(self):
+        # Sem enumerate nem variável de laço: ambos seguram uma referência extra ao buffer
+        for i in range(len(self._buffers)):
+            if sys.getrefcount(self._buffers[i]) <= self._REFS_LIVRE:
+                return i
+        return None
+
+    def ler(self, cap):
+        i = self._livre()
+        if i is None:
+            ret, frame = cap.read()
+        else:
+            ret, frame = cap.read(self._buffers[i])
+        if not ret:
+            return ret, frame
+
+        if i is None:
+            self.alocacoes += 1
+            if len(self._buffers) < self.maximo:
+                self._buffers.append(frame)
+        elif frame is not self._buffers[i]:
+            # Resolução mudou: o OpenCV alocou outro array, que substitui o buffer antigo
+            self.alocacoes += 1
+            self._buffers[i] = frame
+        return ret, frame
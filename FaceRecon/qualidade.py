@@ -0,0 +1,214 @@
+import math
+from collections import Counter
+
+import cv2
+import numpy as np
+
+from keypoints_rosto import TEMPLATE_ARCFACE
+
+# ================================
+# POSE E NITIDEZ DO ROSTO
+# ================================
+# No template do ArcFace (rosto de frente) o nariz fica nesta fração do caminho entre a
+# linha dos olhos e a linha da boca
+_OLHOS_TEMPLATE = TEMPLATE_ARCFACE[:2].mean(axis=0)
+_BOCA_TEMPLATE = TEMPLATE_ARCFACE[3:].mean(axis=0)
+RAZAO_NARIZ_FRONTAL = float((TEMPLATE_ARCFACE[2, 1] - _OLHOS_TEMPLATE[1]) / (_BOCA_TEMPLATE[1] - _OLHOS_TEMPLATE[1]))
+# Quanto a ponta do nariz se projeta à frente do plano olhos-boca, em distâncias entre os olhos
+# (média antropométrica); a mesma profundidade relativa à altura olhos-boca do template
+PROFUNDIDADE_NARIZ = 0.5
+_PROFUNDIDADE_VERTICAL = PROFUNDIDADE_NARIZ * float(TEMPLATE_ARCFACE[1, 0] - TEMPLATE_ARCFACE[0, 0]) / float(
+    _BOCA_TEMPLATE[1] - _OLHOS_TEMPLATE[1])
+
+def estimar_pose(kps):
+    """
+    Yaw e pitch aproximados (graus, em módulo) a partir dos 5 landmarks do InsightFace.
+    O roll é desfeito pela linha dos olhos; o desvio do nariz em relação ao eixo do rosto
+    (meio dos olhos -> meio da boca) vira ângulo pela profundidade média do nariz.
+    Serve para separar rostos de frente de rostos virados, não para medir a pose.
+    """
+    kps = np.asarray(kps, dtype=np.float64)
+    olhos = (kps[0] + kps[1]) / 2
+    distancia_olhos = float(np.hypot(*(kps[1] - kps[0])))
+    if distancia_olhos < 1e-6:
+        return 90.0, 90.0
+    eixo_u = (kps[1] - kps[0]) / distancia_olhos
+    eixo_v = np.array([-eixo_u[1], eixo_u[0]])
+    nariz = kps[2] - olhos
+    boca = (kps[3] + kps[4]) / 2 - olhos
+    altura = float(boca @ eixo_v)
+    if altura <= 1e-6:
+        # Boca acima dos olhos: landmarks de um rosto de cabeça para baixo ou degenerado
+        return 90.0, 90.0
+    nariz_u, nariz_v = float(nariz @ eixo_u), float(nariz @ eixo_v)
+    desvio_u = nariz_u - float(boca @ eixo_u) * nariz_v / altura
+    desvio_v = nariz_v - RAZAO_NARIZ_FRONTAL * altura
+    yaw = math.degrees(math.atan(abs(desvio_u) / distancia_olhos / PROFUNDIDADE_NARIZ))
+    pitch = math.degrees(math.atan(abs(desvio_v) / altura / _PROFUNDIDADE_VERTICAL))
+    return yaw, pitch
+
+def medir_nitidez(imagem, bbox, lado=32, margem=0.1):
+    """
+    Variância do Laplaciano do miolo do rosto (sem 'margem' de cada lado, onde entram
+    cabelo e fundo), em tons de cinza e reamostrado para 'lado' x 'lado': o valor não
+    depende do tamanho do rosto na imagem.
+    """
+    x1, y1, x2, y2 = (float(v) for v in bbox[:4])
+    dx, dy = (x2 - x1) * margem, (y2 - y1) * margem
+    h, w = imagem.shape[:2]
+    x1, y1 = max(0, int(x1 + dx)), max(0, int(y1 + dy))
+    x2, y2 = min(w, int(x2 - dx)), min(h, int(y2 - dy))
+    if x2 - x1 < 2 or y2 - y1 < 2:
+        return 0.0
+    recorte = imagem[y1:y2, x1:x2]
+    interpolacao = cv2.INTER_AREA if min(x2 - x1, y2 - y1) > lado else cv2.INTER_LINEAR
+    recorte = cv2.resize(recorte, (lado, lado), interpolation=interpolacao)
+    cinza = cv2.cvtColor(recorte, cv2.COLOR_BGR2GRAY) if recorte.ndim == 3 else recorte
+    return float(cv2.Laplacian(cinza, cv2.CV_32F).var())
+
+# ================================
+# FILTRO DE QUALIDADE ANTES DO RECONHECIMENTO
+# ================================
+MOTIVOS = ("confianca", "tamanho", "pose", "nitidez")
+
+class AvaliacaoQualidade:
+    """Medidas de um rosto e o primeiro critério reprovado ('motivo' None quando passa)."""
+    def __init__(self, det_score, lado, yaw=None, pitch=None, nitidez=None, motivo=None):
+        self.det_score = det_score
+        self.lado = lado
+        self.yaw = yaw
+        self.pitch = pitch
+        self.nitidez = nitidez
+        self.motivo = motivo
+
+    @property
+    def aprovada(self):
+        return self.motivo is None
+
+class FiltroQualidade:
+    """
+    Decide quais rostos valem um embedding. Os critérios vão do mais barato ao mais caro:
+    confiança da detecção, lado da caixa (pixels da imagem que vai para o reconhecimento),
+    yaw/pitch pelos landmarks e, por último, a nitidez, único que lê pixels.
+
+    Rosto reprovado não passa pelo modelo de reconhecimento nem pela galeria: trilha já
+    identificada mantém a identidade; trilha nova fica adiada (sem nome, sem log e sem
+    alerta) até aparecer um frame bom. As contagens estimam o tempo de reconhecimento
+    poupado e quantas trilhas deixaram de virar NAO ALUNO.
+    """
+    def __init__(self, det_min=0.6, lado_min=24, yaw_max=40.0, pitch_max=30.0, nitidez_min=50.0, lado_bom=56):
+        self.det_min = det_min
+        self.lado_min = lado_min
+        self.yaw_max = yaw_max
+        self.pitch_max = pitch_max
+        self.nitidez_min = nitidez_min
+        self.lado_bom = lado_bom
+
+        self.avaliados = 0
+        self.aprovados = 0
+        self.reprovados = Counter()
+        self.mantidos = 0
+        self.adiados = 0
+        self.trilhas_adiadas = 0
+        self.trilhas_recuperadas = 0
+        self.recuperadas_alunos = 0
+        # Custo médio (ms) de um embedding, para estimar o tempo poupado
+        self.ms_por_embedding = 0.0
+
+    def avaliar(self, face, imagem):
+        """Mede o rosto (coordenadas de 'imagem'), parando no primeiro critério reprovado."""
+        x1, y1, x2, y2 = (float(v) for v in face.bbox[:4])
+        avaliacao = AvaliacaoQualidade(float(face.det_score or 0.0), min(x2 - x1, y2 - y1))
+        if avaliacao.det_score < self.det_min:
+            avaliacao.motivo = "confianca"
+            return avaliacao
+        if avaliacao.lado < self.lado_min:
+            avaliacao.motivo = "tamanho"
+            return avaliacao
+        if face.kps is not None:
+            avaliacao.yaw, avaliacao.pitch = estimar_pose(face.kps)
+            if avaliacao.yaw > self.yaw_max or avaliacao.pitch > self.pitch_max:
+                avaliacao.motivo = "pose"
+                return avaliacao
+        avaliacao.nitidez = medir_nitidez(imagem, face.bbox)
+        if avaliacao.nitidez < self.nitidez_min:
+            avaliacao.motivo = "nitidez"
+        return avaliacao
+
+    def pontuacao(self, avaliacao):
+        """Qualidade em [0, 1] para escolher o melhor recorte de um desconhecido."""
+        pontuacao = avaliacao.det_score * min(1.0, avaliacao.lado / self.lado_bom)
+        if avaliacao.yaw is not None:
+            pontuacao *= math.cos(math.radians(min(avaliacao.yaw, 90.0))) * math.cos(math.radians(min(avaliacao.pitch, 90.0)))
+        if avaliacao.nitidez is not None:
+            pontuacao *= min(1.0, avaliacao.nitidez / (2 * self.nitidez_min))
+        return float(pontuacao)
+
+    def filtrar(self, faces, trilhas, indices, imagem):
+        """
+        Avalia as faces 'indices' (as que precisam de embedding) e retorna
+        ({índice: avaliação}, índices aprovados).
+        """
+        avaliacoes = {}
+        aprovados = []
+        for i in indices:
+            avaliacao = self.avaliar(faces[i], imagem)
+            avaliacoes[i] = avaliacao
+            trilha = trilhas[i]
+            self.avaliados += 1
+            if avaliacao.aprovada:
+                self.aprovados += 1
+                aprovados.append(i)
+                if trilha.adiada:
+                    trilha.adiada = False
+                    trilha.recuperada = True
+                    self.trilhas_recuperadas += 1
+                continue
+            self.reprovados[avaliacao.motivo] += 1
+            if trilha.identificada:
+                self.mantidos += 1
+            else:
+                self.adiados += 1
+                if not trilha.adiada and not trilha.recuperada:
+                    trilha.adiada = True
+                    self.trilhas_adiadas += 1
+        return avaliacoes, aprovados
+
+    def registrar_embeddings(self, duracao_ms, rostos):
+        """Custo medido do reconhecimento em lote (média móvel por rosto)."""
+        if rostos:
+            por_rosto = duracao_ms / rostos
+            self.ms_por_embedding = por_rosto if not self.ms_por_embedding else 0.9 * self.ms_por_embedding + 0.1 * por_rosto
+
+    def registrar_identidade(self, trilha, reconhecido):
+        """Uma trilha adiada que, no frame bom, saiu como aluno teria sido um NAO ALUNO falso."""
+        if trilha.recuperada and reconhecido:
+            self.recuperadas_alunos += 1
+        trilha.recuperada = False
+
+    def estatisticas(self):
+        reprovados = sum(self.reprovados.values())
+        stats = {
+            "avaliados_total": self.avaliados,
+            "aprovados_total": self.aprovados,
+            "reprovados_total": reprovados,
+            "taxa_reprovacao": reprovados / self.avaliados if self.avaliados else 0.0,
+            "mantidos_total": self.mantidos,
+            "adiados_total": self.adiados,
+            "trilhas_adiadas_total": self.trilhas_adiadas,
+            "trilhas_recuperadas_total": self.trilhas_recuperadas,
+            "recuperadas_alunos_total": self.recuperadas_alunos,
+            # Trilhas que não chegaram a um frame bom (até agora): nenhum embedding e nenhum alerta
+            "trilhas_sem_embedding": self.trilhas_adiadas - self.trilhas_recuperadas,
+            "ms_poupados_total": reprovados * self.ms_por_embedding,
+        }
+        for motivo in MOTIVOS:
+            stats[f"reprovados_{motivo}_total"] = self.reprovados[motivo]
+        return stats
+
+def formatar_qualidade(stats):
+    motivos = ", ".join(f"{motivo} {stats[f'reprovados_{motivo}_total']}" for motivo in MOTIVOS)
+    return (f"Qualidade: {stats['reprovados_total']}/{stats['avaliados_total']} rostos sem embedding "
+            f"({stats['taxa_reprovacao'] * 100:.0f}%: {motivos}) | ~{stats['ms_poupados_total'] / 1000:.1f} s de reconhecimento "
+            f"poupados | {stats['trilhas_sem_embedding']} trilhas sem NAO ALUNO, "
+            f"{stats['recuperadas_alunos_total']} adiadas e depois reconhecidas como aluno")
@@ -0,0 +1,119 @@
+import itertools
+
+from cascata import iou
+
+# ================================
+# RASTREAMENTO DE ROSTOS ENTRE FRAMES
+# ================================
+class TrilhaRosto:
+    """Estado de um rosto acompanhado entre frames."""
+    _ids = itertools.count(1)
+
+    def __init__(self, bbox, agora):
+        self.id = next(self._ids)
+        self.bbox = bbox
+        self.nome = None
+        self.score = 0.0
+        self.criada_em = agora
+        self.ultima_vista = agora
+        self.ultimo_embedding = None
+        self.frames_desde_embedding = 0
+        self.ultimo_log = None
+        self.nome_logado = None
+        # Cluster da MemoriaDesconhecidos quando a trilha é de um NAO ALUNO
+        self.desconhecido = None
+        # FiltroQualidade: esperando um frame bom para o primeiro embedding / acabou de sair da espera
+        self.adiada = False
+        self.recuperada = False
+
+    @property
+    def identificada(self):
+        return self.nome is not None
+
+class RastreadorRostos:
+    """
+    Associa as detecções de cada frame às trilhas existentes (IoU e, como
+    alternativa, distância entre centros) e decide quais rostos precisam de um
+    novo embedding. Rostos já identificados reaproveitam nome e score da trilha.
+    """
+    def __init__(self, limiar_iou=0.3, max_ausencia_s=1.0, reembed_frames=15, reembed_ms=1000,
+                 limiar_similaridade=0.52, margem_incerteza=0.08):
+        self.limiar_iou = limiar_iou
+        self.max_ausencia_s = max_ausencia_s
+        self.reembed_frames = reembed_frames
+        self.reembed_ms = reembed_ms
+        self.limiar_similaridade = limiar_similaridade
+        self.margem_incerteza = margem_incerteza
+        self.trilhas = {}
+
+    @staticmethod
+    def _distancia_centros(a, b):
+        ca = ((a[0] + a[2]) / 2, (a[1] + a[3]) / 2)
+        cb = ((b[0] + b[2]) / 2, (b[1] + b[3]) / 2)
+        diagonal = max(a[2] - a[0], a[3] - a[1], 1.0)
+        return (abs(ca[0] - cb[0]) + abs(ca[1] - cb[1])) / diagonal
+
+    def atualizar(self, bboxes, agora):
+        """
+        Associa as caixas do frame atual às trilhas e retorna a lista de
+        trilhas na mesma ordem das caixas. Trilhas sem detecção por mais de
+        'max_ausencia_s' são removidas.
+        """
+        pares = []
+        for i, bbox in enumerate(bboxes):
+            for trilha in self.trilhas.values():
+                sobreposicao = iou(bbox, trilha.bbox)
+                if sobreposicao >= self.limiar_iou:
+                    pares.append((1.0 + sobreposicao, i, trilha.id))
+                elif self._distancia_centros(trilha.bbox, bbox) < 0.5:
+                    pares.append((1.0 - self._distancia_centros(trilha.bbox, bbox), i, trilha.id))
+
+        resultado = [None] * len(bboxes)
+        usadas = set()
+        for _, i, trilha_id in sorted(pares, reverse=True):
+            if resultado[i] is None and trilha_id not in usadas:
+                resultado[i] = self.trilhas[trilha_id]
+                usadas.add(trilha_id)
+
+        for i, bbox in enumerate(bboxes):
+            if resultado[i] is None:
+                trilha = TrilhaRosto(bbox, agora)
+                self.trilhas[trilha.id] = trilha
+                resultado[i] = trilha
+            else:
+                resultado[i].frames_desde_embedding += 1
+            resultado[i].bbox = bbox
+            resultado[i].ultima_vista = agora
+
+        for trilha_id in [t.id for t in self.trilhas.values() if agora - t.ultima_vista > self.max_ausencia_s]:
+            del self.trilhas[trilha_id]
+        return resultado
+
+    def reescalar(self, fator):
+        """Leva as caixas das trilhas para uma nova escala de processamento (SCALE_FACTOR mudou)."""
+        for trilha in self.trilhas.values():
+            trilha.bbox = [coord * fator for coord in trilha.bbox]
+
+    def precisa_embedding(self, trilha, agora):
+        """Trilha nova, identidade incerta ou embedding vencido (N frames ou M ms)."""
+        if not trilha.identificada or trilha.ultimo_embedding is None:
+            return True
+        if abs(trilha.score - self.limiar_similaridade) < self.margem_incerteza:
+            return True
+        if trilha.frames_desde_embedding >= self.reembed_frames:
+            return True
+        return (agora - trilha.ultimo_embedding) * 1000 >= self.reembed_ms
+
+    def registrar_embedding(self, trilha, nome, score, agora):
+        trilha.nome = nome
+        trilha.score = score
+        trilha.ultimo_embedding = agora
+        trilha.frames_desde_embedding = 0
+
+    def deve_logar(self, trilha, agora, cooldown):
+        """Cooldown de log por trilha; uma troca de identidade loga imediatamente."""
+        if trilha.ultimo_log is None or trilha.nome_logado != trilha.nome or agora - trilha.ultimo_log > cooldown:
+            trilha.ultimo_log = agora
+            trilha.nome_logado = trilha.nome
+            return True
+        return False
@@ -0,0 +1,512 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comum.eventos import CAMINHO_PADRAO as BANCO_EVENTOS, INSERCAO, REAVALIADO, conectar as conectar_eventos
+from galeria import GaleriaIndex, carregar_galeria, criar_indice, normalizar
+from modelos import carregar_analise_facial
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DIR_HISTORICO = os.path.join(SCRIPT_DIR, "historico")
+DIR_RECORTES = os.path.join(DIR_HISTORICO, "imagem-nao-aluno")
+DIR_CACHE = os.path.join(DIR_HISTORICO, "cache_reavaliacao")
+DIR_MODELOS = os.path.join(SCRIPT_DIR, "cache_modelos")
+ARQUIVO_GALERIA = os.path.join(SCRIPT_DIR, "base_dados_alunos.galeria.json")
+LOG_ALERTAS = os.path.join(DIR_HISTORICO, "escrito", "alertas_nao_alunos.log")
+
+# O mesmo SIMILARITY_THRESHOLD do ProcessadorCV
+LIMIAR_PADRAO = 0.52
+MODELO = "buffalo_l"
+DIMENSAO = 512
+EXTENSOES_IMAGEM = (".jpg", ".png", ".jpeg")
+# Recortes que casaram com um aluno vão para <recortes>/reavaliados/<aluno>/ e saem das próximas varreduras
+PASTA_REAVALIADOS = "reavaliados"
+ACOES = ("relatorio", "marcar", "mover")
+
+# ================================
+# CACHE DE EMBEDDINGS DOS RECORTES
+# ================================
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS recortes (
+    caminho TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    tamanho INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    linha INTEGER,
+    varredura INTEGER NOT NULL,
+    aluno TEXT,
+    score REAL
+);
+CREATE INDEX IF NOT EXISTS idx_recortes_linha ON recortes(linha) WHERE linha IS NOT NULL;
+CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor TEXT);
+"""
+
+class CacheEmbeddings:
+    """
+    Embeddings dos recortes já passados pelo modelo: índice SQLite (caminho, mtime,
+    tamanho, status, linha) + matriz float16 num arquivo só de acréscimos, lida com
+    np.memmap em blocos. Um recorte só volta ao modelo se o arquivo mudar (o melhor
+    recorte de um desconhecido é regravado no mesmo caminho); depois de um cadastro,
+    reavaliar é só a multiplicação de matrizes.
+
+    Como na galeria, a compactação grava uma nova geração da matriz e troca o nome
+    no índice numa única transação.
+    """
+    TAMANHO_CONSULTA = 500
+
+    def __init__(self, diretorio=DIR_CACHE, modelo=MODELO, dimensao=DIMENSAO):
+        os.makedirs(diretorio, exist_ok=True)
+        self.diretorio = diretorio
+        self.dimensao = dimensao
+        self.bytes_linha = dimensao * 2
+        self.conexao = sqlite3.connect(os.path.join(diretorio, "recortes.sqlite3"), timeout=5.0)
+        self.conexao.execute("PRAGMA journal_mode = WAL")
+        self.conexao.execute("PRAGMA synchronous = NORMAL")
+        self.conexao.executescript(ESQUEMA)
+
+        # Outro modelo (ou dimensão) invalida todos os embeddings
+        identificacao = f"{modelo}/{dimensao}"
+        if self._meta("modelo") not in (None, identificacao):
+            with self.conexao:
+                self.conexao.execute("DELETE FROM recortes")
+        matriz = self._meta("matriz") or f"embeddings.{time.time_ns()}.f16"
+        with self.conexao:
+            self.conexao.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                                     [("modelo", identificacao), ("matriz", matriz)])
+        self.caminho_matriz = os.path.join(diretorio, matriz)
+        self.linhas = self._reconciliar()
+
+    def _meta(self, chave):
+        linha = self.conexao.execute("SELECT valor FROM meta WHERE chave = ?", (chave,)).fetchone()
+        return None if linha is None else linha[0]
+
+    def _reconciliar(self):
+        """
+        Acerta índice e matriz depois de uma interrupção: descarta linhas do índice que
+        não chegaram ao arquivo, corta o que foi gravado sem entrar no índice e apaga
+        gerações antigas da matriz.
+        """
+        for nome in os.listdir(self.diretorio):
+            if nome.endswith(".f16") and nome != os.path.basename(self.caminho_matriz):
+                os.remove(os.path.join(self.diretorio, nome))
+        with open(self.caminho_matriz, 'ab'):
+            pass
+        no_arquivo = os.path.getsize(self.caminho_matriz) // self.bytes_linha
+        with self.conexao:
+            self.conexao.execute("DELETE FROM recortes WHERE linha >= ?", (no_arquivo,))
+        maior = self.conexao.execute("SELECT MAX(linha) FROM recortes").fetchone()[0]
+        linhas = 0 if maior is None else maior + 1
+        if linhas < no_arquivo:
+            os.truncate(self.caminho_matriz, linhas * self.bytes_linha)
+        return linhas
+
+    def __len__(self):
+        return self.conexao.execute("SELECT COUNT(*) FROM recortes").fetchone()[0]
+
+    def com_rosto(self):
+        return self.conexao.execute("SELECT COUNT(*) FROM recortes WHERE linha IS NOT NULL").fetchone()[0]
+
+    def pendentes(self, recortes, varredura):
+        """
+        recortes: [(caminho, mtime_ns, tamanho)]. Marca os que já estão no cache como
+        vistos nesta varredura e retorna os novos ou alterados.
+        """
+        conhecidos = {}
+        for inicio in range(0, len(recortes), self.TAMANHO_CONSULTA):
+            parte = [caminho for caminho, _, _ in recortes[inicio:inicio + self.TAMANHO_CONSULTA]]
+            marcadores = ",".join("?" * len(parte))
+            for caminho, mtime_ns, tamanho in self.conexao.execute(
+                    f"SELECT caminho, mtime_ns, tamanho FROM recortes WHERE caminho IN ({marcadores})", parte):
+                conhecidos[caminho] = (mtime_ns, tamanho)
+        vistos, novos = [], []
+        for caminho, mtime_ns, tamanho in recortes:
+            if conhecidos.get(caminho) == (mtime_ns, tamanho):
+                vistos.append((varredura, caminho))
+            else:
+                novos.append((caminho, mtime_ns, tamanho))
+        with self.conexao:
+            self.conexao.executemany("UPDATE recortes SET varredura = ? WHERE caminho = ?", vistos)
+        return novos
+
+    def adicionar(self, registros, embeddings, varredura):
+        """
+        registros: [(caminho, mtime_ns, tamanho, status)]; embeddings: uma linha por
+        registro com status "ok", na mesma ordem. A matriz é gravada antes do índice.
+        """
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float16)
+        if len(embeddings):
+            with open(self.caminho_matriz, 'ab') as file:
+                file.write(embeddings.tobytes())
+                file.flush()
+                os.fsync(file.fileno())
+        linhas = []
+        proxima = self.linhas
+        for caminho, mtime_ns, tamanho, status in registros:
+            linha = None
+            if status == "ok":
+                linha, proxima = proxima, proxima + 1
+            # Arquivo novo ou regravado: a marcação anterior não vale mais
+            linhas.append((caminho, mtime_ns, tamanho, status, linha, varredura))
+        with self.conexao:
+            self.conexao.executemany("INSERT OR REPLACE INTO recortes (caminho, mtime_ns, tamanho, status, linha, "
+                                     "varredura) VALUES (?, ?, ?, ?, ?, ?)", linhas)
+        self.linhas = proxima
+
+    def remover(self, caminhos):
+        with self.conexao:
+            self.conexao.executemany("DELETE FROM recortes WHERE caminho = ?", [(c,) for c in caminhos])
+
+    def remover_ausentes(self, varredura):
+        """Esquece os recortes que não apareceram nesta varredura (apagados pela retenção ou à mão)."""
+        with self.conexao:
+            return self.conexao.execute("DELETE FROM recortes WHERE varredura != ?", (varredura,)).rowcount
+
+    def marcar(self, marcacoes):
+        """marcacoes: [(aluno ou None, score, caminho)]."""
+        with self.conexao:
+            self.conexao.executemany("UPDATE recortes SET aluno = ?, score = ? WHERE caminho = ?", marcacoes)
+
+    def _matriz(self):
+        return np.memmap(self.caminho_matriz, dtype=np.float16, mode='r', shape=(self.linhas, self.dimensao))
+
+    def blocos(self, tamanho_bloco=GaleriaIndex.TAMANHO_BLOCO):
+        """(caminhos, alunos marcados, embeddings float32) dos recortes com rosto, 'tamanho_bloco' por vez."""
+        if not self.linhas:
+            return
+        matriz = self._matriz()
+        cursor = self.conexao.execute("SELECT caminho, aluno, linha FROM recortes WHERE linha IS NOT NULL ORDER BY linha")
+        while True:
+            linhas = cursor.fetchmany(tamanho_bloco)
+            if not linhas:
+                break
+            caminhos, alunos, indices = zip(*linhas)
+            yield list(caminhos), list(alunos), matriz[np.array(indices)].astype(np.float32)
+
+    def compactar(self, fracao_orfas=0.5):
+        """
+        Regrava a matriz sem as linhas órfãs (recortes regravados, movidos ou apagados)
+        quando elas passam de 'fracao_orfas'. Retorna quantas linhas foram liberadas.
+        """
+        uteis = self.com_rosto()
+        orfas = self.linhas - uteis
+        if orfas == 0 or orfas < self.linhas * fracao_orfas:
+            return 0
+        nome = f"embeddings.{time.time_ns()}.f16"
+        caminho = os.path.join(self.diretorio, nome)
+        matriz = self._matriz()
+        renumeracao = []
+        with open(caminho, 'wb') as file:
+            cursor = self.conexao.execute("SELECT caminho, linha FROM recortes WHERE linha IS NOT NULL ORDER BY linha")
+            while True:
+                linhas = cursor.fetchmany(GaleriaIndex.TAMANHO_BLOCO)
+                if not linhas:
+                    break
+                file.write(np.ascontiguousarray(matriz[np.array([linha for _, linha in linhas])]).tobytes())
+                base = len(renumeracao)
+                renumeracao.extend((base + i, c) for i, (c, _) in enumerate(linhas))
+            file.flush()
+            os.fsync(file.fileno())
+        del matriz
+        with self.conexao:
+            self.conexao.executemany("UPDATE recortes SET linha = ? WHERE caminho = ?", renumeracao)
+            self.conexao.execute("UPDATE meta SET valor = ? WHERE chave = 'matriz'", (nome,))
+        anterior, self.caminho_matriz = self.caminho_matriz, caminho
+        self.linhas = uteis
+        try:
+            os.remove(anterior)
+        except OSError:
+            pass
+        return orfas
+
+    def fechar(self):
+        self.conexao.close()
+
+# ================================
+# WORKERS (UMA INSTÂNCIA DO INSIGHTFACE POR PROCESSO)
+# ================================
+_app_worker = None
+
+def _iniciar_worker(det_size, diretorio_modelos):
+    global _app_worker
+    _app_worker = carregar_analise_facial(MODELO, diretorio_modelos)
+    _app_worker.prepare(ctx_id=0, det_size=(det_size, det_size))
+
+def alinhar_recorte(app, imagem, margem=0.25):
+    """
+    Rosto principal do recorte, alinhado em 112x112 pelos landmarks. O alerta guarda só
+    a caixa do rosto, apertada demais para o detector: a borda é estendida antes.
+    """
+    h, w = imagem.shape[:2]
+    borda_y, borda_x = int(h * margem), int(w * margem)
+    imagem = cv2.copyMakeBorder(imagem, borda_y, borda_y, borda_x, borda_x, cv2.BORDER_CONSTANT, value=0)
+    bboxes, kpss = app.det_model.detect(imagem, max_num=1, metric='default')
+    if bboxes.shape[0] == 0 or kpss is None:
+        return None
+    return app.norm_crop(imagem, landmark=kpss[0], image_size=112)
+
+def _embeddings_lote(itens):
+    """
+    itens: [(caminho, mtime_ns, tamanho)]. Detecta e alinha um recorte por vez e passa
+    o lote inteiro numa só inferência do reconhecimento.
+    Retorna ([(caminho, mtime_ns, tamanho, status)], embeddings float16, segundos).
+    """
+    inicio = time.perf_counter()
+    registros, alinhados = [], []
+    for caminho, mtime_ns, tamanho in itens:
+        try:
+            imagem = cv2.imread(caminho)
+            alinhado = None if imagem is None else alinhar_recorte(_app_worker, imagem)
+            status = "erro" if imagem is None else ("ok" if alinhado is not None else "sem_rosto")
+        except Exception:
+            alinhado, status = None, "erro"
+        if alinhado is not None:
+            alinhados.append(alinhado)
+        registros.append((caminho, mtime_ns, tamanho, status))
+    embeddings = np.zeros((0, DIMENSAO), dtype=np.float16)
+    if alinhados:
+        embeddings = normalizar(_app_worker.models["recognition"].get_feat(alinhados)).astype(np.float16)
+    return registros, embeddings, time.perf_counter() - inicio
+
+# ================================
+# VARREDURA DOS RECORTES
+# ================================
+def listar_recortes(diretorio):
+    """Gera (caminho, mtime_ns, tamanho) de cada recorte, sem montar a lista inteira na memória."""
+    pilha = [diretorio]
+    while pilha:
+        with os.scandir(pilha.pop()) as entradas:
+            for entrada in entradas:
+                if entrada.is_dir():
+                    if entrada.name != PASTA_REAVALIADOS:
+                        pilha.append(entrada.path)
+                elif entrada.name.lower().endswith(EXTENSOES_IMAGEM):
+                    stat = entrada.stat()
+                    yield entrada.path, stat.st_mtime_ns, stat.st_size
+
+def atualizar_cache(cache, diretorio, workers=1, lote=32, det_size=160, diretorio_modelos=DIR_MODELOS,
+                    tamanho_varredura=2048, intervalo_progresso=10.0):
+    """
+    Passa pelo modelo só os recortes novos ou alterados. A varredura anda em blocos de
+    'tamanho_varredura' arquivos e cada processo tem no máximo dois lotes em voo: a
+    memória não cresce com o número de recortes. Os processos só são criados (e os
+    modelos carregados) se houver algo a processar.
+    """
+    varredura = time.time_ns()
+    stats = {"recortes": 0, "processados": 0, "ok": 0, "sem_rosto": 0, "erro": 0,
+             "segundos_modelo": 0.0, "segundos": 0.0}
+    inicio = time.perf_counter()
+    proximo_aviso = inicio + intervalo_progresso
+    executor = None
+    em_voo = set()
+    fila = []
+
+    def coletar(concluidos):
+        nonlocal proximo_aviso
+        for futuro in concluidos:
+            registros, embeddings, segundos = futuro.result()
+            cache.adicionar(registros, embeddings, varredura)
+            stats["processados"] += len(registros)
+            stats["segundos_modelo"] += segundos
+            for *_, status in registros:
+                stats[status] += 1
+        agora = time.perf_counter()
+        if agora >= proximo_aviso:
+            proximo_aviso = agora + intervalo_progresso
+            print(f"[INFO] {stats['processados']} recortes processados ({stats['processados'] / (agora - inicio):.1f}/s), "
+                  f"{stats['recortes']} vistos")
+
+    def enviar(itens):
+        nonlocal executor, em_voo
+        if executor is None:
+            print(f"[INFO] Carregando InsightFace em {workers} processo(s)...")
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_worker,
+                                           initargs=(det_size, diretorio_modelos))
+        while len(em_voo) >= 2 * workers:
+            concluidos, em_voo = wait(em_voo, return_when=FIRST_COMPLETED)
+            coletar(concluidos)
+        em_voo.add(executor.submit(_embeddings_lote, itens))
+
+    try:
+        bloco = []
+        for recorte in listar_recortes(diretorio) if os.path.isdir(diretorio) else ():
+            bloco.append(recorte)
+            if len(bloco) < tamanho_varredura:
+                continue
+            stats["recortes"] += len(bloco)
+            fila.extend(cache.pendentes(bloco, varredura))
+            bloco = []
+            while len(fila) >= lote:
+                enviar(fila[:lote])
+                del fila[:lote]
+        stats["recortes"] += len(bloco)
+        fila.extend(cache.pendentes(bloco, varredura))
+        for i in range(0, len(fila), lote):
+            enviar(fila[i:i + lote])
+        coletar(wait(em_voo).done if em_voo else ())
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    stats["removidos"] = cache.remover_ausentes(varredura)
+    stats["compactados"] = cache.compactar()
+    stats["segundos"] = time.perf_counter() - inicio
+    return stats
+
+# ================================
+# REAVALIAÇÃO CONTRA A GALERIA
+# ================================
+def reavaliar(cache, galeria, limiar=LIMIAR_PADRAO, tamanho_bloco=GaleriaIndex.TAMANHO_BLOCO):
+    """
+    Compara todos os embeddings do cache com a galeria, um bloco por multiplicação de
+    matrizes. Retorna (mudanças [(caminho, aluno anterior, aluno ou None, score)], estatísticas).
+    """
+    mudancas = []
+    comparados = 0
+    inicio = time.perf_counter()
+    for caminhos, anteriores, embeddings in cache.blocos(tamanho_bloco):
+        comparados += len(caminhos)
+        if len(galeria) == 0:
+            continue
+        indices, scores = galeria.buscar(embeddings, k=1)
+        for caminho, anterior, indice, score in zip(caminhos, anteriores, indices[:, 0], scores[:, 0]):
+            aluno = galeria.nomes[indice] if indice >= 0 and score > limiar else None
+            if aluno != anterior:
+                mudancas.append((caminho, anterior, aluno, float(score)))
+    duracao = time.perf_counter() - inicio
+    return mudancas, {"comparados": comparados, "segundos": duracao,
+                      "por_segundo": comparados / duracao if duracao > 0 else 0.0}
+
+def destino_reavaliado(diretorio, caminho, aluno):
+    pasta = os.path.join(diretorio, PASTA_REAVALIADOS, "".join(c if c.isalnum() or c in " ._-" else "_" for c in aluno))
+    return os.path.join(pasta, os.path.basename(caminho))
+
+def aplicar(mudancas, acao, cache, diretorio, limiar=LIMIAR_PADRAO, banco=BANCO_EVENTOS, logger=None):
+    """
+    "marcar": grava a marcação no cache, um evento 'reavaliado' por recorte no histórico
+    e uma linha no log de alertas. "mover": o mesmo, levando o arquivo para
+    <recortes>/reavaliados/<aluno>/ e apontando os eventos antigos para o novo caminho.
+    Recortes marcados que deixam de casar (aluno removido da galeria) só são desmarcados.
+    Retorna quantos recortes passaram a casar com um aluno.
+    """
+    casados = [(caminho, aluno, score) for caminho, _, aluno, score in mudancas if aluno is not None]
+    desmarcados = [(None, None, caminho) for caminho, _, aluno, _ in mudancas if aluno is None]
+    if acao == "relatorio":
+        return len(casados)
+
+    eventos, renomeados, movidos = [], [], []
+    agora = time.time()
+    for caminho, aluno, score in casados:
+        imagem = caminho
+        if acao == "mover":
+            imagem = destino_reavaliado(diretorio, caminho, aluno)
+            try:
+                os.makedirs(os.path.dirname(imagem), exist_ok=True)
+                shutil.move(caminho, imagem)
+            except OSError as e:
+                print(f"[ERRO] Falha ao mover '{caminho}': {e}")
+                continue
+            renomeados.append((imagem, caminho))
+            movidos.append(caminho)
+        eventos.append((agora, REAVALIADO, aluno, None, None, round(score, 3), None, imagem,
+                        json.dumps({"origem": caminho, "limiar": limiar}, ensure_ascii=False)))
+        if logger is not None:
+            logger.info(f"REAVALIADO: {caminho} agora casa com '{aluno}' (score {score:.2f})"
+                        + (f", movido para {imagem}" if imagem != caminho else ""))
+
+    movidos_set = set(movidos)
+    cache.remover(movidos)
+    cache.marcar([(aluno, score, caminho) for caminho, aluno, score in casados if caminho not in movidos_set]
+                 + desmarcados)
+
+    if os.path.exists(banco):
+        conexao = conectar_eventos(banco)
+        try:
+            with conexao:
+                conexao.executemany(INSERCAO, eventos)
+                # A retenção do histórico apaga as imagens pelo caminho: os eventos seguem o arquivo
+                conexao.executemany("UPDATE eventos SET imagem = ? WHERE imagem = ?", renomeados)
+        finally:
+            conexao.close()
+    elif eventos:
+        print(f"[AVISO] Banco de eventos '{banco}' não encontrado: as reavaliações não entram no histórico.")
+    return len(eventos)
+
+def criar_logger(caminho=LOG_ALERTAS):
+    """Mesmo arquivo e formato do log de alertas do ProcessadorCV."""
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    logger = logging.getLogger('ReavaliacaoLogger')
+    logger.setLevel(logging.INFO)
+    if not logger.handlers:
+        handler = logging.FileHandler(caminho, mode='a', encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S'))
+        logger.addHandler(handler)
+    return logger
+
+# ================================
+# LINHA DE COMANDO
+# ================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reavalia os recortes de alertas NAO ALUNO com a galeria atual.")
+    parser.add_argument("--recortes", default=DIR_RECORTES)
+    parser.add_argument("--galeria", default=ARQUIVO_GALERIA)
+    parser.add_argument("--cache", default=DIR_CACHE)
+    parser.add_argument("--banco", default=BANCO_EVENTOS)
+    parser.add_argument("--acao", choices=ACOES, default="marcar",
+                        help="relatorio: só lista | marcar: histórico e log | mover: também move o arquivo")
+    parser.add_argument("--limiar", type=float, default=LIMIAR_PADRAO)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Número de processos (cada um com sua instância do InsightFace)")
+    parser.add_argument("--lote", type=int, default=32, help="Recortes por inferência do reconhecimento")
+    parser.add_argument("--det-size", type=int, default=160, help="Entrada do detector (o recorte já é só o rosto)")
+    parser.add_argument("--mostrar", type=int, default=50, help="Quantos recortes casados listar no terminal")
+    parser.add_argument("--refazer", action="store_true", help="Apaga o cache e passa todos os recortes pelo modelo")
+    args = parser.parse_args()
+
+    if args.refazer and os.path.isdir(args.cache):
+        shutil.rmtree(args.cache)
+    cache = CacheEmbeddings(args.cache)
+
+    print(f"--- ATUALIZANDO O CACHE DE EMBEDDINGS ('{args.recortes}') ---")
+    stats = atualizar_cache(cache, args.recortes, max(1, args.workers), args.lote, args.det_size)
+    print(f"[INFO] {stats['recortes']} recortes: {stats['processados']} passaram pelo modelo "
+          f"({stats['ok']} ok, {stats['sem_rosto']} sem rosto, {stats['erro']} com erro), "
+          f"{stats['recortes'] - stats['processados']} reaproveitados do cache, {stats['removidos']} removidos")
+    if stats["processados"]:
+        print(f"[INFO] {stats['processados'] / stats['segundos']:.1f} recortes/s no total (inclui carga dos modelos), "
+              f"{stats['processados'] * args.workers / max(stats['segundos_modelo'], 1e-9):.1f} recortes/s só de modelo")
+    if stats["compactados"]:
+        print(f"[INFO] Cache compactado: {stats['compactados']} embeddings órfãos liberados")
+
+    print(f"--- REAVALIANDO CONTRA A GALERIA ('{args.galeria}') ---")
+    try:
+        embeddings, nomes, _ = carregar_galeria(args.galeria)
+    except FileNotFoundError:
+        print(f"[ERRO] Galeria não encontrada: {args.galeria}. Rode o cadastro.py primeiro.")
+        cache.fechar()
+        raise SystemExit(1)
+    galeria = criar_indice(embeddings, nomes, normalizado=True)
+    mudancas, stats = reavaliar(cache, galeria, args.limiar)
+    print(f"[INFO] {stats['comparados']} embeddings x {len(galeria)} rostos da galeria em {stats['segundos']:.2f}s "
+          f"({stats['por_segundo']:.0f} recortes/s)")
+
+    casados = [m for m in mudancas if m[2] is not None]
+    for caminho, _, aluno, score in casados[:args.mostrar]:
+        print(f"[REAVALIADO] {caminho} -> {aluno} ({score:.2f})")
+    if len(casados) > args.mostrar:
+        print(f"[INFO] ... e mais {len(casados) - args.mostrar}")
+
+    logger = criar_logger() if args.acao != "relatorio" else None
+    aplicados = aplicar(mudancas, args.acao, cache, args.recortes, args.limiar, args.banco, logger)
+    print(f"[SUCESSO] {len(casados)} alertas agora casam com alunos cadastrados ({args.acao}: {aplicados}), "
+          f"{len(mudancas) - len(casados)} desmarcados.")
+    cache.fechar()
@@ -1,20 +1,45 @@
 import cv2
 import os
+import sys
+import argparse
 import numpy as np
-from ultralytics import YOLO # type: ignore
 import time
-import insightface
-import pickle
 import logging
+import queue
+import atexit
+from logging.handlers import QueueHandler
+
+# Módulos compartilhados com o GestureRecon (pacote 'comum', na raiz do repositório)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comum.agendador import AgendadorInferencia, formatar_estatisticas
+from comum.captura import abrir_fonte, copiar_em_buffer, forma_captura
+from comum.eventos import ArmazemEventos, NAO_ALUNO, RECONHECIDO
+from comum.metricas import medir, Metricas, ServidorMetricas, DespejoMetricas
+from comum.perfil import PerfilInicializacao, formatar_perfil, frame_aquecimento
+from comum.transmissao import iniciar_transmissao, formatar_transmissao
+from alertas import FileHandlerEmLote, ListenerEmLote, GravadorAlertas
+from cascata import regioes_tronco, montar_mosaico, remapear_faces, suprimir_duplicadas
+from desconhecidos import MemoriaDesconhecidos
+from galeria import criar_indice, carregar_galeria, migrar_pickle, RecarregadorGaleria
+from keypoints_rosto import landmarks_de_keypoints
+from modelos import carregar_analise_facial, carregar_detector_pessoas
+from multicamera import ProcessadorMultiCamera
+from pipeline import PipelineCV
+from preprocessamento import Preprocessador, lut_gamma
+from qualidade import FiltroQualidade, formatar_qualidade
+from adaptativo import ControladorAdaptativo, formatar_adaptacao
+from rastreamento import RastreadorRostos
 
 # ================================
 # FUNÇÃO DE CONFIGURAÇÃO DO LOGGER
 # ================================
-def setup_logger(script_dir):
+def setup_logger(script_dir, base_log_directory=None):
     """
     Configura dois loggers para salvar em 'historico/escrito'.
+    'base_log_directory' troca o 'historico' padrão (ex.: replay offline).
     """
-    base_log_directory = os.path.join(script_dir, "historico")
+    if base_log_directory is None:
+        base_log_directory = os.path.join(script_dir, "historico")
     text_log_directory = os.path.join(base_log_directory, "escrito")
     image_log_directory = os.path.join(base_log_directory, "imagem-nao-aluno")
 
@@ -28,23 +53,33 @@ def setup_logger(script_dir):
     
     logger_alunos = logging.getLogger('AlunosLogger')
     logger_alunos.setLevel(logging.INFO)
-    if not logger_alunos.handlers:
-        handler_alunos = logging.FileHandler(
+    logger_alertas = logging.getLogger('AlertasLogger')
+    logger_alertas.setLevel(logging.WARNING)
+    
+    # Os loggers só enfileiram os registros; a escrita em disco
+    # acontece na thread do ListenerEmLote, com um flush por lote.
+    if not logger_alunos.handlers and not logger_alertas.handlers:
+        handler_alunos = FileHandlerEmLote(
             os.path.join(text_log_directory, 'reconhecimento_alunos.log'), 
             mode='a', encoding='utf-8'
         )
         handler_alunos.setFormatter(formatter)
-        logger_alunos.addHandler(handler_alunos)
+        handler_alunos.addFilter(logging.Filter('AlunosLogger'))
         
-    logger_alertas = logging.getLogger('AlertasLogger')
-    logger_alertas.setLevel(logging.WARNING)
-    if not logger_alertas.handlers:
-        handler_alertas = logging.FileHandler(
+        handler_alertas = FileHandlerEmLote(
             os.path.join(text_log_directory, 'alertas_nao_alunos.log'), 
             mode='a', encoding='utf-8'
         )
         handler_alertas.setFormatter(formatter)
-        logger_alertas.addHandler(handler_alertas)
+        handler_alertas.addFilter(logging.Filter('AlertasLogger'))
+        
+        log_queue = queue.Queue(-1)
+        logger_alunos.addHandler(QueueHandler(log_queue))
+        logger_alertas.addHandler(QueueHandler(log_queue))
+        
+        listener = ListenerEmLote(log_queue, handler_alunos, handler_alertas, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
         
     return logger_alunos, logger_alertas, image_log_directory
 
@@ -52,29 +87,149 @@ def setup_logger(script_dir):
 # FUNÇÕES AUXILIARES
 # ================================
 def adjust_gamma(image, gamma=1.0):
-    invGamma = 1.0 / max(gamma, 0.01)
-    table = np.array([((i / 255.0) ** invGamma) * 255 for i in np.arange(0, 256)]).astype("uint8")
-    return cv2.LUT(image, table)
+    return cv2.LUT(image, lut_gamma(gamma))
+
+def desenhar_resultados(frame, results):
+    for face in results.get("faces", []):
+        name = face["name"]
+        x1, y1, x2, y2 = face["bbox"]
+        conf = face["confidence"]
+        
+        if name == "NAO ALUNO":
+            color = (0, 0, 255)
+            label = f"NAO ALUNO"
+        
+        elif name is None:
+            # Trilha esperando um frame com qualidade suficiente para o reconhecimento
+            color = (0, 255, 255)
+            label = "..."
+        
+        else:
+            color = (0, 255, 0)
+            label = f"{name} ({int(conf*100)}%)"
+            
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+        cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+        
+    for person in results.get("persons", []):
+        px1, py1, px2, py2 = person["bbox"]
+        
+        cv2.rectangle(frame, (px1, py1), (px2, py2), (255, 0 ,0), 1)
+
+def executar_multicamera(pcv, fontes, criar_agendador=None, exibir=True, transmissao=None):
+    """
+    Loop de exibição para várias câmeras: uma janela por câmera.
+    'transmissao' é o (servidor, {stream_id: transmissor}) de iniciar_transmissao, ou None.
+    """
+    try:
+        multi = ProcessadorMultiCamera(pcv, fontes, criar_agendador=criar_agendador)
+    except RuntimeError as e:
+        print(f"[ERRO] {e}")
+        pcv.encerrar()
+        return
+    for forma in {forma_captura(captura.cap) for captura in multi.capturas.values()}:
+        pcv.aquecer(forma)
+    if pcv.metricas is not None:
+        pcv.metricas.adicionar_coletor(lambda: {
+            "frames_descartados_total": sum(stats.descartados for stats in multi.stats.values()),
+            "frames_pulados_total": sum(agendador.pulados for agendador in multi.agendadores.values()),
+        })
+    servidor, transmissores = transmissao or (None, {})
+    multi.iniciar()
+    print(f"--- SISTEMA INICIADO COM {len(fontes)} CÂMERAS ---")
+    print("Pressione 'q' em qualquer janela de vídeo para sair." if exibir else "Pressione Ctrl+C para sair.")
+    
+    exibidos = {stream_id: 0 for stream_id in multi.capturas}
+    exibicao = {stream_id: None for stream_id in multi.capturas}
+    ultimo_relatorio = time.monotonic()
+    try:
+        while multi.ativas():
+            for stream_id, captura in multi.capturas.items():
+                seq, _, frame = captura.ultimo_frame()
+                if frame is None or seq == exibidos[stream_id]:
+                    continue
+                exibidos[stream_id] = seq
+                _, _, last_results = multi.ultimos_resultados(stream_id)
+                transmissor = transmissores.get(stream_id)
+                # Sem janela, só desenha quando algum cliente remoto vai receber o frame
+                anotar = exibir or (transmissor is not None and transmissor.aguardando_frame())
+                if anotar:
+                    exibicao[stream_id] = frame = copiar_em_buffer(exibicao[stream_id], frame)
+                    desenhar_resultados(frame, last_results)
+                if exibir:
+                    cv2.imshow(f"Camera {stream_id} - {fontes[stream_id]}", frame)
+                if transmissor is not None:
+                    transmissor.publicar(frame if anotar else None, last_results)
+            
+            if time.monotonic() - ultimo_relatorio > 5.0:
+                ultimo_relatorio = time.monotonic()
+                for stream_id, stats in multi.estatisticas().items():
+                    print(f"[INFO] Câmera {stream_id} ({stats['fonte']}): captura {stats['fps_captura']:.1f} FPS | "
+                          f"inferência {stats['fps_inferencia']:.1f} FPS | latência média {stats['latencia_media_ms']:.0f} ms, "
+                          f"máx {stats['latencia_max_ms']:.0f} ms")
+                    if "agendamento" in stats:
+                        print(f"[INFO] Câmera {stream_id}: {formatar_estatisticas(stats['agendamento'])}")
+                if pcv.filtro_qualidade is not None:
+                    print(f"[INFO] {formatar_qualidade(pcv.filtro_qualidade.estatisticas())}")
+                if pcv.controlador is not None:
+                    print(f"[INFO] {formatar_adaptacao(pcv.controlador.estatisticas())}")
+                if servidor is not None:
+                    print(f"[INFO] {formatar_transmissao(servidor.estatisticas())}")
+            
+            if not exibir:
+                time.sleep(0.005)
+            elif cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+    
+    except KeyboardInterrupt:
+        print("Interrupção manual detectada")
+    
+    finally:
+        multi.parar()
+        for stream_id, agendador in multi.agendadores.items():
+            print(f"[INFO] Câmera {stream_id}: {formatar_estatisticas(agendador.estatisticas())}")
+        if servidor is not None:
+            print(f"[INFO] {formatar_transmissao(servidor.estatisticas())}")
+            servidor.parar()
+        pcv.encerrar()
+        if exibir:
+            cv2.destroyAllWindows()
+        print("[INFO] Sistema encerrado corretamente.")
 
 # ================================
 # CLASSE DO PROCESSADOR DE CV
 # ================================
 
 class ProcessadorCV:
-    def __init__(self):
+    def __init__(self, carregar_yolo=True, diretorio_historico=None, recarregar_galeria=True):
+        """
+        'carregar_yolo=False' dispensa o yolov8n.pt: as pessoas passam a vir de fora
+        (processar_frame(..., pessoas=...)), como no runtime unificado com o modelo de pose.
+        'diretorio_historico' troca o 'historico' ao lado do script (logs, recortes NAO ALUNO
+        e eventos.sqlite3) e 'recarregar_galeria=False' não inicia a thread de recarga da
+        galeria; o replay offline usa os dois para não tocar no histórico de produção.
+        """
         print("[INFO] Inicializando o ProcessadorCV...")
+        # Imports pesados, carga dos modelos, aquecimento e primeiro frame
+        self.perfil = PerfilInicializacao()
         
         # --- Configuração de Caminhos ---
         self.SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+        if diretorio_historico is None:
+            diretorio_historico = os.path.join(self.SCRIPT_DIR, "historico")
         
         ARQUIVO_BASE_DADOS = os.path.join(self.SCRIPT_DIR, "base_dados_alunos.pkl")
+        ARQUIVO_GALERIA = os.path.join(self.SCRIPT_DIR, "base_dados_alunos.galeria.json")
         YOLO_MODEL_PATH = os.path.join(self.SCRIPT_DIR, "yolov8n.pt")
+        # Exportado com 'py modelos.py': dispensa o PyTorch na partida
+        YOLO_ONNX_PATH = os.path.join(self.SCRIPT_DIR, "yolov8n.onnx")
+        CACHE_SESSOES = os.path.join(self.SCRIPT_DIR, "cache_modelos")
 
-        print(f"[INFO] Procurando Base de Dados em: {ARQUIVO_BASE_DADOS}")
+        print(f"[INFO] Procurando Base de Dados em: {ARQUIVO_GALERIA}")
         print(f"[INFO] Procurando Modelo YOLO em: {YOLO_MODEL_PATH}")
 
         # --- VERIFICAÇÃO CRÍTICA DE CAMINHO ---
-        if not os.path.exists(YOLO_MODEL_PATH):
+        if carregar_yolo and not os.path.exists(YOLO_MODEL_PATH) and not os.path.exists(YOLO_ONNX_PATH):
             print("="*50)
             print(f"[ERRO CRÍTICO] O arquivo do modelo YOLO '{YOLO_MODEL_PATH}' não foi encontrado.")
             print("="*50)
@@ -83,85 +238,411 @@ class ProcessadorCV:
         # --- Configuração de Constantes de Processamento ---
         self.SIMILARITY_THRESHOLD = 0.52 
         self.SCALE_FACTOR = 0.5 
+        self.DET_SIZE = 320
+        self.YOLO_IMGSZ = 640
         self.GAMMA_VALUE = 1.2
         self.LOG_COOLDOWN_SECONDS = 1 
+        self.ALERT_QUEUE_SIZE = 32
+        self.ALERT_DROP_POLICY = "descartar_novo"
+        self.GALLERY_DTYPE = "float32"
+        self.GALLERY_ANN_MIN_SIZE = 50000
+        self.GALLERY_RELOAD_SECONDS = 2.0
+        self.CASCADE_MODE = False
+        self.CASCADE_UPPER_BODY_RATIO = 0.5
+        self.TRACK_IOU_THRESHOLD = 0.3
+        self.TRACK_MAX_AGE_SECONDS = 1.0
+        self.TRACK_REEMBED_FRAMES = 15
+        self.TRACK_REEMBED_MS = 1000
+        self.TRACK_UNCERTAIN_MARGIN = 0.08
+        self.KEYPOINT_FACE_MODE = False
+        self.KEYPOINT_FACE_MIN_CONF = 0.6
+        self.UNKNOWN_CLUSTER_THRESHOLD = 0.5
+        self.UNKNOWN_MERGE_THRESHOLD = 0.6
+        self.UNKNOWN_ALERT_COOLDOWN_SECONDS = 30
+        self.UNKNOWN_TTL_SECONDS = 600
+        self.UNKNOWN_MAX_CLUSTERS = 256
+        self.QUALITY_GATE = True
+        self.QUALITY_MIN_DET_SCORE = 0.6
+        self.QUALITY_MIN_FACE_PX = 24
+        self.QUALITY_MAX_YAW = 40.0
+        self.QUALITY_MAX_PITCH = 30.0
+        self.QUALITY_MIN_SHARPNESS = 50.0
+        # Gamma + redução em buffers reaproveitados (um por câmera)
+        self.preprocessador = Preprocessador()
+        # Um alerta por visitante desconhecido (cluster de embeddings), compartilhado entre câmeras
+        self.desconhecidos = MemoriaDesconhecidos(
+            limiar=self.UNKNOWN_CLUSTER_THRESHOLD,
+            limiar_fusao=self.UNKNOWN_MERGE_THRESHOLD,
+            cooldown_s=self.UNKNOWN_ALERT_COOLDOWN_SECONDS,
+            ttl_s=self.UNKNOWN_TTL_SECONDS,
+            max_clusters=self.UNKNOWN_MAX_CLUSTERS
+        )
+        # Rostos pequenos, borrados, virados ou com detecção fraca não passam pelo reconhecimento
+        self.filtro_qualidade = None
+        if self.QUALITY_GATE:
+            self.filtro_qualidade = FiltroQualidade(
+                det_min=self.QUALITY_MIN_DET_SCORE,
+                lado_min=self.QUALITY_MIN_FACE_PX,
+                yaw_max=self.QUALITY_MAX_YAW,
+                pitch_max=self.QUALITY_MAX_PITCH,
+                nitidez_min=self.QUALITY_MIN_SHARPNESS
+            )
         
         # --- Inicialização de Loggers ---
         print("[INFO] Configurando sistema de logs...")
-        self.logger_alunos, self.logger_alertas, self.image_log_directory = setup_logger(self.SCRIPT_DIR)
+        self.logger_alunos, self.logger_alertas, self.image_log_directory = setup_logger(self.SCRIPT_DIR, diretorio_historico)
+        self.gravador_alertas = GravadorAlertas(
+            self.logger_alertas,
+            tamanho_fila=self.ALERT_QUEUE_SIZE,
+            politica=self.ALERT_DROP_POLICY
+        )
+        self.gravador_alertas.start()
+        # Histórico estruturado (SQLite) dos reconhecimentos e alertas, gravado em lote
+        self.eventos = ArmazemEventos(os.path.join(diretorio_historico, "eventos.sqlite3"))
+        self.eventos.start()
         
         # --- Carregamento da Base de Dados ---
-        print("[INFO] Carregando base de dados .pkl...")
-        self.known_face_embeddings = []
-        self.known_face_names = []
-        try:
-            with open(ARQUIVO_BASE_DADOS, 'rb') as file:
-                data = pickle.load(file)
-                self.known_face_embeddings = data["embeddings"]
-                self.known_face_names = data["names"]
-            print(f"[INFO] Base de dados carregada com {len(self.known_face_names)} rostos.")
-        except FileNotFoundError:
-            print(f"[AVISO] O arquivo '{ARQUIVO_BASE_DADOS}' não foi encontrado.")
-            self.logger_alertas.warning(f"Arquivo da base de dados não encontrado: {ARQUIVO_BASE_DADOS}")
+        if not os.path.exists(ARQUIVO_GALERIA) and os.path.exists(ARQUIVO_BASE_DADOS):
+            print("[INFO] Migrando base de dados .pkl para o formato memmap...")
+            migrar_pickle(ARQUIVO_BASE_DADOS, ARQUIVO_GALERIA)
+        
+        print("[INFO] Carregando base de dados (memmap)...")
+        known_face_embeddings = []
+        known_face_names = []
+        with self.perfil.medir("galeria"):
+            try:
+                known_face_embeddings, known_face_names, _ = carregar_galeria(ARQUIVO_GALERIA)
+                print(f"[INFO] Base de dados carregada com {len(known_face_names)} rostos.")
+            except FileNotFoundError:
+                print(f"[AVISO] O arquivo '{ARQUIVO_GALERIA}' não foi encontrado.")
+                self.logger_alertas.warning(f"Arquivo da base de dados não encontrado: {ARQUIVO_GALERIA}")
+            
+            # Matriz contígua e normalizada; acima de GALLERY_ANN_MIN_SIZE rostos usa o índice aproximado (IVF)
+            opcoes_indice = {"dtype": self.GALLERY_DTYPE, "limite_aproximado": self.GALLERY_ANN_MIN_SIZE}
+            self.galeria = criar_indice(known_face_embeddings, known_face_names, normalizado=True, **opcoes_indice)
+        
+        # Novos cadastros são carregados em segundo plano e trocados entre frames
+        self.recarregador_galeria = None
+        if recarregar_galeria:
+            self.recarregador_galeria = RecarregadorGaleria(
+                ARQUIVO_GALERIA, opcoes_indice, intervalo=self.GALLERY_RELOAD_SECONDS
+            )
+            self.recarregador_galeria.start()
         
         # --- Carregamento dos Modelos de IA ---
-        print("[INFO] Carregando modelo YOLO...")
-        self.model_yolo = YOLO(YOLO_MODEL_PATH)
+        # Só o que é usado: YOLO (ONNX, se exportado) e detecção + reconhecimento do buffalo_l,
+        # com as sessões do onnxruntime já otimizadas em CACHE_SESSOES
+        self.detector_pessoas = None
+        if carregar_yolo:
+            print("[INFO] Carregando modelo YOLO...")
+            self.detector_pessoas = carregar_detector_pessoas(YOLO_MODEL_PATH, YOLO_ONNX_PATH, CACHE_SESSOES, self.perfil)
         
         print("[INFO] Carregando modelo InsightFace...")
-        self.app_insight = insightface.app.FaceAnalysis(
-            name='buffalo_l',
-            providers=['CPUExecutionProvider']
-        )
+        self.app_insight = carregar_analise_facial('buffalo_l', CACHE_SESSOES, self.perfil)
         
-        self.app_insight.prepare(ctx_id=0, det_size=(320, 320))
+        self.app_insight.prepare(ctx_id=0, det_size=(self.DET_SIZE, self.DET_SIZE))
         
         # --- Variáveis de Estado ---
-        self.recently_logged = {}
+        # Identidade e cooldown de log ficam por trilha de rosto (não por nome),
+        # com um rastreador independente para cada câmera
+        self.rastreadores = {}
+        self._tempos = {}
+        self.ultimos_tempos = {}
+        
+        # Contadores e histogramas só existem depois de habilitar_metricas()
+        self.metricas = None
+        self._exportadores_metricas = []
+        # ControladorAdaptativo (habilitar_adaptacao): ajusta escala e det_size entre frames
+        self.controlador = None
 
         print("[INFO] ProcessadorCV inicializado e pronto.")
 
-    def processar_frame(self, frame_to_process):
+    def _trocar_galeria_pendente(self):
+        if self.recarregador_galeria is None:
+            return
+        pendente = self.recarregador_galeria.obter_pendente()
+        if pendente is None:
+            return
+        indice, manifesto, duracao_carga = pendente
+        inicio = time.perf_counter()
+        tamanho_anterior = len(self.galeria)
+        self.galeria = indice
+        duracao_troca = (time.perf_counter() - inicio) * 1000
+        mensagem = (f"Galeria recarregada: {tamanho_anterior} -> {len(indice)} rostos "
+                    f"(criada em {manifesto['criado_em']}; carga em segundo plano {duracao_carga:.2f}s, "
+                    f"troca {duracao_troca:.3f} ms)")
+        print(f"[INFO] {mensagem}")
+        self.logger_alunos.info(mensagem)
+    
+    def habilitar_metricas(self, porta=None, arquivo=None, intervalo=30.0):
+        """
+        Liga os contadores e histogramas por estágio e, opcionalmente, o endpoint
+        HTTP local (formato Prometheus) e o despejo periódico em JSON.
+        Desabilitado, o custo por frame se resume aos tempos de self.ultimos_tempos.
+        """
+        self.metricas = Metricas()
+        gravador = self.gravador_alertas
+        self.metricas.adicionar_coletor(lambda: {
+            "alertas_gravados_total": gravador.gravados,
+            "alertas_descartados_total": gravador.descartados,
+            "alertas_falhas_total": gravador.falhas,
+            "alertas_na_fila": gravador.fila.qsize(),
+            "galeria_rostos": len(self.galeria),
+        })
+        desconhecidos = self.desconhecidos
+        self.metricas.adicionar_coletor(lambda: {
+            "desconhecidos_clusters": len(desconhecidos.clusters),
+            "desconhecidos_fusoes_total": desconhecidos.fusoes,
+            "alertas_suprimidos_total": desconhecidos.escritas_suprimidas,
+            "alertas_representantes_total": desconhecidos.representantes_atualizados,
+        })
+        perfil = self.perfil
+        self.metricas.adicionar_coletor(lambda: {f"inicializacao_{chave}": valor
+                                                 for chave, valor in perfil.estatisticas().items()})
+        if self.filtro_qualidade is not None:
+            filtro = self.filtro_qualidade
+            self.metricas.adicionar_coletor(lambda: {f"qualidade_{chave}": valor
+                                                     for chave, valor in filtro.estatisticas().items()})
+        eventos = self.eventos
+        self.metricas.adicionar_coletor(lambda: {
+            "eventos_gravados_total": eventos.gravados,
+            "eventos_descartados_total": eventos.descartados,
+            "eventos_na_fila": eventos.fila.qsize(),
+        })
+        if porta:
+            servidor = ServidorMetricas(self.metricas, porta=porta)
+            servidor.start()
+            self._exportadores_metricas.append(servidor)
+            print(f"[INFO] Métricas disponíveis em {servidor.endereco}")
+        if arquivo:
+            despejo = DespejoMetricas(self.metricas, arquivo, intervalo=intervalo)
+            despejo.start()
+            self._exportadores_metricas.append(despejo)
+            print(f"[INFO] Métricas gravadas em '{arquivo}' a cada {intervalo:.0f}s")
+        return self.metricas
+    
+    def habilitar_adaptacao(self, orcamento_ms, **opcoes):
+        """
+        Liga o ControladorAdaptativo: escala, det_size, imgsz do YOLO e FPS máximo passam a seguir
+        o orçamento de latência por chamada de processar_lote.
+        """
+        self.controlador = ControladorAdaptativo(self, orcamento_ms, logger=self.logger_alunos,
+                                                 eventos=self.eventos, **opcoes)
+        if self.metricas is not None:
+            controlador = self.controlador
+            self.metricas.adicionar_coletor(lambda: {f"adaptacao_{chave}": valor
+                                                     for chave, valor in controlador.estatisticas().items()})
+        return self.controlador
+    
+    def ajustar_resolucao(self, escala, det_size, yolo_imgsz):
+        """Troca escala e tamanhos de entrada entre frames; as trilhas de rosto acompanham a nova escala."""
+        if escala != self.SCALE_FACTOR:
+            for rastreador in self.rastreadores.values():
+                rastreador.reescalar(escala / self.SCALE_FACTOR)
+        self.SCALE_FACTOR = escala
+        self.DET_SIZE = det_size
+        self.YOLO_IMGSZ = yolo_imgsz
+    
+    def aquecer(self, forma_frame=(480, 640, 3), repeticoes=2):
+        """
+        Roda os modelos em frames sintéticos do tamanho da câmera antes do laço principal:
+        alocações do onnxruntime, âncoras do detector e o setup do YOLO ficam fora do
+        primeiro frame de verdade.
+        """
+        altura, largura = forma_frame[:2]
+        pequeno = frame_aquecimento((max(1, round(altura * self.SCALE_FACTOR)), max(1, round(largura * self.SCALE_FACTOR)), 3))
+        rec_model = self.app_insight.models['recognition']
+        recorte = frame_aquecimento((rec_model.input_size[1], rec_model.input_size[0], 3))
+        with self.perfil.medir("aquecimento"):
+            for _ in range(repeticoes):
+                if self.detector_pessoas is not None:
+                    self.detector_pessoas.detectar([pequeno], self.YOLO_IMGSZ)
+                self._detectar_rostos(pequeno)
+                rec_model.get_feat([recorte])
+
+    def _registrar_erro(self, etapa, e):
+        print(f"[ERRO NO PROCESSAMENTO]: {e}")
+        self.logger_alertas.error(f"Erro ao processar frame ({etapa}): {e}")
+        if self.metricas is not None:
+            self.metricas.incrementar("erros", etapa=etapa, tipo=type(e).__name__)
+    
+    def _registrar_metricas(self, resultados, duracao_ms):
+        metricas = self.metricas
+        metricas.observar_tempos(dict(self._tempos, total=duracao_ms))
+        metricas.incrementar("chamadas")
+        for resultado in resultados.values():
+            desconhecidos = sum(1 for face in resultado["faces"] if face["name"] == "NAO ALUNO")
+            metricas.incrementar("frames")
+            metricas.incrementar("pessoas", len(resultado["persons"]))
+            metricas.incrementar("rostos", len(resultado["faces"]))
+            metricas.incrementar("desconhecidos", desconhecidos)
+    
+    def _rastreador(self, stream_id):
+        if stream_id not in self.rastreadores:
+            self.rastreadores[stream_id] = RastreadorRostos(
+                limiar_iou=self.TRACK_IOU_THRESHOLD,
+                max_ausencia_s=self.TRACK_MAX_AGE_SECONDS,
+                reembed_frames=self.TRACK_REEMBED_FRAMES,
+                reembed_ms=self.TRACK_REEMBED_MS,
+                limiar_similaridade=self.SIMILARITY_THRESHOLD,
+                margem_incerteza=self.TRACK_UNCERTAIN_MARGIN
+            )
+        return self.rastreadores[stream_id]
+    
+    def _detectar_pessoas_lote(self, small_frames):
+        """
+        Roda o YOLO uma única vez para todos os frames (um por câmera).
+        Retorna, por frame, [(bbox [x1, y1, x2, y2], confiança), ...] em coordenadas do small_frame.
+        """
+        return self.detector_pessoas.detectar(small_frames, self.YOLO_IMGSZ)
+    
+    def _detectar_faces_em_pessoas(self, small_frame, pessoas):
+        """
+        Modo cascata: roda o InsightFace só na parte superior das pessoas detectadas,
+        com todos os recortes num único mosaico.
+        """
+        if not pessoas:
+            return []
+        regioes = regioes_tronco([bbox for bbox, _ in pessoas], small_frame.shape, self.CASCADE_UPPER_BODY_RATIO)
+        if not regioes:
+            return []
+        mosaico, posicoes = montar_mosaico(small_frame, regioes, largura_max=small_frame.shape[1])
+        
+        # Multidão: o mosaico já é maior que o frame, então o frame inteiro sai mais barato
+        if mosaico.shape[0] * mosaico.shape[1] >= small_frame.shape[0] * small_frame.shape[1]:
+            return self._detectar_rostos(small_frame)
+        
+        faces = remapear_faces(self._detectar_rostos(mosaico), regioes, posicoes)
+        return suprimir_duplicadas(faces)
+    
+    def _faces_de_keypoints(self, keypoints, pessoas):
+        """
+        Modo keypoints: o rosto de cada pessoa sai dos keypoints da cabeça (nariz e olhos)
+        do modelo de pose, sem rodar o detector. Retorna (faces, pessoas_sem_cabeca);
+        as pessoas sem cabeça confiável vão para o detector como fallback.
+        """
+        faces = []
+        sem_cabeca = []
+        for kp, pessoa in zip(keypoints, pessoas):
+            estimado = landmarks_de_keypoints(kp, conf_min=self.KEYPOINT_FACE_MIN_CONF)
+            if estimado is None:
+                sem_cabeca.append(pessoa)
+                continue
+            landmarks, bbox, score = estimado
+            faces.append(self.app_insight.criar_face(bbox=bbox, kps=landmarks, det_score=score))
+        return faces, sem_cabeca
+    
+    def _detectar_rostos(self, imagem):
+        """Só a detecção do buffalo_l: caixas e landmarks, sem embedding."""
+        bboxes, kpss = self.app_insight.det_model.detect(imagem, input_size=(self.DET_SIZE, self.DET_SIZE),
+                                                         max_num=0, metric='default')
+        faces = []
+        for i in range(bboxes.shape[0]):
+            faces.append(self.app_insight.criar_face(
+                bbox=bboxes[i, 0:4],
+                kps=kpss[i] if kpss is not None else None,
+                det_score=bboxes[i, 4]
+            ))
+        return faces
+    
+    def _extrair_embeddings(self, imagem, faces):
+        """Roda o modelo de reconhecimento em lote para as faces pedidas."""
+        if not faces:
+            return
+        rec_model = self.app_insight.models['recognition']
+        alinhadas = [self.app_insight.norm_crop(imagem, landmark=face.kps, image_size=rec_model.input_size[0]) for face in faces]
+        embeddings = rec_model.get_feat(alinhadas)
+        for face, embedding in zip(faces, embeddings):
+            face.embedding = embedding.flatten()
+    
+    def _reconhecer_faces(self, faces, small_frame, frame_to_process, stream_id=None, agora=None):
         current_faces_results = []
-        current_persons_results = []
-        try:
-            frame_ajustado = adjust_gamma(frame_to_process, gamma=self.GAMMA_VALUE)
-            small_frame = cv2.resize(frame_ajustado, (0, 0), fx=self.SCALE_FACTOR, fy=self.SCALE_FACTOR)
-            faces = self.app_insight.get(small_frame)
-            
-            for face in faces:
-                live_embedding = face.normed_embedding
+        if agora is None:
+            agora = time.monotonic()
+        rastreador = self._rastreador(stream_id)
+        origem = "" if stream_id is None else f"[Câmera {stream_id}] "
+        
+        # Rostos já identificados em frames anteriores reaproveitam a identidade da trilha;
+        # só trilhas novas, incertas ou vencidas passam pelo modelo de reconhecimento.
+        trilhas = rastreador.atualizar([face.bbox for face in faces], agora)
+        pendentes = [i for i, trilha in enumerate(trilhas) if rastreador.precisa_embedding(trilha, agora)]
+        avaliacoes = {}
+        filtro = self.filtro_qualidade
+        if filtro is not None and pendentes:
+            # Rosto ruim fica para um frame melhor da mesma trilha
+            with medir(self._tempos, "qualidade"):
+                avaliacoes, pendentes = filtro.filtrar(faces, trilhas, pendentes, small_frame)
+        inicio_embeddings = time.perf_counter()
+        with medir(self._tempos, "reconhecimento"):
+            self._extrair_embeddings(small_frame, [faces[i] for i in pendentes])
+        if filtro is not None:
+            filtro.registrar_embeddings((time.perf_counter() - inicio_embeddings) * 1000, len(pendentes))
+        if self.metricas is not None:
+            self.metricas.incrementar("embeddings", len(pendentes))
+        
+        # Todas as faces pendentes são comparadas com a galeria numa única busca
+        galeria = self.galeria
+        if pendentes and len(galeria) > 0:
+            with medir(self._tempos, "galeria"):
+                match_indices, match_scores = galeria.buscar(np.stack([faces[i].normed_embedding for i in pendentes]), k=1)
+        
+        for j, i in enumerate(pendentes):
+            if len(galeria) == 0 or match_indices[j, 0] < 0:
+                name = "NAO ALUNO"
+                best_score = 0.0
                 
-                if len(self.known_face_embeddings) == 0:
-                    name = "NAO ALUNO"
-                    best_score = 0.0
-                    
-                else:
-                    scores = np.dot(self.known_face_embeddings, live_embedding)
-                    best_match_index = np.argmax(scores)
-                    best_score = scores[best_match_index]
-                    name = "NAO ALUNO"
-                    
-                    if best_score > self.SIMILARITY_THRESHOLD:
-                        name = self.known_face_names[best_match_index]
-                        
-                bbox = face.bbox.astype(int)
-                current_faces_results.append({
-                    "name": name,
-                    "bbox": [int(coord / self.SCALE_FACTOR) for coord in bbox],
-                    "confidence": float(best_score)
-                })
+            else:
+                best_match_index = match_indices[j, 0]
+                best_score = float(match_scores[j, 0])
+                name = "NAO ALUNO"
                 
+                if best_score > self.SIMILARITY_THRESHOLD:
+                    name = galeria.nomes[best_match_index]
+            
+            rastreador.registrar_embedding(trilhas[i], name, best_score, agora)
+            if filtro is not None:
+                filtro.registrar_identidade(trilhas[i], name != "NAO ALUNO")
+            if name == "NAO ALUNO":
+                trilhas[i].desconhecido = self.desconhecidos.atribuir(faces[i].normed_embedding, agora)
+        
+        inicio_alertas = time.perf_counter()
+        for i, (face, trilha) in enumerate(zip(faces, trilhas)):
+            name = trilha.nome
+            bbox = face.bbox.astype(int)
+            current_faces_results.append({
+                "name": name,
+                "bbox": [int(coord / self.SCALE_FACTOR) for coord in bbox],
+                "confidence": float(trilha.score),
+                "track_id": trilha.id
+            })
+            
+            if trilha.identificada and rastreador.deve_logar(trilha, agora, self.LOG_COOLDOWN_SECONDS):
                 current_time = time.time()
                 
-                if name not in self.recently_logged or (current_time - self.recently_logged[name] > self.LOG_COOLDOWN_SECONDS):
-                    self.recently_logged[name] = current_time
+                if name == "NAO ALUNO":
+                    if filtro is not None:
+                        # Qualidade do recorte: confiança, tamanho, pose e nitidez
+                        qualidade = filtro.pontuacao(avaliacoes.get(i) or filtro.avaliar(face, small_frame))
+                    else:
+                        # Qualidade do recorte: confiança da detecção, penalizando rostos menores que 112 px
+                        lado = min(bbox[2] - bbox[0], bbox[3] - bbox[1]) / self.SCALE_FACTOR
+                        qualidade = float(face.det_score or 0.0) * min(1.0, lado / 112)
+                    acao, gravar, cluster = self.desconhecidos.decidir(trilha.desconhecido, qualidade, agora)
+                    if acao == "alertar" and self.metricas is not None:
+                        self.metricas.incrementar("alertas")
                     
-                    if name == "NAO ALUNO":
-                        timestamp = time.strftime("%Y-%m-%d_%H-%M-%S")
-                        timestamp_ms = f"{timestamp}_{int(current_time * 1000) % 1000}"
-                        img_name = f"ALERTA_NAO_ALUNO_{timestamp_ms}.jpg"
-                        save_path = os.path.join(self.image_log_directory, img_name)
+                    imagem = cluster.caminho if cluster is not None else None
+                    if gravar:
+                        if cluster is not None and cluster.caminho is not None:
+                            # Um arquivo por desconhecido: um recorte melhor substitui o anterior
+                            save_path = cluster.caminho
+                        else:
+                            timestamp = time.strftime("%Y-%m-%d_%H-%M-%S")
+                            timestamp_ms = f"{timestamp}_{int(current_time * 1000) % 1000}"
+                            img_name = f"ALERTA_NAO_ALUNO_{timestamp_ms}" if stream_id is None else f"ALERTA_NAO_ALUNO_cam{stream_id}_{timestamp_ms}"
+                            if cluster is not None:
+                                img_name += f"_desconhecido{cluster.id}"
+                            save_path = os.path.join(self.image_log_directory, img_name + ".jpg")
                         inverse_scale = 1 / self.SCALE_FACTOR
                         h_full, w_full = frame_to_process.shape[:2]
                         orig_x1 = max(0, int(bbox[0] * inverse_scale))
@@ -170,100 +651,278 @@ class ProcessadorCV:
                         orig_y2 = min(h_full, int(bbox[3] * inverse_scale))
                         cropped_face = frame_to_process[orig_y1:orig_y2, orig_x1:orig_x2].copy() 
                         if cropped_face.size > 0:
-                            cv2.imwrite(save_path, cropped_face)
-                            self.logger_alertas.warning(f"ALERTA: Pessoa não cadastrada. Imagem salva: {save_path}")
+                            imagem = save_path
+                            if cluster is not None:
+                                cluster.caminho = save_path
+                            # Codificação JPEG e escrita em disco ficam na thread do GravadorAlertas;
+                            # só um alerta novo vai para o log (recortes melhores só substituem o arquivo)
+                            self.gravador_alertas.enviar(save_path, cropped_face, logar=acao == "alertar")
                         else:
-                            self.logger_alertas.warning(f"ALERTA: Pessoa não cadastrada. Falha ao salvar (rosto pequeno).")
+                            self.logger_alertas.warning(f"{origem}ALERTA: Pessoa não cadastrada. Falha ao salvar (rosto pequeno).")
+                    elif acao == "alertar":
+                        self.logger_alertas.warning(f"{origem}ALERTA: Pessoa não cadastrada (desconhecido #{cluster.id}) "
+                                                    f"vista novamente. Imagem: {cluster.caminho}")
+                    self.eventos.registrar(
+                        NAO_ALUNO, identidade=None if cluster is None else f"desconhecido#{cluster.id}",
+                        camera=stream_id, alerta="NAO ALUNO" if acao == "alertar" else None,
+                        confianca=round(qualidade, 3), track_id=trilha.id, imagem=imagem, detalhes={"acao": acao}
+                    )
+                else:
+                    self.logger_alunos.info(f"{origem}RECONHECIDO: {name}")
+                    self.eventos.registrar(RECONHECIDO, identidade=name, camera=stream_id,
+                                           confianca=float(trilha.score), track_id=trilha.id)
+        
+        self._tempos["alertas"] = self._tempos.get("alertas", 0.0) + (time.perf_counter() - inicio_alertas) * 1000
+        return current_faces_results
+    
+    def processar_frame(self, frame_to_process, stream_id=None, pessoas=None, keypoints=None, timestamp=None):
+        pessoas_externas = None if pessoas is None else {stream_id: pessoas}
+        keypoints_externos = None if keypoints is None else {stream_id: keypoints}
+        return self.processar_lote({stream_id: frame_to_process}, pessoas_externas, keypoints_externos,
+                                   timestamp=timestamp)[stream_id]
+    
+    def processar_lote(self, frames, pessoas_externas=None, keypoints_externos=None, timestamp=None):
+        """
+        Processa um frame de cada câmera: {stream_id: frame} -> {stream_id: resultados}.
+        O YOLO roda em lote para todas as câmeras; a análise facial roda por câmera.
+        'pessoas_externas' ({stream_id: [(bbox, confiança), ...]}, em coordenadas do frame
+        original) substitui o YOLO, quando outro modelo já detectou as pessoas.
+        'keypoints_externos' ({stream_id: array [N, 17, 3]}, mesma ordem das pessoas) permite,
+        com KEYPOINT_FACE_MODE, tirar os rostos dos keypoints da cabeça em vez do detector.
+        'timestamp' (segundos) substitui time.monotonic() nas trilhas, cooldowns e clusters de
+        desconhecidos; o replay passa o relógio do vídeo.
+        """
+        inicio = time.perf_counter()
+        self._trocar_galeria_pendente()
+        # Duração (ms) de cada estágio nesta chamada; fica em self.ultimos_tempos ao final
+        self._tempos = {}
+        stream_ids = list(frames)
+        resultados = {stream_id: {"faces": [], "persons": []} for stream_id in stream_ids}
+        try:
+            small_frames = []
+            with medir(self._tempos, "preprocessamento"):
+                for stream_id in stream_ids:
+                    small_frames.append(self.preprocessador.preparar(frames[stream_id], self.SCALE_FACTOR,
+                                                                     self.GAMMA_VALUE, stream_id))
+            if pessoas_externas is not None:
+                pessoas_lote = [
+                    [((np.asarray(bbox) * self.SCALE_FACTOR).astype(int), float(conf)) for bbox, conf in pessoas_externas[stream_id]]
+                    for stream_id in stream_ids
+                ]
+            else:
+                with medir(self._tempos, "pessoas"):
+                    pessoas_lote = self._detectar_pessoas_lote(small_frames)
+        except Exception as e:
+            self._registrar_erro("deteccao_pessoas", e)
+            self.ultimos_tempos = self._tempos
+            return resultados
+        
+        for stream_id, small_frame, pessoas in zip(stream_ids, small_frames, pessoas_lote):
+            current_faces_results = []
+            current_persons_results = []
+            try:
+                with medir(self._tempos, "deteccao_rostos"):
+                    if self.KEYPOINT_FACE_MODE and keypoints_externos is not None:
+                        keypoints = np.asarray(keypoints_externos[stream_id], dtype=np.float32).copy()
+                        keypoints[..., :2] *= self.SCALE_FACTOR
+                        faces, sem_cabeca = self._faces_de_keypoints(keypoints, pessoas)
+                        if sem_cabeca:
+                            # Fallback: detector só na parte superior de quem não tem cabeça confiável
+                            faces = suprimir_duplicadas(faces + self._detectar_faces_em_pessoas(small_frame, sem_cabeca))
+                    elif self.CASCADE_MODE:
+                        # Sem ninguém na cena a análise facial é pulada
+                        faces = self._detectar_faces_em_pessoas(small_frame, pessoas)
                     else:
-                        self.logger_alunos.info(f"RECONHECIDO: {name}")
-                        
-            results_yolo = self.model_yolo(small_frame, classes=[0], verbose=False)
-            
-            for r in results_yolo:
-                for box in r.boxes:
-                    bbox_person = box.xyxy[0].numpy().astype(int)
-                    
+                        faces = self._detectar_rostos(small_frame)
+                
+                current_faces_results = self._reconhecer_faces(faces, small_frame, frames[stream_id], stream_id, timestamp)
+                
+                for bbox_person, confidence in pessoas:
                     current_persons_results.append({
                         "bbox": [int(coord / self.SCALE_FACTOR) for coord in bbox_person],
-                        "confidence": float(box.conf[0])
+                        "confidence": confidence
                     })
-                    
-        except Exception as e:
-            print(f"[ERRO NO PROCESSAMENTO]: {e}")
-            self.logger_alertas.error(f"Erro ao processar frame: {e}")
+                        
+            except Exception as e:
+                self._registrar_erro("analise_facial", e)
             
-        return {"faces": current_faces_results, "persons": current_persons_results}
+            resultados[stream_id] = {"faces": current_faces_results, "persons": current_persons_results}
+        
+        self.ultimos_tempos = self._tempos
+        duracao_ms = (time.perf_counter() - inicio) * 1000
+        if self.metricas is not None:
+            self._registrar_metricas(resultados, duracao_ms)
+        if self.controlador is not None:
+            self.controlador.observar(self._tempos, duracao_ms)
+        if self.perfil.concluir(duracao_ms):
+            print(f"[INFO] {formatar_perfil(self.perfil)}")
+            self.logger_alunos.info(formatar_perfil(self.perfil))
+        return resultados
+    
+    def encerrar(self):
+        """Esvazia a fila de alertas pendentes antes de sair."""
+        if self.recarregador_galeria is not None:
+            self.recarregador_galeria.parar()
+        self.gravador_alertas.parar()
+        self.eventos.parar()
+        for exportador in self._exportadores_metricas:
+            exportador.parar()
+        stats = self.gravador_alertas.estatisticas()
+        print(f"[INFO] Alertas gravados: {stats['gravados']} | descartados: {stats['descartados']} | falhas: {stats['falhas']}")
+        stats = self.eventos.estatisticas()
+        print(f"[INFO] Eventos gravados: {stats['gravados']} em {stats['lotes']} lotes | descartados: {stats['descartados']}")
+        stats = self.desconhecidos.estatisticas()
+        print(f"[INFO] Desconhecidos: {stats['clusters']} clusters | {stats['fusoes']} fusões | "
+              f"{stats['escritas_suprimidas']} gravações suprimidas | {stats['representantes_atualizados']} recortes substituídos")
+        if self.filtro_qualidade is not None:
+            print(f"[INFO] {formatar_qualidade(self.filtro_qualidade.estatisticas())}")
+        if self.controlador is not None:
+            print(f"[INFO] {formatar_adaptacao(self.controlador.estatisticas())}")
         
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconhecimento facial de alunos.")
+    parser.add_argument("--cascata", action="store_true",
+                        help="Roda o YOLO primeiro e o InsightFace só na parte superior das pessoas detectadas")
+    parser.add_argument("--fontes", nargs="+", default=["0"],
+                        help="Câmeras (índices), arquivos de vídeo ou URLs RTSP; mais de uma ativa o modo multi-câmera")
+    parser.add_argument("--metricas-porta", type=int,
+                        help="Expõe as métricas em http://127.0.0.1:PORTA/metrics (formato Prometheus)")
+    parser.add_argument("--metricas-arquivo",
+                        help="Grava periodicamente um instantâneo das métricas neste arquivo JSON")
+    parser.add_argument("--metricas-intervalo", type=float, default=30.0,
+                        help="Intervalo (s) entre gravações do arquivo de métricas")
+    parser.add_argument("--movimento", action="store_true",
+                        help="Só roda os modelos com movimento na cena; parada, cai para --fps-repouso")
+    parser.add_argument("--fps-repouso", type=float, default=1.0,
+                        help="Taxa de inferência (keep-alive) com a cena parada")
+    parser.add_argument("--limiar-movimento", type=float, default=0.01,
+                        help="Fração de pixels alterados que conta como movimento")
+    parser.add_argument("--orcamento-ms", type=float,
+                        help="Latência alvo da inferência; escala, det_size e FPS passam a se ajustar sozinhos")
+    parser.add_argument("--sem-filtro-qualidade", action="store_true",
+                        help="Reconhece todos os rostos, mesmo pequenos, borrados ou virados")
+    parser.add_argument("--sem-janela", action="store_true",
+                        help="Não abre janelas de vídeo (Raspberry Pi sem monitor)")
+    parser.add_argument("--servir", type=int, metavar="PORTA",
+                        help="Transmite os frames anotados (MJPEG) e os resultados (SSE) em http://HOST:PORTA/")
+    parser.add_argument("--servir-host", default="0.0.0.0", help="Interface do servidor de transmissão")
+    parser.add_argument("--codificadores", type=int, default=2, help="Threads de codificação JPEG da transmissão")
+    args = parser.parse_args()
+    
     try:
         pcv = ProcessadorCV()
+        pcv.CASCADE_MODE = args.cascata
+        if args.sem_filtro_qualidade:
+            pcv.filtro_qualidade = None
+        if args.metricas_porta or args.metricas_arquivo:
+            pcv.habilitar_metricas(args.metricas_porta, args.metricas_arquivo, args.metricas_intervalo)
+        if args.orcamento_ms:
+            pcv.habilitar_adaptacao(args.orcamento_ms)
     
     except Exception as e:
         print(f"CRASH FATAL: {e}")
         exit()
     
+    criar_agendador = None
+    if args.movimento:
+        def criar_agendador():
+            return AgendadorInferencia(fps_repouso=args.fps_repouso, limiar_movimento=args.limiar_movimento)
+    
+    transmissao = None
+    if args.servir:
+        transmissao = iniciar_transmissao(range(len(args.fontes)), args.servir, args.servir_host, pcv.metricas,
+                                          codificadores=args.codificadores)
+    servidor, transmissores = transmissao or (None, {})
+    
+    if len(args.fontes) > 1:
+        executar_multicamera(pcv, args.fontes, criar_agendador, exibir=not args.sem_janela, transmissao=transmissao)
+        exit()
+    
     #inicialização da camera
     print("[INFO] Abrindo câmera")
-    cap = cv2.VideoCapture(0)
-    
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH , 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+    cap, fps_alvo = abrir_fonte(args.fontes[0])
     
     if not cap.isOpened():
         print("[ERRO] Não foi possível acesasr a câmera. Verifique a conexão.")
         exit()
     
+    print("[INFO] Aquecendo os modelos...")
+    pcv.aquecer(forma_captura(cap))
+    
     print("--- SISTEMA INICIADO ---")
-    print("Pressione 'q' na janela de vídeo para sair.")
+    print("Pressione Ctrl+C para sair." if args.sem_janela else "Pressione 'q' na janela de vídeo para sair.")
     
-    frame_count = 0
-    SKIP_FRAMES = 3
+    # Captura, inferência e renderização rodam em estágios separados:
+    # a inferência sempre pega o frame mais novo quando fica livre.
+    agendador = criar_agendador() if criar_agendador else None
+    pipeline = PipelineCV(cap, pcv.processar_frame, fps_alvo=fps_alvo, agendador=agendador, controlador=pcv.controlador)
+    if pcv.metricas is not None:
+        pcv.metricas.adicionar_coletor(lambda: {"frames_descartados_total": pipeline.inferencia.descartados})
+        if agendador is not None:
+            pcv.metricas.adicionar_coletor(lambda: {"frames_pulados_total": agendador.pulados})
+    pipeline.iniciar()
     
-    last_results = {"faces": [], "persons" : []}
+    seq = 0
+    exibicao = None
+    transmissor = transmissores.get(0)
+    ultimo_relatorio = time.monotonic()
     
     try:
         while True:
-            ret, frame = cap.read()
+            proximo = pipeline.proximo(seq)
             
-            if not ret: 
-                print("[ERRO] Falha ao ler framded de câmera")
-                break
-                
-            if frame_count % (SKIP_FRAMES + 1) == 0:
-                last_results = pcv.processar_frame(frame)
+            if proximo is None:
+                if pipeline.captura.falhou:
+                    break
+                continue
             
-            for face in last_results.get("faces", []):
-                name = face["name"]
-                x1, y1, x2, y2 = face["bbox"]
-                conf = face["confidence"]
-                
-                if name == "NAO ALUNO":
-                    color = (0, 0, 255)
-                    label = f"NAO ALUNO"
+            seq, frame, last_results, _ = proximo
+            # Sem janela, só desenha quando algum cliente remoto vai receber o frame
+            anotar = not args.sem_janela or (transmissor is not None and transmissor.aguardando_frame())
+            if anotar:
+                # O frame capturado é compartilhado com a thread de inferência: desenha numa cópia reaproveitada
+                exibicao = frame = copiar_em_buffer(exibicao, frame)
                 
-                else:
-                    color = (0, 255, 0)
-                    label = f"{name} ({int(conf*100)}%)"
-                    
-                cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
-                
-            for person in last_results.get("persons", []):
-                px1, py1, px2, py2 = person["bbox"]
+                desenhar_resultados(frame, last_results)
                 
-                cv2.rectangle(frame, (px1, py1), (px2, py2), (255, 0 ,0), 1)
-                
-            cv2.imshow("Sistema de reconhecimento - Raspberry Pi", frame)
-            frame_count += 1
+                pipeline.desenhar_estatisticas(frame)
+            if not args.sem_janela:
+                cv2.imshow("Sistema de reconhecimento - Raspberry Pi", frame)
+            if transmissor is not None:
+                transmissor.publicar(frame if anotar else None, last_results)
+            
+            if time.monotonic() - ultimo_relatorio > pipeline.intervalo_relatorio:
+                ultimo_relatorio = time.monotonic()
+                stats = pipeline.estatisticas()
+                print(f"[INFO] Captura: {stats['fps_captura']:.1f} FPS | "
+                      f"Inferência: {stats['fps_inferencia']:.1f} FPS | "
+                      f"Idade dos resultados: média {stats['idade_media_ms']:.0f} ms, "
+                      f"máx {stats['idade_max_ms']:.0f} ms")
+                if agendador is not None:
+                    print(f"[INFO] {formatar_estatisticas(agendador.estatisticas())}")
+                if pcv.filtro_qualidade is not None:
+                    print(f"[INFO] {formatar_qualidade(pcv.filtro_qualidade.estatisticas())}")
+                if pcv.controlador is not None:
+                    print(f"[INFO] {formatar_adaptacao(pcv.controlador.estatisticas())}")
+                if servidor is not None:
+                    print(f"[INFO] {formatar_transmissao(servidor.estatisticas())}")
             
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            if not args.sem_janela and cv2.waitKey(1) & 0xFF == ord('q'):
                 break
         
     except KeyboardInterrupt:
         print("Interrupção manual detectada")
     
     finally:
+        pipeline.parar()
+        if agendador is not None:
+            print(f"[INFO] {formatar_estatisticas(agendador.estatisticas())}")
+        if servidor is not None:
+            print(f"[INFO] {formatar_transmissao(servidor.estatisticas())}")
+            servidor.parar()
+        pcv.encerrar()
         cap.release()
-        cv2.destroyAllWindows()
+        if not args.sem_janela:
+            cv2.destroyAllWindows()
             
-        print("[INFO] Sistema encerrado corretamente.")
+        print("[INFO] Sistema encerrado corretamente.")
\ No newline at end of file
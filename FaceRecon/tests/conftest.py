@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Os módulos do FaceRecon são importados pelo nome, como no reconhecimento.py,
+# e o pacote 'comum' a partir da raiz do repositório
+FACERECON = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(FACERECON))
+sys.path.insert(0, FACERECON)
@@ -0,0 +1,75 @@
+import logging
+import queue
+import threading
+import time
+
+import numpy as np
+
+import alertas
+from alertas import EncaminhadorAlertas, GravadorAlertas
+
+class ColetorLogs(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.mensagens = []
+
+    def emit(self, record):
+        self.mensagens.append(record.getMessage())
+
+def criar_gravador():
+    logger = logging.getLogger("TesteAlertas")
+    logger.handlers.clear()
+    coletor = ColetorLogs()
+    logger.addHandler(coletor)
+    gravador = GravadorAlertas(logger)
+    gravador.start()
+    return gravador, coletor
+
+def test_so_o_alerta_novo_vai_para_o_log(tmp_path):
+    gravador, coletor = criar_gravador()
+    recorte = np.full((32, 32, 3), 128, dtype=np.uint8)
+    caminho = str(tmp_path / "ALERTA_NAO_ALUNO_desconhecido1.jpg")
+    gravador.enviar(caminho, recorte)
+    # Recortes melhores do mesmo desconhecido substituem o arquivo sem novo ALERTA
+    gravador.enviar(caminho, recorte, logar=False)
+    gravador.enviar(caminho, recorte, logar=False)
+    gravador.parar()
+
+    assert gravador.estatisticas()["gravados"] == 3
+    assert sum("ALERTA" in mensagem for mensagem in coletor.mensagens) == 1
+
+def test_falha_ao_substituir_nao_vira_alerta(tmp_path):
+    gravador, coletor = criar_gravador()
+    recorte = np.full((32, 32, 3), 128, dtype=np.uint8)
+    gravador.enviar(str(tmp_path / "inexistente" / "recorte.jpg"), recorte, logar=False)
+    gravador.parar()
+
+    assert gravador.estatisticas()["falhas"] == 1
+    assert not any("ALERTA" in mensagem for mensagem in coletor.mensagens)
+
+def test_encaminhador_leva_a_decisao_de_log():
+    canal = queue.Queue()
+    encaminhador = EncaminhadorAlertas(canal)
+    encaminhador.enviar("a.jpg", None)
+    encaminhador.enviar("a.jpg", None, logar=False)
+    assert [mensagem[3] for mensagem in (canal.get(), canal.get())] == [True, False]
+
+def test_parar_com_disco_travado_nao_trava(tmp_path, monkeypatch):
+    liberar = threading.Event()
+    monkeypatch.setattr(alertas.cv2, "imwrite", lambda *args: liberar.wait() or True)
+    logger = logging.getLogger("TesteAlertas")
+    gravador = GravadorAlertas(logger, tamanho_fila=2)
+    gravador.start()
+    recorte = np.zeros((8, 8, 3), dtype=np.uint8)
+    # Um alerta preso na escrita e a fila cheia atrás dele
+    for i in range(4):
+        gravador.enviar(str(tmp_path / f"{i}.jpg"), recorte)
+    inicio = time.monotonic()
+    gravador.parar(timeout=0.3)
+    try:
+        assert time.monotonic() - inicio < 1.0
+        assert gravador.is_alive()
+    finally:
+        liberar.set()
+        gravador.join(timeout=5.0)
+    assert not gravador.is_alive()
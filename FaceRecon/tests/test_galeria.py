@@ -0,0 +1,59 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+import galeria
+from galeria import carregar_galeria, migrar_pickle, normalizar, salvar_galeria
+
+def embeddings_aleatorios(n, semente=0):
+    return np.random.default_rng(semente).normal(size=(n, 512)).astype(np.float32)
+
+def arquivos_npy(diretorio):
+    return sorted(nome for nome in os.listdir(diretorio) if nome.endswith(".npy"))
+
+def test_migracao_do_pickle_preserva_nomes_e_embeddings(tmp_path):
+    embeddings = embeddings_aleatorios(3)
+    nomes = ["ANA", "BRUNO", "CAIO"]
+    caminho_pkl = tmp_path / "base_dados_alunos.pkl"
+    with open(caminho_pkl, "wb") as file:
+        pickle.dump({"embeddings": embeddings, "names": nomes}, file)
+
+    manifesto = migrar_pickle(str(caminho_pkl), str(tmp_path / "base_dados_alunos.galeria.json"))
+    carregados, nomes_carregados, _ = carregar_galeria(manifesto)
+    assert nomes_carregados == nomes
+    np.testing.assert_allclose(carregados, normalizar(embeddings), atol=1e-6)
+
+def test_nova_geracao_remove_a_anterior(tmp_path):
+    manifesto = str(tmp_path / "base_dados_alunos.galeria.json")
+    salvar_galeria(manifesto, embeddings_aleatorios(2), ["ANA", "BRUNO"])
+    anterior = arquivos_npy(tmp_path)
+    salvar_galeria(manifesto, embeddings_aleatorios(1, semente=1), ["CAIO"])
+    assert len(arquivos_npy(tmp_path)) == 1
+    assert arquivos_npy(tmp_path) != anterior
+    assert carregar_galeria(manifesto)[1] == ["CAIO"]
+
+@pytest.mark.parametrize("etapa", ["embeddings", "manifesto"])
+def test_falha_no_meio_da_gravacao_mantem_a_galeria_anterior(tmp_path, monkeypatch, etapa):
+    manifesto = str(tmp_path / "base_dados_alunos.galeria.json")
+    embeddings = embeddings_aleatorios(2)
+    salvar_galeria(manifesto, embeddings, ["ANA", "BRUNO"])
+    anterior = arquivos_npy(tmp_path)
+
+    def falhar(*args, **kwargs):
+        raise OSError("disco cheio")
+    if etapa == "embeddings":
+        monkeypatch.setattr(galeria.np, "save", falhar)
+    else:
+        monkeypatch.setattr(galeria.json, "dump", falhar)
+    with pytest.raises(OSError):
+        salvar_galeria(manifesto, embeddings_aleatorios(3, semente=1), ["ANA", "BRUNO", "CAIO"])
+    monkeypatch.undo()
+
+    carregados, nomes, _ = carregar_galeria(manifesto)
+    assert nomes == ["ANA", "BRUNO"]
+    np.testing.assert_allclose(carregados, normalizar(embeddings), atol=1e-6)
+    # Nada da gravação que falhou fica para trás
+    assert arquivos_npy(tmp_path) == anterior
+    assert not os.path.exists(manifesto + ".tmp")
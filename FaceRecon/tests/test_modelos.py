@@ -0,0 +1,32 @@
+import numpy as np
+
+from modelos import DetectorPessoasONNX
+
+class EntradaFalsa:
+    name = "images"
+    shape = [1, 3, "altura", "largura"]
+
+class SessaoFalsa:
+    def get_inputs(self):
+        return [EntradaFalsa()]
+
+def saida_yolo(caixas):
+    """[(cx, cy, w, h, {classe: score})] -> saída [4 + 80, N] do YOLOv8."""
+    saida = np.zeros((84, len(caixas)), dtype=np.float32)
+    for j, (cx, cy, w, h, scores) in enumerate(caixas):
+        saida[:4, j] = (cx, cy, w, h)
+        for classe, score in scores.items():
+            saida[4 + classe, j] = score
+    return saida
+
+def test_so_caixas_com_pessoa_como_melhor_classe():
+    detector = DetectorPessoasONNX(SessaoFalsa())
+    saida = saida_yolo([
+        (100, 100, 50, 100, {0: 0.8}),          # pessoa
+        (300, 100, 50, 100, {0: 0.3, 56: 0.9}), # cadeira que também pontua como pessoa
+    ])
+    pessoas = detector._pessoas(saida, 1.0, (0, 0), (480, 640, 3))
+    assert len(pessoas) == 1
+    bbox, conf = pessoas[0]
+    assert list(bbox) == [75, 50, 125, 150]
+    assert abs(conf - 0.8) < 1e-6
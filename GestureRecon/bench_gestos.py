@@ -0,0 +1,225 @@
+import argparse
+import time
+
+import numpy as np
+
+from detector import GestureAnalyzer
+
+# ================================
+# SEQUÊNCIAS SINTÉTICAS DE KEYPOINTS
+# ================================
+# Esqueleto de uma pessoa em pé (COCO, 17 pontos), em pixels relativos ao centro do tronco
+POSE_BASE = np.array([
+    [0, -90], [-6, -96], [6, -96], [-14, -92], [14, -92],   # cabeça
+    [-30, -60], [30, -60],                                  # ombros
+    [-38, 0], [38, 0],                                      # cotovelos
+    [-40, 60], [40, 60],                                    # pulsos
+    [-20, 40], [20, 40],                                    # quadris
+    [-22, 100], [22, 100],                                  # joelhos
+    [-22, 160], [22, 160],                                  # tornozelos
+], dtype=np.float32)
+
+def _variacao(tipo):
+    """Desloca braços para reproduzir cada gesto analisado."""
+    pose = POSE_BASE.copy()
+    if tipo == "apontando":
+        pose[7] = [-75, -60]
+        pose[9] = [-120, -62]
+    elif tipo == "rendicao":
+        pose[7] = [-45, -100]
+        pose[9] = [-40, -140]
+        pose[8] = [45, -100]
+        pose[10] = [40, -140]
+    elif tipo == "mao_oculta":
+        pose[8] = [20, -10]
+        pose[10] = [5, -20]
+    elif tipo == "bracos_cruzados":
+        pose[9] = [5, 30]
+        pose[10] = [-5, 32]
+    return pose
+
+TIPOS = ("normal", "apontando", "rendicao", "mao_oculta", "bracos_cruzados")
+
+def gerar_sequencia(n_pessoas, n_frames, semente=0):
+    """
+    Gera [n_frames] listas de (track_ids, keypoints [N, 17, 3]). Cada pessoa mantém
+    um gesto por alguns segundos, com ruído e pontos de baixa confiança, e algumas
+    pessoas entram e saem da cena.
+    """
+    rng = np.random.default_rng(semente)
+    centros = rng.uniform([100, 150], [1180, 560], (n_pessoas, 2)).astype(np.float32)
+    escalas = rng.uniform(0.4, 1.6, n_pessoas).astype(np.float32)
+    tipos = rng.integers(0, len(TIPOS), n_pessoas)
+    proximo_id = n_pessoas + 1
+    ids = np.arange(1, n_pessoas + 1)
+
+    frames = []
+    for _ in range(n_frames):
+        troca = rng.random(n_pessoas) < 0.01
+        tipos[troca] = rng.integers(0, len(TIPOS), troca.sum())
+        sai = rng.random(n_pessoas) < 0.002
+        for i in np.flatnonzero(sai):
+            ids[i] = proximo_id
+            proximo_id += 1
+
+        kp = np.empty((n_pessoas, 17, 3), dtype=np.float32)
+        for i in range(n_pessoas):
+            pose = _variacao(TIPOS[tipos[i]]) * escalas[i] + centros[i]
+            kp[i, :, :2] = pose + rng.normal(0, 3, (17, 2))
+            kp[i, :, 2] = np.clip(rng.normal(0.85, 0.15, 17), 0, 1)
+        visiveis = rng.random(n_pessoas) > 0.05
+        frames.append((ids[visiveis].tolist(), kp[visiveis]))
+    return frames
+
+def gerar_roteiro(n_pessoas, duracao_s, fps=30, semente=0):
+    """
+    Roteiro determinístico: cada pessoa alterna trechos normais de 6 s (a evidência
+    sempre zera) com gestos curtos (0,4 s, nunca alertam) ou longos (4 s, sempre
+    alertam). Ruído baixo e confiança alta, para que cada frame seja classificado do
+    mesmo jeito em qualquer taxa de amostragem. Retorna (frames, timestamps).
+    """
+    rng = np.random.default_rng(semente)
+    n_frames = int(duracao_s * fps)
+    centros = rng.uniform([100, 150], [1180, 560], (n_pessoas, 2)).astype(np.float32)
+    tipos = np.zeros((n_pessoas, n_frames), dtype=np.int64)
+    for p in range(n_pessoas):
+        t = rng.uniform(0, 6)
+        while t < duracao_s:
+            duracao = rng.choice([0.4, 4.0])
+            inicio, fim = int(t * fps), int((t + duracao) * fps)
+            tipos[p, inicio:fim] = rng.integers(1, len(TIPOS))
+            t += duracao + 6.0
+
+    frames = []
+    for f in range(n_frames):
+        kp = np.empty((n_pessoas, 17, 3), dtype=np.float32)
+        for p in range(n_pessoas):
+            kp[p, :, :2] = _variacao(TIPOS[tipos[p, f]]) + centros[p] + rng.normal(0, 0.5, (17, 2))
+            kp[p, :, 2] = 0.95
+        frames.append((list(range(1, n_pessoas + 1)), kp))
+    return frames, [f / fps for f in range(n_frames)]
+
+def gerar_aleatoria(n_pessoas, n_frames, semente=0):
+    """Keypoints e confianças uniformes: cobre os casos de borda das regras."""
+    rng = np.random.default_rng(semente)
+    frames = []
+    for _ in range(n_frames):
+        kp = np.empty((n_pessoas, 17, 3), dtype=np.float32)
+        kp[:, :, :2] = rng.uniform(0, 200, (n_pessoas, 17, 2))
+        kp[:, :, 2] = rng.uniform(0, 1, (n_pessoas, 17))
+        frames.append((list(range(n_pessoas)), kp))
+    return frames
+
+# ================================
+# EQUIVALÊNCIA E DESEMPENHO
+# ================================
+def rodar_escalar(frames, timestamps):
+    analyzer = GestureAnalyzer()
+    saidas = []
+    inicio = time.perf_counter()
+    for (track_ids, keypoints), ts in zip(frames, timestamps):
+        saidas.append([analyzer.analyze(track_id, kp, timestamp=ts) for track_id, kp in zip(track_ids, keypoints)])
+        analyzer.clean_old_tracks(track_ids)
+    return saidas, time.perf_counter() - inicio, analyzer
+
+def rodar_lote(frames, timestamps, lote_minimo=0):
+    """Por padrão força o caminho vetorizado (lote_minimo=0); None usa o LOTE_MINIMO da classe."""
+    analyzer = GestureAnalyzer()
+    if lote_minimo is not None:
+        analyzer.LOTE_MINIMO = lote_minimo
+    saidas = []
+    inicio = time.perf_counter()
+    for (track_ids, keypoints), ts in zip(frames, timestamps):
+        saidas.append(analyzer.analyze_batch(track_ids, keypoints, timestamp=ts))
+        analyzer.clean_old_tracks(track_ids)
+    return saidas, time.perf_counter() - inicio, analyzer
+
+def verificar_equivalencia(frames, fps):
+    timestamps = [i / fps for i in range(len(frames))]
+    escalar, t_escalar, a_escalar = rodar_escalar(frames, timestamps)
+    lote, t_lote, a_lote = rodar_lote(frames, timestamps)
+    divergencias = [i for i, (a, b) in enumerate(zip(escalar, lote)) if a != b]
+    if a_escalar.history != a_lote.history:
+        divergencias.append(len(frames))
+    alertas = sum(len(alerts) for frame in escalar for alerts in frame)
+    _, t_automatico, _ = rodar_lote(frames, timestamps, lote_minimo=None)
+    return divergencias, alertas, t_escalar, t_lote, t_automatico
+
+# ================================
+# CONSISTÊNCIA ENTRE TAXAS DE QUADROS
+# ================================
+def episodios(frames, timestamps, saidas):
+    """{(track_id, alerta): [(inicio, fim), ...]} com os intervalos em que cada alerta ficou ativo."""
+    ativos = {}
+    resultado = {}
+    for (track_ids, _), ts, alertas_frame in zip(frames, timestamps, saidas):
+        vistos = set()
+        for track_id, alertas in zip(track_ids, alertas_frame):
+            for alerta in alertas:
+                chave = (track_id, alerta)
+                vistos.add(chave)
+                if chave not in ativos:
+                    ativos[chave] = ts
+                resultado.setdefault(chave, [])
+        for chave in [c for c in ativos if c not in vistos]:
+            resultado[chave].append((ativos.pop(chave), ts))
+    for chave, inicio in ativos.items():
+        resultado[chave].append((inicio, timestamps[-1]))
+    return resultado
+
+def verificar_taxas(n_pessoas, duracao_s, taxas, semente=0, fps_base=30):
+    """
+    Roda o mesmo roteiro a 'fps_base' e subamostrado em cada taxa de 'taxas'.
+    Cada episódio de alerta deve existir em todas as taxas, com início e fim
+    deslocados no máximo dois intervalos entre frames da taxa menor.
+    Retorna {fps: (episódios, maior_diferenca_s, erros)}.
+    """
+    frames, timestamps = gerar_roteiro(n_pessoas, duracao_s, fps_base, semente)
+    referencia = episodios(frames, timestamps, rodar_lote(frames, timestamps)[0])
+    relatorio = {}
+    for fps in taxas:
+        passo = max(1, round(fps_base / fps))
+        sub_frames, sub_ts = frames[::passo], timestamps[::passo]
+        obtidos = episodios(sub_frames, sub_ts, rodar_lote(sub_frames, sub_ts)[0])
+        tolerancia = 2 * passo / fps_base + 1e-6
+        erros = []
+        maior = 0.0
+        for chave in set(referencia) | set(obtidos):
+            esperado, visto = referencia.get(chave, []), obtidos.get(chave, [])
+            if len(esperado) != len(visto):
+                erros.append(f"{chave}: {len(esperado)} episódios a {fps_base} FPS, {len(visto)} a {fps} FPS")
+                continue
+            for (i_ref, f_ref), (i_sub, f_sub) in zip(esperado, visto):
+                diferenca = max(abs(i_ref - i_sub), abs(f_ref - f_sub))
+                maior = max(maior, diferenca)
+                if diferenca > tolerancia:
+                    erros.append(f"{chave}: {i_ref:.2f}-{f_ref:.2f}s a {fps_base} FPS, {i_sub:.2f}-{f_sub:.2f}s a {fps} FPS")
+        relatorio[fps] = (sum(len(v) for v in obtidos.values()), maior, erros)
+    return relatorio
+
+if __name__ == "__main__":
+    # A equivalência e a consistência entre taxas também são verificadas em tests/test_detector.py
+    parser = argparse.ArgumentParser(description="Desempenho e consistência entre taxas de quadros do GestureAnalyzer.")
+    parser.add_argument("--pessoas", type=int, nargs="+", default=[1, 5, 10, 20, 30, 60])
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--sementes", type=int, default=3)
+    parser.add_argument("--taxas", type=float, nargs="+", default=[30, 15, 5],
+                        help="Taxas (FPS) em que o mesmo roteiro é reproduzido na verificação de consistência")
+    args = parser.parse_args()
+
+    print(f"analyze_batch usa o laço escalar abaixo de {GestureAnalyzer.LOTE_MINIMO} pessoas (LOTE_MINIMO)")
+    print(f"{'pessoas':>8}{'semente':>9}{'alertas':>9}{'escalar ms/frame':>18}{'vetorizado ms/frame':>21}"
+          f"{'analyze_batch ms/frame':>24}  resultado")
+    for n_pessoas in args.pessoas:
+        for semente in range(args.sementes):
+            frames = gerar_sequencia(n_pessoas, args.frames, semente)
+            divergencias, alertas, t_escalar, t_lote, t_automatico = verificar_equivalencia(frames, fps=30)
+            status = "idêntico" if not divergencias else f"DIVERGE em {len(divergencias)} frames (1º: {divergencias[0]})"
+            print(f"{n_pessoas:>8}{semente:>9}{alertas:>9}{t_escalar / args.frames * 1000:>18.3f}"
+                  f"{t_lote / args.frames * 1000:>21.3f}{t_automatico / args.frames * 1000:>24.3f}  {status}")
+
+    print(f"\n{'semente':>8}{'FPS':>6}{'episódios':>11}{'maior desvio':>14}  resultado")
+    for semente in range(args.sementes):
+        for fps, (n_episodios, maior, erros) in verificar_taxas(10, 120, args.taxas, semente).items():
+            status = "consistente" if not erros else f"INCONSISTENTE ({len(erros)}): {erros[0]}"
+            print(f"{semente:>8}{fps:>6g}{n_episodios:>11}{maior * 1000:>11.0f} ms  {status}")
@@ -1,21 +1,106 @@
+import time
+import warnings
+
 import numpy as np
-from collections import defaultdict
+
+# Colunas dos contadores de cada pessoa no estado em array
+HIDDEN, SURRENDER, AIMING = 0, 1, 2
+
+# FPS padrão da versão que contava frames; converte a evidência para as chaves antigas
+FPS_LEGADO = 30
+
+class _EvidenciaPessoa(dict):
+    """
+    Evidência de um track ID em segundos ('hidden_s', 'surrender_s', 'aiming_s').
+    As chaves antigas ('hidden_frames', ...) continuam funcionando, obsoletas: devolvem
+    os segundos convertidos em frames ao FPS informado no construtor (30 por padrão),
+    comparáveis aos limiares antigos (int(fps * segundos)).
+    """
+    def __init__(self, valores, fps):
+        super().__init__(valores)
+        self._fps = fps
+
+    def __missing__(self, chave):
+        novo = chave[:-len("_frames")] + "_s" if isinstance(chave, str) and chave.endswith("_frames") else None
+        if novo not in self:
+            raise KeyError(chave)
+        warnings.warn(f"history[...]['{chave}'] está obsoleto: use '{novo}' (segundos).",
+                      DeprecationWarning, stacklevel=2)
+        return int(round(self[novo] * self._fps))
+
+    def get(self, chave, padrao=None):
+        try:
+            return self[chave]
+        except KeyError:
+            return padrao
 
 class GestureAnalyzer:
-    def __init__(self, fps=30):
-        # Histórico de frames contínuos em que a pessoa está fazendo o gesto
-        self.history = defaultdict(lambda: {
-            "hidden_frames": 0,
-            "surrender_frames": 0,
-            "aiming_frames": 0
-        })
-        
-        # Limiares de tempo (frames) para confirmar o gesto
-        # Considerando 30 FPS.
+    # Abaixo desse número de pessoas no frame o laço escalar é mais rápido que as operações
+    # em array (custo fixo de ~0,3-0,5 ms por frame); medido com o bench_gestos.py
+    LOTE_MINIMO = 20
+
+    def __init__(self, fps=None, max_intervalo=1.0):
+        # 'fps' é aceito só por compatibilidade: os limiares agora são em segundos e a
+        # evidência segue os timestamps dos frames, então o valor não é mais usado
+        if fps is not None:
+            warnings.warn("GestureAnalyzer(fps=...) está obsoleto e é ignorado: os limiares são em segundos.",
+                          DeprecationWarning, stacklevel=2)
         self.fps = fps
-        self.thresh_hidden = int(self.fps * 2.5)  # 2.5 segundos oculto
-        self.thresh_surrender = int(self.fps * 1.0) # 1.0 segundo com mão pro alto
-        self.thresh_aiming = int(self.fps * 1.5)    # 1.5 segundo apontando
+        # Evidência acumulada (segundos) de que a pessoa está fazendo o gesto.
+        # Fica num array [slots, 3] (hidden, surrender, aiming) indexado pelo slot de cada track ID,
+        # para que analyze_batch atualize todas as pessoas de uma vez.
+        # A evidência cresce e decai pelo tempo real entre as chamadas (timestamps), não por frame,
+        # então pular frames ou mudar o FPS da inferência não muda a duração dos gestos.
+        self._slots = {}
+        self._slots_livres = []
+        self._contadores = np.zeros((64, 3), dtype=np.float64)
+        self._ultimo_ts = np.full(64, np.nan)
+        
+        # Limiares de tempo (segundos) para confirmar o gesto
+        self.thresh_hidden = 2.5     # 2.5 segundos oculto
+        self.thresh_surrender = 1.0  # 1.0 segundo com mão pro alto
+        self.thresh_aiming = 1.5     # 1.5 segundo apontando
+        
+        # Uma pessoa que some por um tempo (ou uma queda de FPS) não ganha mais
+        # do que 'max_intervalo' segundos de evidência numa única observação
+        self.max_intervalo = max_intervalo
+
+    def _slot(self, track_id):
+        """Retorna o slot do track ID no array de contadores, alocando um novo se necessário."""
+        slot = self._slots.get(track_id)
+        if slot is None:
+            if self._slots_livres:
+                slot = self._slots_livres.pop()
+            else:
+                slot = len(self._slots)
+                if slot >= len(self._contadores):
+                    self._contadores = np.concatenate([self._contadores, np.zeros_like(self._contadores)])
+                    self._ultimo_ts = np.concatenate([self._ultimo_ts, np.full_like(self._ultimo_ts, np.nan)])
+            self._contadores[slot] = 0
+            self._ultimo_ts[slot] = np.nan
+            self._slots[track_id] = slot
+        return slot
+
+    def _intervalo(self, slot, timestamp):
+        """Segundos desde a última observação da pessoa (0 na primeira) e atualiza o timestamp."""
+        anterior = self._ultimo_ts[slot]
+        self._ultimo_ts[slot] = timestamp
+        if np.isnan(anterior):
+            return 0.0
+        return min(max(timestamp - anterior, 0.0), self.max_intervalo)
+
+    @property
+    def history(self):
+        """Visão em dicionário da evidência (segundos) de cada track ID."""
+        fps = self.fps or FPS_LEGADO
+        return {
+            track_id: _EvidenciaPessoa({
+                "hidden_s": float(self._contadores[slot, HIDDEN]),
+                "surrender_s": float(self._contadores[slot, SURRENDER]),
+                "aiming_s": float(self._contadores[slot, AIMING]),
+            }, fps)
+            for track_id, slot in self._slots.items()
+        }
 
     def _get_keypoint(self, keypoints, idx):
         # Retorna (x, y, conf) do keypoint
@@ -23,12 +108,17 @@ class GestureAnalyzer:
         kp = keypoints[idx]
         return kp[0], kp[1], kp[2]
 
-    def analyze(self, track_id, keypoints, box=None):
+    def analyze(self, track_id, keypoints, box=None, timestamp=None):
         """
         Analisa os limiares de pose e atualiza o histórico.
+        'timestamp' (segundos, relógio monotônico) é o instante do frame; por padrão, agora.
         Retorna uma lista de alertas ativos para a pessoa.
         """
         alerts = []
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        slot = self._slot(track_id)
+        contadores = self._contadores[slot]
+        dt = self._intervalo(slot, timestamp)
         
         # Índices do COCO:
         # 5: L Shoulder, 6: R Shoulder
@@ -84,11 +174,11 @@ class GestureAnalyzer:
                     is_aiming = True
                     
         if is_aiming:
-            self.history[track_id]["aiming_frames"] += 1
+            contadores[AIMING] += dt
         else:
-            self.history[track_id]["aiming_frames"] = max(0, self.history[track_id]["aiming_frames"] - 2)
+            contadores[AIMING] = max(0.0, contadores[AIMING] - 2 * dt)
             
-        if self.history[track_id]["aiming_frames"] > self.thresh_aiming:
+        if contadores[AIMING] > self.thresh_aiming:
             alerts.append("Braco Estendido (Agressao)")
 
         # --- 2. Rendição (Mãos para o alto ou Mãos na nuca) ---
@@ -119,11 +209,11 @@ class GestureAnalyzer:
                 is_surrendering = True
         
         if is_surrendering:
-            self.history[track_id]["surrender_frames"] += 1
+            contadores[SURRENDER] += dt
         else:
-            self.history[track_id]["surrender_frames"] = max(0, self.history[track_id]["surrender_frames"] - 2)
+            contadores[SURRENDER] = max(0.0, contadores[SURRENDER] - 2 * dt)
 
-        if self.history[track_id]["surrender_frames"] > self.thresh_surrender:
+        if contadores[SURRENDER] > self.thresh_surrender:
             alerts.append("Rendicao")
 
         # --- 3. Mão Oculta na Jaqueta/Cintura ---
@@ -192,19 +282,143 @@ class GestureAnalyzer:
                 is_hidden = True
 
         if is_hidden:
-            self.history[track_id]["hidden_frames"] += 1
+            contadores[HIDDEN] += dt
         else:
-            self.history[track_id]["hidden_frames"] = max(0, self.history[track_id]["hidden_frames"] - 1)
+            contadores[HIDDEN] = max(0.0, contadores[HIDDEN] - dt)
 
-        if self.history[track_id]["hidden_frames"] > self.thresh_hidden:
+        if contadores[HIDDEN] > self.thresh_hidden:
             alerts.append("Mao Oculta")
 
         # (Aiming logic was moved above to prevent surrender false positives)
 
         return alerts
 
+    def analyze_batch(self, track_ids, keypoints_batch, boxes=None, timestamp=None):
+        """
+        Versão vetorizada de 'analyze' para todas as pessoas do frame de uma vez.
+        keypoints_batch: array [N, 17, 3]; track_ids: N IDs distintos; timestamp: instante do frame.
+        Retorna uma lista com os alertas de cada pessoa, na mesma ordem,
+        idêntica a chamar 'analyze' pessoa por pessoa. Com menos de LOTE_MINIMO pessoas,
+        é exatamente isso que ela faz.
+        """
+        n = len(track_ids)
+        if n == 0:
+            return []
+        if n < self.LOTE_MINIMO:
+            timestamp = time.monotonic() if timestamp is None else timestamp
+            return [self.analyze(track_id, keypoints, None if boxes is None else boxes[i], timestamp=timestamp)
+                    for i, (track_id, keypoints) in enumerate(zip(track_ids, keypoints_batch))]
+        return self._analyze_vetorizado(track_ids, keypoints_batch, timestamp)
+
+    def _analyze_vetorizado(self, track_ids, keypoints_batch, timestamp=None):
+        n = len(track_ids)
+        kp = np.asarray(keypoints_batch)
+        x, y, c = kp[:, :, 0], kp[:, :, 1], kp[:, :, 2]
+        conf_thresh = 0.5
+        ok = c > conf_thresh
+
+        ls_x, ls_y, ls_ok = x[:, 5], y[:, 5], ok[:, 5]
+        rs_x, rs_y, rs_ok = x[:, 6], y[:, 6], ok[:, 6]
+        le_x, le_y, le_ok = x[:, 7], y[:, 7], ok[:, 7]
+        re_x, re_y, re_ok = x[:, 8], y[:, 8], ok[:, 8]
+        lw_x, lw_y, lw_ok = x[:, 9], y[:, 9], ok[:, 9]
+        rw_x, rw_y, rw_ok = x[:, 10], y[:, 10], ok[:, 10]
+        lh_x, lh_y, lh_ok = x[:, 11], y[:, 11], ok[:, 11]
+        rh_x, rh_y, rh_ok = x[:, 12], y[:, 12], ok[:, 12]
+
+        # Largura do ombro como base de escala (mesmas regras de 'analyze')
+        shoulder_dist = np.where(ls_ok & rs_ok, np.abs(ls_x - rs_x) + 0.1, 40.0)
+        shoulder_width = np.where(
+            (shoulder_dist < 20.0) & ls_ok & lh_ok,
+            np.abs(ls_y - lh_y) * 0.4,
+            np.maximum(shoulder_dist, 40.0)
+        )
+
+        # --- 1. Apontando Arma (Braços Estendidos) ---
+        arm_l = np.abs(ls_x - le_x) + np.abs(le_x - lw_x)
+        arm_r = np.abs(rs_x - re_x) + np.abs(re_x - rw_x)
+        aiming_l = (ls_ok & lw_ok & le_ok & (arm_l > 10)
+                    & (np.abs(lw_y - ls_y) < arm_l * 0.5) & (np.abs(lw_x - ls_x) > arm_l * 0.7))
+        aiming_r = (rs_ok & rw_ok & re_ok & (arm_r > 10)
+                    & (np.abs(rw_y - rs_y) < arm_r * 0.5) & (np.abs(rw_x - rs_x) > arm_r * 0.7))
+        is_aiming = aiming_l | aiming_r
+
+        # --- 2. Rendição (Mãos para o alto ou Mãos na nuca) ---
+        margin_y = shoulder_width * 0.4
+        left_hands_up = ls_ok & lw_ok & (lw_y < (ls_y - margin_y))
+        right_hands_up = rs_ok & rw_ok & (rw_y < (rs_y - margin_y))
+        left_behind_head = (ls_ok & lw_ok & le_ok & (le_x < (ls_x - margin_y))
+                            & (lw_y < (ls_y + margin_y)) & (lw_x > le_x))
+        right_behind_head = (rs_ok & rw_ok & re_ok & (re_x > (rs_x + margin_y))
+                             & (rw_y < (rs_y + margin_y)) & (rw_x < re_x))
+        is_surrendering = ~is_aiming & (left_hands_up | right_hands_up | left_behind_head | right_behind_head)
+
+        # --- 3. Mão Oculta na Jaqueta/Cintura ---
+        left_side_visible = ls_ok & lh_ok
+        right_side_visible = rs_ok & rh_ok
+        any_side = left_side_visible | right_side_visible
+
+        torso_x = np.stack([ls_x, rs_x, lh_x, rh_x], axis=1)
+        torso_ok = np.stack([ls_ok, rs_ok, lh_ok, rh_ok], axis=1)
+        min_x = np.where(torso_ok, torso_x, np.inf).min(axis=1)
+        max_x = np.where(torso_ok, torso_x, -np.inf).max(axis=1)
+        min_y = np.where(np.stack([ls_ok, rs_ok], axis=1), np.stack([ls_y, rs_y], axis=1), np.inf).min(axis=1)
+        max_y = np.where(np.stack([lh_ok, rh_ok], axis=1), np.stack([lh_y, rh_y], axis=1), -np.inf).max(axis=1)
+        # Pessoas sem nenhum lado visível não usam a caixa do torso; evita inf - inf
+        min_x, max_x = np.where(any_side, min_x, 0), np.where(any_side, max_x, 0)
+        min_y, max_y = np.where(any_side, min_y, 0), np.where(any_side, max_y, 0)
+
+        estreito = (max_x - min_x) < 10
+        min_x = np.where(estreito, min_x - shoulder_width / 2, min_x)
+        max_x = np.where(estreito, max_x + shoulder_width / 2, max_x)
+        margin = (max_x - min_x) * 0.2
+        waist_y = max_y
+
+        dentro_l = ((min_x - margin) < lw_x) & (lw_x < (max_x + margin)) & (min_y < lw_y) & (lw_y < waist_y)
+        cotovelo_l = ((min_x - margin) < le_x) & (le_x < (max_x + margin)) & (le_y < waist_y)
+        left_hidden = left_side_visible & np.where(lw_ok, dentro_l, le_ok & cotovelo_l)
+
+        dentro_r = ((min_x - margin) < rw_x) & (rw_x < (max_x + margin)) & (min_y < rw_y) & (rw_y < waist_y)
+        cotovelo_r = ((min_x - margin) < re_x) & (re_x < (max_x + margin)) & (re_y < waist_y)
+        right_hidden = right_side_visible & np.where(rw_ok, dentro_r, re_ok & cotovelo_r)
+
+        # Exceção para Braços Cruzados "Relaxados"
+        dist_between_hands = np.abs(lw_x - rw_x) + np.abs(lw_y - rw_y)
+        relaxados = (left_hidden & right_hidden & lw_ok & rw_ok
+                     & (dist_between_hands < (shoulder_width * 1.0)) & (lw_y > (ls_y + shoulder_width)))
+        is_hidden = any_side & (left_hidden | right_hidden) & ~relaxados
+
+        # --- Atualização dos contadores de todas as pessoas de uma vez ---
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        slots = np.fromiter((self._slot(track_id) for track_id in track_ids), dtype=np.int64, count=n)
+        anteriores = self._ultimo_ts[slots]
+        dt = np.where(np.isnan(anteriores), 0.0, np.clip(timestamp - anteriores, 0.0, self.max_intervalo))
+        self._ultimo_ts[slots] = timestamp
+
+        contadores = self._contadores[slots]
+        contadores[:, AIMING] = np.where(is_aiming, contadores[:, AIMING] + dt, np.maximum(0.0, contadores[:, AIMING] - 2 * dt))
+        contadores[:, SURRENDER] = np.where(is_surrendering, contadores[:, SURRENDER] + dt, np.maximum(0.0, contadores[:, SURRENDER] - 2 * dt))
+        contadores[:, HIDDEN] = np.where(is_hidden, contadores[:, HIDDEN] + dt, np.maximum(0.0, contadores[:, HIDDEN] - dt))
+        self._contadores[slots] = contadores
+
+        alerta_aiming = contadores[:, AIMING] > self.thresh_aiming
+        alerta_surrender = contadores[:, SURRENDER] > self.thresh_surrender
+        alerta_hidden = contadores[:, HIDDEN] > self.thresh_hidden
+
+        results = []
+        for i in range(n):
+            alerts = []
+            if alerta_aiming[i]:
+                alerts.append("Braco Estendido (Agressao)")
+            if alerta_surrender[i]:
+                alerts.append("Rendicao")
+            if alerta_hidden[i]:
+                alerts.append("Mao Oculta")
+            results.append(alerts)
+        return results
+
     def clean_old_tracks(self, current_tracks):
         """Remove histórico de IDs que não estão mais na tela"""
-        missing_tracks = set(self.history.keys()) - set(current_tracks)
+        missing_tracks = set(self._slots.keys()) - set(current_tracks)
         for track_id in missing_tracks:
-            del self.history[track_id]
+            self._slots_livres.append(self._slots.pop(track_id))
@@ -1,15 +1,108 @@
+import argparse
+import os
+import sys
+import time
 import cv2
-from ultralytics import YOLO
 from detector import GestureAnalyzer
 
-def main():
+# Pacote 'comum' (compartilhado com o reconhecimento facial) na raiz do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comum.agendador import AgendadorInferencia, formatar_estatisticas
+from comum.captura import forma_captura
+from comum.eventos import ArmazemEventos, TransicoesGestos, registrar_gestos
+from comum.perfil import PerfilInicializacao, formatar_perfil, frame_aquecimento
+from comum.transmissao import iniciar_transmissao, formatar_transmissao
+
+def processar_frame(model, analyzer, frame, tempos=None, timestamp=None):
+    """
+    Roda o tracking de pose e a análise de gestos em um frame.
+    Retorna uma lista de {"track_id", "bbox", "alerts"} por pessoa.
+    Se 'tempos' for um dicionário, recebe a duração (ms) de cada estágio.
+    'timestamp' é o instante de captura do frame (por padrão, agora).
+    """
+    timestamp = time.monotonic() if timestamp is None else timestamp
+    inicio = time.perf_counter()
+
+    # Roda o YOLO Tracking no frame.
+    # persist=True avisa o modelo que os frames pertencem ao mesmo vídeo.
+    # tracker="bytetrack.yaml" usa o ByteTrack, excelente para multidões.
+    results = model.track(frame, persist=True, tracker="bytetrack.yaml", verbose=False)
+
+    meio = time.perf_counter()
+    pessoas = []
+    current_tracks = []
+
+    if results and len(results) > 0:
+        result = results[0]
+
+        # Se encontrou pessoas e possui tracking IDs
+        if result.boxes is not None and result.boxes.id is not None and result.keypoints is not None:
+            boxes = result.boxes.xyxy.cpu().numpy()
+            track_ids = result.boxes.id.int().cpu().tolist()
+            keypoints_batch = result.keypoints.data.cpu().numpy() # [N_pessoas, 17, 3]
+
+            # Analisa o comportamento de todas as pessoas de uma vez com base nas coordenadas dos membros
+            alerts_batch = analyzer.analyze_batch(track_ids, keypoints_batch, boxes, timestamp=timestamp)
+
+            for box, track_id, alerts in zip(boxes, track_ids, alerts_batch):
+                current_tracks.append(track_id)
+                pessoas.append({"track_id": track_id, "bbox": list(map(int, box)), "alerts": alerts})
+
+    # Limpa da memória IDs antigos que não aparecem mais na tela
+    analyzer.clean_old_tracks(current_tracks)
+
+    if tempos is not None:
+        tempos["pose"] = (meio - inicio) * 1000
+        tempos["gestos"] = (time.perf_counter() - meio) * 1000
+    return pessoas
+
+def aquecer_pose(model, forma_frame=(480, 640, 3), repeticoes=2):
+    """
+    Inferências em frames sintéticos antes do laço: o setup do preditor (fusão das camadas,
+    alocações) não cai no primeiro frame. Usa predict, não track: o ByteTrack não vê os frames falsos.
+    """
+    frame = frame_aquecimento(forma_frame)
+    for _ in range(repeticoes):
+        model.predict(frame, verbose=False)
+
+def desenhar(frame, pessoas):
+    for pessoa in pessoas:
+        # --- Desenho Visual ---
+        x1, y1, x2, y2 = pessoa["bbox"]
+        alerts = pessoa["alerts"]
+
+        if alerts:
+            color = (0, 0, 255) # BGR: Vermelho se tiver alerta
+        else:
+            color = (0, 255, 0) # Verde se estiver normal
+
+        # Desenha a Bounding Box
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+
+        # Desenha o ID da pessoa
+        label = f"ID: {pessoa['track_id']}"
+        cv2.putText(frame, label, (x1, max(0, y1 - 30)), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+
+        # Desenha os alertas um embaixo do outro
+        if alerts:
+            for i, alert in enumerate(alerts):
+                text_y = max(0, y1 - 10) + (i * 20)
+                cv2.putText(frame, alert, (x1, text_y), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+
+def main(args):
+    # Import, carga, aquecimento e primeiro frame entram no perfil de inicialização
+    perfil = PerfilInicializacao()
+    with perfil.medir("import_ultralytics"):
+        from ultralytics import YOLO
+    
     # Inicializa o modelo de Pose. 
     # O 'yolov8n-pose.pt' é a versão "nano" (mais rápida, ideal para tempo real).
     # Baixará automaticamente se não existir.
-    model = YOLO("yolov8n-pose.pt")
+    with perfil.medir("carga_pose"):
+        model = YOLO("yolov8n-pose.pt")
     
-    # Inicializa o analisador de gestos
-    analyzer = GestureAnalyzer(fps=30)
+    # Inicializa o analisador de gestos (limiares em segundos, independentes do FPS)
+    analyzer = GestureAnalyzer()
     
     # Tenta usar a câmera externa primeiro (índice 1, ou maior),
     # Se falhar ou não existir, usa a webcam nativa (índice 0).
@@ -26,69 +119,96 @@ def main():
         print(f"Erro ao abrir qualquer fonte de vídeo.")
         return
 
-    print("Iniciando detecção... Pressione 'q' para sair.")
-
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            print("Fim do vídeo ou erro na leitura.")
-            break
-            
-        # Roda o YOLO Tracking no frame.
-        # persist=True avisa o modelo que os frames pertencem ao mesmo vídeo.
-        # tracker="bytetrack.yaml" usa o ByteTrack, excelente para multidões.
-        results = model.track(frame, persist=True, tracker="bytetrack.yaml", verbose=False)
-        
-        current_tracks = []
-
-        if results and len(results) > 0:
-            result = results[0]
-            
-            # Se encontrou pessoas e possui tracking IDs
-            if result.boxes is not None and result.boxes.id is not None and result.keypoints is not None:
-                boxes = result.boxes.xyxy.cpu().numpy()
-                track_ids = result.boxes.id.int().cpu().tolist()
-                keypoints_batch = result.keypoints.data.cpu().numpy() # [N_pessoas, 17, 3]
-
-                for box, track_id, keypoints in zip(boxes, track_ids, keypoints_batch):
-                    current_tracks.append(track_id)
-                    
-                    # Analisa o comportamento da pessoa com base nas suas coordenadas dos membros e bounding box
-                    alerts = analyzer.analyze(track_id, keypoints, box)
-                    
-                    # --- Desenho Visual ---
-                    x1, y1, x2, y2 = map(int, box)
-                    
-                    if alerts:
-                        color = (0, 0, 255) # BGR: Vermelho se tiver alerta
-                    else:
-                        color = (0, 255, 0) # Verde se estiver normal
-                        
-                    # Desenha a Bounding Box
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                    
-                    # Desenha o ID da pessoa
-                    label = f"ID: {track_id}"
-                    cv2.putText(frame, label, (x1, max(0, y1 - 30)), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
-                    
-                    # Desenha os alertas um embaixo do outro
-                    if alerts:
-                        for i, alert in enumerate(alerts):
-                            text_y = max(0, y1 - 10) + (i * 20)
-                            cv2.putText(frame, alert, (x1, text_y), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-                            
-        # Limpa da memória IDs antigos que não aparecem mais na tela
-        analyzer.clean_old_tracks(current_tracks)
-        
-        # Mostra o frame
-        cv2.imshow("Suspicious Gesture Recognition (CityLab)", frame)
-        
-        # Saída com a tecla 'q'
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+    print("[INFO] Aquecendo o modelo de pose...")
+    with perfil.medir("aquecimento"):
+        aquecer_pose(model, forma_captura(cap))
+
+    print("Iniciando detecção... " + ("Pressione Ctrl+C para sair." if args.sem_janela else "Pressione 'q' para sair."))
+
+    # Com --movimento, o model.track só roda com movimento na cena (ou no keep-alive)
+    agendador = None
+    if args.movimento:
+        agendador = AgendadorInferencia(fps_repouso=args.fps_repouso, limiar_movimento=args.limiar_movimento)
+    pessoas = []
+    ultimo_relatorio = time.monotonic()
+    # O início de cada alerta vai para o mesmo histórico (SQLite) do reconhecimento facial
+    eventos = ArmazemEventos()
+    eventos.start()
+    transicoes = TransicoesGestos()
+    servidor = transmissor = None
+    if args.servir:
+        servidor, transmissores = iniciar_transmissao([0], args.servir, args.servir_host,
+                                                      codificadores=args.codificadores)
+        transmissor = transmissores[0]
+    resultados = {"persons": pessoas}
+
+    try:
+        while cap.isOpened():
+            ret, frame = cap.read()
+            timestamp = time.monotonic()
+            if not ret:
+                print("Fim do vídeo ou erro na leitura.")
+                break
+
+            if agendador is None or agendador.deve_processar(frame):
+                inicio = time.perf_counter()
+                pessoas = processar_frame(model, analyzer, frame, timestamp=timestamp)
+                # Dicionário novo só quando a inferência roda: a transmissão só serializa o que mudou
+                resultados = {"persons": pessoas}
+                registrar_gestos(eventos, transicoes, pessoas)
+                if agendador is not None:
+                    agendador.registrar_inferencia(time.perf_counter() - inicio)
+                if perfil.concluir((time.perf_counter() - inicio) * 1000):
+                    print(f"[INFO] {formatar_perfil(perfil)}")
+
+            # Sem janela, só desenha quando algum cliente remoto vai receber o frame
+            anotar = not args.sem_janela or (transmissor is not None and transmissor.aguardando_frame())
+            if anotar:
+                desenhar(frame, pessoas)
+            if transmissor is not None:
+                transmissor.publicar(frame if anotar else None, resultados)
+
+            if time.monotonic() - ultimo_relatorio > 5.0:
+                ultimo_relatorio = time.monotonic()
+                if agendador is not None:
+                    print(f"[INFO] {formatar_estatisticas(agendador.estatisticas())}")
+                if servidor is not None:
+                    print(f"[INFO] {formatar_transmissao(servidor.estatisticas())}")
+
+            if args.sem_janela:
+                continue
+
+            # Mostra o frame
+            cv2.imshow("Suspicious Gesture Recognition (CityLab)", frame)
+
+            # Saída com a tecla 'q'
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+    except KeyboardInterrupt:
+        print("Interrupção manual detectada")
 
     cap.release()
-    cv2.destroyAllWindows()
+    if not args.sem_janela:
+        cv2.destroyAllWindows()
+    eventos.parar()
+    if servidor is not None:
+        print(f"[INFO] {formatar_transmissao(servidor.estatisticas())}")
+        servidor.parar()
+    if agendador is not None:
+        print(f"[INFO] {formatar_estatisticas(agendador.estatisticas())}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Reconhecimento de gestos suspeitos.")
+    parser.add_argument("--movimento", action="store_true",
+                        help="Só roda o modelo de pose com movimento na cena; parada, cai para --fps-repouso")
+    parser.add_argument("--fps-repouso", type=float, default=1.0,
+                        help="Taxa de inferência (keep-alive) com a cena parada")
+    parser.add_argument("--limiar-movimento", type=float, default=0.01,
+                        help="Fração de pixels alterados que conta como movimento")
+    parser.add_argument("--sem-janela", action="store_true",
+                        help="Não abre janela de vídeo (Raspberry Pi sem monitor)")
+    parser.add_argument("--servir", type=int, metavar="PORTA",
+                        help="Transmite os frames anotados (MJPEG) e os resultados (SSE) em http://HOST:PORTA/")
+    parser.add_argument("--servir-host", default="0.0.0.0", help="Interface do servidor de transmissão")
+    parser.add_argument("--codificadores", type=int, default=2, help="Threads de codificação JPEG da transmissão")
+    main(parser.parse_args())
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os módulos do GestureRecon são importados pelo nome, como no main.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
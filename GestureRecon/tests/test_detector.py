@@ -0,0 +1,81 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from bench_gestos import gerar_aleatoria, gerar_sequencia, rodar_escalar, rodar_lote, verificar_taxas
+from detector import GestureAnalyzer
+
+# ================================
+# analyze_batch x analyze
+# ================================
+@pytest.mark.parametrize("lote_minimo", [0, None], ids=["vetorizado", "automatico"])
+@pytest.mark.parametrize("n_pessoas", [1, 5, 30, 60])
+def test_lote_identico_ao_escalar(n_pessoas, lote_minimo):
+    frames = gerar_sequencia(n_pessoas, 300, semente=n_pessoas)
+    timestamps = [i / 30 for i in range(len(frames))]
+    escalar, _, a_escalar = rodar_escalar(frames, timestamps)
+    lote, _, a_lote = rodar_lote(frames, timestamps, lote_minimo=lote_minimo)
+    assert lote == escalar
+    assert a_lote.history == a_escalar.history
+
+def test_lote_identico_em_keypoints_aleatorios():
+    frames = gerar_aleatoria(50, 200)
+    timestamps = [i / 30 for i in range(len(frames))]
+    escalar, _, _ = rodar_escalar(frames, timestamps)
+    lote, _, _ = rodar_lote(frames, timestamps)
+    assert lote == escalar
+
+def test_lote_pequeno_usa_o_laco_escalar(monkeypatch):
+    analyzer = GestureAnalyzer()
+    monkeypatch.setattr(analyzer, "_analyze_vetorizado", lambda *a, **k: pytest.fail("caminho vetorizado"))
+    track_ids, keypoints = gerar_sequencia(GestureAnalyzer.LOTE_MINIMO - 1, 1)[0]
+    assert len(analyzer.analyze_batch(track_ids, keypoints, timestamp=0.0)) == len(track_ids)
+
+# ================================
+# TEMPO DOS GESTOS INDEPENDENTE DO FPS
+# ================================
+@pytest.mark.parametrize("semente", [0, 1])
+def test_alertas_independem_da_taxa_de_quadros(semente):
+    for fps, (n_episodios, _, erros) in verificar_taxas(10, 60, [30, 15, 5], semente).items():
+        assert n_episodios > 0
+        assert erros == [], f"{fps} FPS: {erros[:3]}"
+
+def test_pausa_longa_nao_confirma_gesto():
+    # Uma única observação depois de um buraco de 10 s vale no máximo max_intervalo
+    analyzer = GestureAnalyzer(max_intervalo=1.0)
+    _, keypoints = gerar_sequencia(1, 1)[0]
+    kp = np.array(keypoints[0])
+    analyzer.analyze(1, kp, timestamp=0.0)
+    analyzer.analyze(1, kp, timestamp=10.0)
+    assert all(valor <= 1.0 for valor in analyzer.history[1].values())
+
+def test_fps_obsoleto_continua_aceito():
+    with pytest.warns(DeprecationWarning):
+        analyzer = GestureAnalyzer(fps=15)
+    with pytest.warns(DeprecationWarning):
+        GestureAnalyzer(30)
+    assert analyzer.fps == 15
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        GestureAnalyzer()
+
+def test_chaves_antigas_do_history_continuam_aceitas():
+    # Semente em que a pessoa fica 1 s com as mãos para o alto
+    _, keypoints = gerar_sequencia(1, 1, semente=2)[0]
+    kp = np.array(keypoints[0])
+    for fps, esperado in ((None, 30), (15, 15)):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", DeprecationWarning)
+            analyzer = GestureAnalyzer(fps=fps)
+        for i in range(31):
+            analyzer.analyze(1, kp, timestamp=i / 30)
+        evidencia = analyzer.history[1]
+        assert set(evidencia) == {"hidden_s", "surrender_s", "aiming_s"}
+        assert evidencia["surrender_s"] == pytest.approx(1.0)
+        for gesto in ("hidden", "surrender", "aiming"):
+            with pytest.warns(DeprecationWarning):
+                frames = evidencia[f"{gesto}_frames"]
+            assert frames == round(evidencia[f"{gesto}_s"] * esperado)
+    with pytest.raises(KeyError):
+        evidencia["outro_frames"]
@@ -0,0 +1,162 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(RAIZ, "FaceRecon"))
+
+from multiprocesso import RuntimeMultiprocesso, criar_trabalhador_face
+from replay import resumir
+
+# ================================
+# CARGA SINTÉTICA (SEM MODELOS)
+# ================================
+def trabalho_sintetico(frame, buffer, iteracoes):
+    """Quantidade fixa de trabalho de CPU por frame (filtros do OpenCV numa thread)."""
+    cv2.resize(frame, (buffer.shape[1], buffer.shape[0]), dst=buffer)
+    for _ in range(iteracoes):
+        cv2.GaussianBlur(buffer, (7, 7), 0, dst=buffer)
+
+def calibrar(forma, custo_ms):
+    """Iterações de trabalho_sintetico que custam ~custo_ms num núcleo."""
+    cv2.setNumThreads(1)
+    frame = np.random.default_rng(0).integers(0, 256, forma, dtype=np.uint8)
+    buffer = np.empty((forma[0] // 2, forma[1] // 2, forma[2]), dtype=np.uint8)
+    t0 = time.perf_counter()
+    trabalho_sintetico(frame, buffer, 20)
+    por_iteracao = (time.perf_counter() - t0) * 1000 / 20
+    return max(1, round(custo_ms / por_iteracao))
+
+def criar_trabalhador_sintetico(canal, iteracoes, forma=None, falhar_a_cada=0):
+    """Fábrica no formato do RuntimeMultiprocesso; 'falhar_a_cada' derruba o processo de propósito."""
+    cv2.setNumThreads(1)
+    buffers = {}
+    processados = [0]
+
+    def processar(frame, timestamp):
+        processados[0] += 1
+        if falhar_a_cada and processados[0] % falhar_a_cada == 0:
+            os._exit(1)
+        forma = (frame.shape[0] // 2, frame.shape[1] // 2, frame.shape[2])
+        buffer = buffers.setdefault(forma, np.empty(forma, dtype=np.uint8))
+        inicio = time.perf_counter()
+        trabalho_sintetico(frame, buffer, iteracoes)
+        return {"persons": []}, {"sintetico": (time.perf_counter() - inicio) * 1000}
+    return processar, lambda: None
+
+def gerar_video(caminho, largura=640, altura=480, n_frames=90, fps=30):
+    rng = np.random.default_rng(0)
+    fundo = rng.integers(0, 256, (altura, largura, 3), dtype=np.uint8)
+    escritor = cv2.VideoWriter(caminho, cv2.VideoWriter_fourcc(*"MJPG"), fps, (largura, altura))
+    for i in range(n_frames):
+        frame = fundo.copy()
+        cv2.circle(frame, ((i * 9) % largura, altura // 2), 40, (0, 0, 255), -1)
+        escritor.write(frame)
+    escritor.release()
+
+# ================================
+# EXECUÇÃO COM N TRABALHADORES
+# ================================
+def medir(fonte, fabrica, copias, opcoes, duracao_s, fps_captura, timeout_pronto=120.0):
+    """
+    Inicia o runtime, espera todos os trabalhadores ficarem prontos (carga de modelos fora
+    da medição) e conta os resultados durante 'duracao_s'.
+    """
+    runtime = RuntimeMultiprocesso(fonte, {"trabalho": (fabrica, copias, opcoes)},
+                                   fps_captura=fps_captura, repetir=True)
+    runtime.iniciar()
+    latencias = []
+    resultados = sobrescritos = 0
+    try:
+        prontos = 0
+        limite = time.monotonic() + timeout_pronto
+        while prontos < copias and time.monotonic() < limite:
+            runtime.supervisionar()
+            prontos += sum(1 for m in runtime.receber(timeout=0.1) if m[0] == "pronto")
+        seq_inicio = runtime.anel.ultimo()
+        inicio = time.monotonic()
+        while time.monotonic() - inicio < duracao_s:
+            runtime.supervisionar()
+            for mensagem in runtime.receber(timeout=0.05):
+                if mensagem[0] == "resultado":
+                    resultados += 1
+                    latencias.append((time.monotonic() - mensagem[4]) * 1000)
+                elif mensagem[0] == "sobrescrito":
+                    sobrescritos += 1
+        duracao = time.monotonic() - inicio
+        capturados = runtime.anel.ultimo() - seq_inicio
+    finally:
+        runtime.parar()
+    return {
+        "trabalhadores": copias,
+        "throughput_fps": resultados / duracao,
+        "captura_fps": capturados / duracao,
+        "latencia_ms": resumir(latencias),
+        "sobrescritos": sobrescritos,
+        "reinicios": sum(runtime.reinicios.values()),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Escalabilidade do runtime multiprocesso com o número de trabalhadores.")
+    parser.add_argument("--fonte", help="Vídeo de entrada; sem ele, gera um vídeo sintético 640x480")
+    parser.add_argument("--carga", choices=["sintetica", "face"], default="sintetica",
+                        help="'face' usa o ProcessadorCV de verdade (precisa dos modelos; um trabalhador só)")
+    parser.add_argument("--custo-ms", type=float, default=100.0, help="Custo por frame da carga sintética")
+    parser.add_argument("--trabalhadores", type=int, nargs="+",
+                        default=sorted({1, 2, max(1, (os.cpu_count() or 1) - 1), os.cpu_count() or 1}))
+    parser.add_argument("--duracao", type=float, default=10.0, help="Segundos medidos por configuração")
+    parser.add_argument("--fps-captura", type=float, default=30.0,
+                        help="Ritmo da captura, como uma câmera (0: o mais rápido possível)")
+    parser.add_argument("--falhar-a-cada", type=int, default=0,
+                        help="Carga sintética: derruba cada trabalhador a cada N frames (testa o reinício)")
+    parser.add_argument("--saida", help="Caminho do relatório JSON")
+    args = parser.parse_args()
+
+    temporario = None
+    fonte = args.fonte
+    if fonte is None:
+        temporario = tempfile.NamedTemporaryFile(suffix=".avi", delete=False)
+        temporario.close()
+        fonte = temporario.name
+        gerar_video(fonte)
+
+    try:
+        if args.carga == "sintetica":
+            cap = cv2.VideoCapture(fonte)
+            _, frame = cap.read()
+            cap.release()
+            fabrica = criar_trabalhador_sintetico
+            opcoes = {"iteracoes": calibrar(frame.shape, args.custo_ms), "falhar_a_cada": args.falhar_a_cada}
+        else:
+            fabrica, opcoes = criar_trabalhador_face, {}
+            if args.trabalhadores != [1]:
+                # O ProcessadorCV guarda trilhas e desconhecidos: cópias em paralelo duplicariam alertas
+                print("[AVISO] A carga 'face' roda com um trabalhador só; medindo apenas 1.")
+                args.trabalhadores = [1]
+
+        print(f"--- RUNTIME MULTIPROCESSO: carga {args.carga}, {os.cpu_count()} núcleos ---")
+        print(f"{'trab.':>6}{'FPS':>9}{'escala':>9}{'captura':>10}{'lat p50':>10}{'lat p95':>10}"
+              f"{'sobrescr.':>11}{'reinícios':>11}")
+        medidas = []
+        for copias in args.trabalhadores:
+            medida = medir(fonte, fabrica, copias, opcoes, args.duracao, args.fps_captura)
+            medida["escala"] = medida["throughput_fps"] / medidas[0]["throughput_fps"] if medidas else 1.0
+            medidas.append(medida)
+            latencia = medida["latencia_ms"]
+            print(f"{copias:>6}{medida['throughput_fps']:>9.1f}{medida['escala']:>8.2f}x{medida['captura_fps']:>10.1f}"
+                  f"{latencia.get('p50', 0.0):>10.0f}{latencia.get('p95', 0.0):>10.0f}"
+                  f"{medida['sobrescritos']:>11}{medida['reinicios']:>11}")
+    finally:
+        if temporario is not None:
+            os.remove(temporario.name)
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump({"carga": args.carga, "nucleos": os.cpu_count(), "medidas": medidas}, f, indent=2, ensure_ascii=False)
+        print(f"[INFO] Relatório salvo em '{args.saida}'")
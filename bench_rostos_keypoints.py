@@ -0,0 +1,126 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(RAIZ, "FaceRecon"))
+
+from ultralytics import YOLO # type: ignore
+
+from cascata import iou
+from reconhecimento import ProcessadorCV
+from replay import ler_frames, resumir
+
+# ================================
+# COMPARAÇÃO: app_insight.get x ROSTOS POR KEYPOINTS
+# ================================
+def identidade(pcv, face):
+    indices, scores = pcv.galeria.buscar(face.normed_embedding[None, :], k=1)
+    if len(pcv.galeria) == 0 or indices[0, 0] < 0 or scores[0, 0] <= pcv.SIMILARITY_THRESHOLD:
+        return "NAO ALUNO"
+    return pcv.galeria.nomes[indices[0, 0]]
+
+def comparar_frame(pcv, model_pose, frame, limiar_iou=0.3):
+    small = pcv.preprocessador.preparar(frame, pcv.SCALE_FACTOR, pcv.GAMMA_VALUE)
+
+    # Caminho atual: detector + todos os modelos do buffalo_l no frame reduzido
+    t0 = time.perf_counter()
+    faces_get = pcv.app_insight.get(small)
+    t_get = (time.perf_counter() - t0) * 1000
+
+    # Pose (compartilhada com os gestos no runtime unificado, medida à parte)
+    t0 = time.perf_counter()
+    result = model_pose(frame, verbose=False)[0]
+    t_pose = (time.perf_counter() - t0) * 1000
+    boxes = result.boxes.xyxy.cpu().numpy() * pcv.SCALE_FACTOR
+    keypoints = result.keypoints.data.cpu().numpy().copy()
+    keypoints[..., :2] *= pcv.SCALE_FACTOR
+    pessoas = [(box.astype(int), float(conf)) for box, conf in zip(boxes, result.boxes.conf.cpu().numpy())]
+
+    # Caminho novo: rostos dos keypoints, reconhecimento em lote e detector só como fallback
+    t0 = time.perf_counter()
+    faces_kp, sem_cabeca = pcv._faces_de_keypoints(keypoints, pessoas)
+    faces_fallback = pcv._detectar_faces_em_pessoas(small, sem_cabeca) if sem_cabeca else []
+    faces_novas = faces_kp + faces_fallback
+    pcv._extrair_embeddings(small, faces_novas)
+    t_kp = (time.perf_counter() - t0) * 1000
+
+    similaridades = []
+    concordancias = []
+    usadas = set()
+    for face in faces_get:
+        candidatos = [(iou(face.bbox, f.bbox), j) for j, f in enumerate(faces_novas) if j not in usadas]
+        melhor = max(candidatos, default=(0.0, None))
+        if melhor[0] < limiar_iou:
+            continue
+        usadas.add(melhor[1])
+        outra = faces_novas[melhor[1]]
+        similaridades.append(float(np.dot(face.normed_embedding, outra.normed_embedding)))
+        concordancias.append(identidade(pcv, face) == identidade(pcv, outra))
+
+    return {
+        "t_get": t_get, "t_pose": t_pose, "t_kp": t_kp,
+        "rostos_get": len(faces_get), "rostos_kp": len(faces_kp), "rostos_fallback": len(faces_fallback),
+        "pessoas": len(pessoas), "pessoas_fallback": len(sem_cabeca),
+        "pareados": len(similaridades), "similaridades": similaridades, "concordancias": concordancias,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precisão x latência: app_insight.get contra rostos por keypoints.")
+    parser.add_argument("--fonte", required=True, help="Arquivo de vídeo ou diretório de imagens")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--modelo-pose", default="yolov8n-pose.pt")
+    parser.add_argument("--saida", help="Caminho do relatório JSON")
+    args = parser.parse_args()
+
+    pcv = ProcessadorCV(carregar_yolo=False)
+    model_pose = YOLO(args.modelo_pose)
+    frames, _ = ler_frames(args.fonte)
+
+    medidas = []
+    try:
+        for i, frame in enumerate(frames):
+            if i >= args.frames:
+                break
+            medidas.append(comparar_frame(pcv, model_pose, frame))
+    finally:
+        pcv.encerrar()
+
+    total = lambda chave: sum(m[chave] for m in medidas)
+    similaridades = [s for m in medidas for s in m["similaridades"]]
+    concordancias = [c for m in medidas for c in m["concordancias"]]
+    relatorio = {
+        "frames": len(medidas),
+        "latencia_ms": {
+            "app_insight.get": resumir([m["t_get"] for m in medidas]),
+            "keypoints (sem pose)": resumir([m["t_kp"] for m in medidas]),
+            "pose": resumir([m["t_pose"] for m in medidas]),
+        },
+        "rostos_get": total("rostos_get"),
+        "rostos_keypoints": total("rostos_kp"),
+        "rostos_fallback": total("rostos_fallback"),
+        "fracao_pessoas_fallback": total("pessoas_fallback") / max(total("pessoas"), 1),
+        "recall_vs_get": total("pareados") / max(total("rostos_get"), 1),
+        "similaridade_embedding": resumir(similaridades),
+        "concordancia_identidade": sum(concordancias) / len(concordancias) if concordancias else 0.0,
+    }
+
+    print(f"{'caminho':<24}{'média':>9}{'p50':>9}{'p95':>9}  (ms)")
+    for caminho, s in relatorio["latencia_ms"].items():
+        if s:
+            print(f"{caminho:<24}{s['media']:>9.2f}{s['p50']:>9.2f}{s['p95']:>9.2f}")
+    sim = relatorio["similaridade_embedding"]
+    print(f"Rostos: get {relatorio['rostos_get']} | keypoints {relatorio['rostos_keypoints']} "
+          f"(+{relatorio['rostos_fallback']} pelo fallback, {relatorio['fracao_pessoas_fallback'] * 100:.0f}% das pessoas)")
+    print(f"Recall contra o get: {relatorio['recall_vs_get'] * 100:.1f}% | similaridade dos embeddings: "
+          f"média {sim.get('media', 0.0):.3f}, p50 {sim.get('p50', 0.0):.3f} | "
+          f"mesma identidade: {relatorio['concordancia_identidade'] * 100:.1f}%")
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+        print(f"[INFO] Relatório salvo em '{args.saida}'")
@@ -0,0 +1,5 @@
+"""
+Módulos compartilhados pelo FaceRecon, pelo GestureRecon e pelos scripts da raiz
+(unificado.py, multiprocesso.py, replay.py): captura, agendamento por movimento,
+histórico de eventos, métricas, transmissão e perfil de inicialização.
+"""
@@ -0,0 +1,123 @@
+import time
+
+import cv2
+import numpy as np
+
+# ================================
+# DETECÇÃO DE MOVIMENTO (BARATA)
+# ================================
+class DetectorMovimento:
+    """
+    Compara o frame reduzido (cinza, suavizado) com um fundo de média móvel
+    e retorna a fração de pixels que mudou. Roda em todo frame, então trabalha
+    numa imagem de 'largura' pixels em vez do frame inteiro.
+    """
+    def __init__(self, largura=160, limiar_pixel=25, taxa_fundo=0.05):
+        self.largura = largura
+        self.limiar_pixel = limiar_pixel
+        self.taxa_fundo = taxa_fundo
+        self._fundo = None
+
+    def pontuar(self, frame):
+        altura = max(1, round(frame.shape[0] * self.largura / frame.shape[1]))
+        pequeno = cv2.resize(frame, (self.largura, altura), interpolation=cv2.INTER_AREA)
+        if pequeno.ndim == 3:
+            pequeno = cv2.cvtColor(pequeno, cv2.COLOR_BGR2GRAY)
+        pequeno = cv2.GaussianBlur(pequeno, (5, 5), 0)
+
+        if self._fundo is None or self._fundo.shape != pequeno.shape:
+            self._fundo = pequeno.astype(np.float32)
+            return 1.0
+        diferenca = cv2.absdiff(pequeno, cv2.convertScaleAbs(self._fundo))
+        cv2.accumulateWeighted(pequeno, self._fundo, self.taxa_fundo)
+        return np.count_nonzero(diferenca > self.limiar_pixel) / diferenca.size
+
+# ================================
+# AGENDADOR DE INFERÊNCIA
+# ================================
+class AgendadorInferencia:
+    """
+    Decide, frame a frame, se os modelos pesados devem rodar:
+      - "ativo":   houve movimento há menos de 'manter_ativo_s' -> todo frame é processado.
+      - "repouso": cena parada -> só um frame a cada 1/'fps_repouso' segundos (keep-alive).
+    Movimento no repouso volta ao estado ativo no mesmo frame.
+
+    Mudanças lentas demais para o detector de movimento são vistas, no pior caso,
+    no próximo keep-alive; por isso a latência de reação adicionada fica limitada
+    a 1/'fps_repouso' mais o custo do próprio detector.
+    """
+    def __init__(self, fps_repouso=1.0, limiar_movimento=0.01, manter_ativo_s=2.0, detector=None):
+        self.fps_repouso = fps_repouso
+        self.limiar_movimento = limiar_movimento
+        self.manter_ativo_s = manter_ativo_s
+        self.detector = detector or DetectorMovimento()
+
+        self.estado = "ativo"
+        self.ultimo_score = 0.0
+        self.processados = 0
+        self.pulados = 0
+        self.ativacoes = 0
+        self.custo_detector_s = 0.0
+        self.custo_inferencia_s = 0.0
+        self.inferencias_medidas = 0
+
+        self._inicio = None
+        self._ativo_ate = 0.0
+        self._ultima_execucao = None
+
+    def deve_processar(self, frame, agora=None):
+        agora = time.monotonic() if agora is None else agora
+        if self._inicio is None:
+            self._inicio = agora
+        inicio = time.perf_counter()
+        self.ultimo_score = self.detector.pontuar(frame)
+        self.custo_detector_s += time.perf_counter() - inicio
+
+        if self.ultimo_score >= self.limiar_movimento:
+            if self.estado == "repouso":
+                self.estado = "ativo"
+                self.ativacoes += 1
+            self._ativo_ate = agora + self.manter_ativo_s
+        elif self.estado == "ativo" and agora >= self._ativo_ate:
+            self.estado = "repouso"
+
+        if (self.estado == "ativo" or self._ultima_execucao is None
+                or agora - self._ultima_execucao >= 1.0 / self.fps_repouso):
+            self._ultima_execucao = agora
+            self.processados += 1
+            return True
+        self.pulados += 1
+        return False
+
+    def registrar_inferencia(self, duracao_s):
+        """Duração de uma inferência executada; base para estimar a CPU economizada."""
+        self.custo_inferencia_s += duracao_s
+        self.inferencias_medidas += 1
+
+    def estatisticas(self, agora=None):
+        agora = time.monotonic() if agora is None else agora
+        decorrido = agora - (agora if self._inicio is None else self._inicio)
+        horas = max(decorrido, 1e-9) / 3600
+        frames = self.processados + self.pulados
+        custo_medio = self.custo_inferencia_s / self.inferencias_medidas if self.inferencias_medidas else 0.0
+        # Com o frame mais novo vencendo, sem o agendador a inferência rodaria de ponta a ponta:
+        # no máximo uma por 'custo_medio' segundos, não uma por frame capturado. A CPU gasta
+        # ficaria limitada ao tempo decorrido (100%), e a economia também
+        sem_agendador = min(frames * custo_medio, decorrido)
+        economia = sem_agendador - self.processados * custo_medio - self.custo_detector_s
+        return {
+            "estado": self.estado,
+            "processados": self.processados,
+            "pulados": self.pulados,
+            "fracao_pulada": self.pulados / frames if frames else 0.0,
+            "ativacoes": self.ativacoes,
+            "custo_detector_ms": self.custo_detector_s / frames * 1000 if frames else 0.0,
+            "cpu_economizada_s_por_hora": economia / horas,
+            # Limite teórico (1/fps_repouso + detector), não medido; a latência medida fica no replay.py --movimento
+            "latencia_reacao_limite_ms": 1000.0 / self.fps_repouso + (self.custo_detector_s / frames * 1000 if frames else 0.0),
+        }
+
+def formatar_estatisticas(stats):
+    return (f"Agendamento ({stats['estado']}): {stats['fracao_pulada'] * 100:.0f}% dos frames pulados, "
+            f"{stats['ativacoes']} ativações | CPU economizada ~{stats['cpu_economizada_s_por_hora'] / 60:.1f} min/h | "
+            f"detector {stats['custo_detector_ms']:.1f} ms/frame | reação limitada a +{stats['latencia_reacao_limite_ms']:.0f} ms (1/fps_repouso + detector)")
@@ -0,0 +1,39 @@
+import os
+
+import cv2
+import numpy as np
+
+# ================================
+# ABERTURA DAS FONTES DE VÍDEO
+# ================================
+def abrir_fonte(fonte, largura=640, altura=480):
+    """
+    Abre índice de câmera ("0", "1"...), arquivo de vídeo ou URL RTSP.
+    Retorna (cap, fps_alvo): arquivos são lidos no FPS original do vídeo.
+    """
+    if str(fonte).isdigit():
+        cap = cv2.VideoCapture(int(fonte))
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, largura)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, altura)
+        return cap, None
+
+    cap = cv2.VideoCapture(fonte)
+    if os.path.isfile(fonte):
+        return cap, cap.get(cv2.CAP_PROP_FPS) or 30.0
+    return cap, None
+
+def forma_captura(cap, padrao=(480, 640, 3)):
+    """(altura, largura, 3) que a fonte vai entregar, para o aquecimento dos modelos."""
+    largura = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    altura = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    return (altura, largura, 3) if largura > 0 and altura > 0 else padrao
+
+# ================================
+# CÓPIA DE FRAMES EM BUFFER REAPROVEITADO
+# ================================
+def copiar_em_buffer(buffer, frame):
+    """Copia 'frame' para 'buffer' (realocado só se o formato mudar) e retorna o buffer."""
+    if buffer is None or buffer.shape != frame.shape or buffer.dtype != frame.dtype:
+        return frame.copy()
+    np.copyto(buffer, frame)
+    return buffer
@@ -0,0 +1,368 @@
+import argparse
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+# O histórico continua em FaceRecon/historico, ao lado dos logs e dos recortes
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CAMINHO_PADRAO = os.path.join(RAIZ, "FaceRecon", "historico", "eventos.sqlite3")
+
+# Tipos de evento
+RECONHECIDO = "reconhecido"
+NAO_ALUNO = "nao_aluno"
+GESTO = "gesto"
+ADAPTACAO = "adaptacao"
+# Alerta NAO ALUNO cujo recorte, reavaliado com a galeria atual, casou com um aluno
+REAVALIADO = "reavaliado"
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS eventos (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    tipo TEXT NOT NULL,
+    identidade TEXT,
+    camera TEXT,
+    alerta TEXT,
+    confianca REAL,
+    track_id INTEGER,
+    imagem TEXT,
+    detalhes TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_eventos_ts ON eventos(ts);
+CREATE INDEX IF NOT EXISTS idx_eventos_identidade ON eventos(identidade, ts);
+CREATE INDEX IF NOT EXISTS idx_eventos_camera ON eventos(camera, ts);
+CREATE INDEX IF NOT EXISTS idx_eventos_alerta ON eventos(alerta, ts) WHERE alerta IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_eventos_imagem ON eventos(imagem) WHERE imagem IS NOT NULL;
+"""
+
+INSERCAO = ("INSERT INTO eventos (ts, tipo, identidade, camera, alerta, confianca, track_id, imagem, detalhes) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+def conectar(caminho, somente_leitura=False):
+    if somente_leitura:
+        conexao = sqlite3.connect(f"file:{caminho}?mode=ro", uri=True, timeout=5.0)
+    else:
+        conexao = sqlite3.connect(caminho, timeout=5.0)
+        # auto_vacuum só vale se for definido antes de criar as tabelas
+        conexao.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conexao.execute("PRAGMA journal_mode = WAL")
+        # NORMAL com WAL: sem fsync por transação (cartão SD), sem risco de corromper o banco
+        conexao.execute("PRAGMA synchronous = NORMAL")
+        conexao.executescript(ESQUEMA)
+    conexao.row_factory = sqlite3.Row
+    return conexao
+
+# ================================
+# GRAVAÇÃO EM LOTE (THREAD PRÓPRIA)
+# ================================
+class ArmazemEventos(threading.Thread):
+    """
+    Histórico estruturado de reconhecimentos e alertas num SQLite local (WAL).
+    'registrar' só enfileira; a thread grava em transações de até 'tamanho_lote'
+    eventos, no máximo 'intervalo_s' depois de chegarem. Com a fila cheia o evento
+    é descartado e contado, como no GravadorAlertas.
+
+    Retenção (a cada 'intervalo_retencao_s'): apaga eventos com mais de 'retencao_dias'
+    e os mais antigos acima de 'max_eventos', remove as imagens que nenhum evento
+    restante usa e devolve as páginas livres ao disco (incremental_vacuum).
+    """
+    def __init__(self, caminho=CAMINHO_PADRAO, tamanho_lote=256, intervalo_s=1.0, tamanho_fila=10000,
+                 retencao_dias=90, max_eventos=2_000_000, intervalo_retencao_s=3600.0, remover_imagens=True):
+        super().__init__(daemon=True, name="ArmazemEventos")
+        self.caminho = caminho
+        self.tamanho_lote = tamanho_lote
+        self.intervalo_s = intervalo_s
+        self.retencao_dias = retencao_dias
+        self.max_eventos = max_eventos
+        self.intervalo_retencao_s = intervalo_retencao_s
+        self.remover_imagens = remover_imagens
+        self.fila = queue.Queue(maxsize=tamanho_fila)
+
+        self.enviados = 0
+        self.gravados = 0
+        self.descartados = 0
+        self.lotes = 0
+        self.apagados = 0
+        self.falhas = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        # Cria o banco já aqui: consultas podem começar antes da primeira gravação
+        conectar(caminho).close()
+
+    def registrar(self, tipo, identidade=None, camera=None, alerta=None, confianca=None,
+                  track_id=None, imagem=None, detalhes=None, ts=None):
+        """Enfileira um evento sem bloquear. Retorna False se ele foi descartado."""
+        evento = (
+            time.time() if ts is None else ts, tipo, identidade,
+            None if camera is None else str(camera), alerta, confianca, track_id, imagem,
+            None if detalhes is None else json.dumps(detalhes, ensure_ascii=False),
+        )
+        with self._lock:
+            self.enviados += 1
+        try:
+            self.fila.put_nowait(evento)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.descartados += 1
+            return False
+
+    def _gravar(self, conexao, lote):
+        try:
+            with conexao:
+                conexao.executemany(INSERCAO, lote)
+            with self._lock:
+                self.gravados += len(lote)
+                self.lotes += 1
+        except sqlite3.Error as e:
+            with self._lock:
+                self.falhas += len(lote)
+            print(f"[ERRO] Falha ao gravar {len(lote)} eventos: {e}")
+
+    def aplicar_retencao(self, conexao, agora=None):
+        agora = time.time() if agora is None else agora
+        condicoes, parametros = [], []
+        if self.retencao_dias:
+            condicoes.append("ts < ?")
+            parametros.append(agora - self.retencao_dias * 86400)
+        if self.max_eventos:
+            condicoes.append("id <= (SELECT MAX(id) FROM eventos) - ?")
+            parametros.append(self.max_eventos)
+        if not condicoes:
+            return 0
+
+        filtro = " OR ".join(condicoes)
+        with conexao:
+            imagens = [linha[0] for linha in conexao.execute(
+                f"SELECT DISTINCT imagem FROM eventos WHERE imagem IS NOT NULL AND ({filtro})", parametros)]
+            apagados = conexao.execute(f"DELETE FROM eventos WHERE {filtro}", parametros).rowcount
+        if self.remover_imagens:
+            for imagem in imagens:
+                # O recorte de um desconhecido é reaproveitado por eventos mais novos
+                if conexao.execute("SELECT 1 FROM eventos WHERE imagem = ? LIMIT 1", (imagem,)).fetchone() is None:
+                    try:
+                        os.remove(imagem)
+                    except OSError:
+                        pass
+        if apagados:
+            # Pelo execute o incremental_vacuum libera uma página por passo; o executescript roda até o fim
+            conexao.executescript("PRAGMA incremental_vacuum;")
+            conexao.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        with self._lock:
+            self.apagados += apagados
+        return apagados
+
+    def run(self):
+        conexao = conectar(self.caminho)
+        self.aplicar_retencao(conexao)
+        proxima_retencao = time.monotonic() + self.intervalo_retencao_s
+        lote = []
+        prazo = None
+        encerrar = False
+        while not encerrar:
+            # Sem eventos pendentes, acorda só para a próxima retenção
+            limite = proxima_retencao if prazo is None else min(prazo, proxima_retencao)
+            espera = max(0.0, limite - time.monotonic())
+            try:
+                item = self.fila.get(timeout=espera)
+                while item is not None:
+                    lote.append(item)
+                    if len(lote) >= self.tamanho_lote:
+                        break
+                    item = self.fila.get_nowait()
+                encerrar = item is None
+            except queue.Empty:
+                pass
+
+            if lote and prazo is None:
+                prazo = time.monotonic() + self.intervalo_s
+            if lote and (encerrar or len(lote) >= self.tamanho_lote or time.monotonic() >= prazo):
+                self._gravar(conexao, lote)
+                lote = []
+                prazo = None
+            if time.monotonic() >= proxima_retencao:
+                proxima_retencao = time.monotonic() + self.intervalo_retencao_s
+                self.aplicar_retencao(conexao)
+        conexao.close()
+
+    def parar(self, timeout=5.0):
+        """Grava o que ainda estiver na fila e encerra a thread."""
+        self.fila.put(None)
+        self.join(timeout=timeout)
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "enviados": self.enviados,
+                "gravados": self.gravados,
+                "descartados": self.descartados,
+                "falhas": self.falhas,
+                "lotes": self.lotes,
+                "apagados": self.apagados,
+                "na_fila": self.fila.qsize(),
+            }
+
+class TransicoesGestos:
+    """
+    O GestureAnalyzer repete os alertas de uma pessoa a cada frame enquanto durarem;
+    para o histórico só interessa o início de cada um (track_id, alerta).
+    """
+    def __init__(self):
+        self._ativos = set()
+
+    def novos(self, pessoas):
+        atuais = {(pessoa["track_id"], alerta) for pessoa in pessoas for alerta in pessoa["alerts"]}
+        novos = atuais - self._ativos
+        self._ativos = atuais
+        return [(pessoa, alerta) for pessoa in pessoas for alerta in pessoa["alerts"]
+                if (pessoa["track_id"], alerta) in novos]
+
+def registrar_gestos(armazem, transicoes, pessoas, camera=None):
+    """Registra o início de cada alerta de gesto; a identidade é o nome do rosto associado, se houver."""
+    for pessoa, alerta in transicoes.novos(pessoas):
+        identidade = pessoa.get("name") or f"track#{pessoa['track_id']}"
+        armazem.registrar(GESTO, identidade=identidade, camera=camera, alerta=alerta,
+                          track_id=pessoa["track_id"], detalhes={"bbox": pessoa["bbox"]})
+
+# ================================
+# CONSULTAS
+# ================================
+class ConsultaEventos:
+    """Consultas somente leitura; com WAL, rodam em paralelo com a gravação."""
+    def __init__(self, caminho=CAMINHO_PADRAO):
+        self.caminho = caminho
+
+    def _executar(self, sql, parametros=()):
+        conexao = conectar(self.caminho, somente_leitura=True)
+        try:
+            return [dict(linha) for linha in conexao.execute(sql, parametros)]
+        finally:
+            conexao.close()
+
+    def consultar(self, inicio=None, fim=None, tipo=None, identidade=None, camera=None, alerta=None,
+                  so_alertas=False, limite=100):
+        """Eventos que casam com todos os filtros, do mais novo para o mais antigo."""
+        condicoes, parametros = [], []
+        for coluna, operador, valor in (("ts", ">=", inicio), ("ts", "<", fim), ("tipo", "=", tipo),
+                                        ("identidade", "=", identidade), ("alerta", "=", alerta)):
+            if valor is not None:
+                condicoes.append(f"{coluna} {operador} ?")
+                parametros.append(valor)
+        if camera is not None:
+            condicoes.append("camera = ?")
+            parametros.append(str(camera))
+        if so_alertas:
+            condicoes.append("alerta IS NOT NULL")
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        return self._executar(f"SELECT * FROM eventos {where} ORDER BY ts DESC LIMIT ?", parametros + [limite])
+
+    def ultimo_avistamento(self, identidade):
+        eventos = self.consultar(identidade=identidade, limite=1)
+        return eventos[0] if eventos else None
+
+    def resumo(self, inicio=None, fim=None):
+        """Contagem por tipo e alerta no intervalo."""
+        condicoes, parametros = [], []
+        if inicio is not None:
+            condicoes.append("ts >= ?")
+            parametros.append(inicio)
+        if fim is not None:
+            condicoes.append("ts < ?")
+            parametros.append(fim)
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        return self._executar(f"SELECT tipo, alerta, COUNT(*) AS total, MIN(ts) AS primeiro, MAX(ts) AS ultimo "
+                              f"FROM eventos {where} GROUP BY tipo, alerta ORDER BY total DESC", parametros)
+
+# ================================
+# LINHA DE COMANDO
+# ================================
+def instante(texto):
+    """'2026-10-17 08:00', '2026-10-17', '08:00' (hoje) ou segundos desde a época."""
+    try:
+        return float(texto)
+    except ValueError:
+        pass
+    for formato in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(texto, formato).timestamp()
+        except ValueError:
+            pass
+    for formato in ("%H:%M:%S", "%H:%M"):
+        try:
+            hora = datetime.strptime(texto, formato).time()
+            return datetime.combine(datetime.now().date(), hora).timestamp()
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError(f"Instante inválido: '{texto}'")
+
+def formatar_evento(evento):
+    quando = datetime.fromtimestamp(evento["ts"]).strftime("%Y-%m-%d %H:%M:%S")
+    partes = [quando, evento["tipo"], evento["identidade"] or "-"]
+    if evento["camera"] is not None:
+        partes.append(f"câmera {evento['camera']}")
+    if evento["alerta"]:
+        partes.append(f"ALERTA {evento['alerta']}")
+    if evento["confianca"] is not None:
+        partes.append(f"conf {evento['confianca']:.2f}")
+    if evento["imagem"]:
+        partes.append(evento["imagem"])
+    if evento["tipo"] in (ADAPTACAO, REAVALIADO) and evento["detalhes"]:
+        partes.append(evento["detalhes"])
+    return " | ".join(partes)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consulta o histórico de reconhecimentos e alertas.")
+    parser.add_argument("--banco", default=CAMINHO_PADRAO)
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_consultar = sub.add_parser("consultar", help="Lista eventos filtrados")
+    p_consultar.add_argument("--desde", type=instante)
+    p_consultar.add_argument("--ate", type=instante)
+    p_consultar.add_argument("--tipo", choices=[RECONHECIDO, NAO_ALUNO, GESTO, ADAPTACAO, REAVALIADO])
+    p_consultar.add_argument("--identidade", help="Nome do aluno, 'desconhecido#N' ou 'track#N'")
+    p_consultar.add_argument("--camera")
+    p_consultar.add_argument("--alerta", help="Tipo de alerta (ex.: 'NAO ALUNO' ou o texto do gesto)")
+    p_consultar.add_argument("--alertas", action="store_true", help="Só eventos com alerta")
+    p_consultar.add_argument("--limite", type=int, default=50)
+    p_consultar.add_argument("--json", action="store_true")
+
+    p_ultimo = sub.add_parser("ultimo", help="Último avistamento de uma identidade")
+    p_ultimo.add_argument("identidade")
+
+    p_resumo = sub.add_parser("resumo", help="Contagem por tipo de evento e alerta")
+    p_resumo.add_argument("--desde", type=instante)
+    p_resumo.add_argument("--ate", type=instante)
+
+    p_retencao = sub.add_parser("retencao", help="Aplica a retenção agora")
+    p_retencao.add_argument("--dias", type=float, default=90)
+    p_retencao.add_argument("--max-eventos", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    if args.comando == "retencao":
+        armazem = ArmazemEventos(args.banco, retencao_dias=args.dias, max_eventos=args.max_eventos)
+        conexao = conectar(args.banco)
+        print(f"[INFO] {armazem.aplicar_retencao(conexao)} eventos apagados")
+        conexao.close()
+    elif not os.path.exists(args.banco):
+        print(f"[ERRO] Banco de eventos não encontrado: {args.banco}")
+    else:
+        consulta = ConsultaEventos(args.banco)
+        if args.comando == "consultar":
+            eventos = consulta.consultar(args.desde, args.ate, args.tipo, args.identidade, args.camera,
+                                         args.alerta, args.alertas, args.limite)
+            for evento in eventos:
+                print(json.dumps(evento, ensure_ascii=False) if args.json else formatar_evento(evento))
+            print(f"[INFO] {len(eventos)} eventos")
+        elif args.comando == "ultimo":
+            evento = consulta.ultimo_avistamento(args.identidade)
+            print(formatar_evento(evento) if evento else f"[INFO] '{args.identidade}' nunca foi visto")
+        elif args.comando == "resumo":
+            for linha in consulta.resumo(args.desde, args.ate):
+                primeiro = datetime.fromtimestamp(linha["primeiro"]).strftime("%Y-%m-%d %H:%M")
+                ultimo = datetime.fromtimestamp(linha["ultimo"]).strftime("%Y-%m-%d %H:%M")
+                print(f"{linha['tipo']:<12}{linha['alerta'] or '-':<24}{linha['total']:>10}  {primeiro} -> {ultimo}")
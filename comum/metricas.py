@@ -0,0 +1,225 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ================================
+# TEMPOS POR ESTÁGIO
+# ================================
+@contextmanager
+def medir(tempos, estagio):
+    """
+    Soma em tempos[estagio] a duração (ms, relógio monotônico) do bloco.
+    Um estágio executado várias vezes no mesmo frame (ex.: uma vez por câmera) é acumulado.
+    """
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        tempos[estagio] = tempos.get(estagio, 0.0) + (time.perf_counter() - inicio) * 1000
+
+# ================================
+# HISTOGRAMAS E CONTADORES
+# ================================
+LIMITES_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+class HistogramaMovel:
+    """
+    Histograma cumulativo em faixas fixas (formato Prometheus) e uma janela
+    com as últimas observações para os percentis recentes.
+    """
+    def __init__(self, limites=LIMITES_MS, janela=512):
+        self.limites = tuple(limites)
+        self.contagens = [0] * (len(self.limites) + 1)
+        self.soma = 0.0
+        self.total = 0
+        self.recentes = deque(maxlen=janela)
+
+    def observar(self, valor):
+        self.contagens[bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+        self.total += 1
+        self.recentes.append(valor)
+
+    def faixas(self):
+        return [f"{limite:g}" for limite in self.limites] + ["+Inf"]
+
+    def percentis(self, quantis=(0.5, 0.95, 0.99)):
+        valores = sorted(self.recentes)
+        if not valores:
+            return {q: 0.0 for q in quantis}
+        return {q: valores[min(len(valores) - 1, int(q * len(valores)))] for q in quantis}
+
+def _rotulos(rotulos):
+    if not rotulos:
+        return ""
+    return "{" + ",".join(f'{chave}="{valor}"' for chave, valor in rotulos) + "}"
+
+class Metricas:
+    """
+    Registro de contadores e histogramas de tempo por estágio, seguro entre threads.
+    Valores mantidos fora do registro (fila de alertas, frames descartados pela
+    captura...) entram por coletores, chamados só na hora da exportação.
+    """
+    def __init__(self, prefixo="citylab", janela=512):
+        self.prefixo = prefixo
+        self.janela = janela
+        self.contadores = {}
+        self.histogramas = {}
+        self._coletores = []
+        self._lock = threading.Lock()
+
+    def incrementar(self, nome, n=1, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._lock:
+            self.contadores[chave] = self.contadores.get(chave, 0) + n
+
+    def observar_tempos(self, tempos):
+        """Registra um dicionário {estágio: ms}, como ProcessadorCV.ultimos_tempos."""
+        with self._lock:
+            for estagio, ms in tempos.items():
+                histograma = self.histogramas.get(estagio)
+                if histograma is None:
+                    histograma = self.histogramas[estagio] = HistogramaMovel(janela=self.janela)
+                histograma.observar(ms)
+
+    def adicionar_coletor(self, coletor):
+        """'coletor()' retorna {nome: valor}; nomes terminados em '_total' são contadores."""
+        self._coletores.append(coletor)
+
+    def _coletar(self):
+        valores = {}
+        for coletor in self._coletores:
+            try:
+                valores.update(coletor())
+            except Exception:
+                # Um coletor com problema não derruba a exportação das demais métricas
+                continue
+        return valores
+
+    def instantaneo(self):
+        """Estado atual num dicionário serializável em JSON."""
+        with self._lock:
+            contadores = {nome + _rotulos(rotulos): valor for (nome, rotulos), valor in sorted(self.contadores.items())}
+            estagios = {}
+            for estagio, h in self.histogramas.items():
+                p = h.percentis()
+                estagios[estagio] = {"n": h.total, "media_ms": h.soma / h.total if h.total else 0.0,
+                                     "p50_ms": p[0.5], "p95_ms": p[0.95], "p99_ms": p[0.99]}
+        return {"timestamp": time.time(), "contadores": contadores, "estagios_ms": estagios,
+                "coletados": self._coletar()}
+
+    def texto_prometheus(self):
+        """Exporta no formato de texto do Prometheus (versão 0.0.4)."""
+        p = self.prefixo
+        linhas = []
+        with self._lock:
+            nomes_vistos = set()
+            for (nome, rotulos), valor in sorted(self.contadores.items()):
+                if nome not in nomes_vistos:
+                    nomes_vistos.add(nome)
+                    linhas.append(f"# TYPE {p}_{nome}_total counter")
+                linhas.append(f"{p}_{nome}_total{_rotulos(rotulos)} {valor}")
+
+            if self.histogramas:
+                linhas.append(f"# HELP {p}_estagio_ms Duração de cada estágio por chamada, em ms.")
+                linhas.append(f"# TYPE {p}_estagio_ms histogram")
+            for estagio, h in sorted(self.histogramas.items()):
+                acumulado = 0
+                for limite, contagem in zip(h.faixas(), h.contagens):
+                    acumulado += contagem
+                    linhas.append(f'{p}_estagio_ms_bucket{{estagio="{estagio}",le="{limite}"}} {acumulado}')
+                linhas.append(f'{p}_estagio_ms_sum{{estagio="{estagio}"}} {h.soma:.3f}')
+                linhas.append(f'{p}_estagio_ms_count{{estagio="{estagio}"}} {h.total}')
+
+            if self.histogramas:
+                linhas.append(f"# HELP {p}_estagio_recente_ms Percentis das últimas {self.janela} chamadas, em ms.")
+                linhas.append(f"# TYPE {p}_estagio_recente_ms gauge")
+            for estagio, h in sorted(self.histogramas.items()):
+                for quantil, valor in h.percentis().items():
+                    linhas.append(f'{p}_estagio_recente_ms{{estagio="{estagio}",quantil="{quantil}"}} {valor:.3f}')
+
+        for nome, valor in sorted(self._coletar().items()):
+            if not isinstance(valor, (int, float)):
+                continue
+            tipo = "counter" if nome.endswith("_total") else "gauge"
+            linhas.append(f"# TYPE {p}_{nome} {tipo}")
+            linhas.append(f"{p}_{nome} {valor}")
+        return "\n".join(linhas) + "\n"
+
+# ================================
+# EXPORTAÇÃO (HTTP E ARQUIVO)
+# ================================
+class ServidorMetricas(threading.Thread):
+    """Endpoint HTTP local: GET /metrics (Prometheus) e GET /metrics.json."""
+    def __init__(self, metricas, porta=9108, host="127.0.0.1"):
+        super().__init__(daemon=True, name="ServidorMetricas")
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    corpo = metricas.texto_prometheus().encode("utf-8")
+                    tipo = "text/plain; version=0.0.4; charset=utf-8"
+                elif self.path == "/metrics.json":
+                    corpo = json.dumps(metricas.instantaneo(), ensure_ascii=False).encode("utf-8")
+                    tipo = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", tipo)
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *args):
+                pass
+
+        self.servidor = ThreadingHTTPServer((host, porta), Handler)
+        self.servidor.daemon_threads = True
+
+    @property
+    def endereco(self):
+        host, porta = self.servidor.server_address[:2]
+        return f"http://{host}:{porta}/metrics"
+
+    def run(self):
+        self.servidor.serve_forever(poll_interval=0.5)
+
+    def parar(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+class DespejoMetricas(threading.Thread):
+    """Grava o instantâneo das métricas em JSON a cada 'intervalo' segundos (troca atômica)."""
+    def __init__(self, metricas, caminho, intervalo=30.0):
+        super().__init__(daemon=True, name="DespejoMetricas")
+        self.metricas = metricas
+        self.caminho = caminho
+        self.intervalo = intervalo
+        self._parar = threading.Event()
+
+    def gravar(self):
+        temporario = self.caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(self.metricas.instantaneo(), f, indent=2, ensure_ascii=False)
+        os.replace(temporario, self.caminho)
+
+    def run(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.gravar()
+            except OSError as e:
+                print(f"[ERRO] Falha ao gravar métricas em '{self.caminho}': {e}")
+
+    def parar(self):
+        self._parar.set()
+        self.join(timeout=2.0)
+        try:
+            self.gravar()
+        except OSError as e:
+            print(f"[ERRO] Falha ao gravar métricas em '{self.caminho}': {e}")
@@ -0,0 +1,49 @@
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+# ================================
+# PERFIL DE INICIALIZAÇÃO
+# ================================
+class PerfilInicializacao:
+    """
+    Tempos (ms) de cada etapa da partida a frio, na ordem em que aconteceram: imports
+    pesados, carga dos modelos, aquecimento e o primeiro frame de verdade.
+    """
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.etapas = []
+        self.total_ms = None
+
+    @contextmanager
+    def medir(self, etapa):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.etapas.append((etapa, (time.perf_counter() - inicio) * 1000))
+
+    def concluir(self, duracao_primeiro_frame_ms):
+        """Fecha o perfil no fim do primeiro frame processado; retorna False se já estava fechado."""
+        if self.total_ms is not None:
+            return False
+        self.etapas.append(("primeiro_frame", duracao_primeiro_frame_ms))
+        self.total_ms = (time.perf_counter() - self.inicio) * 1000
+        return True
+
+    def estatisticas(self):
+        stats = {f"{etapa}_ms": ms for etapa, ms in self.etapas}
+        stats["total_ms"] = self.total_ms if self.total_ms is not None else (time.perf_counter() - self.inicio) * 1000
+        return stats
+
+def formatar_perfil(perfil):
+    etapas = " | ".join(f"{etapa} {ms / 1000:.2f}s" for etapa, ms in perfil.etapas)
+    return f"Inicialização: {perfil.estatisticas()['total_ms'] / 1000:.1f}s até o primeiro frame ({etapas})"
+
+# ================================
+# AQUECIMENTO DOS MODELOS
+# ================================
+def frame_aquecimento(forma, semente=0):
+    """Frame de ruído para o aquecimento: o custo dos modelos não depende do conteúdo."""
+    return np.random.default_rng(semente).integers(0, 256, forma, dtype=np.uint8)
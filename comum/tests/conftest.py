@@ -0,0 +1,5 @@
+import os
+import sys
+
+# O pacote 'comum' é importado a partir da raiz do repositório, como nos scripts
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
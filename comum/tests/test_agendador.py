@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from comum.agendador import AgendadorInferencia
+
+def simular(duracao_s, fps_camera, custo_s, movimento_s=0.0, inicio=100.0):
+    """Câmera a 'fps_camera'; só os 'movimento_s' primeiros segundos têm movimento."""
+    agendador = AgendadorInferencia(fps_repouso=1.0)
+    parado = np.zeros((120, 160, 3), dtype=np.uint8)
+    rng = np.random.default_rng(0)
+    agora = inicio
+    for i in range(int(duracao_s * fps_camera)):
+        frame = rng.integers(0, 256, parado.shape, dtype=np.uint8) if agora - inicio < movimento_s else parado
+        if agendador.deve_processar(frame, agora=agora):
+            agendador.registrar_inferencia(custo_s)
+        agora += 1 / fps_camera
+    return agendador.estatisticas(agora=agora)
+
+@pytest.mark.parametrize("custo_s", [0.01, 0.1, 0.3, 1.0])
+@pytest.mark.parametrize("fps_camera", [10, 30])
+def test_cena_parada_nunca_economiza_mais_que_100_por_cento(fps_camera, custo_s):
+    stats = simular(300, fps_camera, custo_s)
+    assert stats["fracao_pulada"] > 0.85
+    assert stats["cpu_economizada_s_por_hora"] <= 3600
+
+def test_economia_conta_so_as_inferencias_que_caberiam():
+    # 30 FPS com 0,3 s por inferência: sem o agendador a CPU ficaria 100% ocupada; com ele,
+    # ~0,3 s de keep-alive por segundo. Economia esperada perto de 70% (~42 min/h)
+    stats = simular(300, 30, 0.3)
+    assert 35 * 60 < stats["cpu_economizada_s_por_hora"] < 45 * 60
+
+def test_inferencia_barata_economiza_proporcional_aos_frames_pulados():
+    # 0,01 s por frame a 30 FPS = 30% de CPU sem o agendador, quase tudo economizado
+    stats = simular(300, 30, 0.01)
+    assert 0.25 * 3600 < stats["cpu_economizada_s_por_hora"] < 0.30 * 3600
+
+def test_cena_com_movimento_nao_pula_frames():
+    stats = simular(20, 30, 0.01, movimento_s=30)
+    assert stats["pulados"] == 0
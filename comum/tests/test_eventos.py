@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+from comum.eventos import INSERCAO, NAO_ALUNO, RECONHECIDO, ArmazemEventos, conectar
+
+AGORA = 1_700_000_000.0
+DIA = 86400
+
+def evento(ts, tipo, identidade, imagem):
+    return (ts, tipo, identidade, 0, int(tipo == NAO_ALUNO), 0.5, 1, imagem, None)
+
+def criar_imagem(diretorio, nome):
+    caminho = str(diretorio / nome)
+    with open(caminho, "wb") as file:
+        file.write(b"\xff\xd8\xff\xd9")
+    return caminho
+
+@pytest.fixture
+def cenario(tmp_path):
+    # 'antiga' só é usada por eventos vencidos; 'compartilhada' é o recorte de um
+    # desconhecido que voltou depois; 'nova' e 'avulsa' nunca deveriam sumir
+    imagens = {nome: criar_imagem(tmp_path, f"{nome}.jpg") for nome in ("antiga", "compartilhada", "nova", "avulsa")}
+    caminho = str(tmp_path / "eventos.sqlite3")
+    conexao = conectar(caminho)
+    with conexao:
+        conexao.executemany(INSERCAO, [
+            evento(AGORA - 40 * DIA, NAO_ALUNO, "desconhecido1", imagens["antiga"]),
+            evento(AGORA - 35 * DIA, NAO_ALUNO, "desconhecido2", imagens["compartilhada"]),
+            evento(AGORA - 31 * DIA, RECONHECIDO, "ANA", None),
+            evento(AGORA - 1 * DIA, NAO_ALUNO, "desconhecido2", imagens["compartilhada"]),
+            evento(AGORA - 1 * DIA, NAO_ALUNO, "desconhecido3", imagens["nova"]),
+        ])
+    yield caminho, conexao, imagens
+    conexao.close()
+
+def test_retencao_remove_so_imagens_sem_evento_restante(cenario):
+    caminho, conexao, imagens = cenario
+    armazem = ArmazemEventos(caminho, retencao_dias=30, max_eventos=0)
+
+    assert armazem.aplicar_retencao(conexao, agora=AGORA) == 3
+    assert conexao.execute("SELECT COUNT(*) FROM eventos").fetchone()[0] == 2
+    assert not os.path.exists(imagens["antiga"])
+    assert all(os.path.exists(imagens[nome]) for nome in ("compartilhada", "nova", "avulsa"))
+
+def test_retencao_por_quantidade_tambem_preserva_imagens_em_uso(cenario):
+    caminho, conexao, imagens = cenario
+    armazem = ArmazemEventos(caminho, retencao_dias=0, max_eventos=2)
+
+    assert armazem.aplicar_retencao(conexao, agora=AGORA) == 3
+    assert not os.path.exists(imagens["antiga"])
+    assert os.path.exists(imagens["compartilhada"])
+
+def test_sem_remover_imagens_os_arquivos_ficam(cenario):
+    caminho, conexao, imagens = cenario
+    armazem = ArmazemEventos(caminho, retencao_dias=30, max_eventos=0, remover_imagens=False)
+
+    assert armazem.aplicar_retencao(conexao, agora=AGORA) == 3
+    assert all(os.path.exists(caminho_imagem) for caminho_imagem in imagens.values())
@@ -0,0 +1,406 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import cv2
+import numpy as np
+
+from comum.captura import copiar_em_buffer
+from comum.metricas import HistogramaMovel
+
+FRONTEIRA = "quadro"
+
+# ================================
+# CLIENTES
+# ================================
+class ClienteTransmissao:
+    """
+    Um visualizador conectado (vídeo MJPEG ou eventos SSE). Guarda só o conteúdo mais
+    novo ainda não enviado: se chega outro antes do envio, o antigo é substituído e conta
+    como pulado. Um cliente lento perde frames, nunca segura a inferência.
+    """
+    def __init__(self, tipo, fps, perfil=None):
+        self.tipo = tipo
+        self.intervalo = 1.0 / fps
+        self.perfil = perfil
+        self.proximo_envio = 0.0
+        # Reservado: entrou num lote de codificação que ainda não terminou
+        self.reservado = False
+        self.enviando = False
+        self.pendente = None
+        self.enviados = 0
+        self.pulados = 0
+        self.bytes_enviados = 0
+
+    def pronto(self, agora):
+        return not self.enviando and not self.reservado and agora >= self.proximo_envio
+
+    def reservar(self, agora):
+        self.reservado = True
+        # Limita a taxa sem acumular atraso: no máximo um envio de "crédito" guardado
+        self.proximo_envio = max(self.proximo_envio + self.intervalo, agora - self.intervalo)
+
+    def entregar(self, conteudo):
+        """Retorna True se substituiu um conteúdo que o cliente não chegou a enviar."""
+        self.reservado = False
+        pulado = self.pendente is not None
+        self.pulados += pulado
+        self.pendente = conteudo
+        return pulado
+
+# ================================
+# CODIFICAÇÃO FORA DO LAÇO PRINCIPAL
+# ================================
+def _json_padrao(valor):
+    if isinstance(valor, np.generic):
+        return valor.item()
+    if isinstance(valor, np.ndarray):
+        return valor.tolist()
+    return str(valor)
+
+class TransmissorFrames:
+    """
+    Recebe os frames anotados e os resultados do laço de exibição e prepara o que cada
+    cliente conectado vai receber. O laço só paga uma cópia do frame (num buffer
+    reaproveitado), e só quando algum cliente está pronto para o próximo frame; resize,
+    JPEG e JSON rodam num pool de threads (cv2.imencode libera o GIL).
+
+    Clientes com a mesma qualidade e largura formam um perfil, codificado uma vez por
+    frame para todos. Cada perfil tem no máximo uma codificação em andamento: se o pool
+    está atrasado, o frame novo é descartado para aquele perfil em vez de enfileirar.
+    """
+    def __init__(self, codificadores=2, fps_max=15.0, qualidade=70, largura=None):
+        self.fps_max = fps_max
+        self.qualidade = qualidade
+        self.largura = largura
+        self.clientes = []
+        self.seq = 0
+        self.parado = False
+
+        self._executor = ThreadPoolExecutor(max_workers=codificadores, thread_name_prefix="CodificadorJPEG")
+        self._lock = threading.Lock()
+        self._novo = threading.Condition(self._lock)
+        self._perfis_ocupados = set()
+        self._serializando = False
+        self._redimensionados = {}
+        self._livres = []
+        self._ultimos_resultados = None
+
+        self.tempos_jpeg = HistogramaMovel()
+        self.codificados = 0
+        self.descartados = 0
+        self.eventos_publicados = 0
+        self.pulados = 0
+        self.bytes_enviados = 0
+
+    # ---------- clientes ----------
+    def conectar(self, tipo, fps=None, qualidade=None, largura=None):
+        fps = min(self.fps_max, fps or self.fps_max)
+        if fps <= 0:
+            raise ValueError("fps precisa ser positivo")
+        perfil = None
+        if tipo == "video":
+            qualidade = int(np.clip(qualidade or self.qualidade, 10, 95))
+            perfil = (qualidade, largura or self.largura)
+        cliente = ClienteTransmissao(tipo, fps, perfil)
+        with self._lock:
+            self.clientes.append(cliente)
+        return cliente
+
+    def desconectar(self, cliente):
+        with self._lock:
+            if cliente in self.clientes:
+                self.clientes.remove(cliente)
+
+    def proximo(self, cliente, timeout):
+        """Bloqueia até haver conteúdo para 'cliente' (ou 'timeout'). Retorna None no timeout ou ao parar."""
+        with self._novo:
+            self._novo.wait_for(lambda: cliente.pendente is not None or self.parado, timeout=timeout)
+            conteudo, cliente.pendente = cliente.pendente, None
+            cliente.enviando = conteudo is not None
+            return conteudo
+
+    def enviado(self, cliente, n_bytes):
+        with self._lock:
+            cliente.enviando = False
+            cliente.enviados += 1
+            cliente.bytes_enviados += n_bytes
+            self.bytes_enviados += n_bytes
+
+    def aguardando_frame(self):
+        """Algum cliente de vídeo quer um frame agora? Sem janela, o laço só desenha nesse caso."""
+        agora = time.monotonic()
+        with self._lock:
+            return any(c.tipo == "video" and c.pronto(agora) for c in self.clientes)
+
+    # ---------- publicação (laço de exibição) ----------
+    def publicar(self, frame, resultados=None):
+        """
+        Chamado pelo laço de exibição a cada frame desenhado. 'resultados' só é
+        serializado quando muda (comparação por identidade: os laços repassam o mesmo
+        dicionário até a inferência produzir outro).
+        """
+        agora = time.monotonic()
+        self.seq += 1
+        perfis = {}
+        eventos = []
+        ocupados = set()
+        with self._lock:
+            if self.parado:
+                return
+            novos_resultados = resultados is not None and resultados is not self._ultimos_resultados
+            if novos_resultados:
+                self._ultimos_resultados = resultados
+            for cliente in self.clientes:
+                if not cliente.pronto(agora):
+                    continue
+                if cliente.tipo == "video" and frame is not None:
+                    if cliente.perfil in self._perfis_ocupados:
+                        ocupados.add(cliente.perfil)
+                        continue
+                    perfis.setdefault(cliente.perfil, []).append(cliente)
+                elif cliente.tipo == "eventos" and novos_resultados and not self._serializando:
+                    eventos.append(cliente)
+            # Cliente pronto, mas o perfil ainda codifica o frame anterior: este frame fica de fora
+            self.descartados += len(ocupados)
+            for lista in list(perfis.values()) + [eventos]:
+                for cliente in lista:
+                    cliente.reservar(agora)
+            self._perfis_ocupados.update(perfis)
+            if eventos:
+                self._serializando = True
+            buffer = self._livres.pop() if perfis and self._livres else None
+
+        if perfis:
+            # Uma cópia por frame, compartilhada pelos perfis; volta ao pool quando o último terminar
+            buffer = copiar_em_buffer(buffer, frame)
+            restantes = [len(perfis)]
+            for perfil, clientes in perfis.items():
+                self._executor.submit(self._codificar, buffer, restantes, perfil, clientes)
+        if eventos:
+            mensagem = {"seq": self.seq, "timestamp": time.time(), **resultados}
+            self._executor.submit(self._serializar, mensagem, eventos)
+
+    def _codificar(self, buffer, restantes, perfil, clientes):
+        qualidade, largura = perfil
+        inicio = time.perf_counter()
+        ok, jpeg = False, None
+        try:
+            imagem = buffer
+            if largura and largura < buffer.shape[1]:
+                forma = (round(buffer.shape[0] * largura / buffer.shape[1]), largura, buffer.shape[2])
+                destino = self._redimensionados.get(perfil)
+                if destino is None or destino.shape != forma:
+                    destino = self._redimensionados[perfil] = np.empty(forma, dtype=buffer.dtype)
+                cv2.resize(buffer, (forma[1], forma[0]), dst=destino, interpolation=cv2.INTER_AREA)
+                imagem = destino
+            ok, jpeg = cv2.imencode(".jpg", imagem, [cv2.IMWRITE_JPEG_QUALITY, qualidade])
+        finally:
+            ms = (time.perf_counter() - inicio) * 1000
+            with self._novo:
+                restantes[0] -= 1
+                if restantes[0] == 0:
+                    self._livres.append(buffer)
+                self._perfis_ocupados.discard(perfil)
+                self.tempos_jpeg.observar(ms)
+                if ok:
+                    self.codificados += 1
+                    self.pulados += sum(cliente.entregar(jpeg) for cliente in clientes)
+                else:
+                    for cliente in clientes:
+                        cliente.reservado = False
+                self._novo.notify_all()
+
+    def _serializar(self, mensagem, clientes):
+        texto = json.dumps(mensagem, default=_json_padrao, ensure_ascii=False).encode("utf-8")
+        with self._novo:
+            self._serializando = False
+            self.eventos_publicados += 1
+            self.pulados += sum(cliente.entregar(texto) for cliente in clientes)
+            self._novo.notify_all()
+
+    def parar(self):
+        with self._novo:
+            self.parado = True
+            self._novo.notify_all()
+        self._executor.shutdown(wait=True)
+
+    def estatisticas(self):
+        with self._lock:
+            p = self.tempos_jpeg.percentis()
+            return {
+                "clientes_video": sum(1 for c in self.clientes if c.tipo == "video"),
+                "clientes_eventos": sum(1 for c in self.clientes if c.tipo == "eventos"),
+                "jpeg_codificados_total": self.codificados,
+                "jpeg_descartados_total": self.descartados,
+                "jpeg_p50_ms": p[0.5],
+                "jpeg_p95_ms": p[0.95],
+                "eventos_publicados_total": self.eventos_publicados,
+                "pulados_clientes_total": self.pulados,
+                "bytes_enviados_total": self.bytes_enviados,
+            }
+
+# ================================
+# SERVIDOR HTTP (MJPEG E SSE)
+# ================================
+PAGINA = """<!doctype html>
+<html><head><meta charset="utf-8"><title>CityLab</title></head>
+<body style="background:#111;color:#eee;font-family:monospace">
+{cameras}
+</body></html>
+"""
+
+CAMERA = """<h3>Câmera {camera}</h3>
+<img src="/video.mjpg?camera={camera}" style="max-width:100%">
+<pre id="eventos{camera}"></pre>
+<script>
+new EventSource("/eventos?camera={camera}").onmessage = function (e) {{
+  document.getElementById("eventos{camera}").textContent = JSON.stringify(JSON.parse(e.data), null, 1);
+}};
+</script>
+"""
+
+class ServidorTransmissao(threading.Thread):
+    """
+    Visualização remota sem janela:
+      GET /                   página com o vídeo e os resultados de cada câmera;
+      GET /video.mjpg         MJPEG (?camera=, ?fps=, ?qualidade=, ?largura=);
+      GET /eventos            resultados por frame em JSON, via Server-Sent Events (?camera=, ?fps=);
+      GET /estado.json        clientes conectados e custo da codificação.
+    'transmissores' é {camera: TransmissorFrames}.
+    """
+    def __init__(self, transmissores, porta=8080, host="0.0.0.0", keepalive_s=15.0):
+        super().__init__(daemon=True, name="ServidorTransmissao")
+        self.transmissores = {str(camera): t for camera, t in transmissores.items()}
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _responder(self, corpo, tipo, status=200):
+                self.send_response(status)
+                self.send_header("Content-Type", tipo)
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                parametros = {chave: valores[-1] for chave, valores in parse_qs(url.query).items()}
+                if url.path == "/":
+                    cameras = "".join(CAMERA.format(camera=camera) for camera in servidor.transmissores)
+                    self._responder(PAGINA.format(cameras=cameras).encode("utf-8"), "text/html; charset=utf-8")
+                    return
+                if url.path == "/estado.json":
+                    corpo = json.dumps(servidor.estatisticas(por_camera=True), ensure_ascii=False).encode("utf-8")
+                    self._responder(corpo, "application/json")
+                    return
+                if url.path not in ("/video.mjpg", "/eventos"):
+                    self.send_error(404)
+                    return
+
+                transmissor = servidor.transmissores.get(parametros.get("camera", next(iter(servidor.transmissores))))
+                if transmissor is None:
+                    self.send_error(404, "Câmera desconhecida")
+                    return
+                try:
+                    fps = float(parametros["fps"]) if "fps" in parametros else None
+                    qualidade = int(parametros["qualidade"]) if "qualidade" in parametros else None
+                    largura = int(parametros["largura"]) if "largura" in parametros else None
+                    if url.path == "/video.mjpg":
+                        cliente = transmissor.conectar("video", fps, qualidade, largura)
+                    else:
+                        cliente = transmissor.conectar("eventos", fps)
+                except ValueError as e:
+                    self.send_error(400, str(e))
+                    return
+
+                try:
+                    if cliente.tipo == "video":
+                        self._transmitir_video(transmissor, cliente)
+                    else:
+                        self._transmitir_eventos(transmissor, cliente)
+                except (BrokenPipeError, ConnectionResetError, TimeoutError):
+                    pass
+                finally:
+                    transmissor.desconectar(cliente)
+
+            def _transmitir_video(self, transmissor, cliente):
+                self.send_response(200)
+                self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={FRONTEIRA}")
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                while not transmissor.parado:
+                    jpeg = transmissor.proximo(cliente, servidor.keepalive_s)
+                    if jpeg is None:
+                        continue
+                    cabecalho = (f"--{FRONTEIRA}\r\nContent-Type: image/jpeg\r\n"
+                                 f"Content-Length: {jpeg.nbytes}\r\n\r\n").encode("ascii")
+                    self.wfile.write(cabecalho)
+                    self.wfile.write(memoryview(jpeg))
+                    self.wfile.write(b"\r\n")
+                    transmissor.enviado(cliente, jpeg.nbytes)
+
+            def _transmitir_eventos(self, transmissor, cliente):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                while not transmissor.parado:
+                    texto = transmissor.proximo(cliente, servidor.keepalive_s)
+                    if texto is None:
+                        # Comentário SSE: mantém a conexão viva através de proxies
+                        self.wfile.write(b": keepalive\n\n")
+                        continue
+                    self.wfile.write(b"data: " + texto + b"\n\n")
+                    transmissor.enviado(cliente, len(texto))
+
+            def log_message(self, *args):
+                pass
+
+        self.keepalive_s = keepalive_s
+        self.servidor = ThreadingHTTPServer((host, porta), Handler)
+        self.servidor.daemon_threads = True
+
+    @property
+    def endereco(self):
+        host, porta = self.servidor.server_address[:2]
+        return f"http://{host}:{porta}/"
+
+    def estatisticas(self, por_camera=False):
+        """Soma de todas as câmeras (formato dos coletores de métricas); 'por_camera' detalha cada uma."""
+        por_transmissor = {camera: t.estatisticas() for camera, t in self.transmissores.items()}
+        total = {}
+        for stats in por_transmissor.values():
+            for chave, valor in stats.items():
+                total[chave] = max(total.get(chave, 0.0), valor) if chave.endswith("_ms") else total.get(chave, 0) + valor
+        if por_camera:
+            total["cameras"] = por_transmissor
+        return total
+
+    def run(self):
+        self.servidor.serve_forever(poll_interval=0.5)
+
+    def parar(self):
+        for transmissor in self.transmissores.values():
+            transmissor.parar()
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+def iniciar_transmissao(cameras, porta, host="0.0.0.0", metricas=None, **opcoes):
+    """Cria um TransmissorFrames por câmera, sobe o servidor e retorna (servidor, {camera: transmissor})."""
+    transmissores = {camera: TransmissorFrames(**opcoes) for camera in cameras}
+    servidor = ServidorTransmissao(transmissores, porta=porta, host=host)
+    servidor.start()
+    if metricas is not None:
+        metricas.adicionar_coletor(lambda: {f"transmissao_{chave}": valor
+                                            for chave, valor in servidor.estatisticas().items()})
+    print(f"[INFO] Transmissão em {servidor.endereco}")
+    return servidor, transmissores
+
+def formatar_transmissao(stats):
+    return (f"Transmissão: {stats['clientes_video']} clientes de vídeo, {stats['clientes_eventos']} de eventos | "
+            f"JPEG p50 {stats['jpeg_p50_ms']:.1f} ms, p95 {stats['jpeg_p95_ms']:.1f} ms | "
+            f"{stats['jpeg_codificados_total']} codificados, {stats['jpeg_descartados_total']} descartados, "
+            f"{stats['pulados_clientes_total']} pulados por clientes lentos")
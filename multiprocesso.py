@@ -0,0 +1,558 @@
+import argparse
+import logging
+import multiprocessing as mp
+import os
+import queue
+import signal
+import sys
+import time
+from collections import defaultdict, deque
+from logging.handlers import QueueHandler
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(RAIZ, "FaceRecon"))
+sys.path.insert(0, os.path.join(RAIZ, "GestureRecon"))
+
+from comum.captura import abrir_fonte, copiar_em_buffer
+from pipeline import MedidorFPS
+
+# Pausa entre consultas ao anel quando não há frame novo
+ESPERA_S = 0.002
+
+# ================================
+# RING BUFFER DE FRAMES EM MEMÓRIA COMPARTILHADA
+# ================================
+class AnelFrames:
+    """
+    Ring buffer de frames num bloco de multiprocessing.shared_memory.
+    Cabeçalho: seq do último frame publicado e, por slot, seq e timestamp de captura.
+    O frame 'seq' fica no slot seq % slots. Só o processo de captura escreve; durante a
+    escrita o seq do slot vale -1. Quem lê copia a view para um buffer próprio e confere
+    o seq antes e depois da cópia: se mudou, o frame foi sobrescrito e é descartado.
+    """
+    def __init__(self, forma, slots=16, nome=None):
+        self.forma = tuple(forma)
+        self.slots = slots
+        criar = nome is None
+        tamanho_cabecalho = 8 * (1 + 2 * slots)
+        tamanho = tamanho_cabecalho + slots * int(np.prod(self.forma))
+        self.shm = shared_memory.SharedMemory(name=nome, create=criar, size=tamanho if criar else 0)
+
+        self._ultimo = np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf, offset=0)
+        self._seqs = np.ndarray((slots,), dtype=np.int64, buffer=self.shm.buf, offset=8)
+        self._timestamps = np.ndarray((slots,), dtype=np.float64, buffer=self.shm.buf, offset=8 * (1 + slots))
+        self._frames = np.ndarray((slots,) + self.forma, dtype=np.uint8, buffer=self.shm.buf, offset=tamanho_cabecalho)
+        if criar:
+            self._ultimo[0] = 0
+            self._seqs[:] = -1
+
+    @property
+    def descritor(self):
+        """O que um processo filho precisa para abrir o mesmo anel (AnelFrames.abrir)."""
+        return self.shm.name, self.forma, self.slots
+
+    @classmethod
+    def abrir(cls, descritor):
+        nome, forma, slots = descritor
+        return cls(forma, slots, nome=nome)
+
+    def ultimo(self):
+        return int(self._ultimo[0])
+
+    # --- Escrita (processo de captura) ---
+    def reservar(self, seq):
+        """Marca o slot do frame 'seq' como em escrita e retorna a view onde gravá-lo."""
+        slot = seq % self.slots
+        self._seqs[slot] = -1
+        return self._frames[slot]
+
+    def publicar(self, seq, timestamp):
+        slot = seq % self.slots
+        self._timestamps[slot] = timestamp
+        self._seqs[slot] = seq
+        self._ultimo[0] = seq
+
+    # --- Leitura (trabalhadores e renderização) ---
+    def ler(self, seq):
+        """Retorna (timestamp, view somente leitura) do frame 'seq', ou None se já foi sobrescrito."""
+        slot = seq % self.slots
+        if self._seqs[slot] != seq:
+            return None
+        timestamp = float(self._timestamps[slot])
+        frame = self._frames[slot]
+        frame.flags.writeable = False
+        return timestamp, frame
+
+    def valido(self, seq):
+        return self._seqs[seq % self.slots] == seq
+
+    def fechar(self, remover=False):
+        # As views precisam sumir antes do close, senão o buffer continua exportado
+        del self._ultimo, self._seqs, self._timestamps, self._frames
+        try:
+            self.shm.close()
+        except BufferError:
+            # Alguma view de frame ainda viva (ex.: exceção no meio do processamento);
+            # o mapeamento é liberado na saída do processo
+            pass
+        if remover:
+            self.shm.unlink()
+
+def sondar_forma(fonte):
+    """Abre a fonte, lê um frame e retorna o formato (altura, largura, canais)."""
+    cap, _ = abrir_fonte(fonte)
+    try:
+        ret, frame = cap.read()
+        if not ret:
+            raise RuntimeError(f"Não foi possível ler um frame de '{fonte}'")
+        return frame.shape
+    finally:
+        cap.release()
+
+# ================================
+# PROCESSOS DE CAPTURA E DE TRABALHO
+# ================================
+def _capturar(anel, fonte, fps_captura, repetir, parar):
+    cap, fps_fonte = abrir_fonte(fonte)
+    if not cap.isOpened():
+        print(f"[ERRO] Não foi possível abrir a fonte '{fonte}'")
+        return 1
+    # None: ritmo da fonte (FPS original para arquivos); 0: o mais rápido possível
+    fps_alvo = fps_fonte if fps_captura is None else fps_captura
+    arquivo = os.path.isfile(str(fonte))
+    altura, largura = anel.forma[:2]
+    # Depois de um reinício a numeração continua de onde parou
+    seq = anel.ultimo()
+    proxima_leitura = time.monotonic()
+    try:
+        while not parar.is_set():
+            if fps_alvo:
+                espera = proxima_leitura - time.monotonic()
+                if espera > 0:
+                    time.sleep(espera)
+                proxima_leitura = max(proxima_leitura + 1.0 / fps_alvo, time.monotonic() - 1.0)
+
+            destino = anel.reservar(seq + 1)
+            ret, frame = cap.read(destino)
+            if not ret:
+                if arquivo and repetir:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    continue
+                if arquivo:
+                    return 0
+                print("[ERRO] Falha ao ler frame da câmera")
+                return 1
+            if frame is not destino:
+                # Resolução diferente da sondada: o OpenCV alocou outro array
+                cv2.resize(frame, (largura, altura), dst=destino)
+            seq += 1
+            anel.publicar(seq, time.monotonic())
+        return 0
+    finally:
+        cap.release()
+
+def _processo_captura(descritor, fonte, fps_captura, repetir, parar):
+    """
+    Lê a fonte direto no slot do anel (cap.read no buffer compartilhado).
+    Sai com código 0 no fim de um arquivo e 1 em falha da câmera (o supervisor reinicia).
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    anel = AnelFrames.abrir(descritor)
+    try:
+        codigo = _capturar(anel, fonte, fps_captura, repetir, parar)
+    finally:
+        anel.fechar()
+    sys.exit(codigo)
+
+def _processo_trabalhador(descritor, tipo, indice, fabrica, opcoes, reivindicado, canal, parar):
+    """
+    Pega sempre o frame mais novo que nenhum outro trabalhador do mesmo tipo pegou,
+    copia o slot para um buffer do processo, processa a cópia e envia ("resultado", tipo,
+    indice, seq, timestamp, resultados, tempos) pelo canal.
+    A validade do slot é conferida logo depois da cópia, antes do processamento: um frame
+    sobrescrito durante a inferência não pode gerar alertas, eventos nem recortes.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    anel = AnelFrames.abrir(descritor)
+    # Os modelos aquecem com frames do tamanho do anel antes do "pronto"
+    processar, encerrar = fabrica(canal, forma=anel.forma, **opcoes)
+    canal.put(("pronto", tipo, indice, os.getpid()))
+    buffer = None
+    try:
+        while not parar.is_set():
+            with reivindicado.get_lock():
+                seq = anel.ultimo()
+                if seq > reivindicado.value:
+                    reivindicado.value = seq
+                else:
+                    seq = None
+            if seq is None:
+                time.sleep(ESPERA_S)
+                continue
+
+            lido = anel.ler(seq)
+            if lido is None:
+                canal.put(("sobrescrito", tipo, indice, seq))
+                continue
+            timestamp, frame = lido
+            del lido
+            buffer = copiar_em_buffer(buffer, frame)
+            del frame
+            if not anel.valido(seq):
+                canal.put(("sobrescrito", tipo, indice, seq))
+                continue
+            resultados, tempos = processar(buffer, timestamp)
+            canal.put(("resultado", tipo, indice, seq, timestamp, resultados, tempos))
+    finally:
+        encerrar()
+        anel.fechar()
+
+# ================================
+# FÁBRICAS DOS TRABALHADORES
+# ================================
+# Rodam dentro do processo de trabalho: recebem o canal de resultados, a forma dos
+# frames (para o aquecimento) e as opções e retornam
+# (processar(frame, timestamp) -> (resultados, tempos), encerrar()).
+class _HandlerCanal(QueueHandler):
+    def enqueue(self, record):
+        self.queue.put_nowait(("log", record))
+
+def encaminhar_logs(canal):
+    """
+    Manda os logs de alunos/alertas deste processo pelo canal. Com o handler já
+    instalado, o setup_logger do ProcessadorCV não abre os arquivos aqui: só o
+    processo de renderização/alertas escreve neles.
+    """
+    handler = _HandlerCanal(canal)
+    for nome in ("AlunosLogger", "AlertasLogger"):
+        logging.getLogger(nome).addHandler(handler)
+
+def criar_trabalhador_face(canal, forma=None, cascata=False):
+    from alertas import EncaminhadorAlertas
+    from reconhecimento import ProcessadorCV
+
+    encaminhar_logs(canal)
+    pcv = ProcessadorCV()
+    pcv.CASCADE_MODE = cascata
+    pcv.gravador_alertas.parar()
+    pcv.gravador_alertas = EncaminhadorAlertas(canal)
+    if forma is not None:
+        pcv.aquecer(forma)
+
+    def processar(frame, timestamp):
+        # Trilhas e cooldowns no relógio da captura (time.monotonic() do outro processo)
+        resultados = pcv.processar_frame(frame, timestamp=timestamp)
+        return resultados, pcv.ultimos_tempos
+
+    def encerrar():
+        pcv.recarregador_galeria.parar()
+        pcv.eventos.parar()
+    return processar, encerrar
+
+def criar_trabalhador_gestos(canal, forma=None, modelo_pose="yolov8n-pose.pt"):
+    from ultralytics import YOLO # type: ignore
+
+    from detector import GestureAnalyzer
+    from comum.eventos import ArmazemEventos, TransicoesGestos, registrar_gestos
+    from main import aquecer_pose, processar_frame
+
+    model = YOLO(modelo_pose)
+    if forma is not None:
+        aquecer_pose(model, forma)
+    analyzer = GestureAnalyzer()
+    # Vários processos gravam no mesmo SQLite (WAL, com espera pelo lock)
+    eventos = ArmazemEventos()
+    eventos.start()
+    transicoes = TransicoesGestos()
+
+    def processar(frame, timestamp):
+        tempos = {}
+        pessoas = processar_frame(model, analyzer, frame, tempos, timestamp)
+        registrar_gestos(eventos, transicoes, pessoas)
+        return {"persons": pessoas}, tempos
+    return processar, eventos.parar
+
+# Guardam estado entre frames (trilhas de rosto, cooldowns e desconhecidos do ProcessadorCV;
+# ByteTrack e evidência dos gestos): cópias em paralelo duplicariam trilhas e alertas
+FABRICAS_COM_ESTADO = (criar_trabalhador_face, criar_trabalhador_gestos)
+
+# ================================
+# SUPERVISOR
+# ================================
+class RuntimeMultiprocesso:
+    """
+    Um processo de captura escreve no AnelFrames; cada tipo de trabalhador roda em
+    'copias' processos que copiam do anel só o frame que vão processar e devolvem os
+    resultados por um único multiprocessing.Queue. O processo principal supervisiona (reinicia quem cai),
+    recebe os resultados e fica com a renderização, os logs e a gravação dos alertas.
+
+    'trabalhadores': {tipo: (fabrica, copias, opcoes)}. Trabalhadores com estado entre
+    frames (FABRICAS_COM_ESTADO: rostos e gestos) têm uma cópia só; o paralelismo vem
+    de tipos diferentes em núcleos diferentes.
+    """
+    REINICIO_MIN_S = 1.0
+    REINICIO_MAX_S = 30.0
+
+    def __init__(self, fonte, trabalhadores, slots=16, fps_captura=None, repetir=False):
+        # spawn: os filhos não herdam threads nem estado do PyTorch/ONNX do processo principal
+        for tipo, (fabrica, copias, _) in trabalhadores.items():
+            if fabrica in FABRICAS_COM_ESTADO and copias > 1:
+                raise ValueError(f"O trabalhador '{tipo}' guarda estado entre frames e deve ter uma cópia só")
+        self._ctx = mp.get_context("spawn")
+        self.fonte = fonte
+        self.trabalhadores = trabalhadores
+        self.fps_captura = fps_captura
+        self.repetir = repetir
+
+        self.anel = AnelFrames(sondar_forma(fonte), slots)
+        self.canal = self._ctx.Queue()
+        self._parar = self._ctx.Event()
+        self._reivindicado = {tipo: self._ctx.Value("q", 0) for tipo in trabalhadores}
+
+        self.processos = {}
+        self.reinicios = defaultdict(int)
+        self._espera_reinicio = {}
+        self._proximo_reinicio = {}
+        self.terminou = False
+
+    def _nomes(self):
+        yield "captura"
+        for tipo, (_, copias, _) in self.trabalhadores.items():
+            for indice in range(copias):
+                yield f"{tipo}-{indice}"
+
+    def _criar(self, nome):
+        if nome == "captura":
+            alvo = _processo_captura
+            args = (self.anel.descritor, self.fonte, self.fps_captura, self.repetir, self._parar)
+        else:
+            tipo, indice = nome.rsplit("-", 1)
+            fabrica, _, opcoes = self.trabalhadores[tipo]
+            alvo = _processo_trabalhador
+            args = (self.anel.descritor, tipo, int(indice), fabrica, opcoes,
+                    self._reivindicado[tipo], self.canal, self._parar)
+        processo = self._ctx.Process(target=alvo, args=args, name=nome, daemon=True)
+        processo.start()
+        self.processos[nome] = processo
+
+    def iniciar(self):
+        for nome in self._nomes():
+            self._criar(nome)
+
+    def supervisionar(self):
+        """Reinicia processos que morreram (com espera crescente). Fim de arquivo encerra o runtime."""
+        agora = time.monotonic()
+        for nome, processo in list(self.processos.items()):
+            if processo.is_alive() or self._parar.is_set():
+                continue
+            if nome == "captura" and processo.exitcode == 0:
+                self.terminou = True
+                continue
+            if nome not in self._proximo_reinicio:
+                espera = self._espera_reinicio.get(nome, self.REINICIO_MIN_S)
+                self._proximo_reinicio[nome] = agora + espera
+                self._espera_reinicio[nome] = min(espera * 2, self.REINICIO_MAX_S)
+                print(f"[ERRO] Processo '{nome}' terminou com código {processo.exitcode}; "
+                      f"reiniciando em {espera:.0f}s")
+            elif agora >= self._proximo_reinicio[nome]:
+                del self._proximo_reinicio[nome]
+                self.reinicios[nome] += 1
+                self._criar(nome)
+
+    def receber(self, timeout=0.01):
+        """Retorna as mensagens que chegaram pelo canal (espera até 'timeout' pela primeira)."""
+        mensagens = []
+        try:
+            mensagens.append(self.canal.get(timeout=timeout))
+            while True:
+                mensagens.append(self.canal.get_nowait())
+        except queue.Empty:
+            pass
+        return mensagens
+
+    def parar(self, timeout=5.0):
+        """Sinaliza os processos, esvazia o canal enquanto terminam e libera a memória compartilhada."""
+        self._parar.set()
+        limite = time.monotonic() + timeout
+        # Quem ainda tem itens no Queue só sai depois que eles forem lidos
+        while any(p.is_alive() for p in self.processos.values()) and time.monotonic() < limite:
+            self.receber(timeout=0.05)
+        for processo in self.processos.values():
+            if processo.is_alive():
+                processo.terminate()
+            processo.join(timeout=1.0)
+        self.receber(timeout=0)
+        self.canal.close()
+        self.anel.fechar(remover=True)
+
+# ================================
+# RENDERIZAÇÃO E ALERTAS (PROCESSO PRINCIPAL)
+# ================================
+class EstatisticasRuntime:
+    """Taxa, latência (captura -> resultado) e frames sobrescritos por tipo de trabalhador."""
+    def __init__(self):
+        self.fps = defaultdict(MedidorFPS)
+        self.latencias = defaultdict(lambda: deque(maxlen=200))
+        self.resultados = defaultdict(int)
+        self.sobrescritos = defaultdict(int)
+
+    def registrar(self, tipo, timestamp, agora=None):
+        agora = time.monotonic() if agora is None else agora
+        self.fps[tipo].marcar(agora)
+        self.latencias[tipo].append((agora - timestamp) * 1000)
+        self.resultados[tipo] += 1
+
+    def resumo(self):
+        resumo = {}
+        for tipo in set(self.resultados) | set(self.sobrescritos):
+            latencias = list(self.latencias[tipo])
+            resumo[tipo] = {
+                "fps": self.fps[tipo].fps(),
+                "resultados": self.resultados[tipo],
+                "sobrescritos": self.sobrescritos[tipo],
+                "latencia_media_ms": sum(latencias) / len(latencias) if latencias else 0.0,
+                "latencia_max_ms": max(latencias) if latencias else 0.0,
+            }
+        return resumo
+
+def executar(runtime, exibir=True, duracao=None, gravador_alertas=None, transmissor=None):
+    """
+    Laço do processo principal: supervisiona, recebe resultados, repassa logs e alertas
+    e desenha o frame mais novo do anel com os resultados mais recentes de cada tipo.
+    O atraso de cada resultado aparece em frames (seq exibido - seq do resultado).
+    Com um TransmissorFrames, o frame desenhado e os resultados também vão para a rede.
+    """
+    if exibir or transmissor is not None:
+        from main import desenhar as desenhar_gestos
+        from reconhecimento import desenhar_resultados
+
+    stats = EstatisticasRuntime()
+    ultimos = {}
+    # Dicionário novo a cada resultado recebido: a transmissão só serializa o que mudou
+    publicados = {}
+    exibido = 0
+    exibicao = None
+    inicio = ultimo_relatorio = time.monotonic()
+    try:
+        while not runtime.terminou and (duracao is None or time.monotonic() - inicio < duracao):
+            runtime.supervisionar()
+            for mensagem in runtime.receber():
+                tipo_mensagem = mensagem[0]
+                if tipo_mensagem == "resultado":
+                    _, tipo, _, seq, timestamp, resultados, _ = mensagem
+                    stats.registrar(tipo, timestamp)
+                    if seq > ultimos.get(tipo, (0,))[0]:
+                        ultimos[tipo] = (seq, resultados)
+                        publicados = {tipo: resultados for tipo, (_, resultados) in ultimos.items()}
+                elif tipo_mensagem == "sobrescrito":
+                    stats.sobrescritos[mensagem[1]] += 1
+                elif tipo_mensagem == "alerta" and gravador_alertas is not None:
+                    gravador_alertas.enviar(mensagem[1], mensagem[2], mensagem[3])
+                elif tipo_mensagem == "log":
+                    logging.getLogger(mensagem[1].name).handle(mensagem[1])
+                elif tipo_mensagem == "pronto":
+                    print(f"[INFO] Trabalhador {mensagem[1]}-{mensagem[2]} pronto (pid {mensagem[3]})")
+
+            seq = runtime.anel.ultimo()
+            # Sem janela, só desenha quando algum cliente remoto vai receber o frame
+            anotar = exibir or (transmissor is not None and transmissor.aguardando_frame())
+            if transmissor is not None and not anotar:
+                transmissor.publicar(None, publicados)
+            if anotar and seq != exibido:
+                lido = runtime.anel.ler(seq)
+                if lido is not None:
+                    exibicao = copiar_em_buffer(exibicao, lido[1])
+                    del lido
+                    if runtime.anel.valido(seq):
+                        exibido = seq
+                        linhas = []
+                        for tipo, (seq_resultado, resultados) in sorted(ultimos.items()):
+                            if "faces" in resultados:
+                                desenhar_resultados(exibicao, resultados)
+                            else:
+                                desenhar_gestos(exibicao, resultados.get("persons", []))
+                            linhas.append(f"{tipo} -{seq - seq_resultado} fr")
+                        cv2.putText(exibicao, " | ".join(linhas), (10, 20), cv2.FONT_HERSHEY_SIMPLEX,
+                                    0.5, (255, 255, 255), 1)
+                        if exibir:
+                            cv2.imshow("CityLab - Multiprocesso", exibicao)
+                        if transmissor is not None:
+                            transmissor.publicar(exibicao, publicados)
+            if exibir and cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+
+            if time.monotonic() - ultimo_relatorio > 5.0:
+                ultimo_relatorio = time.monotonic()
+                for tipo, s in sorted(stats.resumo().items()):
+                    print(f"[INFO] {tipo}: {s['fps']:.1f} FPS | latência média {s['latencia_media_ms']:.0f} ms, "
+                          f"máx {s['latencia_max_ms']:.0f} ms | sobrescritos {s['sobrescritos']}")
+                if runtime.reinicios:
+                    print(f"[INFO] Reinícios: {dict(runtime.reinicios)}")
+    except KeyboardInterrupt:
+        print("Interrupção manual detectada")
+    return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Captura, rostos e gestos em processos separados (memória compartilhada).")
+    parser.add_argument("--fonte", default="0", help="Câmera (índice), arquivo de vídeo ou URL RTSP")
+    parser.add_argument("--sem-faces", action="store_true", help="Não inicia o processo de reconhecimento facial")
+    parser.add_argument("--sem-gestos", action="store_true", help="Não inicia o processo de pose/gestos")
+    parser.add_argument("--cascata", action="store_true",
+                        help="InsightFace só na parte superior das pessoas detectadas")
+    parser.add_argument("--modelo-pose", default="yolov8n-pose.pt")
+    parser.add_argument("--slots", type=int, default=16, help="Frames no ring buffer compartilhado")
+    parser.add_argument("--sem-janela", action="store_true", help="Não abre janela de vídeo (só relatórios)")
+    parser.add_argument("--duracao", type=float, help="Encerra depois de N segundos")
+    parser.add_argument("--servir", type=int, metavar="PORTA",
+                        help="Transmite os frames anotados (MJPEG) e os resultados (SSE) em http://HOST:PORTA/")
+    parser.add_argument("--servir-host", default="0.0.0.0", help="Interface do servidor de transmissão")
+    parser.add_argument("--codificadores", type=int, default=2, help="Threads de codificação JPEG da transmissão")
+    args = parser.parse_args()
+
+    from alertas import GravadorAlertas
+    from reconhecimento import setup_logger
+    from comum.transmissao import iniciar_transmissao, formatar_transmissao
+
+    trabalhadores = {}
+    # Trilhas, cooldowns e desconhecidos (rostos) e ByteTrack (gestos) guardam estado
+    # entre frames: um único processo de cada tipo
+    if not args.sem_faces:
+        trabalhadores["face"] = (criar_trabalhador_face, 1, {"cascata": args.cascata})
+    if not args.sem_gestos:
+        trabalhadores["gestos"] = (criar_trabalhador_gestos, 1, {"modelo_pose": args.modelo_pose})
+
+    _, logger_alertas, _ = setup_logger(os.path.join(RAIZ, "FaceRecon"))
+    gravador = GravadorAlertas(logger_alertas)
+    gravador.start()
+    try:
+        runtime = RuntimeMultiprocesso(args.fonte, trabalhadores, slots=args.slots)
+    except RuntimeError as e:
+        print(f"[ERRO] {e}")
+        gravador.parar()
+        sys.exit(1)
+
+    print(f"--- RUNTIME MULTIPROCESSO: {', '.join(f'{t} x{c}' for t, (_, c, _) in trabalhadores.items())} ---")
+    print("Pressione 'q' na janela de vídeo (ou Ctrl+C) para sair.")
+    servidor = transmissor = None
+    if args.servir:
+        servidor, transmissores = iniciar_transmissao([0], args.servir, args.servir_host,
+                                                      codificadores=args.codificadores)
+        transmissor = transmissores[0]
+    runtime.iniciar()
+    try:
+        executar(runtime, exibir=not args.sem_janela, duracao=args.duracao, gravador_alertas=gravador,
+                 transmissor=transmissor)
+    finally:
+        runtime.parar()
+        gravador.parar()
+        if servidor is not None:
+            print(f"[INFO] {formatar_transmissao(servidor.estatisticas())}")
+            servidor.parar()
+        cv2.destroyAllWindows()
+        stats = gravador.estatisticas()
+        print(f"[INFO] Alertas gravados: {stats['gravados']} | descartados: {stats['descartados']}")
+        print("[INFO] Sistema encerrado corretamente.")
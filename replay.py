@@ -0,0 +1,392 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import cv2
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(RAIZ, "FaceRecon"))
+from comum.agendador import AgendadorInferencia
+
+EXTENSOES_IMAGEM = (".jpg", ".jpeg", ".png", ".bmp")
+
+# ================================
+# FONTES DE FRAMES (SEM CÂMERA)
+# ================================
+def ler_frames(fonte):
+    """
+    Lê frames de um arquivo de vídeo ou de um diretório de imagens (ordem alfabética),
+    um de cada vez. Retorna (gerador, fps_original); diretórios não têm FPS próprio.
+    """
+    if os.path.isdir(fonte):
+        arquivos = sorted(f for f in os.listdir(fonte) if f.lower().endswith(EXTENSOES_IMAGEM))
+        if not arquivos:
+            raise RuntimeError(f"Nenhuma imagem encontrada em '{fonte}'")
+
+        def gerador():
+            for nome in arquivos:
+                frame = cv2.imread(os.path.join(fonte, nome))
+                if frame is not None:
+                    yield frame
+        return gerador(), None
+
+    cap = cv2.VideoCapture(fonte)
+    if not cap.isOpened():
+        raise RuntimeError(f"Não foi possível abrir o vídeo '{fonte}'")
+
+    def gerador():
+        try:
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                yield frame
+        finally:
+            cap.release()
+    return gerador(), cap.get(cv2.CAP_PROP_FPS) or None
+
+# ================================
+# PIPELINES
+# ================================
+def categoria_rosto(nome):
+    """Rosto sem nome: trilha adiada pelo filtro de qualidade, ainda sem reconhecimento."""
+    if nome is None:
+        return "adiados_qualidade"
+    return "desconhecidos" if nome == "NAO ALUNO" else "conhecidos"
+
+def encerrar_com_qualidade(pcv, contagens, encerrar_pipeline):
+    """Encerra o pipeline levando as contagens do filtro de qualidade para o relatório."""
+    def encerrar():
+        if pcv.filtro_qualidade is not None:
+            for chave, valor in pcv.filtro_qualidade.estatisticas().items():
+                if chave.endswith("_total"):
+                    contagens[f"qualidade_{chave[:-len('_total')]}"] = round(valor, 1)
+        encerrar_pipeline()
+    return encerrar
+
+def criar_processador(args, carregar_yolo=True):
+    """
+    ProcessadorCV isolado da produção: logs, recortes NAO ALUNO e eventos.sqlite3
+    vão para 'args.historico', sem a thread de recarga da galeria.
+    """
+    from reconhecimento import ProcessadorCV
+
+    return ProcessadorCV(carregar_yolo=carregar_yolo, diretorio_historico=args.historico, recarregar_galeria=False)
+
+def criar_pipeline_face(args, contagens=None):
+    pcv = criar_processador(args)
+    pcv.CASCADE_MODE = args.cascata
+    if args.sem_filtro_qualidade:
+        pcv.filtro_qualidade = None
+    contagens = Counter() if contagens is None else contagens
+
+    def processar(frame, timestamp):
+        resultados = pcv.processar_frame(frame, timestamp=timestamp)
+        contagens["frames"] += 1
+        contagens["pessoas"] += len(resultados["persons"])
+        for face in resultados["faces"]:
+            contagens["rostos"] += 1
+            contagens[categoria_rosto(face["name"])] += 1
+        return dict(pcv.ultimos_tempos), len(resultados["persons"]) + len(resultados["faces"])
+
+    config = {"cascata": args.cascata, "scale_factor": pcv.SCALE_FACTOR, "gamma": pcv.GAMMA_VALUE,
+              "limiar_similaridade": pcv.SIMILARITY_THRESHOLD, "galeria": len(pcv.galeria),
+              "filtro_qualidade": pcv.filtro_qualidade is not None}
+    return processar, contagens, config, encerrar_com_qualidade(pcv, contagens, pcv.encerrar)
+
+def criar_pipeline_gestos(args, contagens=None):
+    sys.path.insert(0, os.path.join(RAIZ, "GestureRecon"))
+    from ultralytics import YOLO
+    from detector import GestureAnalyzer
+    from main import processar_frame
+
+    model = YOLO("yolov8n-pose.pt")
+    analyzer = GestureAnalyzer()
+    contagens = Counter() if contagens is None else contagens
+
+    def processar(frame, timestamp):
+        tempos = {}
+        pessoas = processar_frame(model, analyzer, frame, tempos, timestamp=timestamp)
+        contagens["frames_gestos"] += 1
+        contagens["pessoas_pose"] += len(pessoas)
+        for pessoa in pessoas:
+            for alerta in pessoa["alerts"]:
+                contagens[f"alerta: {alerta}"] += 1
+        return tempos, len(pessoas)
+
+    return processar, contagens, {"max_intervalo_gestos": analyzer.max_intervalo}, lambda: None
+
+def criar_pipeline_separado(args):
+    """Os dois scripts atuais em sequência: yolov8n + InsightFace e, depois, yolov8n-pose."""
+    contagens = Counter()
+    face, _, config_face, encerrar = criar_pipeline_face(args, contagens)
+    gestos, _, config_gestos, _ = criar_pipeline_gestos(args, contagens)
+
+    def processar(frame, timestamp):
+        tempos_face, deteccoes_face = face(frame, timestamp)
+        tempos_gestos, deteccoes_gestos = gestos(frame, timestamp)
+        return dict(tempos_face, **tempos_gestos), deteccoes_face + deteccoes_gestos
+
+    return processar, contagens, dict(config_face, **config_gestos), encerrar
+
+def criar_pipeline_unificado(args):
+    from unificado import ProcessadorUnificado
+
+    unificado = ProcessadorUnificado(pcv=criar_processador(args, carregar_yolo=False))
+    unificado.pcv.CASCADE_MODE = args.cascata
+    if args.sem_filtro_qualidade:
+        unificado.pcv.filtro_qualidade = None
+    unificado.pcv.KEYPOINT_FACE_MODE = args.rostos_por_keypoints
+    contagens = Counter()
+
+    def processar(frame, timestamp):
+        resultados = unificado.processar_frame(frame, timestamp)
+        contagens["frames"] += 1
+        contagens["pessoas"] += len(resultados["tracks"])
+        for face in resultados["faces"]:
+            contagens["rostos"] += 1
+            contagens[categoria_rosto(face["name"])] += 1
+        for track in resultados["tracks"]:
+            contagens["rostos_associados"] += track["name"] is not None
+            for alerta in track["alerts"]:
+                contagens[f"alerta: {alerta}"] += 1
+        return dict(unificado.ultimos_tempos), len(resultados["tracks"]) + len(resultados["faces"])
+
+    config = {"cascata": args.cascata, "rostos_por_keypoints": args.rostos_por_keypoints,
+              "scale_factor": unificado.pcv.SCALE_FACTOR, "filtro_qualidade": unificado.pcv.filtro_qualidade is not None,
+              "max_intervalo_gestos": unificado.analyzer.max_intervalo}
+    return processar, contagens, config, encerrar_com_qualidade(unificado.pcv, contagens, unificado.encerrar)
+
+# ================================
+# REPLAY E RELATÓRIO
+# ================================
+def resumir(valores):
+    if not valores:
+        return {}
+    v = np.asarray(valores, dtype=np.float64)
+    p50, p95, p99 = np.percentile(v, [50, 95, 99])
+    return {"n": len(v), "media": float(v.mean()), "p50": float(p50), "p95": float(p95),
+            "p99": float(p99), "max": float(v.max())}
+
+class AvaliacaoAgendamento:
+    """
+    Avalia o AgendadorInferencia sem alterar o replay: todo frame continua sendo
+    processado (referência), e para cada um anotamos se o agendador o teria pulado.
+    - CPU economizada: soma das durações dos frames que seriam pulados, menos o detector.
+    - Latência de reação: quando algo aparece na referência depois de uma cena vazia,
+      tempo (no relógio do vídeo) até o primeiro frame que o agendador executaria.
+    """
+    def __init__(self, agendador, fps_fonte):
+        self.agendador = agendador
+        self.fps_fonte = fps_fonte
+        self.economia_s = 0.0
+        self.atrasos_ms = []
+        self._inicio_pendente = None
+        self._havia_deteccao = False
+        self._executaria = True
+        self._t = 0.0
+
+    def antes(self, indice, frame):
+        self._t = indice / self.fps_fonte
+        self._executaria = self.agendador.deve_processar(frame, agora=self._t)
+
+    def depois(self, duracao_s, deteccoes):
+        if self._executaria:
+            self.agendador.registrar_inferencia(duracao_s)
+        else:
+            self.economia_s += duracao_s
+        if deteccoes and not self._havia_deteccao:
+            self._inicio_pendente = self._t
+        if self._inicio_pendente is not None and self._executaria:
+            self.atrasos_ms.append((self._t - self._inicio_pendente) * 1000)
+            self._inicio_pendente = None
+        self._havia_deteccao = bool(deteccoes)
+
+    def relatorio(self):
+        stats = self.agendador.estatisticas(agora=self._t)
+        horas = max(self._t, 1e-9) / 3600
+        economia = self.economia_s - self.agendador.custo_detector_s
+        return {
+            "fps_repouso": self.agendador.fps_repouso,
+            "limiar_movimento": self.agendador.limiar_movimento,
+            "frames_executados": stats["processados"],
+            "frames_pulados": stats["pulados"],
+            "fracao_pulada": stats["fracao_pulada"],
+            "custo_detector_ms": stats["custo_detector_ms"],
+            "cpu_economizada_s": economia,
+            "cpu_economizada_s_por_hora_de_video": economia / horas,
+            "latencia_reacao_ms": resumir(self.atrasos_ms),
+        }
+
+def replay(processar, frames, ritmo, max_frames, aquecimento, fps_fonte, avaliacao=None):
+    """
+    Passa os frames pelo pipeline. Com 'ritmo' em FPS simula uma câmera ao vivo:
+    frames que chegariam enquanto o pipeline está ocupado são descartados
+    (o mais novo vence, como na CapturaThread). Sem ritmo, roda na velocidade máxima.
+    Os 'aquecimento' primeiros frames processados não entram nas estatísticas.
+    Cada frame recebe o timestamp do relógio do vídeo (índice / 'fps_fonte'),
+    então a lógica temporal dos gestos não depende da velocidade do replay.
+    """
+    tempos = {"total": []}
+    cpu_s = 0.0
+    processados = 0
+    descartados = 0
+    inicio = None
+    fim = None
+    relogio = time.monotonic()
+
+    for i, frame in enumerate(frames):
+        if max_frames and processados >= max_frames + aquecimento:
+            break
+        if ritmo:
+            chegada = relogio + i / ritmo
+            agora = time.monotonic()
+            if agora < chegada:
+                time.sleep(chegada - agora)
+            elif agora - chegada > 1.0 / ritmo:
+                # O próximo frame já teria chegado: este foi sobrescrito na câmera
+                descartados += 1
+                continue
+
+        if avaliacao is not None:
+            avaliacao.antes(i, frame)
+        t0 = time.perf_counter()
+        cpu0 = time.process_time()
+        estagios, deteccoes = processar(frame, i / fps_fonte)
+        duracao = (time.perf_counter() - t0) * 1000
+        cpu = time.process_time() - cpu0
+        if avaliacao is not None:
+            avaliacao.depois(duracao / 1000, deteccoes)
+        processados += 1
+        if processados == aquecimento + 1:
+            inicio = time.perf_counter() - duracao / 1000
+        if processados > aquecimento:
+            fim = time.perf_counter()
+            cpu_s += cpu
+            tempos["total"].append(duracao)
+            for estagio, ms in estagios.items():
+                tempos.setdefault(estagio, []).append(ms)
+
+    medidos = len(tempos["total"])
+    duracao_total = (fim - inicio) if medidos else 0.0
+    return {
+        "frames_processados": processados,
+        "frames_medidos": medidos,
+        "frames_descartados": descartados,
+        "duracao_s": duracao_total,
+        "throughput_fps": medidos / duracao_total if duracao_total > 0 else 0.0,
+        # CPU de todas as threads do processo (modelos, gravador de alertas...) por frame
+        "cpu_ms_por_frame": cpu_s / medidos * 1000 if medidos else 0.0,
+        "latencia_ms": {estagio: resumir(valores) for estagio, valores in tempos.items()},
+    }
+
+def ambiente():
+    return {
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "processador": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+    }
+
+def imprimir(relatorio):
+    r = relatorio["resultado"]
+    print(f"\n[INFO] {r['frames_medidos']} frames medidos ({r['frames_descartados']} descartados) em "
+          f"{r['duracao_s']:.1f}s | {r['throughput_fps']:.2f} FPS | CPU {r['cpu_ms_por_frame']:.0f} ms/frame | "
+          f"pico de memória {relatorio['pico_rss_mb']:.0f} MB")
+    print(f"{'estágio':<20}{'média':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'máx':>9}  (ms)")
+    for estagio, s in r["latencia_ms"].items():
+        if s:
+            print(f"{estagio:<20}{s['media']:>9.2f}{s['p50']:>9.2f}{s['p95']:>9.2f}{s['p99']:>9.2f}{s['max']:>9.2f}")
+    print("Contagens: " + ", ".join(f"{k}={v}" for k, v in relatorio["contagens"].items()))
+    if "agendamento" in r:
+        a = r["agendamento"]
+        reacao = a["latencia_reacao_ms"]
+        print(f"Agendamento: {a['fracao_pulada'] * 100:.0f}% dos frames pulados | CPU economizada "
+              f"{a['cpu_economizada_s_por_hora_de_video'] / 60:.1f} min por hora de vídeo | reação "
+              f"+{reacao.get('media', 0.0):.0f} ms em média, +{reacao.get('max', 0.0):.0f} ms no pior caso")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay offline (sem câmera e sem janela) dos pipelines de rosto e de gestos.")
+    parser.add_argument("--pipeline", choices=["face", "gestos", "separado", "unificado"], required=True,
+                        help="'separado' roda os dois scripts em sequência; 'unificado' usa um só modelo de pose")
+    parser.add_argument("--fonte", required=True, help="Arquivo de vídeo ou diretório de imagens")
+    parser.add_argument("--ritmo", default="max",
+                        help="'max' para a velocidade máxima, 'original' para o FPS do vídeo ou um FPS fixo (ex.: 15)")
+    parser.add_argument("--frames", type=int, default=0, help="Limite de frames medidos (0 = todos)")
+    parser.add_argument("--aquecimento", type=int, default=10, help="Frames iniciais fora das estatísticas")
+    parser.add_argument("--cascata", action="store_true", help="Pipeline de rosto no modo cascata")
+    parser.add_argument("--rostos-por-keypoints", action="store_true",
+                        help="Pipeline unificado: rostos a partir dos keypoints da cabeça")
+    parser.add_argument("--sem-filtro-qualidade", action="store_true",
+                        help="Pipelines de rosto sem o filtro de qualidade (para comparar alertas e tempo)")
+    parser.add_argument("--movimento", action="store_true",
+                        help="Avalia o agendamento por movimento: CPU economizada e latência de reação")
+    parser.add_argument("--fps-repouso", type=float, default=1.0)
+    parser.add_argument("--limiar-movimento", type=float, default=0.01)
+    parser.add_argument("--saida", help="Caminho do relatório JSON")
+    parser.add_argument("--historico",
+                        help="Diretório para logs, recortes e eventos do replay (padrão: um diretório temporário)")
+    args = parser.parse_args()
+    if args.historico is None:
+        args.historico = tempfile.mkdtemp(prefix="replay_historico_")
+    print(f"[INFO] Histórico do replay em '{args.historico}'")
+
+    # Sem display: o OpenCV não deve tentar abrir janelas
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    frames, fps_fonte = ler_frames(args.fonte)
+    if args.ritmo == "max":
+        ritmo = None
+    elif args.ritmo == "original":
+        ritmo = fps_fonte or 30.0
+    else:
+        ritmo = float(args.ritmo)
+
+    criadores = {"face": criar_pipeline_face, "gestos": criar_pipeline_gestos,
+                 "separado": criar_pipeline_separado, "unificado": criar_pipeline_unificado}
+    processar, contagens, config, encerrar = criadores[args.pipeline](args)
+
+    # Relógio do vídeo; diretórios de imagens não têm FPS, então assume o ritmo pedido (ou 30)
+    fps_relogio = fps_fonte or ritmo or 30.0
+    avaliacao = None
+    if args.movimento:
+        agendador = AgendadorInferencia(fps_repouso=args.fps_repouso, limiar_movimento=args.limiar_movimento)
+        avaliacao = AvaliacaoAgendamento(agendador, fps_relogio)
+
+    print(f"[INFO] Replay de '{args.fonte}' no pipeline '{args.pipeline}' ({args.ritmo})...")
+    try:
+        resultado = replay(processar, frames, ritmo, args.frames, args.aquecimento, fps_relogio, avaliacao)
+    finally:
+        encerrar()
+    if avaliacao is not None:
+        resultado["agendamento"] = avaliacao.relatorio()
+
+    relatorio = {
+        "pipeline": args.pipeline,
+        "fonte": os.path.abspath(args.fonte),
+        "fps_fonte": fps_fonte,
+        "ritmo_fps": ritmo,
+        "aquecimento": args.aquecimento,
+        "criado_em": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": config,
+        "ambiente": ambiente(),
+        # ru_maxrss é em KB no Linux
+        "pico_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "contagens": dict(sorted(contagens.items())),
+        "resultado": resultado,
+    }
+    imprimir(relatorio)
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+        print(f"[INFO] Relatório salvo em '{args.saida}'")
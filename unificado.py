@@ -0,0 +1,237 @@
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(RAIZ, "FaceRecon"))
+sys.path.insert(0, os.path.join(RAIZ, "GestureRecon"))
+
+from adaptativo import formatar_adaptacao
+from comum.captura import abrir_fonte, copiar_em_buffer, forma_captura
+from comum.eventos import TransicoesGestos, registrar_gestos
+from comum.transmissao import iniciar_transmissao, formatar_transmissao
+from detector import GestureAnalyzer
+from main import aquecer_pose, desenhar as desenhar_gestos
+from pipeline import PipelineCV
+from qualidade import formatar_qualidade
+from reconhecimento import ProcessadorCV, desenhar_resultados
+
+CONF_KEYPOINT = 0.5
+
+# ================================
+# ASSOCIAÇÃO ROSTO -> PESSOA
+# ================================
+def associar_rostos(faces, boxes, keypoints):
+    """
+    Associa cada rosto (bbox no frame original) a no máximo uma pessoa rastreada.
+    Pontua pelos keypoints da cabeça (nariz, olhos, orelhas) dentro do rosto e,
+    sem eles, pelo centro do rosto dentro da metade superior da pessoa.
+    Retorna {índice_do_rosto: índice_da_pessoa}.
+    """
+    pares = []
+    for i, face in enumerate(faces):
+        fx1, fy1, fx2, fy2 = face["bbox"]
+        cx, cy = (fx1 + fx2) / 2, (fy1 + fy2) / 2
+        for j, (x1, y1, x2, y2) in enumerate(boxes):
+            cabeca = keypoints[j, :5]
+            visiveis = cabeca[:, 2] > CONF_KEYPOINT
+            dentro = ((cabeca[:, 0] >= fx1) & (cabeca[:, 0] <= fx2)
+                      & (cabeca[:, 1] >= fy1) & (cabeca[:, 1] <= fy2) & visiveis)
+            if dentro.any():
+                pares.append((1.0 + dentro.sum() / 5, i, j))
+            elif x1 <= cx <= x2 and y1 <= cy <= (y1 + y2) / 2:
+                pares.append((0.5, i, j))
+
+    associacao = {}
+    usadas = set()
+    for _, i, j in sorted(pares, reverse=True):
+        if i not in associacao and j not in usadas:
+            associacao[i] = j
+            usadas.add(j)
+    return associacao
+
+# ================================
+# PROCESSADOR UNIFICADO
+# ================================
+class ProcessadorUnificado:
+    """
+    Um único rastreamento com o yolov8n-pose (ByteTrack) por frame alimenta:
+      - as caixas de pessoas do ProcessadorCV (sem o yolov8n.pt);
+      - os keypoints do GestureAnalyzer;
+      - o track ID estável que junta identidade e gestos no resultado.
+    """
+    def __init__(self, modelo_pose="yolov8n-pose.pt", pcv=None):
+        self.pcv = pcv or ProcessadorCV(carregar_yolo=False)
+        print("[INFO] Carregando modelo de pose...")
+        # Sem o yolov8n.pt, o ultralytics só é importado aqui
+        with self.pcv.perfil.medir("import_ultralytics"):
+            from ultralytics import YOLO # type: ignore
+        with self.pcv.perfil.medir("carga_pose"):
+            self.model_pose = YOLO(modelo_pose)
+        self.analyzer = GestureAnalyzer()
+        self.transicoes = TransicoesGestos()
+        self.ultimos_tempos = {}
+
+    def aquecer(self, forma_frame=(480, 640, 3)):
+        with self.pcv.perfil.medir("aquecimento_pose"):
+            aquecer_pose(self.model_pose, forma_frame)
+        self.pcv.aquecer(forma_frame)
+
+    def processar_frame(self, frame, timestamp=None):
+        """
+        Retorna {"faces", "persons", "tracks"}; cada item de "tracks" traz
+        track_id, bbox, alerts e, se um rosto foi associado, name e face_confidence.
+        """
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        inicio = time.perf_counter()
+        # Pose no frame original, como no GestureRecon: as regras de gesto usam distâncias em pixels
+        results = self.model_pose.track(frame, persist=True, tracker="bytetrack.yaml", verbose=False)
+        meio = time.perf_counter()
+
+        boxes = np.zeros((0, 4), dtype=np.float32)
+        keypoints = np.zeros((0, 17, 3), dtype=np.float32)
+        confs = np.zeros(0, dtype=np.float32)
+        track_ids = []
+        if results and results[0].boxes is not None and results[0].keypoints is not None:
+            result = results[0]
+            boxes = result.boxes.xyxy.cpu().numpy()
+            confs = result.boxes.conf.cpu().numpy()
+            keypoints = result.keypoints.data.cpu().numpy()
+            if result.boxes.id is not None:
+                track_ids = result.boxes.id.int().cpu().tolist()
+            else:
+                # Antes do ByteTrack confirmar as trilhas não há IDs: só a parte facial usa essas pessoas
+                track_ids = [None] * len(boxes)
+
+        rastreadas = [i for i, track_id in enumerate(track_ids) if track_id is not None]
+        alerts_batch = self.analyzer.analyze_batch(
+            [track_ids[i] for i in rastreadas], keypoints[rastreadas], boxes[rastreadas], timestamp=timestamp
+        )
+        self.analyzer.clean_old_tracks([track_ids[i] for i in rastreadas])
+        alertas = dict(zip(rastreadas, alerts_batch))
+        fim_gestos = time.perf_counter()
+
+        resultados = self.pcv.processar_frame(frame, pessoas=list(zip(boxes, confs)), keypoints=keypoints,
+                                              timestamp=timestamp)
+
+        tracks = []
+        for j, (box, track_id) in enumerate(zip(boxes, track_ids)):
+            tracks.append({"track_id": track_id, "bbox": list(map(int, box)), "alerts": alertas.get(j, []),
+                           "name": None, "face_confidence": 0.0})
+        for i, j in associar_rostos(resultados["faces"], boxes, keypoints).items():
+            tracks[j]["name"] = resultados["faces"][i]["name"]
+            tracks[j]["face_confidence"] = resultados["faces"][i]["confidence"]
+
+        # Alertas de gesto entram no histórico já com o nome do aluno, quando o rosto foi associado
+        registrar_gestos(self.pcv.eventos, self.transicoes, [track for track in tracks if track["track_id"] is not None])
+        self.ultimos_tempos = dict(self.pcv.ultimos_tempos,
+                                   pose=(meio - inicio) * 1000, gestos=(fim_gestos - meio) * 1000)
+        resultados["tracks"] = tracks
+        return resultados
+
+    def encerrar(self):
+        self.pcv.encerrar()
+
+def desenhar(frame, resultados):
+    desenhar_resultados(frame, {"faces": resultados.get("faces", [])})
+    desenhar_gestos(frame, [track for track in resultados.get("tracks", []) if track["track_id"] is not None])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconhecimento facial e de gestos com um único modelo de pose.")
+    parser.add_argument("--fonte", default="0", help="Câmera (índice), arquivo de vídeo ou URL RTSP")
+    parser.add_argument("--modelo-pose", default="yolov8n-pose.pt")
+    parser.add_argument("--cascata", action="store_true",
+                        help="InsightFace só na parte superior das pessoas rastreadas")
+    parser.add_argument("--rostos-por-keypoints", action="store_true",
+                        help="Rostos a partir dos keypoints da cabeça; o detector do InsightFace vira fallback")
+    parser.add_argument("--orcamento-ms", type=float,
+                        help="Latência alvo da parte facial; escala, det_size e FPS passam a se ajustar sozinhos")
+    parser.add_argument("--sem-filtro-qualidade", action="store_true",
+                        help="Reconhece todos os rostos, mesmo pequenos, borrados ou virados")
+    parser.add_argument("--sem-janela", action="store_true", help="Não abre janela de vídeo")
+    parser.add_argument("--servir", type=int, metavar="PORTA",
+                        help="Transmite os frames anotados (MJPEG) e os resultados (SSE) em http://HOST:PORTA/")
+    parser.add_argument("--servir-host", default="0.0.0.0", help="Interface do servidor de transmissão")
+    parser.add_argument("--codificadores", type=int, default=2, help="Threads de codificação JPEG da transmissão")
+    args = parser.parse_args()
+
+    unificado = ProcessadorUnificado(args.modelo_pose)
+    unificado.pcv.CASCADE_MODE = args.cascata
+    unificado.pcv.KEYPOINT_FACE_MODE = args.rostos_por_keypoints
+    if args.sem_filtro_qualidade:
+        unificado.pcv.filtro_qualidade = None
+    if args.orcamento_ms:
+        unificado.pcv.habilitar_adaptacao(args.orcamento_ms)
+
+    cap, fps_alvo = abrir_fonte(args.fonte)
+    if not cap.isOpened():
+        print("[ERRO] Não foi possível acessar a câmera. Verifique a conexão.")
+        unificado.encerrar()
+        sys.exit(1)
+    print("[INFO] Aquecendo os modelos...")
+    unificado.aquecer(forma_captura(cap))
+
+    print("--- SISTEMA UNIFICADO INICIADO ---")
+    print("Pressione Ctrl+C para sair." if args.sem_janela else "Pressione 'q' na janela de vídeo para sair.")
+    servidor = transmissor = None
+    if args.servir:
+        servidor, transmissores = iniciar_transmissao([0], args.servir, args.servir_host, unificado.pcv.metricas,
+                                                      codificadores=args.codificadores)
+        transmissor = transmissores[0]
+    pipeline = PipelineCV(cap, unificado.processar_frame, fps_alvo=fps_alvo, controlador=unificado.pcv.controlador)
+    pipeline.iniciar()
+
+    seq = 0
+    exibicao = None
+    ultimo_relatorio = time.monotonic()
+    try:
+        while True:
+            proximo = pipeline.proximo(seq)
+            if proximo is None:
+                if pipeline.captura.falhou:
+                    break
+                continue
+            seq, frame, last_results, _ = proximo
+            # Sem janela, só desenha quando algum cliente remoto vai receber o frame
+            anotar = not args.sem_janela or (transmissor is not None and transmissor.aguardando_frame())
+            if anotar:
+                exibicao = frame = copiar_em_buffer(exibicao, frame)
+                desenhar(frame, last_results)
+                pipeline.desenhar_estatisticas(frame)
+            if not args.sem_janela:
+                cv2.imshow("CityLab - Rostos e Gestos", frame)
+            if transmissor is not None:
+                transmissor.publicar(frame if anotar else None, last_results)
+
+            if time.monotonic() - ultimo_relatorio > pipeline.intervalo_relatorio:
+                ultimo_relatorio = time.monotonic()
+                stats = pipeline.estatisticas()
+                tempos = " | ".join(f"{estagio} {ms:.0f} ms" for estagio, ms in unificado.ultimos_tempos.items())
+                print(f"[INFO] Inferência: {stats['fps_inferencia']:.1f} FPS | {tempos}")
+                if unificado.pcv.filtro_qualidade is not None:
+                    print(f"[INFO] {formatar_qualidade(unificado.pcv.filtro_qualidade.estatisticas())}")
+                if unificado.pcv.controlador is not None:
+                    print(f"[INFO] {formatar_adaptacao(unificado.pcv.controlador.estatisticas())}")
+                if servidor is not None:
+                    print(f"[INFO] {formatar_transmissao(servidor.estatisticas())}")
+
+            if not args.sem_janela and cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+
+    except KeyboardInterrupt:
+        print("Interrupção manual detectada")
+
+    finally:
+        pipeline.parar()
+        if servidor is not None:
+            print(f"[INFO] {formatar_transmissao(servidor.estatisticas())}")
+            servidor.parar()
+        unificado.encerrar()
+        cap.release()
+        if not args.sem_janela:
+            cv2.destroyAllWindows()
+        print("[INFO] Sistema encerrado corretamente.")